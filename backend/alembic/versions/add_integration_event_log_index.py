@@ -0,0 +1,29 @@
+"""Add composite index for paging through integration events
+
+Revision ID: add_integration_event_log_index
+Revises: partition_slack_messages
+Create Date: 2025-05-16 10:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_integration_event_log_index"
+down_revision = "partition_slack_messages"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Matches ORDER BY created_at DESC within an integration, so each page of
+    # the event log is an index range scan
+    op.create_index(
+        "ix_integrationevent_integration_id_created_at",
+        "integrationevent",
+        ["integration_id", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_integrationevent_integration_id_created_at", table_name="integrationevent")
@@ -0,0 +1,70 @@
+"""Add denormalised analysis counters to CrossResourceReport
+
+Revision ID: add_report_counters
+Revises: add_count_fields
+Create Date: 2025-05-02 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_report_counters"
+down_revision = "add_count_fields"
+branch_labels = None
+depends_on = None
+
+COUNTER_COLUMNS = [
+    "total_resources",
+    "pending_analyses",
+    "in_progress_analyses",
+    "completed_analyses",
+    "failed_analyses",
+]
+
+
+def upgrade():
+    # Add the counter columns to the CrossResourceReport table
+    for column in COUNTER_COLUMNS:
+        op.add_column(
+            "crossresourcereport",
+            sa.Column(column, sa.Integer(), server_default="0", nullable=False),
+        )
+    op.add_column(
+        "crossresourcereport",
+        sa.Column("resource_types", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+    # Backfill the counters from the existing analyses
+    op.execute("""
+        UPDATE crossresourcereport AS r
+        SET total_resources = s.total,
+            pending_analyses = s.pending,
+            in_progress_analyses = s.in_progress,
+            completed_analyses = s.completed,
+            failed_analyses = s.failed,
+            resource_types = s.resource_types
+        FROM (
+            SELECT
+                cross_resource_report_id,
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE status = 'PENDING') AS pending,
+                COUNT(*) FILTER (WHERE status = 'IN_PROGRESS') AS in_progress,
+                COUNT(*) FILTER (WHERE status = 'COMPLETED') AS completed,
+                COUNT(*) FILTER (WHERE status = 'FAILED') AS failed,
+                jsonb_agg(DISTINCT resource_type) AS resource_types
+            FROM resourceanalysis
+            GROUP BY cross_resource_report_id
+        ) AS s
+        WHERE s.cross_resource_report_id = r.id
+        """)
+
+
+def downgrade():
+    # Remove the counter columns from the CrossResourceReport table
+    op.drop_column("crossresourcereport", "resource_types")
+    for column in reversed(COUNTER_COLUMNS):
+        op.drop_column("crossresourcereport", column)
@@ -0,0 +1,30 @@
+"""Add LLM token usage to CrossResourceReport
+
+Revision ID: add_report_llm_tokens
+Revises: add_report_schedules
+Create Date: 2025-05-09 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_report_llm_tokens"
+down_revision = "add_report_schedules"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Add the token usage column used for report token budgets
+    op.add_column(
+        "crossresourcereport",
+        sa.Column("llm_tokens_used", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade():
+    # Remove the token usage column
+    op.drop_column("crossresourcereport", "llm_tokens_used")
@@ -0,0 +1,78 @@
+"""Add ReportSchedule table for recurring reports
+
+Revision ID: add_report_schedules
+Revises: add_report_counters
+Create Date: 2025-05-06 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_report_schedules"
+down_revision = "add_report_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    report_frequency = postgresql.ENUM("WEEKLY", "MONTHLY", name="reportfrequency")
+    report_frequency.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "reportschedule",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("team_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column(
+            "frequency",
+            postgresql.ENUM("WEEKLY", "MONTHLY", name="reportfrequency", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("created_by_user_id", sa.String(length=255), nullable=True),
+        sa.Column("channels", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "analysis_type",
+            postgresql.ENUM(
+                "CONTRIBUTION",
+                "TOPICS",
+                "SENTIMENT",
+                "ACTIVITY",
+                name="analysistype",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("include_threads", sa.Boolean(), nullable=False),
+        sa.Column("include_reactions", sa.Boolean(), nullable=False),
+        sa.Column("next_run_at", sa.DateTime(), nullable=False),
+        sa.Column("last_presync_at", sa.DateTime(), nullable=True),
+        sa.Column("last_run_at", sa.DateTime(), nullable=True),
+        sa.Column("last_report_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["team_id"], ["team.id"]),
+        sa.ForeignKeyConstraint(["last_report_id"], ["crossresourcereport.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_reportschedule_id"), "reportschedule", ["id"], unique=False)
+    op.create_index(op.f("ix_reportschedule_team_id"), "reportschedule", ["team_id"], unique=False)
+    op.create_index(
+        "ix_report_schedule_active_next_run",
+        "reportschedule",
+        ["is_active", "next_run_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_report_schedule_active_next_run", table_name="reportschedule")
+    op.drop_index(op.f("ix_reportschedule_team_id"), table_name="reportschedule")
+    op.drop_index(op.f("ix_reportschedule_id"), table_name="reportschedule")
+    op.drop_table("reportschedule")
+    postgresql.ENUM(name="reportfrequency").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,113 @@
+"""Add daily activity rollup tables for Slack channels and users
+
+Revision ID: add_slack_activity_rollups
+Revises: add_slack_message_keyset_index
+Create Date: 2025-05-11 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_slack_activity_rollups"
+down_revision = "add_slack_message_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def _count_columns(with_participants):
+    columns = [
+        sa.Column(name, sa.Integer(), server_default="0", nullable=False)
+        for name in ("message_count", "reply_count", "thread_count", "reaction_count")
+    ]
+    if with_participants:
+        columns.append(sa.Column("participant_count", sa.Integer(), server_default="0", nullable=False))
+    return columns
+
+
+def upgrade():
+    op.create_table(
+        "slackchanneldailyactivity",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("channel_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        *_count_columns(with_participants=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["channel_id"], ["slackchannel.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_slackchanneldailyactivity_channel_id_day",
+        "slackchanneldailyactivity",
+        ["channel_id", "day"],
+        unique=True,
+    )
+
+    op.create_table(
+        "slackuserdailyactivity",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("channel_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        *_count_columns(with_participants=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["channel_id"], ["slackchannel.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["slackuser.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_slackuserdailyactivity_channel_id_day_user_id",
+        "slackuserdailyactivity",
+        ["channel_id", "day", "user_id"],
+        unique=True,
+    )
+
+    # Backfill from existing messages; scripts/backfill_activity_rollups.py
+    # can rebuild any range later
+    op.execute("""
+        INSERT INTO slackchanneldailyactivity (
+            id, channel_id, day, message_count, reply_count, thread_count,
+            reaction_count, participant_count, created_at, updated_at, is_active
+        )
+        SELECT
+            gen_random_uuid(), channel_id, CAST(message_datetime AS DATE),
+            count(*),
+            count(*) FILTER (WHERE is_thread_reply),
+            count(*) FILTER (WHERE is_thread_parent),
+            coalesce(sum(reaction_count), 0),
+            count(DISTINCT user_id),
+            now(), now(), TRUE
+        FROM slackmessage
+        WHERE message_datetime IS NOT NULL
+        GROUP BY channel_id, CAST(message_datetime AS DATE)
+        """)
+    op.execute("""
+        INSERT INTO slackuserdailyactivity (
+            id, channel_id, user_id, day, message_count, reply_count, thread_count,
+            reaction_count, created_at, updated_at, is_active
+        )
+        SELECT
+            gen_random_uuid(), channel_id, user_id, CAST(message_datetime AS DATE),
+            count(*),
+            count(*) FILTER (WHERE is_thread_reply),
+            count(*) FILTER (WHERE is_thread_parent),
+            coalesce(sum(reaction_count), 0),
+            now(), now(), TRUE
+        FROM slackmessage
+        WHERE message_datetime IS NOT NULL AND user_id IS NOT NULL
+        GROUP BY channel_id, user_id, CAST(message_datetime AS DATE)
+        """)
+
+
+def downgrade():
+    op.drop_index("ix_slackuserdailyactivity_channel_id_day_user_id", table_name="slackuserdailyactivity")
+    op.drop_table("slackuserdailyactivity")
+    op.drop_index("ix_slackchanneldailyactivity_channel_id_day", table_name="slackchanneldailyactivity")
+    op.drop_table("slackchanneldailyactivity")
@@ -0,0 +1,29 @@
+"""Add composite index for keyset pagination of Slack messages
+
+Revision ID: add_slack_message_keyset_index
+Revises: add_report_llm_tokens
+Create Date: 2025-05-10 10:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_slack_message_keyset_index"
+down_revision = "add_report_llm_tokens"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Matches ORDER BY message_datetime DESC, id DESC within a channel, so each
+    # page is an index range scan starting at the cursor
+    op.create_index(
+        "ix_slackmessage_channel_id_datetime_id",
+        "slackmessage",
+        ["channel_id", "message_datetime", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_slackmessage_channel_id_datetime_id", table_name="slackmessage")
@@ -0,0 +1,41 @@
+"""Add pg_trgm GIN indexes for Slack message search
+
+Revision ID: add_slack_message_search_indexes
+Revises: add_slack_message_thread_indexes
+Create Date: 2025-05-13 10:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_slack_message_search_indexes"
+down_revision = "add_slack_message_thread_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Creating the extension needs a role allowed to do so (e.g. the database owner)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Serve ILIKE '%term%' on message text without word segmentation
+    op.create_index(
+        "ix_slackmessage_text_trgm",
+        "slackmessage",
+        ["text"],
+        postgresql_using="gin",
+        postgresql_ops={"text": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_slackmessage_processed_text_trgm",
+        "slackmessage",
+        ["processed_text"],
+        postgresql_using="gin",
+        postgresql_ops={"processed_text": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index("ix_slackmessage_processed_text_trgm", table_name="slackmessage")
+    op.drop_index("ix_slackmessage_text_trgm", table_name="slackmessage")
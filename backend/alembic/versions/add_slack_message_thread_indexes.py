@@ -0,0 +1,43 @@
+"""Add partial indexes for Slack thread parents and replies
+
+Revision ID: add_slack_message_thread_indexes
+Revises: add_slack_activity_rollups
+Create Date: 2025-05-12 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "add_slack_message_thread_indexes"
+down_revision = "add_slack_activity_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Channel + datetime range scans are served by
+    # ix_slackmessage_channel_id_datetime_id (add_slack_message_keyset_index)
+
+    # Thread parents of a channel, newest first (thread listing and thread sync)
+    op.create_index(
+        "ix_slackmessage_channel_id_thread_parents",
+        "slackmessage",
+        ["channel_id", "message_datetime"],
+        postgresql_where=sa.text("is_thread_parent IS true"),
+    )
+
+    # Replies of one thread in order
+    op.create_index(
+        "ix_slackmessage_channel_id_thread_ts_replies",
+        "slackmessage",
+        ["channel_id", "thread_ts", "message_datetime"],
+        postgresql_where=sa.text("is_thread_reply IS true"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_slackmessage_channel_id_thread_ts_replies", table_name="slackmessage")
+    op.drop_index("ix_slackmessage_channel_id_thread_parents", table_name="slackmessage")
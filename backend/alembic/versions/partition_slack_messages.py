@@ -0,0 +1,219 @@
+"""Partition slackmessage by month of message_datetime
+
+Revision ID: partition_slack_messages
+Revises: add_slack_message_search_indexes
+Create Date: 2025-05-14 10:00:00.000000
+
+The existing table is renamed, its rows are copied into a new table range
+partitioned by message_datetime (one partition per month plus a default
+partition) and the old table is dropped. Writes to slackmessage must be
+stopped while this runs; on large databases expect it to take as long as
+copying the table and rebuilding its indexes.
+
+Partitioned tables can't be referenced by foreign keys unless the key
+includes the partition column, so the foreign keys from
+slackreaction.message_id and slackmessage.parent_id are dropped and the
+primary key becomes (message_datetime, id).
+"""
+
+from datetime import date, datetime
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "partition_slack_messages"
+down_revision = "add_slack_message_search_indexes"
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created after the current month; the application keeps
+# creating them from then on (SLACK_MESSAGE_PARTITION_MONTHS_AHEAD)
+MONTHS_AHEAD = 3
+
+COLUMNS = [
+    "id",
+    "slack_id",
+    "slack_ts",
+    "text",
+    "processed_text",
+    "message_type",
+    "subtype",
+    "is_edited",
+    "edited_ts",
+    "has_attachments",
+    "attachments",
+    "files",
+    "thread_ts",
+    "is_thread_parent",
+    "is_thread_reply",
+    "reply_count",
+    "reply_users_count",
+    "reaction_count",
+    "message_datetime",
+    "is_analyzed",
+    "message_category",
+    "sentiment_score",
+    "analysis_data",
+    "channel_id",
+    "user_id",
+    "parent_id",
+    "created_at",
+    "updated_at",
+    "is_active",
+]
+
+
+INDEXES = [
+    "ix_slackmessage_id",
+    "ix_slackmessage_slack_id",
+    "ix_slackmessage_slack_ts",
+    "ix_slackmessage_thread_ts",
+    "ix_slackmessage_message_datetime",
+    "ix_slackmessage_channel_id_slack_ts",
+    "ix_slackmessage_user_id_slack_ts",
+    "ix_slackmessage_channel_id_datetime_id",
+    "ix_slackmessage_channel_id_thread_parents",
+    "ix_slackmessage_channel_id_thread_ts_replies",
+    "ix_slackmessage_text_trgm",
+    "ix_slackmessage_processed_text_trgm",
+]
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _message_table(name, primary_key, **kwargs):
+    op.create_table(
+        name,
+        sa.Column("slack_id", sa.String(length=255), nullable=False),
+        sa.Column("slack_ts", sa.String(length=50), nullable=False),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("processed_text", sa.Text(), nullable=True),
+        sa.Column("message_type", sa.String(length=50), nullable=False),
+        sa.Column("subtype", sa.String(length=50), nullable=True),
+        sa.Column("is_edited", sa.Boolean(), nullable=False),
+        sa.Column("edited_ts", sa.String(length=50), nullable=True),
+        sa.Column("has_attachments", sa.Boolean(), nullable=False),
+        sa.Column("attachments", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("files", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("thread_ts", sa.String(length=50), nullable=True),
+        sa.Column("is_thread_parent", sa.Boolean(), nullable=False),
+        sa.Column("is_thread_reply", sa.Boolean(), nullable=False),
+        sa.Column("reply_count", sa.Integer(), nullable=False),
+        sa.Column("reply_users_count", sa.Integer(), nullable=False),
+        sa.Column("reaction_count", sa.Integer(), nullable=False),
+        sa.Column("message_datetime", sa.DateTime(), nullable=False),
+        sa.Column("is_analyzed", sa.Boolean(), nullable=False),
+        sa.Column("message_category", sa.String(length=100), nullable=True),
+        sa.Column("sentiment_score", sa.Float(), nullable=True),
+        sa.Column("analysis_data", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("channel_id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=True),
+        sa.Column("parent_id", sa.UUID(), nullable=True),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["channel_id"], ["slackchannel.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["slackuser.id"]),
+        sa.PrimaryKeyConstraint(*primary_key, name="slackmessage_pkey"),
+        **kwargs,
+    )
+
+
+def _copy_and_drop(source):
+    columns = ", ".join(COLUMNS)
+    op.execute(f"INSERT INTO slackmessage ({columns}) SELECT {columns} FROM {source}")
+    op.drop_table(source)
+
+
+def _create_indexes():
+    op.create_index("ix_slackmessage_id", "slackmessage", ["id"])
+    op.create_index("ix_slackmessage_slack_id", "slackmessage", ["slack_id"])
+    op.create_index("ix_slackmessage_slack_ts", "slackmessage", ["slack_ts"])
+    op.create_index("ix_slackmessage_thread_ts", "slackmessage", ["thread_ts"])
+    op.create_index("ix_slackmessage_message_datetime", "slackmessage", ["message_datetime"])
+    op.create_index("ix_slackmessage_channel_id_slack_ts", "slackmessage", ["channel_id", "slack_ts"])
+    op.create_index("ix_slackmessage_user_id_slack_ts", "slackmessage", ["user_id", "slack_ts"])
+    op.create_index("ix_slackmessage_channel_id_datetime_id", "slackmessage", ["channel_id", "message_datetime", "id"])
+    op.create_index(
+        "ix_slackmessage_channel_id_thread_parents",
+        "slackmessage",
+        ["channel_id", "message_datetime"],
+        postgresql_where=sa.text("is_thread_parent IS true"),
+    )
+    op.create_index(
+        "ix_slackmessage_channel_id_thread_ts_replies",
+        "slackmessage",
+        ["channel_id", "thread_ts", "message_datetime"],
+        postgresql_where=sa.text("is_thread_reply IS true"),
+    )
+    op.create_index(
+        "ix_slackmessage_text_trgm",
+        "slackmessage",
+        ["text"],
+        postgresql_using="gin",
+        postgresql_ops={"text": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_slackmessage_processed_text_trgm",
+        "slackmessage",
+        ["processed_text"],
+        postgresql_using="gin",
+        postgresql_ops={"processed_text": "gin_trgm_ops"},
+    )
+
+
+def upgrade():
+    op.drop_constraint("slackreaction_message_id_fkey", "slackreaction", type_="foreignkey")
+    op.drop_constraint("slackmessage_parent_id_fkey", "slackmessage", type_="foreignkey")
+
+    # Free the table and index names for the partitioned table
+    op.rename_table("slackmessage", "slackmessage_unpartitioned")
+    op.execute("ALTER INDEX slackmessage_pkey RENAME TO slackmessage_unpartitioned_pkey")
+    for index in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    _message_table(
+        "slackmessage",
+        ["message_datetime", "id"],
+        postgresql_partition_by="RANGE (message_datetime)",
+    )
+    op.execute("CREATE TABLE slackmessage_default PARTITION OF slackmessage DEFAULT")
+
+    # One partition per month from the oldest message through the coming months
+    oldest = op.get_bind().execute(sa.text("SELECT min(message_datetime) FROM slackmessage_unpartitioned")).scalar()
+    current = date(datetime.utcnow().year, datetime.utcnow().month, 1)
+    month = date(oldest.year, oldest.month, 1) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE slackmessage_{month.year:04d}_{month.month:02d} PARTITION OF slackmessage "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    # Indexes are built after the copy, which is faster than maintaining them row by row
+    _copy_and_drop("slackmessage_unpartitioned")
+    _create_indexes()
+    op.execute("ANALYZE slackmessage")
+
+
+def downgrade():
+    op.rename_table("slackmessage", "slackmessage_partitioned")
+    op.execute("ALTER INDEX slackmessage_pkey RENAME TO slackmessage_partitioned_pkey")
+    for index in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    _message_table("slackmessage", ["id"])
+
+    # Dropping the partitioned table drops all of its partitions
+    _copy_and_drop("slackmessage_partitioned")
+    _create_indexes()
+
+    op.create_foreign_key("slackmessage_parent_id_fkey", "slackmessage", "slackmessage", ["parent_id"], ["id"])
+    op.create_foreign_key("slackreaction_message_id_fkey", "slackreaction", "slackmessage", ["message_id"], ["id"])
@@ -10,7 +10,8 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from sqlalchemy import func, select
+from sqlalchemy import func, inspect, select
+from sqlalchemy.exc import NoInspectionAvailable
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -18,6 +19,7 @@ from app.api.v1.integration.schemas import (
     AnalysisOptions,
     ChannelSelectionRequest,
     IntegrationCreate,
+    IntegrationEventResponse,
     IntegrationResponse,
     IntegrationShareCreate,
     IntegrationShareResponse,
@@ -56,10 +58,15 @@ from app.models.reports import (
 from app.models.slack import SlackChannel, SlackWorkspace
 
 # Legacy SlackChannelAnalysis import removed
-from app.services.integration.base import IntegrationService
+from app.services.integration.base import (
+    RESPONSE_RELATIONSHIPS,
+    IntegrationService,
+    relationship_options,
+)
 from app.services.integration.slack import SlackIntegrationService
 from app.services.llm.analysis_store import AnalysisStoreService
 from app.services.llm.openrouter import OpenRouterService
+from app.services.reports.counters import add_analyses_to_report
 from app.services.slack.api import SlackApiError
 from app.services.slack.channels import ChannelService
 from app.services.slack.messages import (
@@ -89,6 +96,26 @@ def convert_resource_to_response(resource: ServiceResource) -> Dict:
     }
 
 
+def is_loaded(instance, name: str) -> bool:
+    """Check whether a relationship can be read without a lazy load, which fails in an async session."""
+    try:
+        return name not in inspect(instance).unloaded
+    except NoInspectionAvailable:
+        return hasattr(instance, name)
+
+
+def response_relationships(include_credentials: bool, include_resources: bool, include_details: bool) -> List[str]:
+    """Get the relationships to load for an integration response with the requested parts."""
+    relationships = ["owner_team"]
+    if include_credentials:
+        relationships.append("credentials")
+    if include_resources:
+        relationships.append("resources")
+    if include_details:
+        relationships.append("shared_with")
+    return relationships
+
+
 def prepare_integration_response(integration) -> IntegrationResponse:
     """
     Converts an Integration model to an IntegrationResponse schema.
@@ -96,7 +123,7 @@ def prepare_integration_response(integration) -> IntegrationResponse:
     """
     # Create the owner_team object
     # Make sure owner_team is loaded to prevent MissingGreenlet errors in async context
-    if hasattr(integration, "owner_team") and integration.owner_team is not None:
+    if is_loaded(integration, "owner_team") and integration.owner_team is not None:
         owner_team = TeamInfo(
             id=integration.owner_team.id,
             name=integration.owner_team.name,
@@ -142,7 +169,7 @@ def prepare_integration_response(integration) -> IntegrationResponse:
 
     # Convert credentials to the proper format
     credentials_list = []
-    if hasattr(integration, "credentials") and integration.credentials:
+    if is_loaded(integration, "credentials") and integration.credentials:
         for credential in integration.credentials:
             credentials_list.append(
                 {
@@ -160,16 +187,16 @@ def prepare_integration_response(integration) -> IntegrationResponse:
 
     # Convert resources to the proper format
     resource_list = []
-    if hasattr(integration, "resources") and integration.resources:
+    if is_loaded(integration, "resources") and integration.resources:
         resource_list = [convert_resource_to_response(resource) for resource in integration.resources]
 
     # Convert shared_with to the proper format
     shares_list = []
-    if hasattr(integration, "shared_with") and integration.shared_with:
+    if is_loaded(integration, "shared_with") and integration.shared_with:
         for share in integration.shared_with:
             # Create the team info object for this share
             # Check if team relationship is loaded
-            if hasattr(share, "team") and share.team:
+            if is_loaded(share, "team") and share.team:
                 team_info = TeamInfo(
                     id=share.team.id,
                     name=share.team.name,
@@ -265,6 +292,7 @@ async def get_integrations(
             team_id=team_id,
             include_shared=include_shared,
             service_type=service_type.value if service_type else None,
+            relationships=response_relationships(include_credentials, include_resources, include_details),
         )
     else:
         # Get all teams the user has access to
@@ -346,13 +374,7 @@ async def create_integration(
     stmt = (
         select(Integration)
         .where(Integration.id == new_integration.id)
-        .options(
-            selectinload(Integration.owner_team),
-            selectinload(Integration.credentials),
-            selectinload(Integration.shared_with),
-            selectinload(Integration.resources),
-            selectinload(Integration.events),
-        )
+        .options(*relationship_options(RESPONSE_RELATIONSHIPS))
     )
     result = await db.execute(stmt)
     loaded_integration = result.scalar_one_or_none() or new_integration
@@ -510,11 +532,12 @@ async def get_integration(
     Returns:
         Integration details
     """
-    # Get the integration
+    # Get the integration with the parts of the response that were requested
     integration = await IntegrationService.get_integration(
         db=db,
         integration_id=integration_id,
         user_id=current_user["id"],
+        relationships=response_relationships(include_credentials, include_resources, include_details),
     )
 
     if not integration:
@@ -626,6 +649,8 @@ async def update_integration(
 async def get_integration_resources(
     integration_id: uuid.UUID,
     resource_type: Optional[List[str]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of resources, all if not set"),
+    offset: int = Query(0, ge=0, description="Number of resources to skip"),
     db: AsyncSession = Depends(get_async_db),
     current_user: Dict = Depends(get_current_user),
 ):
@@ -635,6 +660,8 @@ async def get_integration_resources(
     Args:
         integration_id: UUID of the integration
         resource_type: Optional resource types to filter by
+        limit: Maximum number of resources to return, all if not set
+        offset: Number of resources to skip
         db: Database session
         current_user: Current authenticated user
 
@@ -659,6 +686,8 @@ async def get_integration_resources(
         db=db,
         integration_id=integration_id,
         resource_types=resource_type,
+        limit=limit,
+        offset=offset,
     )
 
     # Convert SQLAlchemy model objects to Pydantic schema objects with basic info
@@ -680,115 +709,105 @@ async def get_integration_resources(
             workspace = workspace_result.scalars().first()
 
             if workspace:
-                # Try to get selected channels from SlackChannel table
-                selected_channels_result = await db.execute(
-                    select(SlackChannel.slack_id).where(
-                        SlackChannel.workspace_id == workspace.id,
-                        SlackChannel.is_selected_for_analysis.is_(True),
+                channel_resources = [
+                    resource
+                    for resource in response_resources
+                    if resource["resource_type"] == ResourceType.SLACK_CHANNEL
+                ]
+                channel_ids = [resource["external_id"] for resource in channel_resources]
+
+                # Selection and bot state of all the channels on this page in one query
+                channel_states = await ChannelService.get_channel_states(db, workspace.id, channel_ids)
+
+                # Channels listed as resources may not have a SlackChannel record yet
+                if len(channel_states) < len(set(channel_ids)):
+                    created_count = await ChannelService.create_channels_from_resources(
+                        db, workspace.id, integration_id
                     )
-                )
-                selected_channels = [row[0] for row in selected_channels_result.fetchall()]
-                logger.debug(
-                    f"Found {len(selected_channels)} selected channels in SlackChannel table for workspace {workspace.id}"
-                )
-
-                # If we don't have any selected channels, check if we need to populate data
-                if not selected_channels:
-                    # Count how many SlackChannel records exist for this workspace
-                    channel_count_result = await db.execute(
-                        select(func.count()).where(SlackChannel.workspace_id == workspace.id)
-                    )
-                    channel_count = channel_count_result.scalar_one_or_none() or 0
-
-                    if channel_count == 0:
+                    if created_count > 0:
                         logger.info(
-                            f"No SlackChannel records found for workspace {workspace.id}. Creating from ServiceResource..."
+                            f"Created {created_count} SlackChannel records from resources for workspace {workspace.id}"
                         )
-
-                        # Get all resources for this integration
-                        channel_resources_result = await db.execute(
-                            select(ServiceResource).where(
-                                ServiceResource.integration_id == integration_id,
-                                ServiceResource.resource_type == ResourceType.SLACK_CHANNEL,
-                            )
-                        )
-                        channel_resources = channel_resources_result.scalars().all()
-
-                        # Create SlackChannel records from ServiceResource records
-                        created_count = 0
-                        for resource in channel_resources:
-                            metadata = resource.resource_metadata or {}
-
-                            # Create a new SlackChannel record
-                            new_channel = SlackChannel(
-                                id=resource.id,  # Use the same ID as the resource
-                                workspace_id=workspace.id,
-                                slack_id=resource.external_id,
-                                name=resource.name.lstrip("#"),  # Remove the # prefix if present
-                                type=metadata.get("type", "public"),
-                                is_selected_for_analysis=False,  # Default to not selected
-                                is_supported=True,
-                                purpose=metadata.get("purpose", ""),
-                                topic=metadata.get("topic", ""),
-                                member_count=metadata.get("member_count", 0),
-                                is_archived=metadata.get("is_archived", False),
-                                last_sync_at=resource.last_synced_at,
-                            )
-                            db.add(new_channel)
-                            created_count += 1
-
-                        logger.info(f"Created {created_count} new SlackChannel records from resources")
-                        if created_count > 0:
-                            await db.commit()
-
-                            # Re-query for selected channels just in case any were already selected
-                            selected_channels_result = await db.execute(
-                                select(SlackChannel.slack_id).where(
-                                    SlackChannel.workspace_id == workspace.id,
-                                    SlackChannel.is_selected_for_analysis.is_(True),
-                                )
-                            )
-                            selected_channels = [row[0] for row in selected_channels_result.fetchall()]
-                            logger.info(
-                                f"After migration, found {len(selected_channels)} selected channels in workspace {workspace.id}"
-                            )
+                        await db.commit()
+                        channel_states = await ChannelService.get_channel_states(db, workspace.id, channel_ids)
 
                 # Update the response resources with selection status
-                for resource in response_resources:
-                    if resource["resource_type"] == ResourceType.SLACK_CHANNEL:
-                        # Ensure metadata dictionary exists
-                        if "metadata" not in resource or resource["metadata"] is None:
-                            resource["metadata"] = {}
-
-                        # Set selection status based on whether the channel is in our list
-                        external_id = resource.get("external_id")
-                        is_selected = external_id in selected_channels
-
-                        # Add at both top level and in metadata for backward compatibility
-                        resource["metadata"]["is_selected_for_analysis"] = is_selected
-                        resource["is_selected_for_analysis"] = is_selected
-
-                        # Get the channel record to check if the bot is in the channel
-                        channel_record_result = await db.execute(
-                            select(SlackChannel).where(
-                                SlackChannel.workspace_id == workspace.id,
-                                SlackChannel.slack_id == external_id,
-                            )
-                        )
-                        channel_record = channel_record_result.scalars().first()
-                        has_bot = channel_record.has_bot if channel_record else False
+                for resource in channel_resources:
+                    # Ensure metadata dictionary exists
+                    if "metadata" not in resource or resource["metadata"] is None:
+                        resource["metadata"] = {}
 
-                        # Add has_bot at both top level and in metadata for consistency
-                        resource["metadata"]["has_bot"] = has_bot
-                        resource["has_bot"] = has_bot
+                    is_selected, has_bot = channel_states.get(resource["external_id"], (False, False))
 
-                        # logger.debug(
-                        #    f"Channel {resource['name']} (id={external_id}): is_selected_for_analysis={is_selected}, has_bot={has_bot}"
-                        # )
+                    # Add at both top level and in metadata for backward compatibility
+                    resource["metadata"]["is_selected_for_analysis"] = is_selected
+                    resource["is_selected_for_analysis"] = is_selected
+
+                    # Add has_bot at both top level and in metadata for consistency
+                    resource["metadata"]["has_bot"] = has_bot
+                    resource["has_bot"] = has_bot
 
     return response_resources
 
 
+@router.get("/{integration_id}/events", response_model=List[IntegrationEventResponse])
+async def get_integration_events(
+    integration_id: uuid.UUID,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of events"),
+    offset: int = Query(0, ge=0, description="Number of events to skip"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict = Depends(get_current_user),
+):
+    """
+    Get the event log of an integration, newest first.
+
+    Args:
+        integration_id: UUID of the integration
+        limit: Maximum number of events to return
+        offset: Number of events to skip
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        List of events
+    """
+    integration = await IntegrationService.get_integration(
+        db=db,
+        integration_id=integration_id,
+        user_id=current_user["id"],
+    )
+
+    if not integration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Integration not found",
+        )
+
+    events = await IntegrationService.get_integration_events(
+        db=db,
+        integration_id=integration_id,
+        limit=limit,
+        offset=offset,
+    )
+
+    return [
+        IntegrationEventResponse(
+            id=event.id,
+            integration_id=event.integration_id,
+            event_type=event.event_type.value,
+            details=event.details,
+            actor=UserInfo(id=event.actor_user_id),
+            affected_team=(
+                TeamInfo(id=event.affected_team.id, name=event.affected_team.name, slug=event.affected_team.slug)
+                if event.affected_team
+                else None
+            ),
+            created_at=event.created_at,
+        )
+        for event in events
+    ]
+
+
 @router.post("/{integration_id}/sync", response_model=Dict)
 async def sync_integration_resources(
     integration_id: uuid.UUID,
@@ -1955,6 +1974,7 @@ async def analyze_integration_resource(
             )
 
             db.add(resource_analysis)
+            add_analyses_to_report(cross_report, [resource_analysis])
             await db.commit()
             logger.info(
                 f"Stored analysis in ResourceAnalysis table with ID: {analysis_uuid}, linked to report: {report_uuid}"
@@ -2,11 +2,11 @@
 
 import logging
 from datetime import timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
-from sqlalchemy import and_, case, desc, func, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response, status
+from sqlalchemy import and_, desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -24,8 +24,9 @@ from app.api.v1.reports.schemas import (
     WorkspaceIdResponse,
 )
 from app.core.auth import get_current_user
+from app.core.etag import REVALIDATE, analysis_cache_control, etag_matches, make_etag
 from app.core.team_scoped_access import check_team_access
-from app.db.session import get_async_db
+from app.db.session import get_async_db, get_read_db
 from app.models.integration import Integration
 from app.models.reports import (
     AnalysisResourceType,
@@ -36,6 +37,13 @@ from app.models.reports import (
 )
 from app.models.slack import SlackWorkspace
 from app.models.team import Team, TeamMemberRole
+from app.services.reports.content import (
+    analysis_response_data,
+    defer_analysis_content,
+    defer_report_content,
+    loaded_attributes,
+)
+from app.services.reports.counters import add_analyses_to_report, transition_analysis_status
 from app.services.slack.utils import get_channel_message_stats
 
 logger = logging.getLogger(__name__)
@@ -50,7 +58,8 @@ router = APIRouter()
 async def get_team_reports(
     team_id: UUID = Path(..., description="Team ID"),
     filter_params: ReportFilterParams = Depends(),
-    db: AsyncSession = Depends(get_async_db),
+    include_content: bool = Query(False, description="Include the comprehensive analysis text of each report"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Dict = Depends(get_current_user),
 ):
     """
@@ -59,6 +68,7 @@ async def get_team_reports(
     Args:
         team_id: Team ID
         filter_params: Filter parameters
+        include_content: Whether to load the comprehensive analysis text (null otherwise)
         db: Database session
         current_user: Current authenticated user
 
@@ -78,6 +88,8 @@ async def get_team_reports(
 
     # Build the query
     query = select(CrossResourceReport).where(CrossResourceReport.team_id == team_id)
+    if not include_content:
+        query = query.options(*defer_report_content())
 
     # Apply filters
     if filter_params.status:
@@ -110,51 +122,29 @@ async def get_team_reports(
     else:
         query = query.order_by(getattr(CrossResourceReport, filter_params.sort_by))
 
-    # Get total count before applying pagination
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total_count = total_result.scalar_one()
-
-    # Apply pagination
+    # Fetch the page and the total count in one round-trip: the window count is
+    # computed over all filtered rows before OFFSET/LIMIT are applied
     offset = (filter_params.page - 1) * filter_params.page_size
-    query = query.offset(offset).limit(filter_params.page_size)
-
-    # Execute the query
-    result = await db.execute(query)
-    reports = result.scalars().all()
-
-    # Fetch summary statistics for each report
-    report_responses = []
-    for report in reports:
-        # Convert to response model
-        report_dict = report.__dict__.copy()
-
-        # Add resource analysis summary statistics
-        analysis_stats = await db.execute(
-            select(
-                func.count().label("total"),
-                func.sum(case((ResourceAnalysis.status == ReportStatus.COMPLETED, 1), else_=0)).label("completed"),
-                func.sum(case((ResourceAnalysis.status == ReportStatus.PENDING, 1), else_=0)).label("pending"),
-                func.sum(case((ResourceAnalysis.status == ReportStatus.FAILED, 1), else_=0)).label("failed"),
-            ).where(ResourceAnalysis.cross_resource_report_id == report.id)
-        )
-        stats = analysis_stats.one()
-
-        # Get types of resources
-        resource_types_query = await db.execute(
-            select(ResourceAnalysis.resource_type)
-            .distinct()
-            .where(ResourceAnalysis.cross_resource_report_id == report.id)
-        )
-        resource_types = [rt[0] for rt in resource_types_query.all()]
+    page_query = (
+        query.add_columns(func.count().over().label("total_count")).offset(offset).limit(filter_params.page_size)
+    )
 
-        report_dict["total_resources"] = stats.total
-        report_dict["completed_analyses"] = stats.completed
-        report_dict["pending_analyses"] = stats.pending
-        report_dict["failed_analyses"] = stats.failed
-        report_dict["resource_types"] = resource_types
+    result = await db.execute(page_query)
+    rows = result.all()
+    reports = [row[0] for row in rows]
+
+    if rows:
+        total_count = rows[0].total_count
+    elif filter_params.page > 1:
+        # Past the last page there is no row to carry the total, so count separately
+        count_query = select(func.count()).select_from(query.subquery())
+        total_result = await db.execute(count_query)
+        total_count = total_result.scalar_one()
+    else:
+        total_count = 0
 
-        report_responses.append(report_dict)
+    # Summary statistics are denormalised on the report row, so no per-report queries are needed
+    report_responses = [loaded_attributes(report) for report in reports]
 
     # Return paginated response
     return PaginatedResponse.create(
@@ -224,6 +214,7 @@ async def create_team_report(
     await db.flush()
 
     # If resource analyses were provided, create them
+    new_analyses = []
     if report.resource_analyses:
         for analysis_data in report.resource_analyses:
             # Convert enum values to the internal enum classes
@@ -243,38 +234,16 @@ async def create_team_report(
                 analysis_parameters=analysis_data.analysis_parameters,
             )
             db.add(analysis)
+            new_analyses.append(analysis)
+
+    # Initialise the report's summary counters
+    add_analyses_to_report(new_report, new_analyses)
 
     await db.commit()
     await db.refresh(new_report)
 
-    # Add summary statistics for the response
-    analysis_stats = await db.execute(
-        select(
-            func.count().label("total"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.COMPLETED, 1), else_=0)).label("completed"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.PENDING, 1), else_=0)).label("pending"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.FAILED, 1), else_=0)).label("failed"),
-        ).where(ResourceAnalysis.cross_resource_report_id == new_report.id)
-    )
-    stats = analysis_stats.one()
-
-    # Get types of resources
-    resource_types_query = await db.execute(
-        select(ResourceAnalysis.resource_type)
-        .distinct()
-        .where(ResourceAnalysis.cross_resource_report_id == new_report.id)
-    )
-    resource_types = [rt[0] for rt in resource_types_query.all()]
-
     # Prepare the response
-    response_dict = new_report.__dict__.copy()
-    response_dict["total_resources"] = stats.total
-    response_dict["completed_analyses"] = stats.completed
-    response_dict["pending_analyses"] = stats.pending
-    response_dict["failed_analyses"] = stats.failed
-    response_dict["resource_types"] = resource_types
-
-    return response_dict
+    return new_report.__dict__.copy()
 
 
 @router.get(
@@ -284,22 +253,33 @@ async def create_team_report(
 async def get_team_report(
     team_id: UUID,
     report_id: UUID,
+    response: Response,
     include_analyses: bool = Query(False, description="Include resource analyses in response"),
-    db: AsyncSession = Depends(get_async_db),
+    include_content: bool = Query(
+        True, description="Include the generated analysis text (false for status checks and summaries)"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Dict = Depends(get_current_user),
 ):
     """
     Get details of a specific cross-resource report.
 
+    The response carries an ETag; a request whose If-None-Match still matches
+    it gets an empty 304 without the report being loaded.
+
     Args:
         team_id: Team ID
         report_id: Report ID
+        response: Response whose headers are set
         include_analyses: Whether to include resource analyses in the response
+        include_content: Whether to load the generated analysis text of the report and its analyses
+        if_none_match: ETags of the client's cached copies
         db: Database session
         current_user: Current authenticated user
 
     Returns:
-        Report details
+        Report details, or an empty 304 response if the client's copy is current
     """
     logger.debug(f"Getting report {report_id} for team {team_id}, user {current_user['id']}")
 
@@ -312,6 +292,51 @@ async def get_team_report(
             detail="You don't have access to this team",
         )
 
+    # The report's version and message statistics in one small query. The
+    # analyses' updated_at covers changes to analyses that don't touch the report.
+    version_result = await db.execute(
+        select(
+            CrossResourceReport.updated_at,
+            CrossResourceReport.status,
+            func.max(ResourceAnalysis.updated_at).label("analyses_updated_at"),
+            func.count(ResourceAnalysis.id).label("analysis_count"),
+            func.sum(ResourceAnalysis.message_count).label("total_messages"),
+            func.sum(ResourceAnalysis.participant_count).label("total_participants"),
+            func.sum(ResourceAnalysis.thread_count).label("total_threads"),
+            func.sum(ResourceAnalysis.reaction_count).label("total_reactions"),
+        )
+        .outerjoin(ResourceAnalysis, ResourceAnalysis.cross_resource_report_id == CrossResourceReport.id)
+        .where(
+            and_(
+                CrossResourceReport.id == report_id,
+                CrossResourceReport.team_id == team_id,
+            )
+        )
+        .group_by(CrossResourceReport.id)
+    )
+    stats = version_result.one_or_none()
+
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report not found",
+        )
+
+    etag = make_etag(
+        "report",
+        report_id,
+        stats.updated_at,
+        stats.status,
+        stats.analyses_updated_at,
+        stats.analysis_count,
+        include_analyses,
+        include_content,
+    )
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
     # Build the query
     query = select(CrossResourceReport).where(
         and_(
@@ -320,11 +345,15 @@ async def get_team_report(
         )
     )
 
+    if not include_content:
+        query = query.options(*defer_report_content())
+
     # Include resource analyses if requested
     if include_analyses:
-        query = query.options(
-            selectinload(CrossResourceReport.resource_analyses).joinedload(ResourceAnalysis.integration)
-        )
+        analyses_loader = selectinload(CrossResourceReport.resource_analyses)
+        if not include_content:
+            analyses_loader = analyses_loader.options(*defer_analysis_content())
+        query = query.options(analyses_loader.joinedload(ResourceAnalysis.integration))
 
     # Execute the query
     result = await db.execute(query)
@@ -336,37 +365,10 @@ async def get_team_report(
             detail="Report not found",
         )
 
-    # Add summary statistics
-    analysis_stats = await db.execute(
-        select(
-            func.count().label("total"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.COMPLETED, 1), else_=0)).label("completed"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.PENDING, 1), else_=0)).label("pending"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.FAILED, 1), else_=0)).label("failed"),
-            # Add aggregated message statistics
-            func.sum(ResourceAnalysis.message_count).label("total_messages"),
-            func.sum(ResourceAnalysis.participant_count).label("total_participants"),
-            func.sum(ResourceAnalysis.thread_count).label("total_threads"),
-            func.sum(ResourceAnalysis.reaction_count).label("total_reactions"),
-        ).where(ResourceAnalysis.cross_resource_report_id == report.id)
-    )
-    stats = analysis_stats.one()
-
-    # Get types of resources
-    resource_types_query = await db.execute(
-        select(ResourceAnalysis.resource_type).distinct().where(ResourceAnalysis.cross_resource_report_id == report.id)
-    )
-    resource_types = [rt[0] for rt in resource_types_query.all()]
-
     # Prepare the response
-    response_dict = report.__dict__.copy()
-    response_dict["total_resources"] = stats.total
-    response_dict["completed_analyses"] = stats.completed
-    response_dict["pending_analyses"] = stats.pending
-    response_dict["failed_analyses"] = stats.failed
-    response_dict["resource_types"] = resource_types
+    response_dict = loaded_attributes(report)
 
-    # Include aggregated statistics in the response
+    # Include the aggregated message statistics; status counters are already on the report row
     response_dict["total_messages"] = stats.total_messages or 0
     response_dict["total_participants"] = stats.total_participants or 0
     response_dict["total_threads"] = stats.total_threads or 0
@@ -400,6 +402,9 @@ async def get_team_report(
                     if workspace_id in workspace_uuid_map:
                         setattr(analysis, "_workspace_uuid", workspace_uuid_map[workspace_id])
 
+        # Built from the loaded columns, so deferred content is returned as null
+        response_dict["resource_analyses"] = [analysis_response_data(analysis) for analysis in report.resource_analyses]
+
     return response_dict
 
 
@@ -475,14 +480,9 @@ async def update_team_report(
     await db.commit()
     await db.refresh(report)
 
-    # Add summary statistics for the response
+    # Add aggregated message statistics; status counters are already on the report row
     analysis_stats = await db.execute(
         select(
-            func.count().label("total"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.COMPLETED, 1), else_=0)).label("completed"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.PENDING, 1), else_=0)).label("pending"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.FAILED, 1), else_=0)).label("failed"),
-            # Add aggregated message statistics
             func.sum(ResourceAnalysis.message_count).label("total_messages"),
             func.sum(ResourceAnalysis.participant_count).label("total_participants"),
             func.sum(ResourceAnalysis.thread_count).label("total_threads"),
@@ -491,19 +491,8 @@ async def update_team_report(
     )
     stats = analysis_stats.one()
 
-    # Get types of resources
-    resource_types_query = await db.execute(
-        select(ResourceAnalysis.resource_type).distinct().where(ResourceAnalysis.cross_resource_report_id == report.id)
-    )
-    resource_types = [rt[0] for rt in resource_types_query.all()]
-
     # Prepare the response
     response_dict = report.__dict__.copy()
-    response_dict["total_resources"] = stats.total
-    response_dict["completed_analyses"] = stats.completed
-    response_dict["pending_analyses"] = stats.pending
-    response_dict["failed_analyses"] = stats.failed
-    response_dict["resource_types"] = resource_types
     # Include aggregated statistics in the response
     response_dict["total_messages"] = stats.total_messages or 0
     response_dict["total_participants"] = stats.total_participants or 0
@@ -676,7 +665,7 @@ async def get_resource_analyses(
     team_id: UUID,
     report_id: UUID,
     filter_params: ResourceAnalysisFilterParams = Depends(),
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Dict = Depends(get_current_user),
 ):
     """
@@ -722,6 +711,8 @@ async def get_resource_analyses(
 
     # Build the query
     query = select(ResourceAnalysis).where(ResourceAnalysis.cross_resource_report_id == report_id)
+    if not filter_params.include_content:
+        query = query.options(*defer_analysis_content())
 
     # Apply filters
     if filter_params.status:
@@ -741,7 +732,7 @@ async def get_resource_analyses(
     result = await db.execute(query)
     analyses = result.scalars().all()
 
-    return analyses
+    return [analysis_response_data(analysis) for analysis in analyses]
 
 
 @router.get(
@@ -752,21 +743,29 @@ async def get_resource_analysis(
     team_id: UUID,
     report_id: UUID,
     analysis_id: UUID,
-    db: AsyncSession = Depends(get_async_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Dict = Depends(get_current_user),
 ):
     """
     Get details of a specific resource analysis.
 
+    The response carries an ETag; a request whose If-None-Match still matches
+    it gets an empty 304 without the analysis being loaded. Completed analyses
+    don't change again and may be reused by the client without asking.
+
     Args:
         team_id: Team ID
         report_id: Report ID
         analysis_id: Analysis ID
+        response: Response whose headers are set
+        if_none_match: ETags of the client's cached copies
         db: Database session
         current_user: Current authenticated user
 
     Returns:
-        Resource analysis details
+        Resource analysis details, or an empty 304 response if the client's copy is current
     """
     logger.debug(f"Getting analysis {analysis_id} for report {report_id}, team {team_id}, user {current_user['id']}")
 
@@ -779,22 +778,41 @@ async def get_resource_analysis(
             detail="You don't have access to this team",
         )
 
-    # Verify the report exists and belongs to the team
-    report_result = await db.execute(
-        select(CrossResourceReport).where(
+    # The analysis' version, found only if it belongs to the report and the report to the team
+    version_result = await db.execute(
+        select(ResourceAnalysis.updated_at, ResourceAnalysis.status)
+        .join(CrossResourceReport, CrossResourceReport.id == ResourceAnalysis.cross_resource_report_id)
+        .where(
             and_(
-                CrossResourceReport.id == report_id,
+                ResourceAnalysis.id == analysis_id,
+                ResourceAnalysis.cross_resource_report_id == report_id,
                 CrossResourceReport.team_id == team_id,
             )
         )
     )
-    report = report_result.scalar_one_or_none()
-
-    if not report:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Report not found",
+    version = version_result.one_or_none()
+
+    if version:
+        etag = make_etag("analysis", analysis_id, version.updated_at, version.status)
+        headers = {"ETag": etag, "Cache-Control": analysis_cache_control(version.status)}
+        if etag_matches(etag, if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+    else:
+        # Tell a missing report apart from a missing analysis
+        report_result = await db.execute(
+            select(CrossResourceReport.id).where(
+                and_(
+                    CrossResourceReport.id == report_id,
+                    CrossResourceReport.team_id == team_id,
+                )
+            )
         )
+        if report_result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report not found",
+            )
 
     # Get the analysis
     analysis_result = await db.execute(
@@ -897,10 +915,42 @@ async def get_resource_analysis_task_status(
         "database_status": analysis.status,
         "task_status": task_status,
         "is_running": task_status == "RUNNING",
+        "is_queued": task_status == "QUEUED",
         "last_updated": (analysis.updated_at.isoformat() if analysis.updated_at else None),
     }
 
 
+@router.get("/{team_id}/analysis-queue")
+async def get_team_analysis_queue(
+    team_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict = Depends(get_current_user),
+):
+    """
+    Get the analysis queue and wait-time metrics for a team.
+
+    Args:
+        team_id: Team ID
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Queue depth, running count and wait-time statistics for the team
+    """
+    # Check if user has access to this team
+    has_access = await check_team_access(team_id=team_id, user_id=current_user["id"], db=db)
+
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this team",
+        )
+
+    from app.services.analysis.fair_scheduler import FairShareScheduler
+
+    return FairShareScheduler.get_team_metrics(team_id)
+
+
 @router.post(
     "/{team_id}/cross-resource-reports/{report_id}/generate",
     response_model=ReportGenerationResponse,
@@ -998,10 +1048,10 @@ async def generate_report(
             message="Report generation started. Resource analyses will be processed in the background.",
         )
     else:
-        # If analyses already exist, just update their status
+        # If analyses already exist, reset failed ones so they are picked up again
         for analysis in report.resource_analyses:
-            if analysis.status == ReportStatus.PENDING or analysis.status == ReportStatus.FAILED:
-                analysis.status = ReportStatus.PENDING
+            if analysis.status == ReportStatus.FAILED:
+                await transition_analysis_status(db, analysis.id, ReportStatus.PENDING)
 
         response = ReportGenerationResponse(
             report_id=report_id,
@@ -1191,6 +1241,9 @@ async def create_channel_report(
         db.add(analysis)
         resource_analyses.append(analysis)
 
+    # Initialise the report's summary counters
+    add_analyses_to_report(new_report, resource_analyses)
+
     # Commit all changes
     await db.commit()
     await db.refresh(new_report)
@@ -1208,11 +1261,7 @@ async def create_channel_report(
     # Get summary statistics for the response
     analysis_stats = await db.execute(
         select(
-            func.count().label("total"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.COMPLETED, 1), else_=0)).label("completed"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.PENDING, 1), else_=0)).label("pending"),
-            func.sum(case((ResourceAnalysis.status == ReportStatus.FAILED, 1), else_=0)).label("failed"),
-            # Add aggregated stats across all channels
+            # Aggregated stats across all channels
             func.sum(ResourceAnalysis.message_count).label("total_messages"),
             func.sum(ResourceAnalysis.participant_count).label("total_participants"),
             func.sum(ResourceAnalysis.thread_count).label("total_threads"),
@@ -1221,14 +1270,6 @@ async def create_channel_report(
     )
     stats = analysis_stats.one()
 
-    # Get types of resources
-    resource_types_query = await db.execute(
-        select(ResourceAnalysis.resource_type)
-        .distinct()
-        .where(ResourceAnalysis.cross_resource_report_id == new_report.id)
-    )
-    resource_types = [rt[0] for rt in resource_types_query.all()]
-
     # Add summary message counts to report parameters
     updated_params = new_report.report_parameters.copy() if new_report.report_parameters else {}
     updated_params.update(
@@ -1244,11 +1285,6 @@ async def create_channel_report(
 
     # Prepare the response
     response_dict = new_report.__dict__.copy()
-    response_dict["total_resources"] = stats.total
-    response_dict["completed_analyses"] = stats.completed
-    response_dict["pending_analyses"] = stats.pending
-    response_dict["failed_analyses"] = stats.failed
-    response_dict["resource_types"] = resource_types
     # Include the counts in the response
     response_dict["total_messages"] = stats.total_messages or 0
     response_dict["total_participants"] = stats.total_participants or 0
@@ -0,0 +1,238 @@
+"""API endpoints for recurring (scheduled) reports."""
+
+import logging
+from datetime import datetime
+from typing import Dict, List
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.reports.schemas import ReportScheduleCreate, ReportScheduleResponse, ReportScheduleUpdate
+from app.core.auth import get_current_user
+from app.core.team_scoped_access import check_team_access
+from app.db.session import get_async_db
+from app.models.reports import AnalysisType, ReportFrequency, ReportSchedule
+from app.models.team import TeamMemberRole
+from app.services.reports.scheduled_reports import compute_next_run
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _get_team_schedule(db: AsyncSession, team_id: UUID, schedule_id: UUID) -> ReportSchedule:
+    """Get a team's report schedule or raise a 404."""
+    result = await db.execute(
+        select(ReportSchedule).where(
+            and_(
+                ReportSchedule.id == schedule_id,
+                ReportSchedule.team_id == team_id,
+            )
+        )
+    )
+    schedule = result.scalar_one_or_none()
+
+    if not schedule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report schedule not found",
+        )
+
+    return schedule
+
+
+@router.get(
+    "/{team_id}/report-schedules",
+    response_model=List[ReportScheduleResponse],
+)
+async def get_team_report_schedules(
+    team_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict = Depends(get_current_user),
+):
+    """
+    Get all recurring reports for a team.
+
+    Args:
+        team_id: Team ID
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        List of report schedules
+    """
+    has_access = await check_team_access(team_id=team_id, user_id=current_user["id"], db=db)
+
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this team",
+        )
+
+    result = await db.execute(
+        select(ReportSchedule).where(ReportSchedule.team_id == team_id).order_by(ReportSchedule.next_run_at)
+    )
+    return result.scalars().all()
+
+
+@router.post(
+    "/{team_id}/report-schedules",
+    response_model=ReportScheduleResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_team_report_schedule(
+    team_id: UUID,
+    schedule_data: ReportScheduleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict = Depends(get_current_user),
+):
+    """
+    Create a recurring channel report for a team.
+
+    Args:
+        team_id: Team ID
+        schedule_data: Schedule creation data
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Newly created report schedule
+    """
+    logger.debug(f"Creating report schedule for team {team_id}, user {current_user['id']}")
+
+    has_access = await check_team_access(
+        team_id=team_id,
+        user_id=current_user["id"],
+        db=db,
+        roles=[TeamMemberRole.OWNER, TeamMemberRole.ADMIN, TeamMemberRole.MEMBER],
+    )
+
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to create reports for this team",
+        )
+
+    schedule_id = uuid4()
+    frequency = ReportFrequency(schedule_data.frequency.value)
+
+    schedule = ReportSchedule(
+        id=schedule_id,
+        team_id=team_id,
+        title=schedule_data.title,
+        description=schedule_data.description,
+        frequency=frequency,
+        channels=schedule_data.channels,
+        analysis_type=AnalysisType(schedule_data.analysis_type.value),
+        include_threads=schedule_data.include_threads,
+        include_reactions=schedule_data.include_reactions,
+        created_by_user_id=current_user["id"],
+        next_run_at=compute_next_run(schedule_id, frequency, datetime.utcnow()),
+    )
+    db.add(schedule)
+    await db.commit()
+    await db.refresh(schedule)
+
+    logger.info(f"Created report schedule {schedule.id} for team {team_id}; first run at {schedule.next_run_at}")
+
+    return schedule
+
+
+@router.put(
+    "/{team_id}/report-schedules/{schedule_id}",
+    response_model=ReportScheduleResponse,
+)
+async def update_team_report_schedule(
+    team_id: UUID,
+    schedule_id: UUID,
+    schedule_data: ReportScheduleUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict = Depends(get_current_user),
+):
+    """
+    Update a recurring channel report.
+
+    Args:
+        team_id: Team ID
+        schedule_id: Schedule ID to update
+        schedule_data: Schedule update data
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Updated report schedule
+    """
+    has_access = await check_team_access(
+        team_id=team_id,
+        user_id=current_user["id"],
+        db=db,
+        roles=[TeamMemberRole.OWNER, TeamMemberRole.ADMIN, TeamMemberRole.MEMBER],
+    )
+
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to update reports for this team",
+        )
+
+    schedule = await _get_team_schedule(db, team_id, schedule_id)
+
+    update_data = schedule_data.dict(exclude_unset=True)
+    if "frequency" in update_data:
+        update_data["frequency"] = ReportFrequency(update_data["frequency"].value)
+    if "analysis_type" in update_data:
+        update_data["analysis_type"] = AnalysisType(update_data["analysis_type"].value)
+
+    for key, value in update_data.items():
+        setattr(schedule, key, value)
+
+    # Re-plan the next run when the cadence changes or a paused schedule resumes
+    if "frequency" in update_data or update_data.get("is_active"):
+        schedule.next_run_at = compute_next_run(schedule.id, schedule.frequency, datetime.utcnow())
+
+    await db.commit()
+    await db.refresh(schedule)
+
+    return schedule
+
+
+@router.delete("/{team_id}/report-schedules/{schedule_id}")
+async def delete_team_report_schedule(
+    team_id: UUID,
+    schedule_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict = Depends(get_current_user),
+):
+    """
+    Delete a recurring channel report. Reports it already generated are kept.
+
+    Args:
+        team_id: Team ID
+        schedule_id: Schedule ID to delete
+        db: Database session
+        current_user: Current authenticated user
+
+    Returns:
+        Success message
+    """
+    has_access = await check_team_access(
+        team_id=team_id,
+        user_id=current_user["id"],
+        db=db,
+        roles=[TeamMemberRole.OWNER, TeamMemberRole.ADMIN],
+    )
+
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You need admin access to delete report schedules",
+        )
+
+    schedule = await _get_team_schedule(db, team_id, schedule_id)
+
+    await db.delete(schedule)
+    await db.commit()
+
+    return {"message": "Report schedule deleted successfully"}
@@ -74,6 +74,7 @@ class ResourceAnalysisFilterParams(BaseModel):
     analysis_type: Optional[AnalysisTypeEnum] = Field(None, description="Filter by analysis type")
     page: int = Field(1, description="Page number", ge=1)
     page_size: int = Field(20, description="Number of items per page", ge=1, le=100)
+    include_content: bool = Field(False, description="Include the generated analysis text and results (null otherwise)")
 
 
 class ResourceAnalysisBase(BaseModel):
@@ -164,6 +165,7 @@ class CrossResourceReportResponse(CrossResourceReportBase):
     pending_analyses: Optional[int] = Field(None, description="Number of pending resource analyses")
     failed_analyses: Optional[int] = Field(None, description="Number of failed resource analyses")
     resource_types: Optional[List[str]] = Field(None, description="Types of resources included")
+    llm_tokens_used: Optional[int] = Field(None, description="LLM tokens spent by the report's analyses")
     # Message statistics
     total_messages: Optional[int] = Field(None, description="Total number of messages across all resources")
     total_participants: Optional[int] = Field(
@@ -250,3 +252,95 @@ class PaginatedResponse(GenericModel, Generic[T]):
         """Create a paginated response."""
         pages = (total + page_size - 1) // page_size if page_size > 0 else 0
         return cls(items=items, total=total, page=page, page_size=page_size, pages=pages)
+
+
+# Schemas for recurring reports
+
+
+def _validate_schedule_channels(channels: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Validate that at least one channel with an id and integration_id is given."""
+    if not channels:
+        raise ValueError("At least one channel must be specified for analysis")
+    for channel in channels:
+        if "id" not in channel or "integration_id" not in channel:
+            raise ValueError("Each channel must have an id and an integration_id")
+    return channels
+
+
+class ReportFrequencyEnum(str, Enum):
+    """Report schedule frequency enum for API schemas."""
+
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+
+
+class ReportScheduleCreate(BaseModel):
+    """Schema for creating a recurring channel report."""
+
+    channels: List[Dict[str, str]] = Field(
+        ...,
+        description="List of channels to include in each report",
+        example=[
+            {
+                "id": "uuid-here",
+                "name": "general",
+                "integration_id": "integration-uuid-here",
+            }
+        ],
+    )
+    frequency: ReportFrequencyEnum = Field(..., description="How often the report is generated")
+    title: Optional[str] = Field(None, description="Custom report title", max_length=255)
+    description: Optional[str] = Field(None, description="Custom report description")
+    include_threads: bool = Field(True, description="Whether to include thread replies")
+    include_reactions: bool = Field(True, description="Whether to include reactions")
+    analysis_type: AnalysisTypeEnum = Field(AnalysisTypeEnum.CONTRIBUTION, description="Type of analysis to perform")
+
+    @validator("channels")
+    def validate_channels(cls, v):
+        """Validate the channels to include."""
+        return _validate_schedule_channels(v)
+
+
+class ReportScheduleUpdate(BaseModel):
+    """Schema for updating a recurring channel report."""
+
+    channels: Optional[List[Dict[str, str]]] = Field(None, description="List of channels to include in each report")
+    frequency: Optional[ReportFrequencyEnum] = Field(None, description="How often the report is generated")
+    title: Optional[str] = Field(None, description="Custom report title", max_length=255)
+    description: Optional[str] = Field(None, description="Custom report description")
+    include_threads: Optional[bool] = Field(None, description="Whether to include thread replies")
+    include_reactions: Optional[bool] = Field(None, description="Whether to include reactions")
+    analysis_type: Optional[AnalysisTypeEnum] = Field(None, description="Type of analysis to perform")
+    is_active: Optional[bool] = Field(None, description="Whether the schedule is active")
+
+    @validator("channels")
+    def validate_channels(cls, v):
+        """Validate that channels, when given, have an id and integration_id."""
+        if v is not None:
+            return _validate_schedule_channels(v)
+        return v
+
+
+class ReportScheduleResponse(BaseModel):
+    """Response schema for a recurring channel report."""
+
+    id: UUID = Field(..., description="Schedule ID")
+    team_id: UUID = Field(..., description="Team ID")
+    channels: List[Dict[str, str]] = Field(..., description="Channels included in each report")
+    frequency: ReportFrequencyEnum = Field(..., description="How often the report is generated")
+    title: Optional[str] = Field(None, description="Custom report title")
+    description: Optional[str] = Field(None, description="Custom report description")
+    include_threads: bool = Field(..., description="Whether to include thread replies")
+    include_reactions: bool = Field(..., description="Whether to include reactions")
+    analysis_type: AnalysisTypeEnum = Field(..., description="Type of analysis to perform")
+    is_active: bool = Field(..., description="Whether the schedule is active")
+    next_run_at: datetime = Field(..., description="When the next report will be generated")
+    last_run_at: Optional[datetime] = Field(None, description="When the last report was generated")
+    last_report_id: Optional[UUID] = Field(None, description="ID of the last generated report")
+    created_at: datetime = Field(..., description="Creation timestamp")
+    updated_at: datetime = Field(..., description="Last update timestamp")
+
+    class Config:
+        """Pydantic configuration."""
+
+        orm_mode = True
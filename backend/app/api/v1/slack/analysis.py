@@ -13,7 +13,7 @@ from fastapi import APIRouter, Depends, Query, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_async_db
+from app.db.session import get_async_db, get_read_db
 from app.services.llm.openrouter import OpenRouterService
 from app.services.slack.channels import get_channel_by_id
 from app.services.slack.messages import get_channel_messages, get_channel_users
@@ -127,7 +127,7 @@ async def get_channel_analyses(
     channel_id: str,
     limit: int = Query(10, ge=1, le=100, description="Maximum number of analyses to return"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     DEPRECATED: This endpoint has been removed.
@@ -149,7 +149,7 @@ async def get_channel_analyses(
 async def get_latest_channel_analysis(
     workspace_id: str,
     channel_id: str,
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     DEPRECATED: This endpoint has been removed.
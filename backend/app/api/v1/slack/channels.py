@@ -3,7 +3,7 @@ Slack channels API routes.
 """
 
 import logging
-from datetime import datetime
+from datetime import date, datetime, time
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
@@ -11,9 +11,14 @@ from pydantic import BaseModel
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_async_db
+from app.db.session import get_async_db, get_read_db
 from app.models.slack import SlackChannel, SlackWorkspace
 from app.services.slack.channels import ChannelService
+from app.services.slack.rollups import (
+    get_channel_activity_stats,
+    get_channel_daily_activity,
+    get_channel_top_contributors,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -118,7 +123,7 @@ async def get_sync_status(
 @router.get("/workspaces/{workspace_id}/channels")
 async def list_channels(
     workspace_id: str,
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
     types: Optional[List[str]] = Query(None, description="Filter by channel types (public, private, mpim, im)"),
     include_archived: bool = Query(False, description="Include archived channels"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -272,3 +277,114 @@ async def select_channels_for_analysis(
             status_code=500,
             detail="An error occurred while selecting channels for analysis",
         )
+
+
+async def _get_workspace_channel(db: AsyncSession, workspace_id: str, channel_id: str) -> SlackChannel:
+    """Get a channel of a workspace, raising 404 if it does not exist."""
+    result = await db.execute(
+        select(SlackChannel).where(SlackChannel.id == channel_id, SlackChannel.workspace_id == workspace_id)
+    )
+    channel = result.scalars().first()
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return channel
+
+
+@router.get("/workspaces/{workspace_id}/channels/{channel_id}/activity")
+async def get_channel_activity(
+    workspace_id: str,
+    channel_id: str,
+    db: AsyncSession = Depends(get_read_db),
+    start_date: Optional[date] = Query(None, description="First day to include (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Last day to include (inclusive)"),
+) -> Dict[str, Any]:
+    """
+    Get message statistics and a daily activity series for a channel.
+
+    Args:
+        workspace_id: UUID of the workspace
+        channel_id: UUID of the channel
+        db: Database session
+        start_date: Optional first day to include
+        end_date: Optional last day to include
+
+    Returns:
+        Dictionary with totals and one entry per day with messages
+    """
+    channel = await _get_workspace_channel(db, workspace_id, channel_id)
+
+    try:
+        stats = await get_channel_activity_stats(
+            db,
+            channel.id,
+            start_date=datetime.combine(start_date, time.min) if start_date else None,
+            end_date=datetime.combine(end_date, time.max) if end_date else None,
+        )
+        days = await get_channel_daily_activity(db, channel.id, start_day=start_date, end_day=end_date)
+    except Exception as e:
+        logger.error(f"Error getting channel activity: {str(e)}")
+        raise HTTPException(status_code=500, detail="An error occurred while retrieving channel activity")
+
+    return {
+        "channel_id": str(channel.id),
+        "channel_name": channel.name,
+        "stats": stats,
+        "daily": [
+            {
+                "date": day.day.isoformat(),
+                "message_count": day.message_count,
+                "reply_count": day.reply_count,
+                "thread_count": day.thread_count,
+                "reaction_count": day.reaction_count,
+                "participant_count": day.participant_count,
+            }
+            for day in days
+        ],
+    }
+
+
+@router.get("/workspaces/{workspace_id}/channels/{channel_id}/contributors")
+async def get_channel_contributors(
+    workspace_id: str,
+    channel_id: str,
+    db: AsyncSession = Depends(get_read_db),
+    start_date: Optional[date] = Query(None, description="First day to include (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Last day to include (inclusive)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of contributors to return"),
+    include_bots: bool = Query(False, description="Include bot users"),
+) -> Dict[str, Any]:
+    """
+    Rank a channel's most active contributors by message count.
+
+    Args:
+        workspace_id: UUID of the workspace
+        channel_id: UUID of the channel
+        db: Database session
+        start_date: Optional first day to include
+        end_date: Optional last day to include
+        limit: Number of contributors to return
+        include_bots: Whether to include bot users
+
+    Returns:
+        Dictionary with the ranked contributors
+    """
+    channel = await _get_workspace_channel(db, workspace_id, channel_id)
+
+    try:
+        contributors = await get_channel_top_contributors(
+            db,
+            channel.id,
+            start_day=start_date,
+            end_day=end_date,
+            limit=limit,
+            include_bots=include_bots,
+        )
+    except Exception as e:
+        logger.error(f"Error getting channel contributors: {str(e)}")
+        raise HTTPException(status_code=500, detail="An error occurred while retrieving channel contributors")
+
+    return {
+        "channel_id": str(channel.id),
+        "channel_name": channel.name,
+        "contributors": contributors,
+    }
@@ -3,8 +3,9 @@ Slack messages API routes.
 """
 
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
@@ -12,9 +13,12 @@ from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.db.session import get_async_db
+from app.db.session import get_async_db, get_read_db
 from app.models.slack import SlackChannel, SlackMessage
 from app.services.slack.messages import SlackMessageService
+from app.services.slack.rollups import message_day, refresh_activity_rollups
+from app.services.slack.search import search_messages as search_slack_messages
+from app.services.slack.user_directory import SlackUserDirectory
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -41,6 +45,8 @@ async def get_channel_messages(
     thread_ts: Optional[str] = Query(None, description="Filter by specific thread timestamp"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of messages to retrieve"),
     cursor: Optional[str] = Query(None, description="Pagination cursor"),
+    include_total: bool = Query(False, description="Whether to count all matching messages"),
+    include_content: bool = Query(False, description="Include attachments, files and analysis data"),
     db: AsyncSession = Depends(get_async_db),
 ) -> Dict[str, Any]:
     """
@@ -56,6 +62,8 @@ async def get_channel_messages(
         thread_ts: Filter by specific thread timestamp
         limit: Maximum number of messages to retrieve
         cursor: Pagination cursor for retrieving the next set of results
+        include_total: Whether to include the total number of matching messages
+        include_content: Whether to include attachments, files and analysis data of each message
         db: Database session
 
     Returns:
@@ -93,6 +101,8 @@ async def get_channel_messages(
             include_replies=include_replies,
             thread_only=thread_only,
             thread_ts=thread_ts,
+            include_total=include_total,
+            include_content=include_content,
         )
 
         # Format response for API
@@ -117,7 +127,10 @@ async def get_messages_by_date_range(
     include_replies: bool = Query(True, description="Whether to include thread replies"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(100, ge=1, le=1000, description="Number of items per page"),
-    db: AsyncSession = Depends(get_async_db),
+    cursor: Optional[str] = Query(None, description="Pagination cursor (takes precedence over page)"),
+    include_total: bool = Query(True, description="Whether to count all matching messages"),
+    include_content: bool = Query(False, description="Include attachments, files and analysis data"),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Dict[str, Any]:
     """
     Get messages from multiple channels with date range filtering and pagination.
@@ -130,6 +143,9 @@ async def get_messages_by_date_range(
         include_replies: Whether to include thread replies
         page: Page number for pagination
         page_size: Number of items per page
+        cursor: Pagination cursor returned as next_cursor by the previous page
+        include_total: Whether to include the total number of matching messages
+        include_content: Whether to include attachments, files and analysis data of each message
         db: Database session
 
     Returns:
@@ -164,6 +180,9 @@ async def get_messages_by_date_range(
             include_replies=include_replies,
             page=page,
             page_size=page_size,
+            cursor=cursor,
+            include_total=include_total,
+            include_content=include_content,
         )
 
         # Format response for API
@@ -179,6 +198,62 @@ async def get_messages_by_date_range(
         raise HTTPException(status_code=500, detail="An error occurred while retrieving messages")
 
 
+@router.get("/workspaces/{workspace_id}/messages/search")
+async def search_messages(
+    workspace_id: str,
+    q: str = Query(
+        ...,
+        min_length=2,
+        max_length=200,
+        description="Search terms; every term must match and one must be 3+ characters long",
+    ),
+    channel_ids: Optional[str] = Query(None, description="Comma-separated list of channel IDs to search in"),
+    user_ids: Optional[str] = Query(None, description="Comma-separated list of user IDs to restrict authors to"),
+    start_date: Optional[datetime] = Query(None, description="Start date for message filtering"),
+    end_date: Optional[datetime] = Query(None, description="End date for message filtering"),
+    include_replies: bool = Query(True, description="Whether to include thread replies"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of messages to return"),
+    cursor: Optional[str] = Query(None, description="Pagination cursor"),
+    db: AsyncSession = Depends(get_read_db),
+) -> Dict[str, Any]:
+    """
+    Search the text of messages in a workspace, newest first.
+
+    Args:
+        workspace_id: UUID of the workspace
+        q: Search query
+        channel_ids: Optional comma-separated list of channel IDs to search in
+        user_ids: Optional comma-separated list of user IDs to restrict authors to
+        start_date: Optional start date for filtering messages
+        end_date: Optional end date for filtering messages
+        include_replies: Whether to include thread replies
+        limit: Maximum number of messages to return
+        cursor: Pagination cursor returned as next_cursor by the previous page
+        db: Database session
+
+    Returns:
+        Dictionary with matching messages, their highlights and pagination information
+    """
+    try:
+        return await search_slack_messages(
+            db=db,
+            workspace_id=workspace_id,
+            query=q,
+            channel_ids=[ch_id.strip() for ch_id in channel_ids.split(",") if ch_id.strip()] if channel_ids else None,
+            user_ids=[u_id.strip() for u_id in user_ids.split(",") if u_id.strip()] if user_ids else None,
+            start_date=start_date,
+            end_date=end_date,
+            include_replies=include_replies,
+            limit=limit,
+            cursor=cursor,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching messages: {str(e)}")
+        raise HTTPException(status_code=500, detail="An error occurred while searching messages")
+
+
 @router.get("/workspaces/{workspace_id}/users")
 async def get_users(
     workspace_id: str,
@@ -236,20 +311,13 @@ async def get_users(
             db_users = result.scalars().all()
             users.extend(db_users)
 
-        # Fetch users by Slack ID
+        # Fetch users by Slack ID, from the workspace's user directory where it knows them
         if slack_user_ids:
-            query = select(SlackUser).where(
-                SlackUser.slack_id.in_(slack_user_ids),
-                SlackUser.workspace_id == workspace_id,
-            )
-
-            result = await db.execute(query)
-            slack_id_users = result.scalars().all()
-            users.extend(slack_id_users)
+            slack_id_users = await SlackUserDirectory.resolve(db, workspace_id, slack_user_ids)
+            users.extend(slack_id_users.values())
 
             # Get Slack IDs that weren't found
-            found_slack_ids = [user.slack_id for user in slack_id_users]
-            missing_slack_ids = [sid for sid in slack_user_ids if sid not in found_slack_ids]
+            missing_slack_ids = [sid for sid in slack_user_ids if sid not in slack_id_users]
 
             # If fetch_from_slack is True, try to get missing users from Slack API
             if fetch_from_slack and missing_slack_ids:
@@ -463,23 +531,14 @@ async def sync_users_from_messages(
             if not workspace or not workspace.access_token:
                 continue
 
+            # Find the users that already exist in one lookup
+            existing_users = await SlackUserDirectory.resolve(db, workspace_id, slack_user_ids)
+
             # Fetch and create each user
             # API client will be created in the service
             for slack_user_id in slack_user_ids:
                 try:
-                    # Check if user already exists
-                    # Import SlackUser locally to avoid warning
-                    from app.models.slack import SlackUser
-
-                    user_result = await db.execute(
-                        select(SlackUser).where(
-                            SlackUser.workspace_id == workspace_id,
-                            SlackUser.slack_id == slack_user_id,
-                        )
-                    )
-                    existing_user = user_result.scalars().first()
-
-                    if existing_user:
+                    if slack_user_id in existing_users:
                         continue
 
                     # Fetch user from Slack API
@@ -591,10 +650,20 @@ async def fix_thread_parent_flags(
         WHERE reply_count > 0
           AND (thread_ts = slack_ts OR thread_ts IS NULL)
           AND is_thread_parent = FALSE
+        RETURNING channel_id, message_datetime
         """
 
         result = await db.execute(text(sql))
-        updated_count = result.rowcount
+        updated_rows = result.all()
+        updated_count = len(updated_rows)
+
+        # Thread counts in the daily rollups change with the flags
+        touched_days: Dict[UUID, Set[date]] = {}
+        for updated_channel_id, updated_datetime in updated_rows:
+            if updated_datetime:
+                touched_days.setdefault(updated_channel_id, set()).add(message_day(updated_datetime))
+        for updated_channel_id, days in touched_days.items():
+            await refresh_activity_rollups(db, updated_channel_id, days)
         await db.commit()
 
         logger.info(f"Fixed {updated_count} thread parent flags")
@@ -684,6 +753,7 @@ async def fix_thread_replies(
 
                 # Process replies
                 thread_reply_count = 0
+                reply_days: Set[date] = set()
                 for reply in thread_replies:
                     # Skip parent message
                     if reply.get("ts") == parent.slack_ts:
@@ -710,9 +780,12 @@ async def fix_thread_replies(
                     new_reply = SlackMessage(**reply_data)
                     db.add(new_reply)
                     thread_reply_count += 1
+                    if new_reply.message_datetime:
+                        reply_days.add(message_day(new_reply.message_datetime))
 
                 if thread_reply_count > 0:
                     # Commit after each thread with new replies
+                    await refresh_activity_rollups(db, channel.id, reply_days)
                     await db.commit()
                     replies_added += thread_reply_count
 
@@ -829,6 +902,7 @@ async def get_thread_replies(
 
                     # Process replies (excluding parent)
                     api_formatted_replies = []
+                    reply_days: Set[date] = set()
                     for reply in api_replies:
                         # Skip the parent message
                         if reply.get("ts") == thread_ts:
@@ -884,6 +958,7 @@ async def get_thread_replies(
                                 # Create and save the new reply
                                 db_reply = SlackMessage(**reply_data)
                                 db.add(db_reply)
+                                reply_days.add(message_day(db_reply.message_datetime))
 
                                 # Don't wait for the commit - we'll commit after processing all replies
                         except Exception as e:
@@ -894,6 +969,7 @@ async def get_thread_replies(
 
                     # Try to commit any database changes
                     try:
+                        await refresh_activity_rollups(db, channel.id, reply_days)
                         await db.commit()
                         logger.info("Thread replies saved to database")
                     except Exception as e:
@@ -16,6 +16,7 @@ from sqlalchemy.future import select
 from app.config import settings
 from app.db.session import AsyncSessionLocal, get_async_db
 from app.models.slack import SlackWorkspace
+from app.services.integration.credentials import IntegrationCredentialCache
 from app.services.slack.workspace import WorkspaceService
 
 # Configure logging
@@ -630,6 +631,7 @@ async def disconnect_workspace(
         workspace.refresh_token = None
 
         await db.commit()
+        IntegrationCredentialCache.invalidate()
 
         return {"status": "success", "message": f"Disconnected from {workspace.name}"}
 
@@ -21,6 +21,7 @@ from app.db.session import get_async_db
 
 # TeamMemberRole is imported but used only for type hints in docstrings
 from app.services.team.members import TeamMemberService
+from app.services.team.permissions import invalidate_team_roles
 
 logger = logging.getLogger(__name__)
 
@@ -317,6 +318,7 @@ async def debug_accept_invitation(
         # Save changes
         await db.commit()
         await db.refresh(member)
+        await invalidate_team_roles(team_id, member.user_id)
 
         # Update team size counter
         await TeamMemberService.update_team_size(db, team_id)
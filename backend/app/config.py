@@ -1,7 +1,7 @@
 import logging
 import os
 from functools import lru_cache
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import PostgresDsn, SecretStr, validator
 from pydantic_settings import BaseSettings
@@ -70,19 +70,32 @@ class Settings(BaseSettings):
     # Database Settings
     DATABASE_URL: PostgresDsn
     DATABASE_TEST_URL: Optional[PostgresDsn] = None
+    DB_POOL_SIZE: int = 10  # Connections kept open per worker
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT: float = 10.0  # Seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Replace connections older than this many seconds (-1 disables)
+    DB_POOL_PRE_PING: bool = True  # Check connections on checkout so dropped ones are replaced
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection (0 behind pgbouncer)
+    DB_POOL_SLOW_CHECKOUT_SECONDS: float = 1.0  # Log checkouts that wait longer than this
+    DATABASE_REPLICA_URL: Optional[PostgresDsn] = None  # Read replica for read-only endpoints (unset: primary only)
+    DB_REPLICA_STICKY_SECONDS: float = 10.0  # After a write, the user's reads stay on the primary this long
 
     # Authentication Settings
     SUPABASE_URL: str
     SUPABASE_KEY: SecretStr
     SUPABASE_JWT_SECRET: str
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Verified tokens remembered per worker (0 disables the cache)
+    AUTH_TOKEN_CACHE_MAX_TTL_SECONDS: float = 3600  # Longest a token is trusted without verifying it again
 
     # Third-Party API Keys
     OPENROUTER_API_KEY: SecretStr
     OPENROUTER_DEFAULT_MODEL: str = "anthropic/claude-3-sonnet:20240229"
     OPENROUTER_MAX_TOKENS: int = 4000
     OPENROUTER_TEMPERATURE: float = 0.7
+    OPENROUTER_API_BASE_URL: str = "https://openrouter.ai/api/v1"  # Overridden to point analyses at a mock LLM
     # Slack credentials are now provided by the user through the UI
     # rather than through environment variables
+    SLACK_API_BASE_URL: str = "https://slack.com/api"  # Overridden to point syncs at a mock Slack API
     GITHUB_CLIENT_ID: Optional[str] = None
     GITHUB_CLIENT_SECRET: Optional[SecretStr] = None
     NOTION_API_KEY: Optional[SecretStr] = None
@@ -91,6 +104,55 @@ class Settings(BaseSettings):
     ENABLE_SLACK_INTEGRATION: bool = True
     ENABLE_GITHUB_INTEGRATION: bool = True
     ENABLE_NOTION_INTEGRATION: bool = True
+    ENABLE_SCHEDULED_REPORTS: bool = True
+
+    # Slack message partitions
+    SLACK_MESSAGE_PARTITION_MONTHS_AHEAD: int = 3  # Monthly partitions created ahead of the current month
+    SLACK_MESSAGE_RETENTION_MONTHS: int = 0  # Months of messages to keep, dropped by partition (0 keeps all)
+
+    # Scheduled Reports
+    REPORT_SCHEDULE_WINDOW_START_HOUR: int = 1  # UTC hour at which the off-peak window opens
+    REPORT_SCHEDULE_WINDOW_HOURS: int = 5  # Length of the off-peak window that runs are spread across
+    REPORT_SCHEDULE_PRESYNC_LEAD_HOURS: int = 2  # Sync channel data this long before a scheduled run
+    REPORT_SCHEDULE_POLL_SECONDS: int = 300  # How often the scheduler looks for due schedules
+
+    # Analysis Scheduling
+    ANALYSIS_MAX_CONCURRENCY: int = 8  # Analyses running at once across all teams
+    ANALYSIS_TEAM_MAX_CONCURRENCY: int = 3  # Analyses running at once for a single team
+    ANALYSIS_TEAM_MAX_QUEUE_DEPTH: int = 500  # Analyses a single team may have waiting
+    ANALYSIS_TEAM_WEIGHTS: Dict[str, int] = {}  # Team ID -> analyses started per round-robin turn (default 1)
+
+    # Analysis Budgets (0 disables a limit)
+    ANALYSIS_TIMEOUT_SECONDS: int = 900  # Wall-clock limit for one analysis, from when it starts running
+    ANALYSIS_REPORT_TIMEOUT_SECONDS: int = 3 * 60 * 60  # Wall-clock limit for a report, from when it is scheduled
+    ANALYSIS_MAX_TOKENS: int = 200_000  # LLM tokens (prompt + completion) for one analysis
+    ANALYSIS_REPORT_MAX_TOKENS: int = 2_000_000  # LLM tokens for all analyses of a report
+
+    # CPU-bound work (prompt building, LLM response parsing)
+    CPU_POOL_MODE: str = "thread"  # "thread", "process" or "inline" (run on the event loop)
+    CPU_POOL_MAX_WORKERS: int = 4  # Pool size (0 uses the executor's default)
+
+    # Shared cache
+    CACHE_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared by all workers)
+    CACHE_REDIS_URL: Optional[str] = None  # Redis-protocol server for the "redis" backend
+    CACHE_KEY_PREFIX: str = "tobancv"  # Prefix of every key, so deployments can share a server
+
+    # Team access
+    TEAM_ROLE_CACHE_TTL_SECONDS: float = 30  # How long a member's role is trusted across requests (0 disables)
+
+    # Channel data cache (messages and users loaded for analysis)
+    CHANNEL_DATA_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Estimated size of all cached payloads per worker
+    CHANNEL_DATA_CACHE_MAX_ENTRIES: int = 1000  # Cached channel periods per worker
+    CHANNEL_DATA_CACHE_TTL_SECONDS: float = 300  # Lifetime of data for recent periods
+    CHANNEL_DATA_CACHE_HISTORICAL_TTL_SECONDS: float = 3600  # Lifetime of data for periods that ended over a day ago
+
+    # Integration credentials (memory only, never in the shared cache)
+    # How long looked-up tokens and workspaces are reused (0 disables)
+    INTEGRATION_CREDENTIAL_CACHE_TTL_SECONDS: float = 60
+
+    # Slack user directory (Slack user ID -> SlackUser lookups during ingest)
+    SLACK_USER_DIRECTORY_MAX_WORKSPACES: int = 100  # Workspaces whose users are kept per worker
+    SLACK_USER_DIRECTORY_MAX_USERS: int = 50000  # Users kept per workspace
 
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -1,6 +1,9 @@
+import copy
+import hashlib
 import logging
 import time
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
@@ -15,10 +18,127 @@ from app.db.session import get_async_db
 security = HTTPBearer()
 
 
+class VerifiedTokens:
+    """
+    Payloads of tokens this worker has verified, so repeat requests skip verification.
+
+    Entries are keyed by a hash of the token and expire with the token (or after
+    AUTH_TOKEN_CACHE_MAX_TTL_SECONDS), least recently used first once
+    AUTH_TOKEN_CACHE_MAX_ENTRIES is reached. Tokens that fail verification are
+    never cached.
+    """
+
+    _payloads: "OrderedDict[bytes, Tuple[Dict, float]]" = OrderedDict()
+
+    # Index of the verification strategy that first succeeded, by token issuer
+    _strategies: Dict[str, int] = {}
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        """Get the cache key of a token."""
+        return hashlib.sha256(token.encode()).digest()
+
+    @classmethod
+    def get(cls, key: bytes) -> Optional[Dict]:
+        """
+        Get the payload of a verified token.
+
+        Args:
+            key: Cache key of the token
+
+        Returns:
+            Copy of the payload, or None if the token isn't cached or has expired
+        """
+        entry = cls._payloads.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del cls._payloads[key]
+            return None
+        cls._payloads.move_to_end(key)
+        return copy.deepcopy(payload)
+
+    @classmethod
+    def set(cls, key: bytes, payload: Dict) -> None:
+        """
+        Remember the payload of a verified token until it expires.
+
+        Args:
+            key: Cache key of the token
+            payload: Verified payload
+        """
+        max_entries = settings.AUTH_TOKEN_CACHE_MAX_ENTRIES
+        if max_entries <= 0:
+            return
+
+        expires_at = time.time() + settings.AUTH_TOKEN_CACHE_MAX_TTL_SECONDS
+        if isinstance(payload.get("exp"), (int, float)):
+            expires_at = min(expires_at, payload["exp"])
+
+        cls._payloads[key] = (copy.deepcopy(payload), expires_at)
+        cls._payloads.move_to_end(key)
+        while len(cls._payloads) > max_entries:
+            cls._payloads.popitem(last=False)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget all verified tokens and strategies."""
+        cls._payloads = OrderedDict()
+        cls._strategies = {}
+
+
+def _verification_strategies() -> List[Dict]:
+    """
+    Get the keyword arguments of the progressive jwt.decode approaches for Supabase compatibility.
+
+    Returns:
+        Arguments of each approach, from the most lenient
+    """
+    supabase_url = settings.SUPABASE_URL.rstrip("/")
+    audiences = [supabase_url, f"{supabase_url}/auth/v1"]
+
+    return [
+        # First approach: Basic verification without audience/issuer checks
+        {
+            "options": {
+                "verify_signature": True,
+                "verify_aud": False,
+                "verify_iss": False,
+            },
+        },
+        # Second approach: With audience verification
+        {
+            "audience": audiences,
+            "options": {
+                "verify_signature": True,
+                "verify_aud": True,
+                "verify_iss": False,
+            },
+        },
+        # Third approach: With full verification
+        {
+            "audience": audiences,
+            "issuer": supabase_url,
+            "options": {
+                "verify_signature": True,
+                "verify_aud": True,
+                "verify_iss": True,
+            },
+        },
+    ]
+
+
 def decode_token(token: str) -> Dict:
     """
     Decode and validate a JWT token from Supabase Auth.
 
+    Verified payloads are cached until the token expires, so a repeat caller's
+    token is only verified once. The first approach that verifies a token of an
+    issuer is remembered, and later tokens of that issuer are only checked with
+    it: the approaches go from the most lenient, so one the remembered approach
+    rejects would be rejected by the rest too.
+
     Args:
         token: JWT token to decode and validate
 
@@ -30,60 +150,36 @@ def decode_token(token: str) -> Dict:
     """
     logger = logging.getLogger(__name__)
 
+    key = VerifiedTokens.key(token)
+    payload = VerifiedTokens.get(key)
+    if payload is not None:
+        return payload
+
     try:
         jwt_secret = settings.SUPABASE_JWT_SECRET
         if not jwt_secret:
             logger.error("JWT secret is not configured")
             raise ValueError("JWT secret is not configured")
 
-        # Try progressive token verification approaches for Supabase compatibility
-        supabase_url = settings.SUPABASE_URL.rstrip("/")
-        audiences = [supabase_url, f"{supabase_url}/auth/v1"]
+        strategies = _verification_strategies()
+        issuer = str(jwt.get_unverified_claims(token).get("iss"))
+        known_strategy = VerifiedTokens._strategies.get(issuer)
+        attempts = [known_strategy] if known_strategy is not None else range(len(strategies))
 
-        # First approach: Basic verification without audience/issuer checks
-        try:
-            return jwt.decode(
-                token,
-                jwt_secret,
-                algorithms=["HS256"],
-                options={
-                    "verify_signature": True,
-                    "verify_aud": False,
-                    "verify_iss": False,
-                },
-            )
-        except Exception:
-            # Second approach: With audience verification
+        error: Optional[Exception] = None
+        for index in attempts:
             try:
-                return jwt.decode(
-                    token,
-                    jwt_secret,
-                    algorithms=["HS256"],
-                    audience=audiences,
-                    options={
-                        "verify_signature": True,
-                        "verify_aud": True,
-                        "verify_iss": False,
-                    },
-                )
-            except Exception:
-                # Third approach: With full verification
-                try:
-                    return jwt.decode(
-                        token,
-                        jwt_secret,
-                        algorithms=["HS256"],
-                        audience=audiences,
-                        issuer=supabase_url,
-                        options={
-                            "verify_signature": True,
-                            "verify_aud": True,
-                            "verify_iss": True,
-                        },
-                    )
-                except Exception as e:
-                    logger.error(f"All token verification methods failed: {str(e)}")
-                    raise
+                payload = jwt.decode(token, jwt_secret, algorithms=["HS256"], **strategies[index])
+            except Exception as e:
+                error = e
+                continue
+
+            VerifiedTokens._strategies[issuer] = index
+            VerifiedTokens.set(key, payload)
+            return payload
+
+        logger.error(f"All token verification methods failed: {str(error)}")
+        raise error
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
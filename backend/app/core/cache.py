@@ -0,0 +1,449 @@
+"""
+Cache storage shared by the workers of a deployment.
+
+A Cache is a namespace of JSON values kept in the backend selected by
+CACHE_BACKEND:
+
+- "memory": a dictionary in the worker's own memory. Nothing is shared, which
+  is fine for a single worker and for tests.
+- "redis": any server speaking the Redis protocol (Redis, Valkey, KeyDB) at
+  CACHE_REDIS_URL. Values are shared by all workers, so a value loaded by
+  one worker is a hit for the others. Needs the redis package.
+
+Workers also keep in-process caches of their own, such as ChannelDataCache.
+Cache.invalidate deletes keys from the backend and publishes an invalidation
+message, and each worker runs a listener (started with the application) that
+passes the invalidations of other workers to the handlers registered with
+Cache.on_invalidate, so they can drop their local copies too.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ("memory", "redis")
+
+# Pub/sub channel carrying invalidations between workers
+INVALIDATION_CHANNEL = "cache-invalidation"
+
+# Seconds to wait before listening again after the connection was lost
+LISTEN_RETRY_SECONDS = 1.0
+
+# Called with the invalidated key and whether it is a prefix of keys
+InvalidationHandler = Callable[[str, bool], None]
+
+
+class CacheBackend:
+    """Storage and messaging a Cache is built on."""
+
+    # Whether other workers see the stored values
+    shared = False
+
+    def __init__(self):
+        # Identifies this worker's invalidation messages
+        self.origin = uuid.uuid4().hex
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a stored value, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a value, expiring after ttl seconds if given."""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Delete a value."""
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every value whose key starts with a prefix, returning how many were deleted."""
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: str) -> None:
+        """Send a message to the listeners of a channel in every worker."""
+        raise NotImplementedError
+
+    async def listen(self, channel: str, handler: Callable[[str], None]) -> None:
+        """Pass the messages sent to a channel to a handler until cancelled."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release the backend's connections."""
+
+
+class MemoryBackend(CacheBackend):
+    """Backend keeping values in the worker's memory."""
+
+    def __init__(self):
+        super().__init__()
+        self._values: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._listeners: Dict[str, List[Callable[[str], None]]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        self._values[key] = (value, now + ttl if ttl else None)
+
+        # Forget expired values once the store grows, so it stays proportional to live ones
+        if len(self._values) > 10000:
+            self._values = {k: item for k, item in self._values.items() if item[1] is None or item[1] > now}
+
+    async def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._values if key.startswith(prefix)]
+        for key in keys:
+            del self._values[key]
+        return len(keys)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for handler in list(self._listeners.get(channel, ())):
+            handler(message)
+
+    async def listen(self, channel: str, handler: Callable[[str], None]) -> None:
+        self._listeners.setdefault(channel, []).append(handler)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._listeners[channel].remove(handler)
+
+
+class RedisBackend(CacheBackend):
+    """Backend keeping values in a server speaking the Redis protocol."""
+
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, client: Any = None):
+        """
+        Connect to the server.
+
+        Args:
+            url: Server URL, e.g. redis://localhost:6379/0
+            client: Client to use instead of connecting to url, with the
+                interface of redis.asyncio.Redis (decoding responses)
+        """
+        super().__init__()
+        if client is None:
+            # Only needed when CACHE_BACKEND is "redis"
+            import redis.asyncio as redis
+
+            client = redis.from_url(url, decode_responses=True)
+        self._client = client
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self._client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        # SCAN walks the keyspace in batches instead of blocking the server like KEYS
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", prefix) + "*"
+        keys = [key async for key in self._client.scan_iter(match=pattern, count=500)]
+        if keys:
+            await self._client.delete(*keys)
+        return len(keys)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._client.publish(channel, message)
+
+    async def listen(self, channel: str, handler: Callable[[str], None]) -> None:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    handler(message["data"])
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    """
+    Get the configured cache backend, creating it on first use.
+
+    Returns:
+        Cache backend
+    """
+    global _backend
+
+    if _backend is None:
+        kind = settings.CACHE_BACKEND
+        if kind not in CACHE_BACKENDS:
+            raise ValueError(f"Invalid CACHE_BACKEND {kind!r}, expected one of {', '.join(CACHE_BACKENDS)}")
+        if kind == "redis":
+            if not settings.CACHE_REDIS_URL:
+                raise ValueError("CACHE_REDIS_URL is required when CACHE_BACKEND is 'redis'")
+            _backend = RedisBackend(settings.CACHE_REDIS_URL)
+        else:
+            _backend = MemoryBackend()
+        logger.info(f"Using {kind} cache backend")
+
+    return _backend
+
+
+async def close_cache_backend() -> None:
+    """Close the cache backend if it was created."""
+    global _backend
+
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+class Cache:
+    """
+    A namespace of JSON-serialisable values in a cache backend.
+
+    Backend errors are logged and treated as misses, so a cache outage slows
+    requests down instead of failing them. None can't be told apart from a
+    miss, so don't cache it.
+    """
+
+    # Invalidation handlers of this worker, by namespace
+    _handlers: Dict[str, List[InvalidationHandler]] = {}
+
+    def __init__(self, namespace: str, backend: Optional[CacheBackend] = None):
+        """
+        Create a namespace.
+
+        Args:
+            namespace: Namespace of the keys, e.g. "channel-data"
+            backend: Backend to use instead of the configured one
+        """
+        self.namespace = namespace
+        self._backend = backend
+
+    @property
+    def backend(self) -> CacheBackend:
+        """Get the backend of this namespace."""
+        return self._backend or get_cache_backend()
+
+    def _key(self, key: str) -> str:
+        """Get the backend key of a key in this namespace."""
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Any:
+        """
+        Get a value.
+
+        Args:
+            key: Key within the namespace
+
+        Returns:
+            The value, or None if it is not cached
+        """
+        try:
+            raw = await self.backend.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache get of {self.namespace}:{key} failed: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Key within the namespace
+            value: JSON-serialisable value
+            ttl: Seconds to keep the value, forever if not given
+        """
+        try:
+            await self.backend.set(self._key(key), json.dumps(value), ttl)
+        except Exception as e:
+            logger.warning(f"Cache set of {self.namespace}:{key} failed: {e}")
+
+    async def delete(self, key: str) -> None:
+        """
+        Delete a value from the backend, without notifying other workers.
+
+        Args:
+            key: Key within the namespace
+        """
+        try:
+            await self.backend.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache delete of {self.namespace}:{key} failed: {e}")
+
+    async def invalidate(self, key: str, prefix: bool = False) -> None:
+        """
+        Delete a value, or every value with a key prefix, in every worker.
+
+        The values are deleted from the backend and the other workers'
+        invalidation handlers for this namespace are called with the key.
+
+        Args:
+            key: Key, or key prefix, within the namespace
+            prefix: Whether key is a prefix of the keys to delete
+        """
+        backend = self.backend
+        message = json.dumps({"origin": backend.origin, "namespace": self.namespace, "key": key, "prefix": prefix})
+        try:
+            if prefix:
+                await backend.delete_prefix(self._key(key))
+            else:
+                await backend.delete(self._key(key))
+            await backend.publish(INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.error(f"Cache invalidation of {self.namespace}:{key} failed, other workers may serve it: {e}")
+
+    def on_invalidate(self, handler: InvalidationHandler) -> None:
+        """
+        Register a function to call when another worker invalidates a key of this namespace.
+
+        Args:
+            handler: Function called with the key and whether it is a prefix
+        """
+        Cache._handlers.setdefault(self.namespace, []).append(handler)
+
+
+class SingleFlight:
+    """
+    Shares one load of a key between concurrent callers.
+
+    The first caller for a key runs the load; callers arriving while it runs
+    wait for its result (or its error) instead of loading the key again. Used
+    by the in-process caches so concurrent misses cost a single load.
+    """
+
+    def __init__(self) -> None:
+        self._loading: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def is_loading(self, key: Hashable) -> bool:
+        """Check whether a load of a key is in flight."""
+        return key in self._loading
+
+    def keys(self) -> List[Hashable]:
+        """Get the keys being loaded."""
+        return list(self._loading)
+
+    async def run(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+        store: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """
+        Load a key, or wait for the load of it already in flight.
+
+        Args:
+            key: Key to load
+            load: Coroutine function loading the value
+            store: Optional function caching the loaded value; it isn't
+                called if the load was forgotten while it ran
+
+        Returns:
+            The loaded value
+        """
+        loading = self._loading.get(key)
+        if loading is not None:
+            # Shielded so a cancelled waiter doesn't cancel the load for everyone else
+            return await asyncio.shield(loading)
+
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[key] = loading
+        try:
+            value = await load()
+            # A load racing an invalidation may have read the old value, so only store it if still current
+            if store is not None and self._loading.get(key) is loading:
+                store(value)
+            loading.set_result(value)
+            return value
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                loading.cancel()
+            else:
+                loading.set_exception(e)
+                # Mark the error as retrieved in case nobody was waiting for it
+                loading.exception()
+            raise
+        finally:
+            if self._loading.get(key) is loading:
+                del self._loading[key]
+
+    def forget(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        """
+        Stop sharing the loads in flight of some keys, e.g. after invalidating them.
+
+        Loads already running finish for their callers but aren't stored, and
+        later callers start a new load.
+
+        Args:
+            keys: Keys to forget, or None to forget all of them
+        """
+        if keys is None:
+            self._loading = {}
+            return
+        for key in keys:
+            self._loading.pop(key, None)
+
+
+def dispatch_invalidation(message: str, origin: str) -> None:
+    """
+    Pass an invalidation message to the handlers of its namespace.
+
+    Args:
+        message: Invalidation message published by Cache.invalidate
+        origin: Origin of the receiving backend; the worker's own messages are skipped
+    """
+    try:
+        invalidation = json.loads(message)
+    except ValueError:
+        logger.warning(f"Ignoring malformed cache invalidation {message!r}")
+        return
+
+    if invalidation.get("origin") == origin:
+        return
+
+    for handler in Cache._handlers.get(invalidation.get("namespace"), ()):
+        try:
+            handler(invalidation["key"], invalidation.get("prefix", False))
+        except Exception as e:
+            logger.error(f"Cache invalidation handler for {invalidation.get('namespace')} failed: {e}")
+
+
+async def listen_for_invalidations(backend: Optional[CacheBackend] = None) -> None:
+    """
+    Apply the invalidations of other workers until cancelled, reconnecting when the connection drops.
+
+    Args:
+        backend: Backend to listen on instead of the configured one
+    """
+    backend = backend or get_cache_backend()
+    while True:
+        try:
+            await backend.listen(INVALIDATION_CHANNEL, lambda message: dispatch_invalidation(message, backend.origin))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Lost the cache invalidation channel, listening again: {e}")
+        await asyncio.sleep(LISTEN_RETRY_SECONDS)
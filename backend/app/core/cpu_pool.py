@@ -0,0 +1,89 @@
+"""
+Off-event-loop execution of CPU-bound work.
+
+Prompt building and LLM response parsing walk thousands of messages or run
+regexes over large responses. Run on the event loop, that work stalls every
+other request handled by the worker. run_cpu_bound hands such work to a
+shared executor configured by CPU_POOL_MODE:
+
+- "thread": a thread pool. The event loop keeps running between GIL switches,
+  which is enough to keep request latency flat, and works with any callable.
+- "process": a process pool for true parallelism. Callables and their
+  arguments must be picklable, so pass module-level functions and plain data.
+- "inline": run on the calling thread (useful for debugging).
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CPU_POOL_MODES = ("thread", "process", "inline")
+
+_executor: Optional[Executor] = None
+
+
+def get_cpu_executor() -> Optional[Executor]:
+    """
+    Get the shared executor for CPU-bound work, creating it on first use.
+
+    Returns:
+        Executor to run work in, or None when work runs inline
+    """
+    global _executor
+
+    mode = settings.CPU_POOL_MODE
+    if mode not in CPU_POOL_MODES:
+        raise ValueError(f"Invalid CPU_POOL_MODE {mode!r}, expected one of {', '.join(CPU_POOL_MODES)}")
+    if mode == "inline":
+        return None
+
+    if _executor is None:
+        max_workers = settings.CPU_POOL_MAX_WORKERS or None
+        if mode == "process":
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu-pool")
+        logger.info(f"Started {mode} pool for CPU-bound work (max_workers={max_workers or 'default'})")
+
+    return _executor
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a CPU-bound function outside the event loop and wait for its result.
+
+    If the awaiting task is cancelled the caller stops waiting, but work that
+    has already started in the pool runs to completion.
+
+    Args:
+        func: Function to run (module-level when CPU_POOL_MODE is "process")
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Return value of func
+    """
+    executor = get_cpu_executor()
+    if executor is None:
+        return func(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_cpu_executor() -> None:
+    """Shut down the shared executor, if it was started."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        logger.info("CPU pool shut down")
@@ -0,0 +1,62 @@
+"""
+Conditional GET support.
+
+Endpoints serving large, rarely changing resources compute a strong ETag
+from the few columns that change whenever the resource does (updated_at and
+status), check If-None-Match before loading the resource, and answer a
+match with an empty 304. Browsers revalidate cached responses this way on
+their own, so navigating back to a report or polling an unchanged analysis
+costs a small query instead of the full payload.
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from app.models.reports import ReportStatus
+
+# Responses that may still change: caches keep them but revalidate before every reuse
+REVALIDATE = "private, no-cache"
+
+# Completed analyses are never changed again, so caches can reuse them without asking
+IMMUTABLE = "private, max-age=86400, immutable"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Compute a strong ETag from the values identifying a representation.
+
+    Include the resource's version (e.g. updated_at and status) and every
+    request option that changes the response body.
+
+    Args:
+        parts: Values identifying the representation
+
+    Returns:
+        Quoted ETag
+    """
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Check whether an If-None-Match header matches an ETag.
+
+    If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+
+    Args:
+        etag: Current ETag of the resource
+        if_none_match: Value of the If-None-Match header
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def analysis_cache_control(analysis_status: Optional[str]) -> str:
+    """Get the Cache-Control value of an analysis in a status."""
+    return IMMUTABLE if analysis_status == ReportStatus.COMPLETED else REVALIDATE
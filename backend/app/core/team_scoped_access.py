@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_current_user
 from app.db.session import get_async_db
 from app.models.team import TeamMemberRole
-from app.services.team.permissions import get_team_member
+from app.services.team.permissions import get_team_role
 
 logger = logging.getLogger(__name__)
 
@@ -90,9 +90,9 @@ class TeamScopedAccess:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Team ID is required")
 
         # Check if the user is a member of the team
-        member = await get_team_member(db, team_id, current_user["id"])
+        role = await get_team_role(db, team_id, current_user["id"])
 
-        if not member:
+        if not role:
             logger.warning(f"User {current_user['id']} denied access to team {team_id} - not a member")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -100,10 +100,10 @@ class TeamScopedAccess:
             )
 
         # Check if the user's role is allowed
-        if member.role not in self.required_roles:
+        if role not in self.required_roles:
             logger.warning(
                 f"User {current_user['id']} denied access to team {team_id} - insufficient role "
-                f"(has {member.role}, needs one of {self.required_roles})"
+                f"(has {role}, needs one of {self.required_roles})"
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -111,7 +111,7 @@ class TeamScopedAccess:
             )
 
         # Add team role to the user object
-        current_user["team_role"] = member.role
+        current_user["team_role"] = role
 
         return current_user
 
@@ -160,9 +160,9 @@ async def check_team_access(
     """
     try:
         # Check if the user is a member of the team
-        member = await get_team_member(db, team_id, user_id)
+        role = await get_team_role(db, team_id, user_id)
 
-        if not member:
+        if not role:
             logger.warning(f"User {user_id} denied access to team {team_id} - not a member")
             return False
 
@@ -171,10 +171,10 @@ async def check_team_access(
             return True
 
         # Check if the user's role is in the allowed roles
-        if member.role not in roles:
+        if role not in roles:
             logger.warning(
                 f"User {user_id} denied access to team {team_id} - insufficient role "
-                f"(has {member.role}, needs one of {roles})"
+                f"(has {role}, needs one of {roles})"
             )
             return False
 
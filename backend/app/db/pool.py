@@ -0,0 +1,127 @@
+"""
+Connection pool instrumentation.
+
+InstrumentedAsyncPool times every checkout from the async engine's pool:
+the wait for a free connection plus, when the pool grows or a connection is
+replaced, the time to open it. PoolMetrics keeps the wait-time statistics
+and combines them with the pool's current occupancy, so pool exhaustion
+under concurrent report generation shows up as rising waits, saturation
+near 1.0 and checkout timeouts instead of requests that just hang.
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Number of recent checkout waits kept for percentiles
+RECENT_CHECKOUTS = 1000
+
+
+class PoolMetrics:
+    """Checkout wait-time statistics for the application's connection pool."""
+
+    _checkouts = 0
+    _timeouts = 0
+    _slow_checkouts = 0
+    _total_wait_seconds = 0.0
+    _max_wait_seconds = 0.0
+    _recent_waits: Deque[float] = deque(maxlen=RECENT_CHECKOUTS)
+
+    @classmethod
+    def record_checkout(cls, pool: Pool, wait_seconds: float) -> None:
+        """
+        Record a successful checkout.
+
+        Args:
+            pool: Pool the connection was taken from
+            wait_seconds: Seconds the checkout took
+        """
+        cls._checkouts += 1
+        cls._total_wait_seconds += wait_seconds
+        cls._max_wait_seconds = max(cls._max_wait_seconds, wait_seconds)
+        cls._recent_waits.append(wait_seconds)
+
+        if wait_seconds >= settings.DB_POOL_SLOW_CHECKOUT_SECONDS:
+            cls._slow_checkouts += 1
+            logger.warning(f"Waited {wait_seconds:.2f}s for a database connection ({pool.status()})")
+
+    @classmethod
+    def record_timeout(cls, pool: Pool) -> None:
+        """
+        Record a checkout that gave up because the pool stayed exhausted.
+
+        Args:
+            pool: Pool that timed out
+        """
+        cls._timeouts += 1
+        logger.error(f"Timed out waiting for a database connection ({pool.status()})")
+
+    @classmethod
+    def get_metrics(cls, pool: Optional[Pool] = None) -> Dict[str, Any]:
+        """
+        Get checkout wait-time statistics and the pool's current occupancy.
+
+        Args:
+            pool: Optional pool to report occupancy for
+
+        Returns:
+            Dictionary with checkout counts, wait times and saturation
+        """
+        recent = sorted(cls._recent_waits)
+        metrics: Dict[str, Any] = {
+            "checkouts": cls._checkouts,
+            "timeouts": cls._timeouts,
+            "slow_checkouts": cls._slow_checkouts,
+            "avg_wait_seconds": (cls._total_wait_seconds / cls._checkouts) if cls._checkouts else 0.0,
+            "max_wait_seconds": cls._max_wait_seconds,
+            "p95_wait_seconds": recent[int(len(recent) * 0.95)] if recent else 0.0,
+        }
+
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            metrics.update(
+                {
+                    "pool_size": pool.size(),
+                    "max_overflow": pool._max_overflow,
+                    "checked_out": checked_out,
+                    "checked_in": pool.checkedin(),
+                    "overflow": pool.overflow(),
+                    "capacity": capacity,
+                    "saturation": (checked_out / capacity) if capacity else 0.0,
+                }
+            )
+
+        return metrics
+
+    @classmethod
+    def reset(cls) -> None:
+        """Reset all statistics."""
+        cls._checkouts = 0
+        cls._timeouts = 0
+        cls._slow_checkouts = 0
+        cls._total_wait_seconds = 0.0
+        cls._max_wait_seconds = 0.0
+        cls._recent_waits = deque(maxlen=RECENT_CHECKOUTS)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Async queue pool that records checkout wait times in PoolMetrics."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            PoolMetrics.record_timeout(self)
+            raise
+        PoolMetrics.record_checkout(self, time.perf_counter() - started)
+        return connection
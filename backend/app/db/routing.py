@@ -0,0 +1,119 @@
+"""
+Read-replica routing with read-your-writes.
+
+Read-only endpoints take their session from get_read_db, which uses the
+replica (DATABASE_REPLICA_URL) when one is configured. A replica lags the
+primary, so a user who just changed something could read the old state
+back. To avoid that, every request with an unsafe method marks its user as
+a recent writer, and that user's reads stay on the primary for
+DB_REPLICA_STICKY_SECONDS. The mark is kept in-process per user and sent
+back as a short-lived cookie so a browser stays on the primary even when
+its next request is served by another worker.
+"""
+
+import hashlib
+import time
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from jose import jwt
+
+from app.config import settings
+
+# Requests with these methods don't write, everything else marks the user as a recent writer
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Cookie telling any worker that the client wrote recently
+PRIMARY_COOKIE = "db_read_primary"
+
+
+def routing_key(request: Request) -> Optional[str]:
+    """
+    Get the key identifying the user who sent a request.
+
+    The token's subject is read without verifying it: the key only decides
+    which database serves the request, and authentication still happens in
+    the endpoint's own dependencies.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        The user's ID, a hash of an unparseable token, or None for anonymous requests
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        subject = jwt.get_unverified_claims(token).get("sub")
+    except Exception:
+        subject = None
+    return subject or hashlib.sha256(token.encode()).hexdigest()
+
+
+class RecentWrites:
+    """Users whose reads must stay on the primary because they wrote recently."""
+
+    _primary_until: Dict[str, float] = {}
+
+    @classmethod
+    def record(cls, key: str) -> None:
+        """
+        Keep a user's reads on the primary for the sticky window.
+
+        Args:
+            key: Routing key of the user who wrote
+        """
+        now = time.monotonic()
+        cls._primary_until[key] = now + settings.DB_REPLICA_STICKY_SECONDS
+
+        # Forget expired entries once the map grows, so it stays proportional to active writers
+        if len(cls._primary_until) > 1000:
+            cls._primary_until = {k: until for k, until in cls._primary_until.items() if until > now}
+
+    @classmethod
+    def is_recent(cls, key: Optional[str]) -> bool:
+        """Check whether a user wrote within the sticky window."""
+        return key is not None and cls._primary_until.get(key, 0.0) > time.monotonic()
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget all writers."""
+        cls._primary_until = {}
+
+
+def record_write(request: Request, response: Response) -> None:
+    """
+    Mark the sender of a writing request so their next reads use the primary.
+
+    Args:
+        request: Request that may have written
+        response: Response the cookie is set on
+    """
+    if request.method in SAFE_METHODS:
+        return
+
+    key = routing_key(request)
+    if key:
+        RecentWrites.record(key)
+    response.set_cookie(
+        PRIMARY_COOKIE,
+        "1",
+        max_age=max(int(settings.DB_REPLICA_STICKY_SECONDS), 1),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def should_read_primary(request: Request) -> bool:
+    """
+    Check whether a read-only request must still be served by the primary.
+
+    Args:
+        request: Incoming read-only request
+
+    Returns:
+        True if the sender wrote within the sticky window
+    """
+    return PRIMARY_COOKIE in request.cookies or RecentWrites.is_recent(routing_key(request))
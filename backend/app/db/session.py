@@ -2,11 +2,17 @@
 Database session and connection management.
 """
 
+from typing import Any, Dict, Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.db.pool import InstrumentedAsyncPool, PoolMetrics
+from app.db.routing import should_read_primary
 
 
 # Convert SQL Alchemy URL to async version if needed
@@ -16,12 +22,26 @@ def get_async_db_url(url):
     return url
 
 
-# Create SQLAlchemy engines
-engine = create_engine(str(settings.DATABASE_URL))
-async_engine = create_async_engine(get_async_db_url(str(settings.DATABASE_URL)))
+def get_pool_options() -> Dict[str, Any]:
+    """Get the connection pool options shared by the sync and async engines."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Create the async engine used by the application
+async_engine = create_async_engine(
+    get_async_db_url(str(settings.DATABASE_URL)),
+    poolclass=InstrumentedAsyncPool,
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    **get_pool_options(),
+)
 
 # Create session factories
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 AsyncSessionLocal = sessionmaker(
     class_=AsyncSession,
     autocommit=False,
@@ -30,13 +50,69 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Optional read replica for read-only endpoints (see app/db/routing.py); its
+# pool is not instrumented so PoolMetrics keeps describing the primary
+replica_engine: Optional[AsyncEngine] = None
+ReplicaSessionLocal: Optional[sessionmaker] = None
+
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        get_async_db_url(str(settings.DATABASE_REPLICA_URL)),
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+        **get_pool_options(),
+    )
+    ReplicaSessionLocal = sessionmaker(
+        class_=AsyncSession,
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine,
+        expire_on_commit=False,
+    )
+
+# The sync engine is only used by a few scripts, so it is created on first use
+_engine: Optional[Engine] = None
+_session_local: Optional[sessionmaker] = None
+
+
+def get_sync_engine() -> Engine:
+    """Get the sync engine, creating it on first use."""
+    global _engine
+
+    if _engine is None:
+        _engine = create_engine(str(settings.DATABASE_URL), **get_pool_options())
+    return _engine
+
+
+def get_sync_sessionmaker() -> sessionmaker:
+    """Get the sync session factory, creating it on first use."""
+    global _session_local
+
+    if _session_local is None:
+        _session_local = sessionmaker(autocommit=False, autoflush=False, bind=get_sync_engine())
+    return _session_local
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from app.db.session import engine, SessionLocal` working without
+    # connecting a sync engine at import time
+    if name == "engine":
+        return get_sync_engine()
+    if name == "SessionLocal":
+        return get_sync_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_pool_metrics() -> Dict[str, Any]:
+    """Get checkout wait times and occupancy of the async engine's pool."""
+    return PoolMetrics.get_metrics(async_engine.pool)
+
 
 def get_db():
     """
     Dependency for FastAPI to get a database session.
     Yields a session and ensures it's closed after use.
     """
-    db = SessionLocal()
+    db = get_sync_sessionmaker()()
     try:
         yield db
     finally:
@@ -53,3 +129,24 @@ async def get_async_db():
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db(request: Request):
+    """
+    Dependency for FastAPI to get an async database session for read-only endpoints.
+
+    Uses the read replica when one is configured, unless the user wrote
+    within the sticky window, in which case the primary serves the request
+    so the user reads their own writes. Endpoints using this dependency must
+    not write.
+    """
+    if ReplicaSessionLocal is None or should_read_primary(request):
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = ReplicaSessionLocal
+
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
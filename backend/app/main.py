@@ -3,12 +3,14 @@ import logging
 import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import router as api_router
 from app.config import settings
 from app.core.env_test import check_env
+from app.db.routing import record_write
+from app.services.team.permissions import team_role_memo
 
 # Configure logging
 logging.basicConfig(
@@ -40,6 +42,24 @@ async def lifespan(app: FastAPI):
 
         logger.info("Started Slack background tasks")
 
+    if settings.ENABLE_SCHEDULED_REPORTS:
+        from app.services.reports.scheduled_reports import schedule_report_tasks
+
+        # Start the runner that materialises recurring reports
+        task = asyncio.create_task(schedule_report_tasks())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+        logger.info("Started scheduled report runner")
+
+    from app.core.cache import get_cache_backend, listen_for_invalidations
+
+    if get_cache_backend().shared:
+        # Drop local copies of entries other workers invalidate
+        task = asyncio.create_task(listen_for_invalidations())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
     yield
 
     # Shutdown: Cancel any running background tasks
@@ -51,6 +71,20 @@ async def lifespan(app: FastAPI):
         await asyncio.gather(*background_tasks, return_exceptions=True)
         logger.info("Background tasks cancelled")
 
+    from app.core.cpu_pool import shutdown_cpu_executor
+
+    shutdown_cpu_executor()
+
+    from app.core.cache import close_cache_backend
+
+    await close_cache_backend()
+
+    from app.db.session import async_engine, replica_engine
+
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -95,6 +129,24 @@ app.add_middleware(
 )
 
 
+# Keep users on the primary database right after they write, so reads
+# routed to the replica can't return data older than their own changes
+if settings.DATABASE_REPLICA_URL:
+
+    @app.middleware("http")
+    async def route_reads_after_writes(request: Request, call_next):
+        response = await call_next(request)
+        record_write(request, response)
+        return response
+
+
+# Resolve each team role once per request, however many permission checks the endpoint makes
+@app.middleware("http")
+async def memoize_team_roles(request: Request, call_next):
+    with team_role_memo():
+        return await call_next(request)
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -117,6 +169,38 @@ async def health_check():
     return {"status": "ok"}
 
 
+# Database pool telemetry: checkout wait times, saturation and timeouts
+@app.get("/health/db-pool")
+async def db_pool_metrics():
+    from app.db.session import get_pool_metrics
+
+    return get_pool_metrics()
+
+
+# Analysis channel data cache: hits, misses, evictions and size
+@app.get("/health/channel-data-cache")
+async def channel_data_cache_metrics():
+    from app.services.analysis.data_cache import ChannelDataCache
+
+    return ChannelDataCache.get_metrics()
+
+
+# Slack user directory: lookups served from memory, loading queries and size
+@app.get("/health/slack-user-directory")
+async def slack_user_directory_metrics():
+    from app.services.slack.user_directory import SlackUserDirectory
+
+    return SlackUserDirectory.get_metrics()
+
+
+# Integration credential cache: hits, misses and shared loads
+@app.get("/health/integration-credential-cache")
+async def integration_credential_cache_metrics():
+    from app.services.integration.credentials import IntegrationCredentialCache
+
+    return IntegrationCredentialCache.get_metrics()
+
+
 # CORS debug endpoint - useful for troubleshooting CORS issues
 @app.get("/cors-debug")
 async def cors_debug():
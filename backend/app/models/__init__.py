@@ -21,6 +21,8 @@ from app.models.reports import (  # noqa: F401
     AnalysisResourceType,
     AnalysisType,
     CrossResourceReport,
+    ReportFrequency,
+    ReportSchedule,
     ReportStatus,
     ResourceAnalysis,
 )
@@ -28,9 +30,11 @@ from app.models.reports import (  # noqa: F401
 # Import models to make them discoverable
 from app.models.slack import (  # noqa: F401; Legacy models removed: SlackAnalysis, SlackContribution, analysis_channels
     SlackChannel,
+    SlackChannelDailyActivity,
     SlackMessage,
     SlackReaction,
     SlackUser,
+    SlackUserDailyActivity,
     SlackWorkspace,
 )
 from app.models.team import Team, TeamMember, TeamMemberRole  # noqa: F401
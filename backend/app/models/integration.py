@@ -298,5 +298,9 @@ class IntegrationEvent(Base, BaseModel):
     integration: Mapped["Integration"] = relationship("Integration", back_populates="events")
     affected_team: Mapped[Optional["Team"]] = relationship("Team")
 
+    # Matches ORDER BY created_at DESC within an integration, so each page of
+    # the event log is an index range scan
+    __table_args__ = (Index("ix_integrationevent_integration_id_created_at", "integration_id", "created_at"),)
+
     def __repr__(self) -> str:
         return f"<IntegrationEvent {self.event_type} for {self.integration_id}>"
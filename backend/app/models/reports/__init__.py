@@ -9,6 +9,7 @@ from app.models.reports.cross_resource_report import (
     ReportStatus,
     ResourceAnalysis,
 )
+from app.models.reports.report_schedule import ReportFrequency, ReportSchedule
 
 __all__ = [
     "CrossResourceReport",
@@ -16,4 +17,6 @@ __all__ = [
     "ReportStatus",
     "AnalysisResourceType",
     "AnalysisType",
+    "ReportFrequency",
+    "ReportSchedule",
 ]
@@ -78,6 +78,19 @@ class CrossResourceReport(Base, BaseModel):
     comprehensive_analysis_generated_at = Column(DateTime, nullable=True)
     model_used = Column(String(100), nullable=True)
 
+    # Denormalised analysis counters, kept in step with ResourceAnalysis.status
+    # by app.services.reports.counters so status checks and listings never
+    # have to aggregate over the analyses table.
+    total_resources = Column(Integer, default=0, server_default="0", nullable=False)
+    pending_analyses = Column(Integer, default=0, server_default="0", nullable=False)
+    in_progress_analyses = Column(Integer, default=0, server_default="0", nullable=False)
+    completed_analyses = Column(Integer, default=0, server_default="0", nullable=False)
+    failed_analyses = Column(Integer, default=0, server_default="0", nullable=False)
+    resource_types = Column(JSONB, nullable=True)
+
+    # LLM tokens spent by the report's analyses, checked against the report token budget
+    llm_tokens_used = Column(Integer, default=0, server_default="0", nullable=False)
+
     # Relationships
     team = relationship("Team", back_populates="cross_resource_reports")
     resource_analyses: Mapped[List["ResourceAnalysis"]] = relationship(
@@ -0,0 +1,64 @@
+"""
+SQLAlchemy models for recurring (scheduled) reports.
+"""
+
+import enum
+
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Index, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+from app.models.base import BaseModel
+from app.models.reports.cross_resource_report import AnalysisType
+
+
+class ReportFrequency(str, enum.Enum):
+    """How often a scheduled report is generated."""
+
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+
+
+class ReportSchedule(Base, BaseModel):
+    """
+    Model for a recurring channel report.
+
+    Each run materialises a regular CrossResourceReport covering the period
+    that just ended (the previous week or calendar month). Runs are placed
+    inside an off-peak window, and channel data is synced ahead of time so
+    the report is ready when users open it.
+    """
+
+    # Foreign key to team
+    team_id = Column(UUID(as_uuid=True), ForeignKey("team.id"), nullable=False, index=True)
+
+    # Schedule metadata
+    title = Column(String(255), nullable=True)
+    description = Column(Text, nullable=True)
+    frequency = Column(Enum(ReportFrequency, name="reportfrequency"), nullable=False)
+    created_by_user_id = Column(String(255), nullable=True)
+
+    # Report configuration, mirroring ChannelReportCreate
+    # channels: [{"id": "<channel uuid>", "name": "general", "integration_id": "<integration uuid>"}]
+    channels = Column(JSONB, nullable=False)
+    analysis_type = Column(
+        Enum(AnalysisType, name="analysistype"),
+        default=AnalysisType.CONTRIBUTION,
+        nullable=False,
+    )
+    include_threads = Column(Boolean, default=True, nullable=False)
+    include_reactions = Column(Boolean, default=True, nullable=False)
+
+    # Run bookkeeping
+    next_run_at = Column(DateTime, nullable=False)
+    last_presync_at = Column(DateTime, nullable=True)
+    last_run_at = Column(DateTime, nullable=True)
+    last_report_id = Column(UUID(as_uuid=True), ForeignKey("crossresourcereport.id"), nullable=True)
+
+    # Relationships
+    team = relationship("Team")
+    last_report = relationship("CrossResourceReport")
+
+    # Indexes
+    __table_args__ = (Index("ix_report_schedule_active_next_run", "is_active", next_run_at),)
@@ -10,6 +10,7 @@ from sqlalchemy import (  # noqa: F401
     JSON,
     Boolean,
     Column,
+    Date,
     DateTime,
     Float,
     ForeignKey,
@@ -19,6 +20,7 @@ from sqlalchemy import (  # noqa: F401
     Table,
     Text,
 )
+from sqlalchemy import text as sql_text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, relationship
 
@@ -203,7 +205,8 @@ class SlackMessage(Base, BaseModel):
     reaction_count = Column(Integer, default=0, nullable=False)
 
     # Message timestamp as datetime (for easier querying)
-    message_datetime = Column(DateTime, nullable=False, index=True)
+    # Part of the primary key because slackmessage is range partitioned by it
+    message_datetime = Column(DateTime, primary_key=True, nullable=False, index=True)
 
     # Analysis fields
     is_analyzed = Column(Boolean, default=False, nullable=False)
@@ -214,18 +217,23 @@ class SlackMessage(Base, BaseModel):
     # Foreign keys
     channel_id = Column(UUID(as_uuid=True), ForeignKey("slackchannel.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("slackuser.id"), nullable=True)  # Null for system messages
-    parent_id = Column(UUID(as_uuid=True), ForeignKey("slackmessage.id"), nullable=True)  # For thread replies
+    # No database-level foreign keys can point into the partitioned table, so
+    # parent_id (and SlackReaction.message_id) are plain columns
+    parent_id = Column(UUID(as_uuid=True), nullable=True)  # For thread replies
 
     # Relationships
     channel: Mapped["SlackChannel"] = relationship("SlackChannel", back_populates="messages")
     user: Mapped[Optional["SlackUser"]] = relationship("SlackUser", back_populates="messages")
-    reactions: Mapped[List["SlackReaction"]] = relationship("SlackReaction", back_populates="message")
+    reactions: Mapped[List["SlackReaction"]] = relationship(
+        "SlackReaction",
+        primaryjoin="SlackMessage.id == foreign(SlackReaction.message_id)",
+        back_populates="message",
+    )
     # Self-referential relationship for threading
     parent: Mapped[Optional["SlackMessage"]] = relationship(
         "SlackMessage",
-        foreign_keys=[parent_id],
+        primaryjoin="foreign(SlackMessage.parent_id) == remote(SlackMessage.id)",
         backref="replies",
-        remote_side="SlackMessage.id",
     )
 
     # Indexes for efficient querying
@@ -233,6 +241,33 @@ class SlackMessage(Base, BaseModel):
         Index("ix_slackmessage_channel_id_slack_ts", "channel_id", "slack_ts"),
         Index("ix_slackmessage_user_id_slack_ts", "user_id", "slack_ts"),
         Index("ix_slackmessage_message_datetime", "message_datetime"),
+        Index("ix_slackmessage_channel_id_datetime_id", "channel_id", "message_datetime", "id"),
+        # Partial indexes for thread navigation; the predicates match the
+        # is_(True) filters the queries use, so the planner can pick them
+        # (sql_text because the text column shadows sqlalchemy.text here)
+        Index(
+            "ix_slackmessage_channel_id_thread_parents",
+            "channel_id",
+            "message_datetime",
+            postgresql_where=sql_text("is_thread_parent IS true"),
+        ),
+        Index(
+            "ix_slackmessage_channel_id_thread_ts_replies",
+            "channel_id",
+            "thread_ts",
+            "message_datetime",
+            postgresql_where=sql_text("is_thread_reply IS true"),
+        ),
+        # Trigram indexes for substring search (needs the pg_trgm extension)
+        Index("ix_slackmessage_text_trgm", "text", postgresql_using="gin", postgresql_ops={"text": "gin_trgm_ops"}),
+        Index(
+            "ix_slackmessage_processed_text_trgm",
+            "processed_text",
+            postgresql_using="gin",
+            postgresql_ops={"processed_text": "gin_trgm_ops"},
+        ),
+        # Monthly partitions are managed by app/services/slack/partitions.py
+        {"postgresql_partition_by": "RANGE (message_datetime)"},
     )
 
     def __repr__(self) -> str:
@@ -250,11 +285,15 @@ class SlackReaction(Base, BaseModel):
     reaction_ts = Column(String(50), nullable=True)  # Slack timestamp
 
     # Foreign keys
-    message_id = Column(UUID(as_uuid=True), ForeignKey("slackmessage.id"), nullable=False)
+    message_id = Column(UUID(as_uuid=True), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("slackuser.id"), nullable=False)
 
     # Relationships
-    message: Mapped["SlackMessage"] = relationship("SlackMessage", back_populates="reactions")
+    message: Mapped["SlackMessage"] = relationship(
+        "SlackMessage",
+        primaryjoin="foreign(SlackReaction.message_id) == SlackMessage.id",
+        back_populates="reactions",
+    )
     user: Mapped["SlackUser"] = relationship("SlackUser", back_populates="reactions")
 
     # Ensure uniqueness of reactions per message and user
@@ -272,6 +311,51 @@ class SlackReaction(Base, BaseModel):
         return f"<SlackReaction :{self.emoji_name}: by {self.user_id} on {self.message_id}>"
 
 
+class SlackChannelDailyActivity(Base, BaseModel):
+    """
+    Message activity of a Slack channel on one day (UTC).
+
+    Rollups are rebuilt from slackmessage for the days touched by each ingest,
+    see app/services/slack/rollups.py.
+    """
+
+    channel_id = Column(UUID(as_uuid=True), ForeignKey("slackchannel.id"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    message_count = Column(Integer, default=0, server_default="0", nullable=False)
+    reply_count = Column(Integer, default=0, server_default="0", nullable=False)
+    thread_count = Column(Integer, default=0, server_default="0", nullable=False)
+    reaction_count = Column(Integer, default=0, server_default="0", nullable=False)
+    participant_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (Index("ix_slackchanneldailyactivity_channel_id_day", "channel_id", "day", unique=True),)
+
+    def __repr__(self) -> str:
+        return f"<SlackChannelDailyActivity {self.channel_id} {self.day}: {self.message_count} messages>"
+
+
+class SlackUserDailyActivity(Base, BaseModel):
+    """
+    Message activity of one user in a Slack channel on one day (UTC).
+    """
+
+    channel_id = Column(UUID(as_uuid=True), ForeignKey("slackchannel.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("slackuser.id"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    message_count = Column(Integer, default=0, server_default="0", nullable=False)
+    reply_count = Column(Integer, default=0, server_default="0", nullable=False)
+    thread_count = Column(Integer, default=0, server_default="0", nullable=False)
+    reaction_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        Index("ix_slackuserdailyactivity_channel_id_day_user_id", "channel_id", "day", "user_id", unique=True),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SlackUserDailyActivity {self.user_id} in {self.channel_id} {self.day}: {self.message_count} messages>"
+
+
 # Legacy model classes (SlackAnalysis, SlackContribution, SlackChannelAnalysis) removed
 # These have been replaced by the resource-based analysis system
 # See models/reports/cross_resource_report.py for the new model structure
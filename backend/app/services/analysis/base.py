@@ -1,6 +1,7 @@
 """Base service for resource analysis."""
 
 import abc
+import asyncio
 import logging
 from datetime import datetime
 from typing import Any, Dict, Optional
@@ -9,6 +10,13 @@ from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.reports import ReportStatus, ResourceAnalysis
+from app.services.analysis.budget import (
+    AnalysisBudget,
+    BudgetExceededError,
+    reset_current_budget,
+    set_current_budget,
+)
+from app.services.reports.counters import transition_analysis_status
 
 logger = logging.getLogger(__name__)
 
@@ -91,19 +99,17 @@ class ResourceAnalysisService(abc.ABC):
         Returns:
             Updated ResourceAnalysis object
         """
-        from sqlalchemy import select, update
+        from sqlalchemy import select
 
         logger.info(f"Updating analysis {analysis_id} status to {status}")
 
-        # Update the analysis status
-        await self.db.execute(
-            update(ResourceAnalysis)
-            .where(ResourceAnalysis.id == analysis_id)
-            .values(
-                status=status,
-                # Add error message to results if status is failed
-                results=({"error": message} if status == ReportStatus.FAILED and message else None),
-            )
+        # Update the analysis status together with the report counters
+        await transition_analysis_status(
+            self.db,
+            analysis_id,
+            status,
+            # Add error message to results if status is failed
+            results=({"error": message} if status == ReportStatus.FAILED and message else None),
         )
 
         # Return the updated analysis
@@ -140,14 +146,13 @@ class ResourceAnalysisService(abc.ABC):
         Returns:
             Updated ResourceAnalysis object
         """
-        from sqlalchemy import select, update
+        from sqlalchemy import select
 
         logger.info(f"Storing analysis results for {analysis_id}")
         logger.info(f"Message_count: {message_count}")
 
         update_values = {
             "results": results,
-            "status": ReportStatus.COMPLETED,
             "analysis_generated_at": datetime.utcnow(),
         }
 
@@ -171,10 +176,8 @@ class ResourceAnalysisService(abc.ABC):
         if reaction_count is not None:
             update_values["reaction_count"] = reaction_count
 
-        # Update the analysis
-        await self.db.execute(
-            update(ResourceAnalysis).where(ResourceAnalysis.id == analysis_id).values(**update_values)
-        )
+        # Update the analysis and mark it as completed
+        await transition_analysis_status(self.db, analysis_id, ReportStatus.COMPLETED, **update_values)
 
         # Return the updated analysis
         result = await self.db.execute(select(ResourceAnalysis).where(ResourceAnalysis.id == analysis_id))
@@ -246,6 +249,91 @@ class ResourceAnalysisService(abc.ABC):
 
         return any(phrase in error_message for phrase in retryable_phrases)
 
+    async def record_partial_results(
+        self,
+        analysis_id: UUID,
+        error: BudgetExceededError,
+        partial: Dict[str, Any],
+        budget: AnalysisBudget,
+    ) -> ResourceAnalysis:
+        """
+        Mark an analysis that ran out of budget as failed, keeping what it produced.
+
+        Args:
+            analysis_id: ID of the analysis
+            error: The budget error that stopped the analysis
+            partial: Statistics and results gathered by the phases that completed
+            budget: The analysis budget
+
+        Returns:
+            Updated ResourceAnalysis object
+        """
+        from sqlalchemy import select
+
+        logger.warning(f"Analysis {analysis_id} stopped during {error.phase}: {str(error)}")
+
+        stats = {
+            key: partial[key]
+            for key in ("message_count", "participant_count", "thread_count", "reaction_count")
+            if partial.get(key) is not None
+        }
+
+        # Budget failures are not retried, so record the failure together with the partial results
+        await transition_analysis_status(
+            self.db,
+            analysis_id,
+            ReportStatus.FAILED,
+            results={
+                "error": str(error),
+                "budget_exceeded": {"reason": error.reason, "phase": error.phase},
+                "budget": budget.summary(),
+                "partial": partial,
+            },
+            **stats,
+        )
+
+        result = await self.db.execute(select(ResourceAnalysis).where(ResourceAnalysis.id == analysis_id))
+        return result.scalar_one_or_none()
+
+    async def record_cancellation(
+        self,
+        analysis_id: UUID,
+        partial: Dict[str, Any],
+        budget: AnalysisBudget,
+    ) -> None:
+        """
+        Mark a cancelled analysis as failed, keeping what it produced.
+
+        The cancellation may have interrupted a query, so the transaction is
+        rolled back first. The caller is responsible for committing.
+
+        Args:
+            analysis_id: ID of the analysis
+            partial: Statistics and results gathered by the phases that completed
+            budget: The analysis budget
+        """
+        logger.info(f"Analysis {analysis_id} was cancelled during {budget.phase or 'setup'}")
+
+        stats = {
+            key: partial[key]
+            for key in ("message_count", "participant_count", "thread_count", "reaction_count")
+            if partial.get(key) is not None
+        }
+
+        await self.db.rollback()
+        await transition_analysis_status(
+            self.db,
+            analysis_id,
+            ReportStatus.FAILED,
+            results={
+                "error": "Analysis was cancelled",
+                "cancelled": {"phase": budget.phase},
+                "budget": budget.summary(),
+                "partial": partial,
+            },
+            **stats,
+        )
+
     async def run_analysis(
         self,
         analysis_id: UUID,
@@ -255,6 +343,7 @@ class ResourceAnalysisService(abc.ABC):
         period_start: datetime,
         period_end: datetime,
         parameters: Optional[Dict[str, Any]] = None,
+        budget: Optional[AnalysisBudget] = None,
     ) -> ResourceAnalysis:
         """
         Run a complete analysis on a resource.
@@ -267,6 +356,11 @@ class ResourceAnalysisService(abc.ABC):
         5. Store the results
         6. Update status to completed
 
+        Fetching, processing and the LLM call run within the analysis budget.
+        If the budget runs out or the analysis is cancelled, the analysis is
+        marked as failed and whatever the completed phases produced is kept
+        in its results.
+
         Args:
             analysis_id: ID of the analysis to run
             resource_id: ID of the resource to analyze
@@ -275,33 +369,57 @@ class ResourceAnalysisService(abc.ABC):
             period_start: Start date for the analysis period
             period_end: End date for the analysis period
             parameters: Optional parameters for the analysis
+            budget: Optional deadline and token budget (defaults to the configured limits)
 
         Returns:
             Completed ResourceAnalysis object
         """
+        budget = budget or AnalysisBudget.from_settings()
+        budget_token = set_current_budget(budget)
+        partial: Dict[str, Any] = {}
+
         try:
             # Update status to in progress
             await self.update_analysis_status(analysis_id=analysis_id, status=ReportStatus.IN_PROGRESS)
 
             # Fetch data from the resource
-            data = await self.fetch_data(
-                resource_id=resource_id,
-                start_date=period_start,
-                end_date=period_end,
-                integration_id=integration_id,
-                parameters=parameters or {},
+            data = await budget.run_phase(
+                "fetch",
+                self.fetch_data(
+                    resource_id=resource_id,
+                    start_date=period_start,
+                    end_date=period_end,
+                    integration_id=integration_id,
+                    parameters=parameters or {},
+                ),
             )
             logger.debug(f"******Fetched data for analysis {analysis_id}: {data}")
             logger.debug(f"Message metadata: {data.get('metadata')}")
 
+            metadata = (data.get("metadata") or {}) if isinstance(data, dict) else {}
+            partial.update(
+                {
+                    "message_count": metadata.get("message_count"),
+                    "participant_count": metadata.get("user_count"),
+                    "thread_count": metadata.get("thread_count"),
+                    "reaction_count": metadata.get("reaction_count"),
+                }
+            )
+
             # Process the data for analysis
-            processed_data = await self.prepare_data_for_analysis(data=data, analysis_type=analysis_type)
+            processed_data = await budget.run_phase(
+                "prompt_build",
+                self.prepare_data_for_analysis(data=data, analysis_type=analysis_type),
+            )
 
             # Send to LLM for analysis
-            results = await self.analyze_data(
-                data=processed_data,
-                analysis_type=analysis_type,
-                parameters=parameters or {},
+            results = await budget.run_phase(
+                "llm",
+                self.analyze_data(
+                    data=processed_data,
+                    analysis_type=analysis_type,
+                    parameters=parameters or {},
+                ),
             )
 
             # Extract specific sections from the results
@@ -333,5 +451,15 @@ class ResourceAnalysisService(abc.ABC):
             logger.info(f"Analysis {analysis_id} completed successfully")
             return analysis
 
+        except BudgetExceededError as e:
+            return await self.record_partial_results(analysis_id, e, partial, budget)
+
+        except asyncio.CancelledError:
+            await self.record_cancellation(analysis_id, partial, budget)
+            raise
+
         except Exception as e:
             return await self.handle_errors(error=e, analysis_id=analysis_id)
+
+        finally:
+            reset_current_budget(budget_token)
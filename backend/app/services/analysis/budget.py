@@ -0,0 +1,210 @@
+"""
+Deadline and token budgets for resource analyses.
+
+An AnalysisBudget bounds the wall-clock time and LLM tokens one analysis may
+spend. Each phase (sync, fetch, prompt build, LLM call) runs through
+run_phase, which cancels the phase when the deadline passes; cancellation
+propagates into in-flight HTTP requests, so a hung sync or a slow model
+releases its worker slot on time. The budget of the running analysis is
+available through get_current_budget, which lets the LLM client cap the
+completion size and record token usage without threading it through every
+call signature.
+"""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_current_budget: ContextVar[Optional["AnalysisBudget"]] = ContextVar("analysis_budget", default=None)
+
+
+class BudgetExceededError(Exception):
+    """Raised when an analysis runs past its deadline or token budget."""
+
+    def __init__(self, reason: str, phase: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.phase = phase
+
+
+class AnalysisBudget:
+    """Wall-clock deadline and token allowance for a single analysis."""
+
+    def __init__(
+        self,
+        timeout_seconds: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        """
+        Initialize the budget.
+
+        Args:
+            timeout_seconds: Seconds the analysis may run from now (None for no limit)
+            max_tokens: LLM tokens (prompt + completion) the analysis may use (None for no limit)
+            deadline: Optional absolute time.monotonic() deadline, e.g. the report's deadline
+        """
+        self.started_at = time.monotonic()
+        deadlines = [d for d in (deadline, self.started_at + timeout_seconds if timeout_seconds else None) if d]
+        self.deadline = min(deadlines) if deadlines else None
+        self.max_tokens = max_tokens
+        self.tokens_used = 0
+        self.phase: Optional[str] = None
+        self.phase_seconds: Dict[str, float] = {}
+
+    @classmethod
+    def from_settings(cls, report_deadline: Optional[float] = None) -> "AnalysisBudget":
+        """
+        Create a budget from the configured per-analysis limits.
+
+        Args:
+            report_deadline: Optional time.monotonic() deadline of the analysis' report
+
+        Returns:
+            New AnalysisBudget
+        """
+        return cls(
+            timeout_seconds=settings.ANALYSIS_TIMEOUT_SECONDS or None,
+            max_tokens=settings.ANALYSIS_MAX_TOKENS or None,
+            deadline=report_deadline,
+        )
+
+    def remaining_seconds(self) -> Optional[float]:
+        """Get the seconds left before the deadline, or None if there is no deadline."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def remaining_tokens(self) -> Optional[int]:
+        """Get the tokens left in the budget, or None if there is no token limit."""
+        if self.max_tokens is None:
+            return None
+        return max(self.max_tokens - self.tokens_used, 0)
+
+    def limit_tokens(self, max_tokens: Optional[int]) -> None:
+        """
+        Tighten the token allowance, e.g. to what is left of the report's budget.
+
+        Args:
+            max_tokens: New upper bound on the tokens this analysis may use
+        """
+        if max_tokens is not None:
+            self.max_tokens = max_tokens if self.max_tokens is None else min(self.max_tokens, max_tokens)
+
+    def check_deadline(self, phase: str) -> None:
+        """
+        Raise if the deadline has already passed.
+
+        Args:
+            phase: Phase about to start
+        """
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise BudgetExceededError("deadline", phase, f"Analysis deadline exceeded before {phase}")
+
+    def check_tokens(self, phase: str, estimated_tokens: int) -> None:
+        """
+        Raise if an estimated number of tokens does not fit in the budget.
+
+        Args:
+            phase: Phase that needs the tokens
+            estimated_tokens: Estimated tokens the phase will use
+        """
+        remaining = self.remaining_tokens()
+        if remaining is not None and estimated_tokens > remaining:
+            raise BudgetExceededError(
+                "tokens",
+                phase,
+                f"Analysis token budget exceeded: {phase} needs ~{estimated_tokens} tokens, {remaining} left",
+            )
+
+    def record_tokens(self, tokens: int) -> None:
+        """
+        Record tokens spent by an LLM call.
+
+        Args:
+            tokens: Tokens used (prompt + completion)
+        """
+        self.tokens_used += max(int(tokens or 0), 0)
+
+    async def run_phase(self, phase: str, awaitable: Awaitable[T]) -> T:
+        """
+        Run one phase of the analysis within the remaining time.
+
+        The phase is cancelled when the deadline passes, which also cancels
+        any HTTP request it has in flight.
+
+        Args:
+            phase: Name of the phase (sync, fetch, prompt_build, llm)
+            awaitable: Coroutine running the phase
+
+        Returns:
+            Result of the phase
+
+        Raises:
+            BudgetExceededError: If the deadline passes before or during the phase
+        """
+        self.phase = phase
+        try:
+            self.check_deadline(phase)
+        except BudgetExceededError:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise
+
+        started = time.monotonic()
+        try:
+            remaining = self.remaining_seconds()
+            if remaining is None:
+                return await awaitable
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError:
+            logger.warning(f"Analysis deadline exceeded during {phase}")
+            raise BudgetExceededError("deadline", phase, f"Analysis deadline exceeded during {phase}")
+        finally:
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + time.monotonic() - started
+
+    def summary(self) -> Dict[str, Any]:
+        """Get a JSON-serialisable summary of the budget and what was spent."""
+        return {
+            "elapsed_seconds": round(time.monotonic() - self.started_at, 3),
+            "remaining_seconds": self.remaining_seconds(),
+            "tokens_used": self.tokens_used,
+            "max_tokens": self.max_tokens,
+            "phase_seconds": {phase: round(seconds, 3) for phase, seconds in self.phase_seconds.items()},
+        }
+
+
+def get_current_budget() -> Optional[AnalysisBudget]:
+    """Get the budget of the analysis running in the current context, if any."""
+    return _current_budget.get()
+
+
+def set_current_budget(budget: Optional[AnalysisBudget]):
+    """
+    Make a budget the current one for this context.
+
+    Args:
+        budget: Budget to use
+
+    Returns:
+        Token to pass to reset_current_budget
+    """
+    return _current_budget.set(budget)
+
+
+def reset_current_budget(token) -> None:
+    """Restore the budget that was current before set_current_budget."""
+    _current_budget.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of LLM tokens in a text (~4 characters per token)."""
+    return len(text) // 4 + 1
@@ -1,26 +1,140 @@
 """
 Channel data cache to reduce redundant fetching during analysis.
+
+Entries are kept in least-recently-used order in an OrderedDict, so lookups,
+inserts and evictions are O(1). The cache is bounded by an estimate of the
+bytes its payloads take (CHANNEL_DATA_CACHE_MAX_BYTES) and by a number of
+entries, and entries expire after CHANNEL_DATA_CACHE_TTL_SECONDS, or after
+CHANNEL_DATA_CACHE_HISTORICAL_TTL_SECONDS for periods that ended more than
+a day ago. Syncing a channel invalidates its entries either way.
+
+get_or_load loads each key once when several analyses miss it at the same
+time: the first one loads the data and the others wait for its result. A
+request for a period inside a cached period of the same channel is served
+by slicing the cached messages, as long as the cached data was not cut off
+by a message limit.
+
+With a shared cache backend (CACHE_BACKEND=redis), loaded data is also
+stored there, so a period loaded by one worker is a hit for the others, and
+invalidate_everywhere drops a channel's data from every worker.
 """
 
+import json
 import logging
 import time
-from datetime import datetime
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.cache import Cache, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Periods that ended longer ago than this use the historical TTL
+HISTORICAL_AFTER = timedelta(days=1)
+
+
+@dataclass
+class _Entry:
+    """A cached channel payload."""
+
+    data: Dict[str, Any]
+    size: int
+    expires_at: float
+    channel_id: str
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+    include_threads: bool
+    complete: bool
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Drop the timezone of a datetime, the way the message queries compare them."""
+    if value is not None and value.tzinfo:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def _estimate_size(data: Dict[str, Any]) -> int:
+    """Estimate the memory a payload takes by the size of its JSON encoding."""
+    return len(json.dumps(data, default=str))
+
+
+def _ttl(end_date: Optional[datetime]) -> float:
+    """Get the configured lifetime of the data of a period."""
+    if end_date is not None and _naive(end_date) < datetime.utcnow() - HISTORICAL_AFTER:
+        return settings.CHANNEL_DATA_CACHE_HISTORICAL_TTL_SECONDS
+    return settings.CHANNEL_DATA_CACHE_TTL_SECONDS
+
+
+def _copy(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a payload deep enough that callers can't change the cached one.
+
+    Analysis replaces the message list and updates the metadata of the data
+    it is given, so the top level and nested dictionaries are copied; the
+    message and user dictionaries are shared.
+    """
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in data.items()}
+
+
+def _slice(data: Dict[str, Any], start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """
+    Get the channel data of a period from the data of a period containing it.
+
+    Args:
+        data: Channel data as built by SlackChannelAnalysisService.fetch_data
+        start_date: Start of the period
+        end_date: End of the period
+
+    Returns:
+        Channel data with the messages, users, period and counts of the period
+    """
+    start, end = _naive(start_date), _naive(end_date)
+    messages = [message for message in data["messages"] if start <= datetime.fromisoformat(message["timestamp"]) <= end]
+    user_ids = {message["user_id"] for message in messages if message["user_id"]}
+    users = [user for user in data["users"] if user["id"] in user_ids]
+
+    return {
+        **data,
+        "messages": messages,
+        "users": users,
+        "period": {"start": start_date.isoformat(), "end": end_date.isoformat()},
+        "metadata": {
+            **data["metadata"],
+            "message_count": len(messages),
+            "user_count": len(users),
+            "thread_count": sum(1 for message in messages if message["is_thread_parent"]),
+            "reaction_count": sum(message["reaction_count"] or 0 for message in messages),
+        },
+    }
+
 
 class ChannelDataCache:
     """
-    A simple in-memory cache for channel data to avoid redundant fetching
+    A bounded in-memory cache for channel data to avoid redundant fetching
     during multi-channel analysis.
 
     This cache stores channel data with time-based expiration to ensure
     freshness while avoiding duplicate database queries and API calls.
     """
 
-    # Static class variable to hold the cache data
-    _cache: Dict[str, Dict[str, Any]] = {}
+    # Entries by cache key, least recently used first
+    _cache: "OrderedDict[str, _Entry]" = OrderedDict()
+    # Cache keys of each channel, for invalidation and sub-range lookups
+    _channel_keys: Dict[str, Set[str]] = {}
+    # Loads in progress, by cache key
+    _flights = SingleFlight()
+    _size = 0
+
+    _hits = 0
+    _range_hits = 0
+    _misses = 0
+    _coalesced = 0
+    _evictions = 0
+    _expirations = 0
 
     @classmethod
     def get_cache_key(
@@ -59,6 +173,9 @@ class ChannelDataCache:
         """
         Retrieve channel data from cache if available and not expired.
 
+        Data cached for exactly this period is returned as is. Otherwise,
+        complete data cached for a period containing this one is sliced.
+
         Args:
             channel_id: Channel ID
             start_date: Analysis period start date
@@ -70,19 +187,20 @@ class ChannelDataCache:
         """
         cache_key = cls.get_cache_key(channel_id, start_date, end_date, include_threads)
 
-        if cache_key in cls._cache:
-            cache_entry = cls._cache[cache_key]
-            now = time.time()
+        entry = cls._live_entry(cache_key)
+        if entry is not None:
+            cls._hits += 1
+            logger.debug(f"Cache hit for channel {channel_id}")
+            return _copy(entry.data)
 
-            # Check if cache entry has expired (default 5 minute TTL)
-            if now - cache_entry["timestamp"] < 300:  # 5 minutes in seconds
-                logger.info(f"Cache hit for channel {channel_id}")
-                return cache_entry["data"]
-            else:
-                # Remove expired entry
-                logger.info(f"Cache expired for channel {channel_id}")
-                del cls._cache[cache_key]
+        if start_date is not None and end_date is not None:
+            entry = cls._containing_entry(channel_id, start_date, end_date, include_threads)
+            if entry is not None:
+                cls._range_hits += 1
+                logger.debug(f"Cache hit for channel {channel_id} from {entry.start_date} - {entry.end_date}")
+                return _slice(entry.data, start_date, end_date)
 
+        cls._misses += 1
         return None
 
     @classmethod
@@ -93,6 +211,8 @@ class ChannelDataCache:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         include_threads: bool = True,
+        complete: bool = False,
+        ttl: Optional[float] = None,
     ) -> None:
         """
         Store channel data in cache.
@@ -103,33 +223,214 @@ class ChannelDataCache:
             start_date: Analysis period start date
             end_date: Analysis period end date
             include_threads: Whether thread replies are included
+            complete: Whether the data has every message of the period, so
+                shorter periods can be sliced from it
+            ttl: Seconds to keep the data, instead of the configured TTL
         """
         cache_key = cls.get_cache_key(channel_id, start_date, end_date, include_threads)
+        cls._remove(cache_key)
 
-        cls._cache[cache_key] = {"data": data, "timestamp": time.time()}
+        size = _estimate_size(data)
+        if size > settings.CHANNEL_DATA_CACHE_MAX_BYTES:
+            logger.info(f"Not caching data for channel {channel_id}: {size} bytes exceeds the cache size")
+            return
 
-        logger.info(f"Cached data for channel {channel_id}")
+        if ttl is None:
+            ttl = _ttl(end_date)
 
-        # Simple cache size management - keep only the most recent 50 entries
-        if len(cls._cache) > 50:
-            # Sort by timestamp and remove oldest entries
-            sorted_keys = sorted(cls._cache.keys(), key=lambda k: cls._cache[k]["timestamp"])
+        cls._cache[cache_key] = _Entry(
+            data=_copy(data),
+            size=size,
+            expires_at=time.monotonic() + ttl,
+            channel_id=channel_id,
+            start_date=start_date,
+            end_date=end_date,
+            include_threads=include_threads,
+            complete=complete,
+        )
+        cls._channel_keys.setdefault(channel_id, set()).add(cache_key)
+        cls._size += size
+        logger.debug(f"Cached {size} bytes of data for channel {channel_id}")
 
-            # Remove oldest entries to keep cache size at 50
-            for old_key in sorted_keys[: len(cls._cache) - 50]:
-                del cls._cache[old_key]
+        # Evict least recently used entries until the cache is within its limits
+        while cls._size > settings.CHANNEL_DATA_CACHE_MAX_BYTES or len(cls._cache) > (
+            settings.CHANNEL_DATA_CACHE_MAX_ENTRIES
+        ):
+            oldest_key = next(iter(cls._cache))
+            cls._remove(oldest_key)
+            cls._evictions += 1
+
+    @classmethod
+    async def get_or_load(
+        cls,
+        channel_id: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        include_threads: bool,
+        load: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]],
+    ) -> Dict[str, Any]:
+        """
+        Get channel data from cache, loading and caching it on a miss.
+
+        Concurrent misses of the same key share one load: the first caller
+        runs it and the others wait for its result (or its error). With a
+        shared cache backend, data another worker loaded is used before
+        loading it here.
+
+        Args:
+            channel_id: Channel ID
+            start_date: Analysis period start date
+            end_date: Analysis period end date
+            include_threads: Whether thread replies are included
+            load: Coroutine function returning the channel data and whether it
+                is complete (see set)
+
+        Returns:
+            Channel data
+        """
+        data = cls.get(channel_id, start_date, end_date, include_threads)
+        if data is not None:
+            return data
+
+        cache_key = cls.get_cache_key(channel_id, start_date, end_date, include_threads)
+        if cls._flights.is_loading(cache_key):
+            cls._coalesced += 1
+            logger.debug(f"Waiting for the data of channel {channel_id} being loaded by another analysis")
+
+        async def load_data() -> Tuple[Dict[str, Any], bool]:
+            shared = await _shared.get(cache_key) if _shared.backend.shared else None
+            if shared is not None:
+                return shared["data"], shared["complete"]
+            data, complete = await load()
+            if _shared.backend.shared:
+                await _shared.set(cache_key, {"data": data, "complete": complete}, _ttl(end_date))
+            return data, complete
+
+        def store(loaded: Tuple[Dict[str, Any], bool]) -> None:
+            cls.set(channel_id, loaded[0], start_date, end_date, include_threads, complete=loaded[1])
+
+        data, _ = await cls._flights.run(cache_key, load_data, store)
+        return _copy(data)
 
     @classmethod
     def invalidate(cls, channel_id: str) -> None:
         """
         Invalidate all cache entries for a specific channel.
 
+        Loads of the channel still running finish for their callers but
+        aren't cached, since they may have read the data from before a sync.
+
         Args:
             channel_id: Channel ID to invalidate
         """
-        keys_to_remove = [k for k in cls._cache.keys() if k.startswith(f"{channel_id}:")]
+        keys_to_remove = list(cls._channel_keys.get(channel_id, ()))
 
         for key in keys_to_remove:
-            del cls._cache[key]
+            cls._remove(key)
+        # The cache keys of a channel start with its ID (see get_cache_key)
+        cls._flights.forget(key for key in cls._flights.keys() if key.startswith(f"{channel_id}:"))
 
         logger.info(f"Invalidated {len(keys_to_remove)} cache entries for channel {channel_id}")
+
+    @classmethod
+    async def invalidate_everywhere(cls, channel_id: str) -> None:
+        """
+        Invalidate a channel's cache entries in every worker and in the shared cache.
+
+        Args:
+            channel_id: Channel ID to invalidate
+        """
+        cls.invalidate(channel_id)
+        # The cache keys of a channel start with its ID (see get_cache_key)
+        await _shared.invalidate(f"{channel_id}:", prefix=True)
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, Any]:
+        """
+        Get hit, miss and eviction counts and the cache's current size.
+
+        Returns:
+            Dictionary of metrics
+        """
+        lookups = cls._hits + cls._range_hits + cls._misses
+        return {
+            "hits": cls._hits,
+            "range_hits": cls._range_hits,
+            "misses": cls._misses,
+            "hit_ratio": (cls._hits + cls._range_hits) / lookups if lookups else None,
+            "coalesced_loads": cls._coalesced,
+            "evictions": cls._evictions,
+            "expirations": cls._expirations,
+            "entries": len(cls._cache),
+            "bytes": cls._size,
+            "max_bytes": settings.CHANNEL_DATA_CACHE_MAX_BYTES,
+        }
+
+    @classmethod
+    def clear(cls) -> None:
+        """Remove all entries and reset the metrics."""
+        cls._cache = OrderedDict()
+        cls._channel_keys = {}
+        cls._flights.forget()
+        cls._size = 0
+        cls._hits = cls._range_hits = cls._misses = 0
+        cls._coalesced = cls._evictions = cls._expirations = 0
+
+    @classmethod
+    def _live_entry(cls, cache_key: str) -> Optional[_Entry]:
+        """Get an unexpired entry and mark it as recently used, dropping it if it expired."""
+        entry = cls._cache.get(cache_key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            logger.debug(f"Cache expired for channel {entry.channel_id}")
+            cls._remove(cache_key)
+            cls._expirations += 1
+            return None
+
+        cls._cache.move_to_end(cache_key)
+        return entry
+
+    @classmethod
+    def _containing_entry(
+        cls, channel_id: str, start_date: datetime, end_date: datetime, include_threads: bool
+    ) -> Optional[_Entry]:
+        """Get the smallest unexpired complete entry of a channel whose period contains the given one."""
+        start, end = _naive(start_date), _naive(end_date)
+        now = time.monotonic()
+        best_key = None
+        best_span = None
+
+        for key in cls._channel_keys.get(channel_id, ()):
+            entry = cls._cache[key]
+            if not entry.complete or entry.include_threads != include_threads or entry.expires_at <= now:
+                continue
+            if entry.start_date is None or entry.end_date is None:
+                continue
+            if not (_naive(entry.start_date) <= start and end <= _naive(entry.end_date)):
+                continue
+            span = entry.end_date - entry.start_date
+            if best_span is None or span < best_span:
+                best_key, best_span = key, span
+
+        return cls._live_entry(best_key) if best_key is not None else None
+
+    @classmethod
+    def _remove(cls, cache_key: str) -> None:
+        """Remove an entry if it is cached."""
+        entry = cls._cache.pop(cache_key, None)
+        if entry is None:
+            return
+
+        cls._size -= entry.size
+        keys = cls._channel_keys.get(entry.channel_id)
+        if keys is not None:
+            keys.discard(cache_key)
+            if not keys:
+                del cls._channel_keys[entry.channel_id]
+
+
+# Data shared between workers, and invalidations from other workers
+_shared = Cache("channel-data")
+_shared.on_invalidate(lambda key, prefix: ChannelDataCache.invalidate(key.split(":", 1)[0]))
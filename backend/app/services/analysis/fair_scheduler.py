@@ -0,0 +1,270 @@
+"""
+Fair-share admission control for resource analysis tasks.
+
+Analyses are queued per team and admitted by weighted round-robin: on each
+turn a team may start up to its weight in analyses before the next team with
+queued work is served. A global cap bounds the total number of analyses
+running at once, and per-team caps keep one tenant from holding every slot,
+so a team with a 100-channel report cannot starve a single-channel analysis
+of another team.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Union
+from uuid import UUID
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue key for analyses whose team could not be resolved
+UNASSIGNED_TEAM = "unassigned"
+
+
+class TeamQueueFullError(Exception):
+    """Raised when a team already has the maximum number of queued analyses."""
+
+
+class AnalysisTicket:
+    """A queued analysis waiting to be admitted by the fair-share scheduler."""
+
+    def __init__(self, team_key: str, analysis_id: str, future: asyncio.Future):
+        self.team_key = team_key
+        self.analysis_id = analysis_id
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.admitted = False
+        self.released = False
+
+
+class TeamQueueStats:
+    """Queue and wait-time counters for a single team."""
+
+    def __init__(self):
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.last_wait_seconds = 0.0
+
+    def record_wait(self, wait_seconds: float) -> None:
+        """Record how long an admitted analysis waited in the queue."""
+        self.admitted += 1
+        self.total_wait_seconds += wait_seconds
+        self.last_wait_seconds = wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+
+class FairShareScheduler:
+    """
+    Weighted round-robin admission across teams.
+
+    This class keeps its state at class level, like ResourceAnalysisTaskScheduler,
+    since there is one analysis queue per process.
+    """
+
+    _queues: Dict[str, Deque[AnalysisTicket]] = {}
+    _ring: Deque[str] = deque()
+    _credits: Dict[str, int] = {}
+    _running: Dict[str, int] = {}
+    _total_running: int = 0
+    _stats: Dict[str, TeamQueueStats] = {}
+
+    @staticmethod
+    def team_key(team_id: Optional[Union[str, UUID]]) -> str:
+        """Get the queue key for a team ID."""
+        return str(team_id) if team_id else UNASSIGNED_TEAM
+
+    @classmethod
+    def get_team_weight(cls, team_key: str) -> int:
+        """Get the number of analyses a team may start per round-robin turn."""
+        return max(int(settings.ANALYSIS_TEAM_WEIGHTS.get(team_key, 1)), 1)
+
+    @classmethod
+    def enqueue(cls, team_id: Optional[Union[str, UUID]], analysis_id: Union[str, UUID]) -> AnalysisTicket:
+        """
+        Queue an analysis for admission.
+
+        Must be called from within the running event loop.
+
+        Args:
+            team_id: ID of the team that owns the analysis
+            analysis_id: ID of the analysis
+
+        Returns:
+            Ticket to wait on with wait_for_turn
+
+        Raises:
+            TeamQueueFullError: If the team's queue is at its depth limit
+        """
+        key = cls.team_key(team_id)
+        queue = cls._queues.setdefault(key, deque())
+        stats = cls._stats.setdefault(key, TeamQueueStats())
+
+        if len(queue) >= settings.ANALYSIS_TEAM_MAX_QUEUE_DEPTH:
+            stats.rejected += 1
+            raise TeamQueueFullError(
+                f"Team {key} already has {len(queue)} analyses queued "
+                f"(limit {settings.ANALYSIS_TEAM_MAX_QUEUE_DEPTH})"
+            )
+
+        ticket = AnalysisTicket(key, str(analysis_id), asyncio.get_running_loop().create_future())
+        queue.append(ticket)
+        if key not in cls._ring:
+            cls._ring.append(key)
+
+        cls._dispatch()
+        return ticket
+
+    @classmethod
+    async def wait_for_turn(cls, ticket: AnalysisTicket) -> None:
+        """
+        Wait until a ticket is admitted.
+
+        If the waiting task is cancelled the ticket leaves the queue (or gives
+        its slot back if it was admitted at the same moment).
+
+        Args:
+            ticket: Ticket returned by enqueue
+        """
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.admitted:
+                cls.release(ticket)
+            else:
+                queue = cls._queues.get(ticket.team_key)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+            raise
+
+    @classmethod
+    def release(cls, ticket: AnalysisTicket) -> None:
+        """
+        Give back the slot of an admitted ticket and admit the next analyses.
+
+        Args:
+            ticket: Admitted ticket
+        """
+        if not ticket.admitted or ticket.released:
+            return
+
+        ticket.released = True
+        cls._running[ticket.team_key] = max(cls._running.get(ticket.team_key, 0) - 1, 0)
+        cls._total_running = max(cls._total_running - 1, 0)
+        cls._dispatch()
+
+    @classmethod
+    def _admit(cls, ticket: AnalysisTicket) -> None:
+        """Mark a ticket as running and wake its waiter."""
+        wait_seconds = time.monotonic() - ticket.enqueued_at
+
+        ticket.admitted = True
+        cls._running[ticket.team_key] = cls._running.get(ticket.team_key, 0) + 1
+        cls._total_running += 1
+        cls._stats.setdefault(ticket.team_key, TeamQueueStats()).record_wait(wait_seconds)
+        ticket.future.set_result(None)
+
+        logger.debug(f"Admitted analysis {ticket.analysis_id} for team {ticket.team_key} after {wait_seconds:.2f}s")
+
+    @classmethod
+    def _dispatch(cls) -> None:
+        """Admit queued analyses while there are free slots."""
+        blocked = 0
+
+        while cls._ring and cls._total_running < settings.ANALYSIS_MAX_CONCURRENCY and blocked < len(cls._ring):
+            key = cls._ring[0]
+            queue = cls._queues.get(key)
+
+            # Drop cancelled waiters at the head of the queue
+            while queue and queue[0].future.done():
+                queue.popleft()
+
+            if not queue:
+                cls._ring.popleft()
+                cls._credits.pop(key, None)
+                continue
+
+            # Team is at its concurrency cap: its turn passes to the next team
+            if cls._running.get(key, 0) >= settings.ANALYSIS_TEAM_MAX_CONCURRENCY:
+                cls._ring.rotate(-1)
+                cls._credits.pop(key, None)
+                blocked += 1
+                continue
+
+            blocked = 0
+            cls._admit(queue.popleft())
+
+            credits = cls._credits.get(key, cls.get_team_weight(key)) - 1
+            if not queue:
+                cls._ring.popleft()
+                cls._credits.pop(key, None)
+            elif credits <= 0:
+                cls._ring.rotate(-1)
+                cls._credits.pop(key, None)
+            else:
+                cls._credits[key] = credits
+
+    @classmethod
+    def is_queued(cls, analysis_id: Union[str, UUID]) -> bool:
+        """Check whether an analysis is waiting for admission."""
+        analysis_id_str = str(analysis_id)
+        return any(
+            ticket.analysis_id == analysis_id_str and not ticket.future.done()
+            for queue in cls._queues.values()
+            for ticket in queue
+        )
+
+    @classmethod
+    def get_team_metrics(cls, team_id: Optional[Union[str, UUID]]) -> Dict[str, Any]:
+        """
+        Get queue and wait-time metrics for a team.
+
+        Args:
+            team_id: ID of the team
+
+        Returns:
+            Dictionary with queue depth, running count and wait-time statistics
+        """
+        key = cls.team_key(team_id)
+        queue = [ticket for ticket in cls._queues.get(key, ()) if not ticket.future.done()]
+        stats = cls._stats.get(key) or TeamQueueStats()
+        now = time.monotonic()
+
+        return {
+            "team_id": key,
+            "queued": len(queue),
+            "running": cls._running.get(key, 0),
+            "admitted": stats.admitted,
+            "rejected": stats.rejected,
+            "avg_wait_seconds": (stats.total_wait_seconds / stats.admitted) if stats.admitted else 0.0,
+            "max_wait_seconds": stats.max_wait_seconds,
+            "last_wait_seconds": stats.last_wait_seconds,
+            "oldest_queued_seconds": (now - queue[0].enqueued_at) if queue else 0.0,
+            "weight": cls.get_team_weight(key),
+            "concurrency_limit": settings.ANALYSIS_TEAM_MAX_CONCURRENCY,
+            "queue_limit": settings.ANALYSIS_TEAM_MAX_QUEUE_DEPTH,
+        }
+
+    @classmethod
+    def get_all_metrics(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        Get queue and wait-time metrics for every team seen by the scheduler.
+
+        Returns:
+            Dictionary of team key to team metrics
+        """
+        return {key: cls.get_team_metrics(key) for key in cls._stats}
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget all queued work and statistics (used by tests)."""
+        cls._queues.clear()
+        cls._ring.clear()
+        cls._credits.clear()
+        cls._running.clear()
+        cls._total_running = 0
+        cls._stats.clear()
@@ -2,17 +2,19 @@
 
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cpu_pool import run_cpu_bound
 from app.models.integration import Integration
 from app.models.reports import AnalysisType
-from app.models.slack import SlackChannel, SlackUser
+from app.models.slack import SlackChannel, SlackUser, SlackWorkspace
 from app.services.analysis.base import ResourceAnalysisService
 from app.services.analysis.data_cache import ChannelDataCache
+from app.services.integration.credentials import IntegrationCredentialCache
 from app.services.llm.openrouter import OpenRouterService
 from app.services.slack.messages import SlackMessageService, get_channel_messages
 
@@ -62,18 +64,43 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
         resource_id_str = str(resource_id)
         logger.info(f"Fetching data for Slack channel {resource_id_str}")
 
-        # OPTIMIZATION: Check cache first
+        # OPTIMIZATION: Use the cache, so concurrent analyses of a channel load its data once
         include_threads = parameters.get("include_threads", True) if parameters else True
-        cached_data = ChannelDataCache.get(
+        return await ChannelDataCache.get_or_load(
             channel_id=resource_id_str,
             start_date=start_date,
             end_date=end_date,
             include_threads=include_threads,
+            load=lambda: self._load_channel_data(
+                resource_id, start_date, end_date, integration_id, parameters, include_threads
+            ),
         )
 
-        if cached_data:
-            logger.info(f"Using cached data for channel {resource_id_str}")
-            return cached_data
+    async def _load_channel_data(
+        self,
+        resource_id: UUID,
+        start_date: datetime,
+        end_date: datetime,
+        integration_id: UUID,
+        parameters: Optional[Dict[str, Any]],
+        include_threads: bool,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Load the data of a Slack channel within a date range from the database.
+
+        Args:
+            resource_id: Channel ID to analyze
+            start_date: Start date for the analysis period
+            end_date: End date for the analysis period
+            integration_id: Integration ID for the Slack workspace
+            parameters: Additional parameters for data fetching
+            include_threads: Whether thread replies are included
+
+        Returns:
+            Tuple of the channel data and whether it has every message of the
+            period (False when the message limit cut it off)
+        """
+        resource_id_str = str(resource_id)
 
         # Not in cache, need to fetch data from database
         # Get the Slack channel
@@ -84,43 +111,19 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
             logger.error(f"Channel {resource_id} not found")
             raise ValueError(f"Channel {resource_id} not found")
 
-        # Get the integration (Slack workspace)
-        integration_result = await self.db.execute(select(Integration).where(Integration.id == integration_id))
-        integration = integration_result.scalar_one_or_none()
-
-        if not integration:
-            logger.error(f"Integration {integration_id} not found")
-            raise ValueError(f"Integration {integration_id} not found")
+        # Get the integration's Slack workspace, looked up once for all channels of a report
+        workspace = await IntegrationCredentialCache.get_or_load(
+            integration_id, "slack_workspace", lambda: self._get_integration_workspace(integration_id)
+        )
+        workspace_id = workspace["workspace_id"]
 
         # Extract parameters
         message_limit = parameters.get("message_limit", 1000) if parameters else 1000
 
-        # Get messages within the date range
-        # First, we need to get the SlackWorkspace.id using the integration.workspace_id
-        if not integration.workspace_id:
-            logger.error(f"Integration {integration_id} has no workspace_id")
-            raise ValueError(f"Integration {integration_id} has no workspace_id")
-
-        # Query the SlackWorkspace table to get the workspace by slack_id
-        from app.models.slack import SlackWorkspace
-
-        workspace_result = await self.db.execute(
-            select(SlackWorkspace).where(SlackWorkspace.slack_id == integration.workspace_id)
-        )
-        workspace = workspace_result.scalar_one_or_none()
-
-        if not workspace:
-            logger.error(f"SlackWorkspace not found with slack_id={integration.workspace_id}")
-            raise ValueError(f"SlackWorkspace not found with slack_id={integration.workspace_id}")
-
-        # Now we have the correct workspace ID (UUID) to use with get_channel_messages
-        workspace_id = str(workspace.id)
-
         logger.info(
             f"Fetching messages for SlackWorkspace.id={workspace_id}, "
             f"channel_id={resource_id}, integration_id={integration_id}"
         )
-        logger.info(f"Integration.workspace_id (Slack ID): {integration.workspace_id}")
         logger.info(f"Date range: {start_date} to {end_date}")
 
         messages = await get_channel_messages(
@@ -150,7 +153,7 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
                 "purpose": channel.purpose,
                 "topic": channel.topic,
                 "member_count": channel.member_count,
-                "workspace_name": integration.name,
+                "workspace_name": workspace["integration_name"],
             },
             "messages": [
                 {
@@ -191,16 +194,43 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
             },
         }
 
-        # Store in cache for future use
-        ChannelDataCache.set(
-            channel_id=resource_id_str,
-            data=channel_data,
-            start_date=start_date,
-            end_date=end_date,
-            include_threads=include_threads,
+        complete = message_limit <= 0 or len(messages) < message_limit
+        return channel_data, complete
+
+    async def _get_integration_workspace(self, integration_id: UUID) -> Dict[str, str]:
+        """
+        Look up the Slack workspace of an integration.
+
+        Args:
+            integration_id: Integration ID for the Slack workspace
+
+        Returns:
+            Dictionary with the SlackWorkspace.id ("workspace_id") and the
+            integration's name ("integration_name")
+        """
+        # Get the integration (Slack workspace)
+        integration_result = await self.db.execute(select(Integration).where(Integration.id == integration_id))
+        integration = integration_result.scalar_one_or_none()
+
+        if not integration:
+            logger.error(f"Integration {integration_id} not found")
+            raise ValueError(f"Integration {integration_id} not found")
+
+        # We need the SlackWorkspace.id behind the integration.workspace_id (Slack ID)
+        if not integration.workspace_id:
+            logger.error(f"Integration {integration_id} has no workspace_id")
+            raise ValueError(f"Integration {integration_id} has no workspace_id")
+
+        workspace_result = await self.db.execute(
+            select(SlackWorkspace).where(SlackWorkspace.slack_id == integration.workspace_id)
         )
+        workspace = workspace_result.scalar_one_or_none()
+
+        if not workspace:
+            logger.error(f"SlackWorkspace not found with slack_id={integration.workspace_id}")
+            raise ValueError(f"SlackWorkspace not found with slack_id={integration.workspace_id}")
 
-        return channel_data
+        return {"workspace_id": str(workspace.id), "integration_name": integration.name}
 
     async def prepare_data_for_analysis(self, data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
         """
@@ -215,187 +245,11 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
         """
         logger.info(f"Preparing Slack channel data for {analysis_type} analysis")
 
-        # Filter out system messages before processing
-        # Issue #238: Many channels only contain system messages which aren't useful for analysis
-        filtered_messages = []
-        system_message_count = 0
-        empty_message_count = 0
-        join_message_count = 0
-        non_text_message_count = 0
-
-        for msg in data["messages"]:
-            text = msg["text"]
-            has_user_id = bool(msg["user_id"])
-
-            # Skip messages about users joining channels or other system notifications
-            if "さんがチャンネルに参加しました" in text or "has joined the channel" in text:
-                join_message_count += 1
-                continue
-
-            # Skip system notifications about users leaving
-            if "さんがチャンネルから退出しました" in text or "has left the channel" in text:
-                join_message_count += 1  # Count under the same category
-                continue
-
-            # Skip empty messages
-            if not text.strip():
-                empty_message_count += 1
-                continue
-
-            # Skip system messages without user_id
-            if not has_user_id:
-                system_message_count += 1
-                continue
-
-            # Check for messages that only contain non-latin characters (might cause issues for LLM)
-            if text and all(ord(c) > 127 for c in text.strip()):
-                # Count it but still include it - just for tracking
-                non_text_message_count += 1
-
-            # Include this message for analysis
-            filtered_messages.append(msg)
-
-        # Log filtering results for debugging
-        original_count = len(data["messages"])
-        filtered_count = len(filtered_messages)
-        logger.info(
-            f"Filtered messages: {original_count} → {filtered_count} "
-            f"(removed {join_message_count} join/leave messages, "
-            f"{empty_message_count} empty messages, "
-            f"{system_message_count} system messages, "
-            f"kept {non_text_message_count} non-Latin text messages)"
-        )
-
-        # Update the messages and counts in the data
+        # Walking the messages is CPU-bound, so it runs off the event loop. The pool
+        # may work on a copy of the data, so apply the filtering to it here.
+        prepared_data, filtered_messages = await run_cpu_bound(build_analysis_data, data, analysis_type)
         data["messages"] = filtered_messages
-        data["metadata"]["message_count"] = filtered_count
-
-        # Basic channel info is always included
-        prepared_data = {
-            "channel_name": data["channel"]["name"],
-            "channel_purpose": data["channel"]["purpose"],
-            "channel_topic": data["channel"]["topic"],
-            "channel_type": data["channel"]["type"],
-            "workspace_name": data["channel"]["workspace_name"],
-            "period_start": data["period"]["start"],
-            "period_end": data["period"]["end"],
-            "total_messages": data["metadata"]["message_count"],
-            "total_users": data["metadata"]["user_count"],
-            "total_threads": data["metadata"]["thread_count"],
-        }
-
-        # Build a user lookup dictionary
-        user_lookup = {user["id"]: user for user in data["users"]}
-
-        # Process messages differently based on analysis type
-        if analysis_type == AnalysisType.CONTRIBUTION:
-            # For contribution analysis, we need user-centric data
-            user_stats = {}
-
-            for msg in data["messages"]:
-                user_id = msg["user_id"]
-                if not user_id:
-                    continue  # Skip system messages
-
-                if user_id not in user_stats:
-                    user_stats[user_id] = {
-                        "message_count": 0,
-                        "thread_replies": 0,
-                        "thread_parents": 0,
-                        "reactions_received": 0,
-                        "user_info": user_lookup.get(user_id, {"name": "Unknown", "is_bot": False}),
-                    }
-
-                # Update stats
-                user_stats[user_id]["message_count"] += 1
-                if msg["is_thread_reply"]:
-                    user_stats[user_id]["thread_replies"] += 1
-                if msg["is_thread_parent"]:
-                    user_stats[user_id]["thread_parents"] += 1
-                user_stats[user_id]["reactions_received"] += msg["reaction_count"]
-
-            prepared_data["user_contributions"] = user_stats
-
-            # FIX FOR ISSUE #238: Even for contribution analysis, include messages for multi-channel reports
-            messages_for_analysis = []
-            for msg in data["messages"]:
-                user_id = msg["user_id"]
-                if user_id:
-                    user_name = user_lookup.get(user_id, {}).get("display_name", "Unknown")
-                else:
-                    user_name = "System"
-
-                message_data = {
-                    "text": msg["text"],
-                    "user": user_name,
-                    "timestamp": msg["timestamp"],
-                    "is_thread_parent": msg["is_thread_parent"],
-                    "is_thread_reply": msg["is_thread_reply"],
-                    "reply_count": msg["reply_count"],
-                    "reaction_count": msg["reaction_count"],
-                }
-                messages_for_analysis.append(message_data)
-
-            prepared_data["messages"] = messages_for_analysis
-
-        elif analysis_type == AnalysisType.TOPICS:
-            # For topic analysis, we focus on the message content
-            # Prepare message content, skipping bot messages if needed
-            messages_for_analysis = []
-            for msg in data["messages"]:
-                user_id = msg["user_id"]
-                is_bot = user_lookup.get(user_id, {}).get("is_bot", False) if user_id else False
-
-                if not is_bot:  # Skip bot messages for topic analysis
-                    message_data = {
-                        "text": msg["text"],
-                        "user": (user_lookup.get(user_id, {}).get("display_name", "Unknown") if user_id else "Unknown"),
-                        "timestamp": msg["timestamp"],
-                        "is_thread": msg["is_thread_parent"] or msg["is_thread_reply"],
-                    }
-                    messages_for_analysis.append(message_data)
-
-            # Group messages by date for better topic analysis
-            from collections import defaultdict
-            from datetime import datetime
-
-            date_grouped_messages = defaultdict(list)
-            for msg in messages_for_analysis:
-                date_str = datetime.fromisoformat(msg["timestamp"]).strftime("%Y-%m-%d")
-                date_grouped_messages[date_str].append(msg)
-
-            prepared_data["messages_by_date"] = dict(date_grouped_messages)
-
-            # FIX FOR ISSUE #238: Also include a flat list of messages for multi-channel reports
-            prepared_data["messages"] = messages_for_analysis
-
-        else:
-            # For general analysis or other types, include processed messages
-            messages_for_analysis = []
-            for msg in data["messages"]:
-                user_id = msg["user_id"]
-                if user_id:
-                    user_name = user_lookup.get(user_id, {}).get("display_name", "Unknown")
-                else:
-                    user_name = "System"
-
-                message_data = {
-                    "text": msg["text"],
-                    "user": user_name,
-                    "timestamp": msg["timestamp"],
-                    "is_thread_parent": msg["is_thread_parent"],
-                    "is_thread_reply": msg["is_thread_reply"],
-                    "reply_count": msg["reply_count"],
-                    "reaction_count": msg["reaction_count"],
-                }
-                messages_for_analysis.append(message_data)
-
-            prepared_data["messages"] = messages_for_analysis
-
-        # FIX FOR ISSUE #238: Log the prepared data to ensure messages are included
-        logger.info(f"Prepared data includes 'messages' key: {'messages' in prepared_data}")
-        if "messages" in prepared_data:
-            logger.info(f"Prepared message count: {len(prepared_data['messages'])}")
+        data["metadata"]["message_count"] = len(filtered_messages)
 
         return prepared_data
 
@@ -471,7 +325,7 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
         model = model_params.get("model", default_model)
 
         # Create a context string from the data
-        context = self.create_context_for_llm(data, analysis_type)
+        context = await run_cpu_bound(build_llm_context, data, analysis_type)
 
         # Format the prompt using standard string formatting
         try:
@@ -724,75 +578,8 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
             """
 
     def create_context_for_llm(self, data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
-        """
-        Create a context dictionary for the LLM prompt.
-
-        Args:
-            data: Processed channel data
-            analysis_type: Type of analysis to perform
-
-        Returns:
-            Context dictionary for the LLM prompt
-        """
-        context = {
-            "channel_name": data.get("channel_name", "Unknown"),
-            "channel_purpose": data.get("channel_purpose", "No purpose specified"),
-            "channel_topic": data.get("channel_topic", "No topic specified"),
-            "workspace_name": data.get("workspace_name", "Unknown workspace"),
-            "period_start": data.get("period_start", "Unknown"),
-            "period_end": data.get("period_end", "Unknown"),
-            "total_messages": data.get("total_messages", 0),
-            "total_users": data.get("total_users", 0),
-            "total_threads": data.get("total_threads", 0),
-        }
-
-        if analysis_type == AnalysisType.CONTRIBUTION:
-            # Format user contributions data
-            user_contributions = data.get("user_contributions", {})
-            user_lines = []
-
-            for _user_id, stats in user_contributions.items():
-                user_info = stats["user_info"]
-                user_lines.append(
-                    f"User: {user_info.get('display_name', user_info.get('name', 'Unknown'))}\n"
-                    f"  Messages: {stats['message_count']}\n"
-                    f"  Thread Replies: {stats['thread_replies']}\n"
-                    f"  Thread Starters: {stats['thread_parents']}\n"
-                    f"  Reactions Received: {stats['reactions_received']}\n"
-                    f"  Is Bot: {user_info.get('is_bot', False)}\n"
-                )
-
-            context["user_contributions_text"] = "\n".join(user_lines)
-
-        elif analysis_type == AnalysisType.TOPICS:
-            # Format messages by date
-            messages_by_date = data.get("messages_by_date", {})
-            date_lines = []
-
-            for date, messages in messages_by_date.items():
-                date_lines.append(f"Date: {date} ({len(messages)} messages)")
-                # Include a sample of messages for each date
-                sample_size = min(10, len(messages))
-                for _, msg in enumerate(messages[:sample_size]):
-                    date_lines.append(f"  {msg['user']}: {msg['text']}")
-                if len(messages) > sample_size:
-                    date_lines.append(f"  ... and {len(messages) - sample_size} more messages")
-                date_lines.append("")  # Add a blank line between dates
-
-            context["messages_by_date_text"] = "\n".join(date_lines)
-
-        else:
-            # For general analysis, include a sample of messages
-            messages = data.get("messages", [])
-            sample_size = min(50, len(messages))
-            message_lines = [f"{msg['user']} ({msg['timestamp']}): {msg['text']}" for msg in messages[:sample_size]]
-
-            if len(messages) > sample_size:
-                message_lines.append(f"... and {len(messages) - sample_size} more messages")
-
-            context["messages_sample_text"] = "\n".join(message_lines)
-
-        return context
+        """Create a context dictionary for the LLM prompt (see build_llm_context)."""
+        return build_llm_context(data, analysis_type)
 
     def parse_llm_response(self, response: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
         """
@@ -938,3 +725,272 @@ class SlackChannelAnalysisService(ResourceAnalysisService):
                         result[key] = match.group(1).strip()
 
         return result
+
+
+def build_analysis_data(data: Dict[str, Any], analysis_type: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Filter raw Slack channel data and build the data for LLM analysis.
+
+    Args:
+        data: Raw channel data
+        analysis_type: Type of analysis to perform
+
+    Returns:
+        Tuple of the prepared data and the messages kept for analysis
+    """
+    # Filter out system messages before processing
+    # Issue #238: Many channels only contain system messages which aren't useful for analysis
+    filtered_messages = []
+    system_message_count = 0
+    empty_message_count = 0
+    join_message_count = 0
+    non_text_message_count = 0
+
+    for msg in data["messages"]:
+        text = msg["text"]
+        has_user_id = bool(msg["user_id"])
+
+        # Skip messages about users joining channels or other system notifications
+        if "さんがチャンネルに参加しました" in text or "has joined the channel" in text:
+            join_message_count += 1
+            continue
+
+        # Skip system notifications about users leaving
+        if "さんがチャンネルから退出しました" in text or "has left the channel" in text:
+            join_message_count += 1  # Count under the same category
+            continue
+
+        # Skip empty messages
+        if not text.strip():
+            empty_message_count += 1
+            continue
+
+        # Skip system messages without user_id
+        if not has_user_id:
+            system_message_count += 1
+            continue
+
+        # Check for messages that only contain non-latin characters (might cause issues for LLM)
+        if text and all(ord(c) > 127 for c in text.strip()):
+            # Count it but still include it - just for tracking
+            non_text_message_count += 1
+
+        # Include this message for analysis
+        filtered_messages.append(msg)
+
+    # Log filtering results for debugging
+    original_count = len(data["messages"])
+    filtered_count = len(filtered_messages)
+    logger.info(
+        f"Filtered messages: {original_count} → {filtered_count} "
+        f"(removed {join_message_count} join/leave messages, "
+        f"{empty_message_count} empty messages, "
+        f"{system_message_count} system messages, "
+        f"kept {non_text_message_count} non-Latin text messages)"
+    )
+
+    # Update the messages and counts in the data
+    data["messages"] = filtered_messages
+    data["metadata"]["message_count"] = filtered_count
+
+    # Basic channel info is always included
+    prepared_data = {
+        "channel_name": data["channel"]["name"],
+        "channel_purpose": data["channel"]["purpose"],
+        "channel_topic": data["channel"]["topic"],
+        "channel_type": data["channel"]["type"],
+        "workspace_name": data["channel"]["workspace_name"],
+        "period_start": data["period"]["start"],
+        "period_end": data["period"]["end"],
+        "total_messages": data["metadata"]["message_count"],
+        "total_users": data["metadata"]["user_count"],
+        "total_threads": data["metadata"]["thread_count"],
+    }
+
+    # Build a user lookup dictionary
+    user_lookup = {user["id"]: user for user in data["users"]}
+
+    # Process messages differently based on analysis type
+    if analysis_type == AnalysisType.CONTRIBUTION:
+        # For contribution analysis, we need user-centric data
+        user_stats = {}
+
+        for msg in data["messages"]:
+            user_id = msg["user_id"]
+            if not user_id:
+                continue  # Skip system messages
+
+            if user_id not in user_stats:
+                user_stats[user_id] = {
+                    "message_count": 0,
+                    "thread_replies": 0,
+                    "thread_parents": 0,
+                    "reactions_received": 0,
+                    "user_info": user_lookup.get(user_id, {"name": "Unknown", "is_bot": False}),
+                }
+
+            # Update stats
+            user_stats[user_id]["message_count"] += 1
+            if msg["is_thread_reply"]:
+                user_stats[user_id]["thread_replies"] += 1
+            if msg["is_thread_parent"]:
+                user_stats[user_id]["thread_parents"] += 1
+            user_stats[user_id]["reactions_received"] += msg["reaction_count"]
+
+        prepared_data["user_contributions"] = user_stats
+
+        # FIX FOR ISSUE #238: Even for contribution analysis, include messages for multi-channel reports
+        messages_for_analysis = []
+        for msg in data["messages"]:
+            user_id = msg["user_id"]
+            if user_id:
+                user_name = user_lookup.get(user_id, {}).get("display_name", "Unknown")
+            else:
+                user_name = "System"
+
+            message_data = {
+                "text": msg["text"],
+                "user": user_name,
+                "timestamp": msg["timestamp"],
+                "is_thread_parent": msg["is_thread_parent"],
+                "is_thread_reply": msg["is_thread_reply"],
+                "reply_count": msg["reply_count"],
+                "reaction_count": msg["reaction_count"],
+            }
+            messages_for_analysis.append(message_data)
+
+        prepared_data["messages"] = messages_for_analysis
+
+    elif analysis_type == AnalysisType.TOPICS:
+        # For topic analysis, we focus on the message content
+        # Prepare message content, skipping bot messages if needed
+        messages_for_analysis = []
+        for msg in data["messages"]:
+            user_id = msg["user_id"]
+            is_bot = user_lookup.get(user_id, {}).get("is_bot", False) if user_id else False
+
+            if not is_bot:  # Skip bot messages for topic analysis
+                message_data = {
+                    "text": msg["text"],
+                    "user": (user_lookup.get(user_id, {}).get("display_name", "Unknown") if user_id else "Unknown"),
+                    "timestamp": msg["timestamp"],
+                    "is_thread": msg["is_thread_parent"] or msg["is_thread_reply"],
+                }
+                messages_for_analysis.append(message_data)
+
+        # Group messages by date for better topic analysis
+        from collections import defaultdict
+        from datetime import datetime
+
+        date_grouped_messages = defaultdict(list)
+        for msg in messages_for_analysis:
+            date_str = datetime.fromisoformat(msg["timestamp"]).strftime("%Y-%m-%d")
+            date_grouped_messages[date_str].append(msg)
+
+        prepared_data["messages_by_date"] = dict(date_grouped_messages)
+
+        # FIX FOR ISSUE #238: Also include a flat list of messages for multi-channel reports
+        prepared_data["messages"] = messages_for_analysis
+
+    else:
+        # For general analysis or other types, include processed messages
+        messages_for_analysis = []
+        for msg in data["messages"]:
+            user_id = msg["user_id"]
+            if user_id:
+                user_name = user_lookup.get(user_id, {}).get("display_name", "Unknown")
+            else:
+                user_name = "System"
+
+            message_data = {
+                "text": msg["text"],
+                "user": user_name,
+                "timestamp": msg["timestamp"],
+                "is_thread_parent": msg["is_thread_parent"],
+                "is_thread_reply": msg["is_thread_reply"],
+                "reply_count": msg["reply_count"],
+                "reaction_count": msg["reaction_count"],
+            }
+            messages_for_analysis.append(message_data)
+
+        prepared_data["messages"] = messages_for_analysis
+
+    # FIX FOR ISSUE #238: Log the prepared data to ensure messages are included
+    logger.info(f"Prepared data includes 'messages' key: {'messages' in prepared_data}")
+    if "messages" in prepared_data:
+        logger.info(f"Prepared message count: {len(prepared_data['messages'])}")
+
+    return prepared_data, data["messages"]
+
+
+def build_llm_context(data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
+    """
+    Create a context dictionary for the LLM prompt.
+
+    Args:
+        data: Processed channel data
+        analysis_type: Type of analysis to perform
+
+    Returns:
+        Context dictionary for the LLM prompt
+    """
+    context = {
+        "channel_name": data.get("channel_name", "Unknown"),
+        "channel_purpose": data.get("channel_purpose", "No purpose specified"),
+        "channel_topic": data.get("channel_topic", "No topic specified"),
+        "workspace_name": data.get("workspace_name", "Unknown workspace"),
+        "period_start": data.get("period_start", "Unknown"),
+        "period_end": data.get("period_end", "Unknown"),
+        "total_messages": data.get("total_messages", 0),
+        "total_users": data.get("total_users", 0),
+        "total_threads": data.get("total_threads", 0),
+    }
+
+    if analysis_type == AnalysisType.CONTRIBUTION:
+        # Format user contributions data
+        user_contributions = data.get("user_contributions", {})
+        user_lines = []
+
+        for _user_id, stats in user_contributions.items():
+            user_info = stats["user_info"]
+            user_lines.append(
+                f"User: {user_info.get('display_name', user_info.get('name', 'Unknown'))}\n"
+                f"  Messages: {stats['message_count']}\n"
+                f"  Thread Replies: {stats['thread_replies']}\n"
+                f"  Thread Starters: {stats['thread_parents']}\n"
+                f"  Reactions Received: {stats['reactions_received']}\n"
+                f"  Is Bot: {user_info.get('is_bot', False)}\n"
+            )
+
+        context["user_contributions_text"] = "\n".join(user_lines)
+
+    elif analysis_type == AnalysisType.TOPICS:
+        # Format messages by date
+        messages_by_date = data.get("messages_by_date", {})
+        date_lines = []
+
+        for date, messages in messages_by_date.items():
+            date_lines.append(f"Date: {date} ({len(messages)} messages)")
+            # Include a sample of messages for each date
+            sample_size = min(10, len(messages))
+            for _, msg in enumerate(messages[:sample_size]):
+                date_lines.append(f"  {msg['user']}: {msg['text']}")
+            if len(messages) > sample_size:
+                date_lines.append(f"  ... and {len(messages) - sample_size} more messages")
+            date_lines.append("")  # Add a blank line between dates
+
+        context["messages_by_date_text"] = "\n".join(date_lines)
+
+    else:
+        # For general analysis, include a sample of messages
+        messages = data.get("messages", [])
+        sample_size = min(50, len(messages))
+        message_lines = [f"{msg['user']} ({msg['timestamp']}): {msg['text']}" for msg in messages[:sample_size]]
+
+        if len(messages) > sample_size:
+            message_lines.append(f"... and {len(messages) - sample_size} more messages")
+
+        context["messages_sample_text"] = "\n".join(message_lines)
+
+    return context
+    return context
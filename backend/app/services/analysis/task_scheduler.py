@@ -4,15 +4,26 @@ Task scheduler for resource analysis.
 
 import asyncio
 import logging
+import time
 from typing import Dict, List, Optional, Union
 from uuid import UUID
 
-from sqlalchemy import func, select, update
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db.session import get_async_db
 from app.models.reports import CrossResourceReport, ReportStatus, ResourceAnalysis
+from app.services.analysis.budget import (
+    AnalysisBudget,
+    BudgetExceededError,
+    get_current_budget,
+    reset_current_budget,
+    set_current_budget,
+)
 from app.services.analysis.factory import ResourceAnalysisServiceFactory
+from app.services.analysis.fair_scheduler import AnalysisTicket, FairShareScheduler, TeamQueueFullError
+from app.services.reports.counters import add_report_llm_tokens, get_report_counters, transition_analysis_status
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +33,8 @@ class ResourceAnalysisTaskScheduler:
     Task scheduler for resource analysis.
 
     This class is responsible for scheduling and managing resource analysis tasks.
+    Scheduled analyses are admitted through FairShareScheduler, which shares
+    the available concurrency fairly between teams.
     It provides methods to:
     - Schedule a new analysis
     - Schedule analyses for a cross-resource report
@@ -32,13 +45,21 @@ class ResourceAnalysisTaskScheduler:
     _tasks: Dict[str, asyncio.Task] = {}
 
     @classmethod
-    async def schedule_analysis(cls, analysis_id: Union[str, UUID], db: Optional[AsyncSession] = None) -> bool:
+    async def schedule_analysis(
+        cls,
+        analysis_id: Union[str, UUID],
+        db: Optional[AsyncSession] = None,
+        team_id: Optional[Union[str, UUID]] = None,
+        deadline: Optional[float] = None,
+    ) -> bool:
         """
         Schedule a resource analysis task.
 
         Args:
             analysis_id: ID of the ResourceAnalysis to run
-            db: Optional database session
+            db: Optional database session, used to look up the team if team_id is not given
+            team_id: Optional ID of the team that owns the analysis
+            deadline: Optional time.monotonic() deadline (e.g. the report's), including time spent queued
 
         Returns:
             True if the task was scheduled, False otherwise
@@ -51,8 +72,22 @@ class ResourceAnalysisTaskScheduler:
             logger.warning(f"Analysis {analysis_id_str} is already running")
             return False
 
-        # Create a new task
-        task = asyncio.create_task(cls._run_analysis(analysis_id), name=f"analysis_{analysis_id_str}")
+        if team_id is None and db is not None:
+            team_id = await cls._get_analysis_team_id(db, analysis_id)
+
+        # Queue the analysis in its team's fair-share queue
+        try:
+            ticket = FairShareScheduler.enqueue(team_id, analysis_id_str)
+        except TeamQueueFullError as e:
+            logger.warning(f"Not scheduling analysis {analysis_id_str}: {str(e)}")
+            # Nothing retries a rejected analysis, so fail it rather than leave its report pending forever
+            await cls._reject_analysis(analysis_id, f"Team analysis queue full: {str(e)}", db)
+            return False
+
+        # Create a new task that waits for its turn before running
+        task = asyncio.create_task(
+            cls._run_admitted_analysis(ticket, analysis_id, deadline), name=f"analysis_{analysis_id_str}"
+        )
 
         # Store the task
         cls._tasks[analysis_id_str] = task
@@ -91,10 +126,23 @@ class ResourceAnalysisTaskScheduler:
             )
             analyses = analyses_result.scalars().all()
 
+            # All analyses of a report belong to the report's team
+            team_result = await db.execute(
+                select(CrossResourceReport.team_id).where(CrossResourceReport.id == report_id)
+            )
+            team_id = team_result.scalar_one_or_none()
+
+            # All analyses of the report share the report's deadline
+            report_deadline = (
+                time.monotonic() + settings.ANALYSIS_REPORT_TIMEOUT_SECONDS
+                if settings.ANALYSIS_REPORT_TIMEOUT_SECONDS
+                else None
+            )
+
             # Schedule each analysis
             scheduled_count = 0
             for analysis in analyses:
-                scheduled = await cls.schedule_analysis(analysis.id, db)
+                scheduled = await cls.schedule_analysis(analysis.id, db, team_id=team_id, deadline=report_deadline)
                 if scheduled:
                     scheduled_count += 1
 
@@ -114,7 +162,7 @@ class ResourceAnalysisTaskScheduler:
             analysis_id: ID of the analysis
 
         Returns:
-            Status string: "RUNNING", "COMPLETED", "FAILED", or "NOT_FOUND"
+            Status string: "QUEUED", "RUNNING", "COMPLETED", "FAILED", or "NOT_FOUND"
         """
         analysis_id_str = str(analysis_id)
 
@@ -130,13 +178,18 @@ class ResourceAnalysisTaskScheduler:
                 return "COMPLETED"
             except Exception:
                 return "FAILED"
+        elif FairShareScheduler.is_queued(analysis_id_str):
+            return "QUEUED"
         else:
             return "RUNNING"
 
     @classmethod
     def cancel_task(cls, analysis_id: Union[str, UUID]) -> bool:
         """
-        Cancel a running analysis task.
+        Cancel a queued or running analysis task.
+
+        The task fails the analysis as it stops, keeping any partial results,
+        so the report's counters and status stay consistent.
 
         Args:
             analysis_id: ID of the analysis to cancel
@@ -167,6 +220,123 @@ class ResourceAnalysisTaskScheduler:
         """
         return [task_id for task_id, task in cls._tasks.items() if not task.done()]
 
+    @classmethod
+    async def _get_analysis_team_id(cls, db: AsyncSession, analysis_id: Union[str, UUID]) -> Optional[UUID]:
+        """
+        Look up the team that owns an analysis through its report.
+
+        Args:
+            db: Database session
+            analysis_id: ID of the analysis
+
+        Returns:
+            Team ID, or None if the analysis or report does not exist
+        """
+        result = await db.execute(
+            select(CrossResourceReport.team_id)
+            .join(ResourceAnalysis, ResourceAnalysis.cross_resource_report_id == CrossResourceReport.id)
+            .where(ResourceAnalysis.id == analysis_id)
+        )
+        return result.scalar_one_or_none()
+
+    @classmethod
+    async def _reject_analysis(
+        cls, analysis_id: Union[str, UUID], error: str, db: Optional[AsyncSession] = None
+    ) -> None:
+        """
+        Mark an analysis that could not be scheduled as failed and update its report.
+
+        Args:
+            analysis_id: ID of the rejected analysis
+            error: Why the analysis was rejected
+            db: Optional database session
+        """
+        close_db = False
+        if db is None:
+            db_gen = get_async_db()
+            db = await db_gen.__anext__()
+            close_db = True
+
+        try:
+            report_id = await transition_analysis_status(db, analysis_id, ReportStatus.FAILED, results={"error": error})
+            await db.commit()
+
+            if report_id:
+                await cls._check_and_update_report_status(db, report_id)
+        except Exception as e:
+            logger.error(f"Error failing rejected analysis {analysis_id}: {e}")
+        finally:
+            if close_db:
+                await db.close()
+
+    @classmethod
+    async def _run_admitted_analysis(
+        cls,
+        ticket: AnalysisTicket,
+        analysis_id: Union[str, UUID],
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        Wait for the fair-share scheduler to admit an analysis, then run it within its budget.
+
+        Args:
+            ticket: Ticket of the queued analysis
+            analysis_id: ID of the analysis to run
+            deadline: Optional time.monotonic() deadline of the analysis' report
+        """
+        try:
+            await FairShareScheduler.wait_for_turn(ticket)
+
+            # The analysis' own time limit starts once it is admitted
+            budget_token = set_current_budget(AnalysisBudget.from_settings(report_deadline=deadline))
+            try:
+                await cls._run_analysis(analysis_id)
+            finally:
+                reset_current_budget(budget_token)
+                FairShareScheduler.release(ticket)
+        except asyncio.CancelledError:
+            await cls._fail_cancelled_analysis(analysis_id)
+            raise
+
+    @classmethod
+    async def _fail_cancelled_analysis(cls, analysis_id: Union[str, UUID]) -> None:
+        """
+        Move a cancelled analysis to FAILED, unless it already finished, and update its report.
+
+        An analysis cancelled while it ran has usually been failed with its
+        partial results already (see ResourceAnalysisService.run_analysis);
+        this covers analyses cancelled while queued or before that point.
+
+        Args:
+            analysis_id: ID of the cancelled analysis
+        """
+        db_gen = get_async_db()
+        db = await db_gen.__anext__()
+
+        try:
+            result = await db.execute(
+                select(ResourceAnalysis.status, ResourceAnalysis.cross_resource_report_id)
+                .where(ResourceAnalysis.id == analysis_id)
+                .with_for_update()
+            )
+            row = result.one_or_none()
+            if row is None:
+                return
+
+            status, report_id = row
+            if ReportStatus(status) in (ReportStatus.PENDING, ReportStatus.IN_PROGRESS):
+                await transition_analysis_status(
+                    db, analysis_id, ReportStatus.FAILED, results={"error": "Analysis was cancelled"}
+                )
+            await db.commit()
+
+            if report_id:
+                await cls._check_and_update_report_status(db, report_id)
+        except Exception as e:
+            logger.error(f"Error failing cancelled analysis {analysis_id}: {e}")
+        finally:
+            await db.close()
+
     @classmethod
     def _cleanup_task(cls, analysis_id: str, task: asyncio.Task) -> None:
         """
@@ -199,23 +369,19 @@ class ResourceAnalysisTaskScheduler:
             report_id: ID of the CrossResourceReport to check
         """
         try:
-            # Count the analyses for this report by status
-            analyses_result = await db.execute(
-                select(ResourceAnalysis.status, func.count().label("count"))
-                .where(ResourceAnalysis.cross_resource_report_id == report_id)
-                .group_by(ResourceAnalysis.status)
-            )
-
-            status_counts = {status: count for status, count in analyses_result.all()}
+            # Read the denormalised counters maintained by each status transition
+            counters = await get_report_counters(db, report_id)
+            if counters is None:
+                logger.warning(f"Report {report_id} not found during status check")
+                return
 
-            # Calculate totals
-            total_analyses = sum(status_counts.values())
-            completed_analyses = status_counts.get(ReportStatus.COMPLETED, 0)
-            failed_analyses = status_counts.get(ReportStatus.FAILED, 0)
-            pending_analyses = status_counts.get(ReportStatus.PENDING, 0)
-            in_progress_analyses = status_counts.get(ReportStatus.IN_PROGRESS, 0)
+            total_analyses = counters["total_resources"]
+            completed_analyses = counters["completed_analyses"]
+            failed_analyses = counters["failed_analyses"]
+            pending_analyses = counters["pending_analyses"]
+            in_progress_analyses = counters["in_progress_analyses"]
 
-            logger.info(f"Report {report_id} status check: {status_counts}")
+            logger.info(f"Report {report_id} status check: {counters}")
 
             # If all analyses are complete, update the report status to COMPLETED
             if total_analyses > 0 and completed_analyses == total_analyses:
@@ -272,6 +438,8 @@ class ResourceAnalysisTaskScheduler:
         db_gen = get_async_db()
         db = await db_gen.__anext__()
 
+        budget = get_current_budget() or AnalysisBudget.from_settings()
+
         try:
             # Get the analysis
             analysis_result = await db.execute(select(ResourceAnalysis).where(ResourceAnalysis.id == analysis_id))
@@ -305,12 +473,11 @@ class ResourceAnalysisTaskScheduler:
                     )
 
                     # If it's multi-channel, check how many resources are in the report
-                    resource_count_result = await db.execute(
-                        select(func.count())
-                        .select_from(ResourceAnalysis)
-                        .where(ResourceAnalysis.cross_resource_report_id == report.id)
-                    )
-                    resource_count = resource_count_result.scalar_one() or 0
+                    resource_count = report.total_resources or 0
+
+                    # Don't let this analysis spend more than is left of the report's token budget
+                    if settings.ANALYSIS_REPORT_MAX_TOKENS:
+                        budget.limit_tokens(max(settings.ANALYSIS_REPORT_MAX_TOKENS - (report.llm_tokens_used or 0), 0))
 
                     if resource_count > 1:
                         logger.info(f"Report contains {resource_count} resources (multi-channel analysis)")
@@ -329,14 +496,8 @@ class ResourceAnalysisTaskScheduler:
             # MULTI-CHANNEL DEBUG: For multi-channel reports, sync messages only if needed
             if report and resource_count > 1:
                 try:
-                    # Import the message service
-                    from app.services.slack.messages import SlackMessageService
-
-                    # Create a new message service - without passing db
-                    message_service = SlackMessageService()
-
-                    # Get the channel
                     from app.models.slack import SlackChannel
+                    from app.services.slack.messages import SlackMessageService
 
                     # Find the channel
                     channel_result = await db.execute(
@@ -388,11 +549,16 @@ class ResourceAnalysisTaskScheduler:
                             )
 
                             # Sync messages for this channel with the date range
-                            sync_result = await message_service.sync_channel_messages(
-                                channel_id=str(channel.id),
-                                start_date=analysis.period_start,
-                                end_date=analysis.period_end,
-                                include_replies=True,
+                            sync_result = await budget.run_phase(
+                                "sync",
+                                SlackMessageService.sync_channel_messages(
+                                    db=db,
+                                    workspace_id=str(channel.workspace_id),
+                                    channel_id=str(channel.id),
+                                    start_date=analysis.period_start,
+                                    end_date=analysis.period_end,
+                                    include_replies=True,
+                                ),
                             )
 
                             logger.info(f"Message sync result: {sync_result}")
@@ -401,6 +567,13 @@ class ResourceAnalysisTaskScheduler:
                     else:
                         logger.warning(f"Could not find channel {analysis.resource_id} for syncing")
 
+                except BudgetExceededError as budget_error:
+                    # Out of time before the analysis could start: record sync as the phase that overran
+                    await service.record_partial_results(analysis.id, budget_error, {}, budget)
+                    await db.commit()
+                    await cls._check_and_update_report_status(db, analysis.cross_resource_report_id)
+                    return
+
                 except Exception as sync_error:
                     logger.error(f"Error syncing messages for multi-channel report: {str(sync_error)}")
                     # Continue with analysis even if sync fails
@@ -414,8 +587,13 @@ class ResourceAnalysisTaskScheduler:
                 period_start=analysis.period_start,
                 period_end=analysis.period_end,
                 parameters=analysis.analysis_parameters,
+                budget=budget,
             )
 
+            # Charge the tokens this analysis spent to its report
+            if analysis.cross_resource_report_id:
+                await add_report_llm_tokens(db, analysis.cross_resource_report_id, budget.tokens_used)
+
             # Commit changes
             await db.commit()
 
@@ -424,8 +602,12 @@ class ResourceAnalysisTaskScheduler:
                 await cls._check_and_update_report_status(db, analysis.cross_resource_report_id)
 
         except asyncio.CancelledError:
-            # Cancellation is not an error
+            # Cancellation is not an error; keep the cancellation the service recorded, if any
             logger.info(f"Analysis {analysis_id} was cancelled")
+            try:
+                await db.commit()
+            except Exception as commit_error:
+                logger.error(f"Error recording the cancellation of analysis {analysis_id}: {commit_error}")
             raise
 
         except Exception as e:
@@ -434,19 +616,12 @@ class ResourceAnalysisTaskScheduler:
 
             # Update the analysis status to FAILED
             try:
-                await db.execute(
-                    update(ResourceAnalysis)
-                    .where(ResourceAnalysis.id == analysis_id)
-                    .values(status=ReportStatus.FAILED, results={"error": str(e)})
+                cross_resource_report_id = await transition_analysis_status(
+                    db, analysis_id, ReportStatus.FAILED, results={"error": str(e)}
                 )
                 await db.commit()
 
                 # Check if this analysis is part of a report
-                analysis_result = await db.execute(
-                    select(ResourceAnalysis.cross_resource_report_id).where(ResourceAnalysis.id == analysis_id)
-                )
-                cross_resource_report_id = analysis_result.scalar_one_or_none()
-
                 if cross_resource_report_id:
                     await cls._check_and_update_report_status(db, cross_resource_report_id)
 
@@ -8,11 +8,12 @@ creating, updating, and sharing integrations between teams.
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
 
 from app.models.integration import (
     AccessLevel,
@@ -27,10 +28,35 @@ from app.models.integration import (
     ServiceResource,
     ShareLevel,
 )
-from app.models.team import Team
+from app.models.team import Team, TeamMember
+from app.services.integration.credentials import IntegrationCredentialCache
 
 logger = logging.getLogger(__name__)
 
+# Relationships an integration response is built from. The event log is never
+# loaded with an integration, it is paged through with get_integration_events.
+RESPONSE_RELATIONSHIPS = ("owner_team", "credentials", "shared_with", "resources")
+
+
+def relationship_options(relationships: Sequence[str]) -> List[LoaderOption]:
+    """
+    Get the loader options eagerly loading some relationships of Integration.
+
+    Args:
+        relationships: Names of the relationships to load, e.g. RESPONSE_RELATIONSHIPS
+
+    Returns:
+        List of loader options
+    """
+    options = []
+    for name in relationships:
+        if name == "shared_with":
+            # The response names the teams an integration is shared with
+            options.append(selectinload(Integration.shared_with).selectinload(IntegrationShare.team))
+        else:
+            options.append(selectinload(getattr(Integration, name)))
+    return options
+
 
 class IntegrationService:
     """
@@ -41,59 +67,51 @@ class IntegrationService:
     """
 
     @staticmethod
-    async def get_integration(db: AsyncSession, integration_id: uuid.UUID, user_id: str) -> Optional[Integration]:
+    async def get_integration(
+        db: AsyncSession,
+        integration_id: uuid.UUID,
+        user_id: str,
+        relationships: Sequence[str] = (),
+    ) -> Optional[Integration]:
         """
-        Get an integration by ID.
+        Get an integration by ID if the user has access to it.
+
+        The access check is part of the query: the integration is returned if
+        one of the user's teams owns it or has an active share of it. By
+        default no relationships are loaded, which is all that callers
+        needing the integration's metadata and owner need.
 
         Args:
             db: Database session
             integration_id: UUID of the integration to retrieve
             user_id: ID of the user making the request
+            relationships: Names of the relationships to load, e.g. RESPONSE_RELATIONSHIPS
+                or ("resources",)
 
         Returns:
-            Integration object if found, None otherwise
+            Integration object if found and accessible, None otherwise
         """
-        # Get the integration with eager loading of relationships
-        stmt = (
-            select(Integration)
-            .where(Integration.id == integration_id)
-            .options(
-                selectinload(Integration.owner_team),
-                selectinload(Integration.credentials),
-                selectinload(Integration.shared_with),
-                selectinload(Integration.resources),
-                selectinload(Integration.events),
-            )
-        )
-        result = await db.execute(stmt)
-        integration = result.scalar_one_or_none()
-
-        if not integration:
-            return None
-
-        # Get the teams the user is a member of
-        result = await db.execute(select(Team).join(Team.members).where(Team.members.any(user_id=user_id)))
-        user_teams = result.scalars().all()
-        user_team_ids = [team.id for team in user_teams]
-
-        # Check if user has access to this integration
-        if integration.owner_team_id in user_team_ids:
-            return integration
-
-        # Check if integration is shared with user's teams
-        result = await db.execute(
-            select(IntegrationShare).where(
-                IntegrationShare.integration_id == integration_id,
+        user_team_ids = select(TeamMember.team_id).where(TeamMember.user_id == user_id)
+        shared_with_user_team = (
+            select(IntegrationShare.id)
+            .where(
+                IntegrationShare.integration_id == Integration.id,
                 IntegrationShare.team_id.in_(user_team_ids),
                 IntegrationShare.status == "active",
             )
+            .exists()
         )
-        shares = result.scalars().all()
-
-        if shares:
-            return integration
 
-        return None
+        stmt = (
+            select(Integration)
+            .where(
+                Integration.id == integration_id,
+                or_(Integration.owner_team_id.in_(user_team_ids), shared_with_user_team),
+            )
+            .options(*relationship_options(relationships))
+        )
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
 
     @staticmethod
     async def get_team_integrations(
@@ -101,6 +119,7 @@ class IntegrationService:
         team_id: uuid.UUID,
         include_shared: bool = True,
         service_type: Optional[IntegrationType] = None,
+        relationships: Sequence[str] = RESPONSE_RELATIONSHIPS,
     ) -> List[Integration]:
         """
         Get all integrations available to a team.
@@ -110,6 +129,7 @@ class IntegrationService:
             team_id: UUID of the team
             include_shared: Whether to include integrations shared with this team
             service_type: Filter by service type
+            relationships: Names of the relationships to load
 
         Returns:
             List of Integration objects
@@ -118,13 +138,7 @@ class IntegrationService:
         query = (
             select(Integration)
             .where(Integration.owner_team_id == team_id)
-            .options(
-                selectinload(Integration.owner_team),
-                selectinload(Integration.credentials),
-                selectinload(Integration.shared_with),
-                selectinload(Integration.resources),
-                selectinload(Integration.events),
-            )
+            .options(*relationship_options(relationships))
         )
 
         # Add service type filter if provided
@@ -145,13 +159,7 @@ class IntegrationService:
                     IntegrationShare.team_id == team_id,
                     IntegrationShare.status == "active",
                 )
-                .options(
-                    selectinload(Integration.owner_team),
-                    selectinload(Integration.credentials),
-                    selectinload(Integration.shared_with),
-                    selectinload(Integration.resources),
-                    selectinload(Integration.events),
-                )
+                .options(*relationship_options(relationships))
             )
 
             # Add service type filter if provided
@@ -297,6 +305,8 @@ class IntegrationService:
                 )
                 db.add(credential)
 
+            IntegrationCredentialCache.invalidate(integration.id)
+
         # Update status to ACTIVE in case it was previously disconnected
         integration.status = IntegrationStatus.ACTIVE
 
@@ -433,13 +443,7 @@ class IntegrationService:
         stmt = (
             select(Integration).where(Integration.id == integration.id)
             # No need to filter by status here since we just created this integration
-            .options(
-                selectinload(Integration.owner_team),
-                selectinload(Integration.credentials),
-                selectinload(Integration.shared_with),
-                selectinload(Integration.resources),
-                selectinload(Integration.events),
-            )
+            .options(*relationship_options(RESPONSE_RELATIONSHIPS))
         )
         result = await db.execute(stmt)
         integration_with_relations = result.scalar_one_or_none()
@@ -466,17 +470,11 @@ class IntegrationService:
         Returns:
             Updated Integration object if successful, None otherwise
         """
-        # Get the integration with eager loading of relationships
+        # Get the integration with the relationships of its response
         stmt = (
             select(Integration)
             .where(Integration.id == integration_id)
-            .options(
-                selectinload(Integration.owner_team),
-                selectinload(Integration.credentials),
-                selectinload(Integration.shared_with),
-                selectinload(Integration.resources),
-                selectinload(Integration.events),
-            )
+            .options(*relationship_options(RESPONSE_RELATIONSHIPS))
         )
         result = await db.execute(stmt)
         integration = result.scalar_one_or_none()
@@ -509,6 +507,10 @@ class IntegrationService:
                 **data["integration_metadata"],
             }
 
+        # A status change may revoke the integration, and old integrations keep their token in the metadata
+        if "status" in data or "integration_metadata" in data:
+            IntegrationCredentialCache.invalidate(integration.id)
+
         # Record the update event
         event = IntegrationEvent(
             id=uuid.uuid4(),
@@ -546,22 +548,9 @@ class IntegrationService:
         Returns:
             IntegrationShare object if successful, None otherwise
         """
-        # Get the integration with eager loading
-        stmt = (
-            select(Integration)
-            .where(Integration.id == integration_id)
-            .options(
-                selectinload(Integration.owner_team),
-                selectinload(Integration.credentials),
-                selectinload(Integration.shared_with),
-                selectinload(Integration.resources),
-                selectinload(Integration.events),
-            )
-        )
-        result = await db.execute(stmt)
-        integration = result.scalar_one_or_none()
-
-        if not integration:
+        # Check that the integration exists
+        result = await db.execute(select(Integration.id).where(Integration.id == integration_id))
+        if result.scalar_one_or_none() is None:
             return None
 
         # Check if already shared
@@ -662,25 +651,41 @@ class IntegrationService:
         db: AsyncSession,
         integration_id: uuid.UUID,
         resource_types: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
     ) -> List[ServiceResource]:
         """
         Get resources for an integration.
 
+        Resources are ordered by type and external ID, the order of the
+        unique index on them, so pages are stable and read from the index.
+
         Args:
             db: Database session
             integration_id: UUID of the integration
             resource_types: Optional list of resource types to filter by
+            limit: Maximum number of resources to return, None for all
+            offset: Number of resources to skip
 
         Returns:
             List of ServiceResource objects
         """
         # Build the query
-        query = select(ServiceResource).where(ServiceResource.integration_id == integration_id)
+        query = (
+            select(ServiceResource)
+            .where(ServiceResource.integration_id == integration_id)
+            .order_by(ServiceResource.resource_type, ServiceResource.external_id)
+        )
 
         # Add resource type filter if provided
         if resource_types:
             query = query.where(ServiceResource.resource_type.in_(resource_types))
 
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+
         # Execute the query
         result = await db.execute(query)
         return result.scalars().all()
@@ -769,7 +774,7 @@ class IntegrationService:
         offset: int = 0,
     ) -> List[IntegrationEvent]:
         """
-        Get events for an integration.
+        Get events for an integration, newest first, with their affected teams.
 
         Args:
             db: Database session
@@ -783,6 +788,7 @@ class IntegrationService:
         result = await db.execute(
             select(IntegrationEvent)
             .where(IntegrationEvent.integration_id == integration_id)
+            .options(selectinload(IntegrationEvent.affected_team))
             .order_by(IntegrationEvent.created_at.desc())
             .limit(limit)
             .offset(offset)
@@ -0,0 +1,122 @@
+"""
+Short-lived cache of integration credentials and workspace lookups.
+
+Syncs and analyses look up an integration's access token, or the Slack
+workspace behind it, once per call; the analyses of a multi-channel report
+all look up the same integration. IntegrationCredentialCache keeps each
+lookup for INTEGRATION_CREDENTIAL_CACHE_TTL_SECONDS, so they collapse to one
+per integration, and concurrent misses share a single load.
+
+Credentials are secrets, so they are only kept in the worker's memory and
+never in the shared cache backend. Code changing credentials, revoking a
+workspace's token or finding it invalid calls invalidate().
+"""
+
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.core.cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Cached lookups are keyed by integration ID and kind, e.g. "token"
+_Key = Tuple[str, str]
+
+
+class IntegrationCredentialCache:
+    """Per-worker cache of what was looked up about an integration, by integration ID and kind."""
+
+    _entries: Dict[_Key, Tuple[Any, float]] = {}
+    _flights = SingleFlight()
+    _metrics: Dict[str, int] = {"hits": 0, "misses": 0, "coalesced_loads": 0}
+
+    @classmethod
+    def get(cls, integration_id: Any, kind: str) -> Optional[Any]:
+        """
+        Get a cached lookup.
+
+        Args:
+            integration_id: Integration ID
+            kind: Kind of lookup, e.g. "token"
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        key = (str(integration_id), kind)
+        entry = cls._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            cls._entries.pop(key, None)
+            return None
+        cls._metrics["hits"] += 1
+        return entry[0]
+
+    @classmethod
+    async def get_or_load(cls, integration_id: Any, kind: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a cached lookup, loading and caching it on a miss.
+
+        Concurrent misses share one load. None results are returned but not
+        cached, so a missing credential is looked up again next time.
+
+        Args:
+            integration_id: Integration ID
+            kind: Kind of lookup, e.g. "token"
+            load: Coroutine function looking the value up
+
+        Returns:
+            The value
+        """
+        value = cls.get(integration_id, kind)
+        if value is not None:
+            return value
+
+        key = (str(integration_id), kind)
+        if cls._flights.is_loading(key):
+            cls._metrics["coalesced_loads"] += 1
+        else:
+            cls._metrics["misses"] += 1
+
+        def store(loaded: Any) -> None:
+            ttl = settings.INTEGRATION_CREDENTIAL_CACHE_TTL_SECONDS
+            if loaded is not None and ttl > 0:
+                cls._entries[key] = (loaded, time.monotonic() + ttl)
+
+        return await cls._flights.run(key, load, store)
+
+    @classmethod
+    def invalidate(cls, integration_id: Optional[Any] = None) -> None:
+        """
+        Forget the lookups of an integration, e.g. after its credentials changed.
+
+        Args:
+            integration_id: Integration ID, or None to forget every integration,
+                e.g. when a workspace's token was revoked
+        """
+        if integration_id is None:
+            cls._entries = {}
+            cls._flights.forget()
+            return
+
+        integration_key = str(integration_id)
+        for key in [key for key in cls._entries if key[0] == integration_key]:
+            del cls._entries[key]
+        cls._flights.forget(key for key in cls._flights.keys() if key[0] == integration_key)
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, int]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Hits, misses, loads shared by concurrent misses and cached entries
+        """
+        return {**cls._metrics, "entries": len(cls._entries)}
+
+    @classmethod
+    def clear(cls) -> None:
+        """Forget all lookups and reset the metrics."""
+        cls._entries = {}
+        cls._flights.forget()
+        cls._metrics = {"hits": 0, "misses": 0, "coalesced_loads": 0}
@@ -22,6 +22,7 @@ from app.models.integration import (
     ServiceResource,
 )
 from app.services.integration.base import IntegrationService
+from app.services.integration.credentials import IntegrationCredentialCache
 from app.services.slack.api import SlackApiClient
 
 logger = logging.getLogger(__name__)
@@ -144,6 +145,22 @@ class SlackIntegrationService(IntegrationService):
         """
         Get the access token for a Slack integration.
 
+        Args:
+            db: Database session
+            integration_id: UUID of the integration
+
+        Returns:
+            Access token if found, None otherwise
+        """
+        return await IntegrationCredentialCache.get_or_load(
+            integration_id, "token", lambda: SlackIntegrationService._load_token(db, integration_id)
+        )
+
+    @staticmethod
+    async def _load_token(db: AsyncSession, integration_id: uuid.UUID) -> Optional[str]:
+        """
+        Load the access token for a Slack integration from the database.
+
         Args:
             db: Database session
             integration_id: UUID of the integration
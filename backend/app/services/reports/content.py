@@ -0,0 +1,73 @@
+"""
+Deferred loading of the LLM output stored on reports and analyses.
+
+The generated text and result JSON of a ResourceAnalysis (and the
+comprehensive analysis of a CrossResourceReport) are by far the largest
+columns of those rows. Listings, status polling and history pages only show
+titles, dates, statuses and counters, so they defer these columns and
+build their responses from the columns that were loaded; the content
+columns come back as null unless full content is requested.
+
+Deferred columns are loaded with raiseload, so code that touches one by
+mistake fails loudly instead of issuing a query per row (which the async
+session can't do implicitly anyway).
+"""
+
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.models.reports import CrossResourceReport, ResourceAnalysis
+
+ANALYSIS_CONTENT_COLUMNS = (
+    ResourceAnalysis.results,
+    ResourceAnalysis.contributor_insights,
+    ResourceAnalysis.topic_analysis,
+    ResourceAnalysis.resource_summary,
+    ResourceAnalysis.key_highlights,
+)
+
+REPORT_CONTENT_COLUMNS = (CrossResourceReport.comprehensive_analysis,)
+
+
+def defer_analysis_content() -> List[LoaderOption]:
+    """Get the loader options deferring the content columns of ResourceAnalysis."""
+    return [defer(column, raiseload=True) for column in ANALYSIS_CONTENT_COLUMNS]
+
+
+def defer_report_content() -> List[LoaderOption]:
+    """Get the loader options deferring the content columns of CrossResourceReport."""
+    return [defer(column, raiseload=True) for column in REPORT_CONTENT_COLUMNS]
+
+
+def loaded_attributes(instance: Any) -> Dict[str, Any]:
+    """
+    Get the attributes of an ORM instance that are loaded, without triggering any load.
+
+    Deferred columns are left out, so a response model built from the result
+    falls back to its defaults for them.
+
+    Args:
+        instance: ORM instance
+
+    Returns:
+        Dictionary of attribute name to value
+    """
+    return {key: value for key, value in instance.__dict__.items() if not key.startswith("_sa_")}
+
+
+def analysis_response_data(analysis: ResourceAnalysis) -> Dict[str, Any]:
+    """
+    Get the response data of an analysis from its loaded attributes.
+
+    Args:
+        analysis: Resource analysis, possibly with its content deferred
+
+    Returns:
+        Dictionary for ResourceAnalysisResponse
+    """
+    data = loaded_attributes(analysis)
+    data.pop("_workspace_uuid", None)
+    data["workspace_uuid"] = analysis.workspace_uuid
+    return data
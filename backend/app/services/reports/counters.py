@@ -0,0 +1,203 @@
+"""
+Denormalised analysis counters for cross-resource reports.
+
+CrossResourceReport carries per-status counts of its ResourceAnalysis rows
+together with the distinct resource types it covers. Every status change of
+an analysis should go through transition_analysis_status so the counters are
+adjusted in the same transaction, which keeps report status checks and report
+listings free of aggregate queries.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.reports import CrossResourceReport, ReportStatus, ResourceAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Maps each analysis status to the report column that counts it
+STATUS_COUNTER_COLUMNS: Dict[ReportStatus, str] = {
+    ReportStatus.PENDING: "pending_analyses",
+    ReportStatus.IN_PROGRESS: "in_progress_analyses",
+    ReportStatus.COMPLETED: "completed_analyses",
+    ReportStatus.FAILED: "failed_analyses",
+}
+
+COUNTER_COLUMNS = ["total_resources"] + list(STATUS_COUNTER_COLUMNS.values())
+
+
+def _enum_value(value) -> str:
+    """Return the plain string value of an enum member or string."""
+    return value.value if hasattr(value, "value") else str(value)
+
+
+def add_analyses_to_report(report: CrossResourceReport, analyses: Iterable[ResourceAnalysis]) -> None:
+    """
+    Count newly created analyses on a report that is being built in this transaction.
+
+    This works on the in-memory objects, so it is only safe for reports that
+    no other transaction can see yet (i.e. before the creating commit).
+
+    Args:
+        report: The report the analyses belong to
+        analyses: The new ResourceAnalysis objects
+    """
+    resource_types = list(report.resource_types or [])
+
+    for analysis in analyses:
+        report.total_resources = (report.total_resources or 0) + 1
+        column = STATUS_COUNTER_COLUMNS[ReportStatus(analysis.status or ReportStatus.PENDING)]
+        setattr(report, column, (getattr(report, column) or 0) + 1)
+
+        resource_type = _enum_value(analysis.resource_type)
+        if resource_type not in resource_types:
+            resource_types.append(resource_type)
+
+    report.resource_types = resource_types
+
+    # Make sure untouched counters are initialised for the response
+    for column in COUNTER_COLUMNS:
+        if getattr(report, column) is None:
+            setattr(report, column, 0)
+
+
+async def transition_analysis_status(
+    db: AsyncSession,
+    analysis_id: UUID,
+    status: ReportStatus,
+    **values,
+) -> Optional[UUID]:
+    """
+    Move an analysis to a new status and adjust its report's counters.
+
+    The analysis row is locked until the end of the transaction so two
+    concurrent transitions of the same analysis cannot both be counted.
+    The caller is responsible for committing.
+
+    Args:
+        db: Database session
+        analysis_id: ID of the analysis to update
+        status: New status for the analysis
+        values: Additional ResourceAnalysis columns to update
+
+    Returns:
+        ID of the analysis' report, or None if the analysis does not exist
+    """
+    result = await db.execute(
+        select(ResourceAnalysis.status, ResourceAnalysis.cross_resource_report_id)
+        .where(ResourceAnalysis.id == analysis_id)
+        .with_for_update()
+    )
+    row = result.one_or_none()
+
+    if row is None:
+        logger.warning(f"Cannot transition analysis {analysis_id}: not found")
+        return None
+
+    previous_status, report_id = row
+
+    await db.execute(update(ResourceAnalysis).where(ResourceAnalysis.id == analysis_id).values(status=status, **values))
+
+    if previous_status is not None and ReportStatus(previous_status) != ReportStatus(status):
+        old_column = STATUS_COUNTER_COLUMNS[ReportStatus(previous_status)]
+        new_column = STATUS_COUNTER_COLUMNS[ReportStatus(status)]
+        await db.execute(
+            update(CrossResourceReport)
+            .where(CrossResourceReport.id == report_id)
+            .values(
+                {
+                    old_column: getattr(CrossResourceReport, old_column) - 1,
+                    new_column: getattr(CrossResourceReport, new_column) + 1,
+                }
+            )
+        )
+
+    return report_id
+
+
+async def get_report_counters(db: AsyncSession, report_id: UUID) -> Optional[Dict[str, int]]:
+    """
+    Read the denormalised counters of a report.
+
+    Args:
+        db: Database session
+        report_id: ID of the report
+
+    Returns:
+        Dictionary of counter column name to value, or None if the report does not exist
+    """
+    result = await db.execute(
+        select(*[getattr(CrossResourceReport, column) for column in COUNTER_COLUMNS]).where(
+            CrossResourceReport.id == report_id
+        )
+    )
+    row = result.one_or_none()
+
+    if row is None:
+        return None
+
+    return {column: value or 0 for column, value in zip(COUNTER_COLUMNS, row)}
+
+
+async def recount_report_analyses(db: AsyncSession, report_id: UUID) -> Dict[str, int]:
+    """
+    Rebuild a report's counters from its analyses.
+
+    This is the slow path used to repair counters that drifted, e.g. after
+    analyses were modified outside transition_analysis_status.
+
+    Args:
+        db: Database session
+        report_id: ID of the report
+
+    Returns:
+        Dictionary of the recomputed counters
+    """
+    status_result = await db.execute(
+        select(ResourceAnalysis.status, func.count())
+        .where(ResourceAnalysis.cross_resource_report_id == report_id)
+        .group_by(ResourceAnalysis.status)
+    )
+    status_counts = {ReportStatus(status): count for status, count in status_result.all()}
+
+    types_result = await db.execute(
+        select(ResourceAnalysis.resource_type).distinct().where(ResourceAnalysis.cross_resource_report_id == report_id)
+    )
+    resource_types = sorted(_enum_value(resource_type) for (resource_type,) in types_result.all())
+
+    counters = {"total_resources": sum(status_counts.values())}
+    for report_status, column in STATUS_COUNTER_COLUMNS.items():
+        counters[column] = status_counts.get(report_status, 0)
+
+    await db.execute(
+        update(CrossResourceReport)
+        .where(CrossResourceReport.id == report_id)
+        .values(resource_types=resource_types, **counters)
+    )
+
+    return counters
+
+
+async def add_report_llm_tokens(db: AsyncSession, report_id: UUID, tokens: int) -> None:
+    """
+    Add LLM tokens spent by one of a report's analyses to the report's total.
+
+    The caller is responsible for committing.
+
+    Args:
+        db: Database session
+        report_id: ID of the report
+        tokens: Tokens to add
+    """
+    if not tokens:
+        return
+
+    await db.execute(
+        update(CrossResourceReport)
+        .where(CrossResourceReport.id == report_id)
+        .values(llm_tokens_used=CrossResourceReport.llm_tokens_used + tokens)
+    )
@@ -0,0 +1,402 @@
+"""
+Recurring reports: materialise ReportSchedule rows into CrossResourceReports.
+
+Runs are placed inside a configurable off-peak window. Each schedule gets a
+stable offset inside that window derived from its ID, so many schedules with
+the same frequency do not all hit the LLM provider at the same moment.
+Channel data is synced shortly before a run (but never before the reporting
+period has ended), so the analyses read fresh messages without waiting on
+the Slack API themselves.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.reports import (
+    AnalysisResourceType,
+    CrossResourceReport,
+    ReportFrequency,
+    ReportSchedule,
+    ReportStatus,
+    ResourceAnalysis,
+)
+from app.models.slack import SlackChannel
+from app.services.reports.counters import add_analyses_to_report
+from app.services.slack.utils import get_channel_message_stats
+
+logger = logging.getLogger(__name__)
+
+
+def _midnight(value: datetime) -> datetime:
+    """Truncate a datetime to the start of its day."""
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _period_boundary(frequency: ReportFrequency, day: datetime) -> datetime:
+    """
+    Get the first period boundary on or after a given day.
+
+    Weekly periods start on Mondays and monthly periods on the 1st.
+
+    Args:
+        frequency: Schedule frequency
+        day: Day to start from (truncated to midnight)
+
+    Returns:
+        Midnight of the boundary day
+    """
+    day = _midnight(day)
+    if ReportFrequency(frequency) == ReportFrequency.WEEKLY:
+        return day + timedelta(days=(7 - day.weekday()) % 7)
+
+    if day.day == 1:
+        return day
+    if day.month == 12:
+        return day.replace(year=day.year + 1, month=1, day=1)
+    return day.replace(month=day.month + 1, day=1)
+
+
+def get_window_offset(schedule_id: UUID) -> timedelta:
+    """
+    Get the stable offset of a schedule inside the off-peak window.
+
+    Args:
+        schedule_id: ID of the schedule
+
+    Returns:
+        Offset from the start of the window
+    """
+    window_seconds = max(settings.REPORT_SCHEDULE_WINDOW_HOURS, 0) * 60 * 60
+    if window_seconds == 0:
+        return timedelta(0)
+    return timedelta(seconds=UUID(str(schedule_id)).int % window_seconds)
+
+
+def compute_next_run(schedule_id: UUID, frequency: ReportFrequency, after: datetime) -> datetime:
+    """
+    Compute the next run time of a schedule strictly after a given time.
+
+    Args:
+        schedule_id: ID of the schedule
+        frequency: Schedule frequency
+        after: Time to compute the next run after
+
+    Returns:
+        Next run time (UTC, naive like the rest of the models)
+    """
+    slot = timedelta(hours=settings.REPORT_SCHEDULE_WINDOW_START_HOUR) + get_window_offset(schedule_id)
+
+    boundary = _period_boundary(frequency, after)
+    if boundary + slot <= after:
+        boundary = _period_boundary(frequency, boundary + timedelta(days=1))
+
+    return boundary + slot
+
+
+def get_report_period(frequency: ReportFrequency, run_at: datetime) -> Tuple[datetime, datetime]:
+    """
+    Get the reporting period covered by a run.
+
+    A run covers the whole week or calendar month that ended at the
+    boundary the run belongs to.
+
+    Args:
+        frequency: Schedule frequency
+        run_at: Scheduled run time
+
+    Returns:
+        Tuple of (period start, period end)
+    """
+    period_end = _midnight(run_at)
+
+    if ReportFrequency(frequency) == ReportFrequency.WEEKLY:
+        return period_end - timedelta(days=7), period_end
+
+    period_start = (period_end - timedelta(days=1)).replace(day=1)
+    return period_start, period_end
+
+
+async def _load_channels(db: AsyncSession, schedule: ReportSchedule) -> Dict[UUID, SlackChannel]:
+    """Load the SlackChannel rows referenced by a schedule in one query."""
+    channel_ids = []
+    for channel in schedule.channels or []:
+        try:
+            channel_ids.append(UUID(channel["id"]))
+        except (KeyError, ValueError) as e:
+            logger.error(f"Invalid channel data in report schedule {schedule.id}: {str(e)}")
+
+    if not channel_ids:
+        return {}
+
+    result = await db.execute(select(SlackChannel).where(SlackChannel.id.in_(channel_ids)))
+    return {channel.id: channel for channel in result.scalars().all()}
+
+
+async def presync_schedule_channels(db: AsyncSession, schedule: ReportSchedule, now: datetime) -> int:
+    """
+    Sync the channels of a schedule for its upcoming reporting period.
+
+    Args:
+        db: Database session
+        schedule: Schedule whose next run is coming up
+        now: Current time
+
+    Returns:
+        Number of channels synced successfully
+    """
+    from app.services.slack.messages import SlackMessageService
+
+    period_start, period_end = get_report_period(schedule.frequency, schedule.next_run_at)
+    channels = await _load_channels(db, schedule)
+
+    synced = 0
+    for channel in channels.values():
+        try:
+            await SlackMessageService.sync_channel_messages(
+                db=db,
+                workspace_id=str(channel.workspace_id),
+                channel_id=str(channel.id),
+                start_date=period_start,
+                end_date=period_end,
+                include_replies=schedule.include_threads,
+                sync_threads=schedule.include_threads,
+            )
+            synced += 1
+        except Exception as e:
+            logger.error(f"Error pre-syncing channel {channel.id} for report schedule {schedule.id}: {str(e)}")
+
+    schedule.last_presync_at = now
+    await db.commit()
+
+    logger.info(f"Pre-synced {synced}/{len(channels)} channels for report schedule {schedule.id}")
+    return synced
+
+
+async def materialize_schedule(db: AsyncSession, schedule: ReportSchedule, now: datetime) -> CrossResourceReport:
+    """
+    Create the report for a due schedule and advance the schedule.
+
+    This mirrors the channel report endpoint: one CrossResourceReport with a
+    PENDING ResourceAnalysis per channel, seeded with the initial message
+    statistics. The caller schedules the analyses once this has committed.
+
+    Args:
+        db: Database session
+        schedule: Due schedule
+        now: Current time
+
+    Returns:
+        The newly created report, FAILED if none of its channels were valid
+    """
+    period_start, period_end = get_report_period(schedule.frequency, schedule.next_run_at)
+    channels = schedule.channels or []
+    channel_count = len(channels)
+    frequency_label = ReportFrequency(schedule.frequency).value.capitalize()
+
+    title = schedule.title or (
+        f"{frequency_label} Multi-channel Analysis ({channel_count} channels)"
+        if channel_count > 1
+        else f"{frequency_label} Analysis of #{channels[0].get('name', 'Unknown')}"
+    )
+    description = schedule.description or (
+        f"{frequency_label} analysis for {period_start:%Y-%m-%d} to {period_end:%Y-%m-%d}"
+    )
+
+    report = CrossResourceReport(
+        id=uuid4(),
+        team_id=schedule.team_id,
+        title=title,
+        description=description,
+        date_range_start=period_start,
+        date_range_end=period_end,
+        status=ReportStatus.PENDING,
+        report_parameters={
+            "include_threads": schedule.include_threads,
+            "include_reactions": schedule.include_reactions,
+            "analysis_type": schedule.analysis_type.value,
+            "channel_count": channel_count,
+            "schedule_id": str(schedule.id),
+        },
+    )
+    db.add(report)
+    await db.flush()
+
+    resource_analyses: List[ResourceAnalysis] = []
+    for channel in channels:
+        try:
+            channel_id = UUID(channel["id"])
+            integration_id = UUID(channel["integration_id"])
+        except (KeyError, ValueError) as e:
+            logger.error(f"Skipping invalid channel in report schedule {schedule.id}: {str(e)}")
+            continue
+
+        channel_stats = await get_channel_message_stats(
+            db=db, channel_id=channel_id, start_date=period_start, end_date=period_end
+        )
+
+        analysis = ResourceAnalysis(
+            id=uuid4(),
+            cross_resource_report_id=report.id,
+            integration_id=integration_id,
+            resource_id=channel_id,
+            resource_type=AnalysisResourceType.SLACK_CHANNEL,
+            analysis_type=schedule.analysis_type,
+            status=ReportStatus.PENDING,
+            period_start=period_start,
+            period_end=period_end,
+            message_count=channel_stats["message_count"],
+            participant_count=channel_stats["participant_count"],
+            thread_count=channel_stats["thread_count"],
+            reaction_count=channel_stats["reaction_count"],
+            analysis_parameters={
+                "include_threads": schedule.include_threads,
+                "include_reactions": schedule.include_reactions,
+                "channel_name": channel.get("name", "Unknown"),
+            },
+        )
+        db.add(analysis)
+        resource_analyses.append(analysis)
+
+    add_analyses_to_report(report, resource_analyses)
+    if not resource_analyses:
+        # Nothing will ever complete this report, so fail it instead of leaving it pending
+        report.status = ReportStatus.FAILED
+        report.report_parameters = {**report.report_parameters, "error": "No valid channels to analyze"}
+
+    # Advance the schedule; missed runs (e.g. downtime) are not replayed
+    schedule.last_run_at = now
+    schedule.last_report_id = report.id
+    schedule.next_run_at = compute_next_run(schedule.id, schedule.frequency, max(now, schedule.next_run_at))
+
+    await db.commit()
+
+    logger.info(
+        f"Created scheduled report {report.id} with {len(resource_analyses)} channel analyses "
+        f"for schedule {schedule.id}; next run at {schedule.next_run_at}"
+    )
+    return report
+
+
+async def process_report_schedules(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Run one pass of the report scheduler.
+
+    Pre-syncs channels for schedules that run soon, then materialises every
+    schedule that is due and queues its analyses. Upcoming and due rows are
+    locked with SKIP LOCKED so several workers can run the scheduler side by
+    side.
+
+    Args:
+        db: Database session
+        now: Current time (defaults to utcnow)
+
+    Returns:
+        Dictionary with the number of schedules pre-synced and reports created
+    """
+    from app.services.analysis.task_scheduler import ResourceAnalysisTaskScheduler
+
+    now = now or datetime.utcnow()
+    lead = timedelta(hours=settings.REPORT_SCHEDULE_PRESYNC_LEAD_HOURS)
+    stats = {"presynced": 0, "reports_created": 0}
+
+    # Pre-sync upcoming runs, but only once their period has ended. Like due
+    # runs, each schedule is claimed with SKIP LOCKED and the claim committed
+    # before syncing, so concurrent workers don't sync the same channels.
+    upcoming_conditions = (
+        ReportSchedule.is_active.is_(True),
+        ReportSchedule.next_run_at > now,
+        ReportSchedule.next_run_at <= now + lead,
+    )
+    upcoming_result = await db.execute(select(ReportSchedule.id).where(*upcoming_conditions))
+    upcoming_ids = upcoming_result.scalars().all()
+
+    for schedule_id in upcoming_ids:
+        schedule_result = await db.execute(
+            select(ReportSchedule)
+            .where(ReportSchedule.id == schedule_id, *upcoming_conditions)
+            .with_for_update(skip_locked=True)
+        )
+        schedule = schedule_result.scalar_one_or_none()
+        if schedule is None:
+            continue
+
+        _, period_end = get_report_period(schedule.frequency, schedule.next_run_at)
+        presync_from = max(schedule.next_run_at - lead, period_end)
+        if now < presync_from or (schedule.last_presync_at and schedule.last_presync_at >= presync_from):
+            # Release the row lock
+            await db.rollback()
+            continue
+
+        schedule.last_presync_at = now
+        await db.commit()
+
+        await presync_schedule_channels(db, schedule, now)
+        stats["presynced"] += 1
+
+    # Materialise due runs, one transaction per schedule
+    due_result = await db.execute(
+        select(ReportSchedule.id)
+        .where(ReportSchedule.is_active.is_(True), ReportSchedule.next_run_at <= now)
+        .order_by(ReportSchedule.next_run_at)
+    )
+    due_ids = due_result.scalars().all()
+
+    for schedule_id in due_ids:
+        schedule_result = await db.execute(
+            select(ReportSchedule)
+            .where(ReportSchedule.id == schedule_id, ReportSchedule.next_run_at <= now)
+            .with_for_update(skip_locked=True)
+        )
+        schedule = schedule_result.scalar_one_or_none()
+        if schedule is None:
+            # Another worker is running (or has just run) this schedule
+            continue
+
+        try:
+            report = await materialize_schedule(db, schedule, now)
+        except Exception as e:
+            logger.error(f"Error running report schedule {schedule_id}: {str(e)}", exc_info=True)
+            await db.rollback()
+            continue
+
+        stats["reports_created"] += 1
+        if report.status == ReportStatus.FAILED:
+            continue
+        await ResourceAnalysisTaskScheduler.schedule_analyses_for_report(report_id=report.id, db=db)
+
+    return stats
+
+
+async def schedule_report_tasks():
+    """
+    Poll for due report schedules until cancelled.
+
+    This function is meant to be run as a background task when the app starts.
+    """
+    logger.info("Starting scheduled report runner")
+
+    try:
+        while True:
+            try:
+                from app.db.session import AsyncSessionLocal
+
+                async with AsyncSessionLocal() as db:
+                    stats = await process_report_schedules(db)
+                    if stats["presynced"] or stats["reports_created"]:
+                        logger.info(f"Report scheduler pass: {stats}")
+            except Exception as e:
+                logger.error(f"Error running report schedules: {str(e)}")
+
+            await asyncio.sleep(settings.REPORT_SCHEDULE_POLL_SECONDS)
+
+    except asyncio.CancelledError:
+        logger.info("Scheduled report runner was cancelled")
+    except Exception as e:
+        logger.error(f"Scheduled report runner failed: {str(e)}")
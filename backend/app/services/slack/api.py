@@ -7,6 +7,8 @@ from typing import Any, Dict, List, Optional
 
 import aiohttp
 
+from app.config import settings
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -48,7 +50,7 @@ class SlackApiClient:
             access_token: Slack access token
         """
         self.access_token = access_token
-        self.base_url = "https://slack.com/api"
+        self.base_url = settings.SLACK_API_BASE_URL.rstrip("/")
 
     async def _make_request(
         self,
@@ -7,13 +7,15 @@ import logging
 import time
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import select, update
+from sqlalchemy import Boolean, Integer, cast, false, func, literal, select, true, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import AsyncSessionLocal
+from app.models.integration import ResourceType, ServiceResource
 from app.models.slack import SlackChannel, SlackWorkspace
 from app.services.slack.api import SlackApiClient, SlackApiError
 
@@ -198,6 +200,104 @@ class ChannelService:
             },
         }
 
+    @staticmethod
+    async def get_channel_states(
+        db: AsyncSession, workspace_id: uuid.UUID, slack_ids: Iterable[str]
+    ) -> Dict[str, Tuple[bool, bool]]:
+        """
+        Get the selection and bot state of channels in one query.
+
+        Args:
+            db: Database session
+            workspace_id: UUID of the workspace
+            slack_ids: Slack IDs of the channels
+
+        Returns:
+            Dictionary of Slack ID to (is_selected_for_analysis, has_bot), without
+            the channels that have no SlackChannel row
+        """
+        slack_ids = list(set(slack_ids))
+        if not slack_ids:
+            return {}
+
+        result = await db.execute(
+            select(SlackChannel.slack_id, SlackChannel.is_selected_for_analysis, SlackChannel.has_bot).where(
+                SlackChannel.workspace_id == workspace_id,
+                SlackChannel.slack_id.in_(slack_ids),
+            )
+        )
+        return {slack_id: (is_selected, has_bot) for slack_id, is_selected, has_bot in result.all()}
+
+    @staticmethod
+    async def create_channels_from_resources(
+        db: AsyncSession, workspace_id: uuid.UUID, integration_id: uuid.UUID
+    ) -> int:
+        """
+        Create the missing SlackChannel rows of a workspace from its integration's channel resources.
+
+        The rows are copied with a single INSERT ... SELECT. Channels that
+        already exist are left as they are, and new ones start out not
+        selected for analysis and without the bot.
+
+        Args:
+            db: Database session
+            workspace_id: UUID of the workspace
+            integration_id: UUID of the Slack integration of the workspace
+
+        Returns:
+            Number of channels created
+        """
+        metadata = ServiceResource.resource_metadata
+        now = datetime.utcnow()
+        resources = select(
+            ServiceResource.id,
+            literal(workspace_id),
+            ServiceResource.external_id,
+            func.ltrim(ServiceResource.name, "#"),
+            func.coalesce(metadata["type"].astext, "public"),
+            func.coalesce(metadata["purpose"].astext, ""),
+            func.coalesce(metadata["topic"].astext, ""),
+            func.coalesce(cast(metadata["member_count"].astext, Integer), 0),
+            func.coalesce(cast(metadata["is_archived"].astext, Boolean), false()),
+            false(),
+            false(),
+            true(),
+            ServiceResource.last_synced_at,
+            literal(now),
+            literal(now),
+            true(),
+        ).where(
+            ServiceResource.integration_id == integration_id,
+            ServiceResource.resource_type == ResourceType.SLACK_CHANNEL,
+        )
+
+        result = await db.execute(
+            insert(SlackChannel)
+            .from_select(
+                [
+                    "id",
+                    "workspace_id",
+                    "slack_id",
+                    "name",
+                    "type",
+                    "purpose",
+                    "topic",
+                    "member_count",
+                    "is_archived",
+                    "has_bot",
+                    "is_selected_for_analysis",
+                    "is_supported",
+                    "last_sync_at",
+                    "created_at",
+                    "updated_at",
+                    "is_active",
+                ],
+                resources,
+            )
+            .on_conflict_do_nothing()
+        )
+        return result.rowcount or 0
+
     @staticmethod
     async def sync_channels_from_slack(
         db: AsyncSession,
@@ -2,21 +2,83 @@
 Slack message retrieval and processing service.
 """
 
+import base64
+import binascii
 import logging
+import re
 import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import select, text
+from sqlalchemy import func, select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.interfaces import LoaderOption
 
 from app.models.slack import SlackChannel, SlackMessage, SlackUser, SlackWorkspace
 from app.services.slack.api import SlackApiClient, SlackApiError, SlackApiRateLimitError
+from app.services.slack.partitions import ensure_partitions_for_days
+from app.services.slack.rollups import message_day, refresh_activity_rollups
+from app.services.slack.user_directory import SlackUserDirectory
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Marks a database keyset cursor, as opposed to a cursor from the Slack API
+KEYSET_CURSOR_PREFIX = "k."
+
+# Large JSON payloads of a message, only loaded when a listing asks for full content
+MESSAGE_CONTENT_COLUMNS = (SlackMessage.attachments, SlackMessage.files, SlackMessage.analysis_data)
+
+
+def defer_message_content() -> List[LoaderOption]:
+    """Get the loader options deferring the large JSON columns of SlackMessage."""
+    return [defer(column, raiseload=True) for column in MESSAGE_CONTENT_COLUMNS]
+
+
+def encode_message_cursor(message: SlackMessage) -> str:
+    """
+    Create an opaque keyset cursor pointing after a message.
+
+    Listings are ordered by (message_datetime, id) descending, so the cursor
+    holds the sort key of the last message on the page.
+
+    Args:
+        message: Last message of the current page
+
+    Returns:
+        Cursor string for the next page
+    """
+    key = f"{message.message_datetime.isoformat()}|{message.id}"
+    return KEYSET_CURSOR_PREFIX + base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_message_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, UUID]]:
+    """
+    Decode a keyset cursor created by encode_message_cursor.
+
+    Args:
+        cursor: Cursor from the client
+
+    Returns:
+        Tuple of (message_datetime, id), or None if the cursor is not a keyset cursor
+
+    Raises:
+        HTTPException: If the cursor is a malformed keyset cursor
+    """
+    if not cursor or not cursor.startswith(KEYSET_CURSOR_PREFIX):
+        return None
+
+    encoded = cursor[len(KEYSET_CURSOR_PREFIX) :]
+    try:
+        key = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+        message_datetime, message_id = key.split("|", 1)
+        return datetime.fromisoformat(message_datetime), UUID(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
 
 async def get_channel_messages(
     db: AsyncSession,
@@ -186,10 +248,17 @@ class SlackMessageService:
         include_replies: bool = True,
         thread_only: bool = False,
         thread_ts: Optional[str] = None,
+        include_total: bool = False,
+        include_content: bool = False,
     ) -> Dict[str, Any]:
         """
         Get messages from a channel with pagination, optionally filtered by date range.
 
+        Database pages are addressed with keyset cursors over (message_datetime, id),
+        so a deep page costs the same as the first one. Cursors returned while
+        messages are still being fetched from the Slack API are Slack cursors and
+        are passed back to the API.
+
         Args:
             db: Database session
             workspace_id: UUID of the workspace
@@ -197,10 +266,12 @@ class SlackMessageService:
             start_date: Optional start date for filtering messages
             end_date: Optional end date for filtering messages
             limit: Maximum number of messages to fetch per page
-            cursor: Pagination cursor (message timestamp)
+            cursor: Pagination cursor from a previous page
             include_replies: Whether to include thread replies
             thread_only: Only retrieve thread parent messages
             thread_ts: Filter by specific thread timestamp
+            include_total: Whether to count all matching messages (costs a COUNT query)
+            include_content: Whether to return attachments, files and analysis data
 
         Returns:
             Dictionary with messages and pagination information
@@ -230,8 +301,10 @@ class SlackMessageService:
             logger.error(f"Channel not found: {channel_id}")
             raise HTTPException(status_code=404, detail="Channel not found")
 
+        content_options = [] if include_content else defer_message_content()
+
         # First check if we already have messages for this channel in the database
-        query = select(SlackMessage).where(SlackMessage.channel_id == channel_id)
+        query = select(SlackMessage).options(*content_options).where(SlackMessage.channel_id == channel_id)
 
         # Apply thread filtering if specified
         if thread_only:
@@ -244,8 +317,8 @@ class SlackMessageService:
                 | ((SlackMessage.thread_ts == thread_ts) & (SlackMessage.is_thread_reply.is_(True)))  # Get replies
             )
 
-        # Sort by datetime descending (newest first)
-        query = query.order_by(SlackMessage.message_datetime.desc())
+        # Sort by datetime descending (newest first); the id breaks ties for the keyset cursor
+        query = query.order_by(SlackMessage.message_datetime.desc(), SlackMessage.id.desc())
 
         # Apply date filtering if specified, handling timezone-aware datetimes
         if start_date:
@@ -274,12 +347,22 @@ class SlackMessageService:
             logger.info(f"SlackMessageService.get_channel_messages - Filtering with end_date: {naive_end_date}")
             query = query.where(SlackMessage.message_datetime <= naive_end_date)
 
-        # Apply pagination
-        query = query.limit(limit)
+        # Keep the filtered query for the optional total count
+        filtered_query = query
+
+        # Continue after the last message of the previous page
+        keyset = decode_message_cursor(cursor)
+        if keyset:
+            query = query.where(tuple_(SlackMessage.message_datetime, SlackMessage.id) < tuple_(*keyset))
+
+        # Fetch one extra row to know whether there is a next page without counting
+        query = query.limit(limit + 1)
 
         # Execute query
         result = await db.execute(query)
         messages = result.scalars().all()
+        has_more_in_db = len(messages) > limit
+        messages = messages[:limit]
 
         # If we have no messages, or start date is earlier than oldest message,
         # fetch from Slack API
@@ -293,8 +376,10 @@ class SlackMessageService:
             else:
                 safe_start_date = start_date
 
-        should_fetch_from_api = len(messages) == 0 or (
-            start_date and (not channel.oldest_synced_ts or safe_start_date < messages[-1].message_datetime)
+        # Keyset cursors page through messages already in the database
+        should_fetch_from_api = not keyset and (
+            len(messages) == 0
+            or (start_date and (not channel.oldest_synced_ts or safe_start_date < messages[-1].message_datetime))
         )
 
         if should_fetch_from_api:
@@ -338,6 +423,7 @@ class SlackMessageService:
                 # Re-fetch messages from database to include the newly stored ones
                 query = (
                     select(SlackMessage)
+                    .options(*content_options)
                     .where(SlackMessage.channel_id == channel_id)
                     .order_by(SlackMessage.message_datetime.desc())
                 )
@@ -361,14 +447,19 @@ class SlackMessageService:
         else:
             # Just use database pagination
             pagination = {
-                "has_more": len(messages) == limit,
-                "next_cursor": None,  # We'll implement database pagination later
+                "has_more": has_more_in_db,
+                "next_cursor": encode_message_cursor(messages[-1]) if has_more_in_db else None,
                 "page_size": limit,
                 "total_messages": len(messages),
             }
 
+        if include_total:
+            count_query = select(func.count()).select_from(filtered_query.order_by(None).subquery())
+            count_result = await db.execute(count_query)
+            pagination["total_items"] = count_result.scalar() or 0
+
         # Convert messages to dictionaries
-        message_dicts = [SlackMessageService._message_to_dict(msg) for msg in messages]
+        message_dicts = SlackMessageService._messages_to_dicts(messages, include_content)
 
         return {
             "messages": message_dicts,
@@ -465,6 +556,12 @@ class SlackMessageService:
         # Track parent threads to fetch replies for
         thread_ts_set: Set[str] = set()
         stored_message_count = 0
+        stored_days: Set[date] = set()
+
+        # Resolve the authors of the whole batch at once
+        await SlackUserDirectory.resolve(
+            db, workspace_id, [SlackMessageService._message_user_id(message) for message in messages]
+        )
 
         # Process and store each message
         for message in messages:
@@ -495,12 +592,16 @@ class SlackMessageService:
             db_message = SlackMessage(**message_data)
             db.add(db_message)
             stored_message_count += 1
+            if db_message.message_datetime:
+                stored_days.add(message_day(db_message.message_datetime))
 
             # Track threads to fetch replies for
             if include_replies and message.get("thread_ts") and message.get("replies"):
                 thread_ts_set.add(message["thread_ts"])
 
-        # Commit the changes
+        # Commit the changes along with the rollups of the days they landed on, in their months' partitions
+        await ensure_partitions_for_days(db, stored_days)
+        await refresh_activity_rollups(db, channel.id, stored_days)
         await db.commit()
         logger.info(f"Stored {stored_message_count} messages for channel {channel.name}")
 
@@ -508,6 +609,7 @@ class SlackMessageService:
         if include_replies and thread_ts_set:
             logger.info(f"Fetching replies for {len(thread_ts_set)} threads")
             total_replies_stored = 0
+            reply_days: Set[date] = set()
 
             for thread_ts in thread_ts_set:
                 # Fetch thread replies from Slack API
@@ -535,6 +637,9 @@ class SlackMessageService:
 
                 # Track replies stored for this thread
                 thread_reply_count = 0
+                await SlackUserDirectory.resolve(
+                    db, workspace_id, [SlackMessageService._message_user_id(reply) for reply in thread_replies]
+                )
 
                 # Process and store each reply
                 for reply in thread_replies:
@@ -568,6 +673,8 @@ class SlackMessageService:
                     db_reply = SlackMessage(**reply_data)
                     db.add(db_reply)
                     thread_reply_count += 1
+                    if db_reply.message_datetime:
+                        reply_days.add(message_day(db_reply.message_datetime))
 
                 if thread_reply_count > 0:
                     # Update parent message with latest counts
@@ -577,9 +684,35 @@ class SlackMessageService:
 
             # Commit all thread replies
             if total_replies_stored > 0:
+                await ensure_partitions_for_days(db, reply_days)
+                await refresh_activity_rollups(db, channel.id, reply_days)
                 await db.commit()
                 logger.info(f"Total thread replies stored: {total_replies_stored}")
 
+    @staticmethod
+    def _message_user_id(message: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the Slack user ID of a message's author.
+
+        Args:
+            message: Message data from Slack API
+
+        Returns:
+            The author's Slack user ID, taken from a leading <@USER_ID> mention
+            if the message has no user, or None if there is neither
+        """
+        user_id = message.get("user")
+        text = message.get("text", "")
+
+        # Try to extract user ID from the text if not provided in the message
+        if not user_id and text and text.startswith("<@"):
+            match = re.match(r"^<@([A-Z0-9]+)>", text)
+            if match:
+                user_id = match.group(1)
+                logger.info(f"Extracted user ID from message text: {user_id}")
+
+        return user_id
+
     @staticmethod
     async def _prepare_message_data(
         db: AsyncSession,
@@ -602,19 +735,7 @@ class SlackMessageService:
         # Extract basic message data
         slack_ts = message["ts"]
         text = message.get("text", "")
-        user_id = message.get("user")
-
-        # Try to extract user ID from the text if not provided in the message
-        extracted_user_id = None
-        if not user_id and text and text.startswith("<@"):
-            # Extract user ID from a message starting with <@USER_ID>
-            import re
-
-            match = re.match(r"^<@([A-Z0-9]+)>", text)
-            if match:
-                extracted_user_id = match.group(1)
-                logger.info(f"Extracted user ID from message text: {extracted_user_id}")
-                user_id = extracted_user_id
+        user_id = SlackMessageService._message_user_id(message)
 
         # Convert Slack timestamp to datetime
         message_datetime = datetime.fromtimestamp(float(slack_ts))
@@ -645,14 +766,9 @@ class SlackMessageService:
         # Get user record if user_id is available
         db_user_id = None
         if user_id:
-            # Try to find user in database first
-            user_result = await db.execute(
-                select(SlackUser).where(
-                    SlackUser.workspace_id == workspace_id,
-                    SlackUser.slack_id == user_id,
-                )
-            )
-            user = user_result.scalars().first()
+            # Try the workspace's user directory first, which only queries for users it doesn't know
+            known_users = await SlackUserDirectory.resolve(db, workspace_id, [user_id])
+            user = known_users.get(user_id)
 
             if user:
                 # User exists in database, use their ID
@@ -865,6 +981,7 @@ class SlackMessageService:
             db.add(new_user)
             await db.commit()
             await db.refresh(new_user)
+            SlackUserDirectory.remember(workspace_id, new_user)
 
             return new_user
 
@@ -906,6 +1023,28 @@ class SlackMessageService:
             "parent_id": str(message.parent_id) if message.parent_id else None,
         }
 
+    @staticmethod
+    def _messages_to_dicts(messages: List[SlackMessage], include_content: bool = False) -> List[Dict[str, Any]]:
+        """
+        Convert database message models to dictionaries.
+
+        Args:
+            messages: SlackMessage instances
+            include_content: Whether to add attachments, files and analysis data (which must be loaded)
+
+        Returns:
+            List of dictionaries with message data
+        """
+        message_dicts = []
+        for message in messages:
+            message_dict = SlackMessageService._message_to_dict(message)
+            if include_content:
+                message_dict["attachments"] = message.attachments
+                message_dict["files"] = message.files
+                message_dict["analysis_data"] = message.analysis_data
+            message_dicts.append(message_dict)
+        return message_dicts
+
     @staticmethod
     async def get_messages_by_date_range(
         db: AsyncSession,
@@ -915,18 +1054,30 @@ class SlackMessageService:
         end_date: datetime,
         page: int = 1,
         page_size: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        include_replies: bool = True,
+        include_content: bool = False,
     ) -> Dict[str, Any]:
         """
         Get messages from multiple channels filtered by date range with pagination.
 
+        Pages can be addressed by page number (OFFSET) or by the keyset cursor
+        returned as next_cursor. With a cursor and include_total=False, every
+        page costs the same regardless of depth.
+
         Args:
             db: Database session
             workspace_id: UUID of the workspace
             channel_ids: List of channel UUIDs
             start_date: Start date for filtering messages
             end_date: End date for filtering messages
-            page: Page number for pagination
+            page: Page number for pagination (ignored when a cursor is given)
             page_size: Number of messages per page
+            cursor: Keyset cursor from a previous page
+            include_total: Whether to count all matching messages (costs a COUNT query)
+            include_replies: Whether to include thread replies
+            include_content: Whether to return attachments, files and analysis data
 
         Returns:
             Dictionary with messages and pagination information
@@ -956,48 +1107,48 @@ class SlackMessageService:
         naive_start_date = start_date.replace(tzinfo=None) if start_date.tzinfo else start_date
         naive_end_date = end_date.replace(tzinfo=None) if end_date.tzinfo else end_date
 
-        # Query messages from database
+        conditions = [
+            SlackMessage.channel_id.in_(channel_ids),
+            SlackMessage.message_datetime >= naive_start_date,
+            SlackMessage.message_datetime <= naive_end_date,
+        ]
+        if not include_replies:
+            conditions.append(SlackMessage.is_thread_reply.is_(False))
+
+        # Query messages from database, newest first; the id breaks ties for the keyset cursor
         query = (
             select(SlackMessage)
-            .where(
-                SlackMessage.channel_id.in_(channel_ids),
-                SlackMessage.message_datetime >= naive_start_date,
-                SlackMessage.message_datetime <= naive_end_date,
-            )
-            .order_by(SlackMessage.message_datetime.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
+            .where(*conditions)
+            .order_by(SlackMessage.message_datetime.desc(), SlackMessage.id.desc())
         )
+        if not include_content:
+            query = query.options(*defer_message_content())
 
-        # Execute query
-        result = await db.execute(query)
-        messages = result.scalars().all()
-
-        # Count total messages for pagination - but more efficiently using COUNT()
-        from sqlalchemy import func
+        keyset = decode_message_cursor(cursor)
+        if keyset:
+            query = query.where(tuple_(SlackMessage.message_datetime, SlackMessage.id) < tuple_(*keyset))
+        else:
+            query = query.offset((page - 1) * page_size)
 
-        count_query = (
-            select(func.count())
-            .select_from(SlackMessage)
-            .where(
-                SlackMessage.channel_id.in_(channel_ids),
-                SlackMessage.message_datetime >= naive_start_date,
-                SlackMessage.message_datetime <= naive_end_date,
-            )
-        )
-        count_result = await db.execute(count_query)
-        total_count = count_result.scalar() or 0
+        # Fetch one extra row to know whether there is a next page without counting
+        result = await db.execute(query.limit(page_size + 1))
+        messages = result.scalars().all()
+        has_next = len(messages) > page_size
+        messages = messages[:page_size]
 
-        # Log message counts for debugging Issue #238
-        logger.info(f"Total messages found for channels {channel_ids}: {total_count}")
+        total_count = None
+        total_pages = None
+        if include_total:
+            count_query = select(func.count()).select_from(SlackMessage).where(*conditions)
+            count_result = await db.execute(count_query)
+            total_count = count_result.scalar() or 0
+            total_pages = (total_count + page_size - 1) // page_size
 
-        # Calculate pagination info
-        total_pages = (total_count + page_size - 1) // page_size
-        has_next = page < total_pages
-        has_prev = page > 1
+            # Log message counts for debugging Issue #238
+            logger.info(f"Total messages found for channels {channel_ids}: {total_count}")
 
         # Convert messages to dictionaries
-        message_dicts = [SlackMessageService._message_to_dict(msg) for msg in messages]
+        message_dicts = SlackMessageService._messages_to_dicts(messages, include_content)
 
         return {
             "messages": message_dicts,
@@ -1007,7 +1158,8 @@ class SlackMessageService:
                 "total_pages": total_pages,
                 "total_items": total_count,
                 "has_next": has_next,
-                "has_prev": has_prev,
+                "has_prev": bool(keyset) or page > 1,
+                "next_cursor": encode_message_cursor(messages[-1]) if has_next else None,
             },
         }
 
@@ -1054,6 +1206,7 @@ class SlackMessageService:
             FROM slackuser u
             WHERE {' AND '.join(conditions)}
             AND u.slack_id = regexp_replace(m.text, '^<@([A-Z0-9]+)>.*', '\\1')
+            RETURNING m.channel_id, m.message_datetime
             """
 
             # Prepare parameters
@@ -1063,10 +1216,19 @@ class SlackMessageService:
 
             # Execute the query using SQLAlchemy text() function
             result = await db.execute(text(sql_text), params)
+            fixed_rows = result.all()
+
+            # The per-user rollups of the affected days change with the user references
+            touched_days: Dict[UUID, Set[date]] = {}
+            for fixed_channel_id, fixed_datetime in fixed_rows:
+                if fixed_datetime:
+                    touched_days.setdefault(fixed_channel_id, set()).add(message_day(fixed_datetime))
+            for fixed_channel_id, days in touched_days.items():
+                await refresh_activity_rollups(db, fixed_channel_id, days)
             await db.commit()
 
             # Get the number of rows affected
-            rows_affected = result.rowcount if hasattr(result, "rowcount") else 0
+            rows_affected = len(fixed_rows)
             logger.info(f"Fixed {rows_affected} message user references")
 
             return rows_affected
@@ -1212,7 +1374,7 @@ class SlackMessageService:
         try:
             from app.services.analysis.data_cache import ChannelDataCache
 
-            ChannelDataCache.invalidate(channel_id)
+            await ChannelDataCache.invalidate_everywhere(channel_id)
             logger.info(f"Invalidated data cache for channel {channel_id} after sync")
         except ImportError:
             logger.warning("Could not import ChannelDataCache to invalidate channel cache")
@@ -1247,10 +1409,14 @@ class SlackMessageService:
                   AND reply_count > 0
                   AND (thread_ts = slack_ts OR thread_ts IS NULL)
                   AND is_thread_parent = FALSE
+                RETURNING message_datetime
                 """
 
                 result = await db.execute(text(thread_flag_sql), {"channel_id": channel_id})
-                fixed_thread_flags = result.rowcount if hasattr(result, "rowcount") else 0
+                flagged_rows = result.all()
+                fixed_thread_flags = len(flagged_rows)
+                flag_days = {message_day(row[0]) for row in flagged_rows if row[0]}
+                await refresh_activity_rollups(db, channel.id, flag_days)
                 await db.commit()
 
                 logger.info(f"Fixed {fixed_thread_flags} thread parent flags")
@@ -1270,6 +1436,7 @@ class SlackMessageService:
                 parents = parent_result.scalars().all()
 
                 thread_sync_results["threads_synced"] = len(parents)
+                reply_days: Set[date] = set()
 
                 # Process each thread
                 for parent in parents:
@@ -1281,7 +1448,10 @@ class SlackMessageService:
                             thread_ts=parent.slack_ts,
                         )
 
-                        # Process each reply
+                        # Resolve the authors of the thread at once, then process each reply
+                        await SlackUserDirectory.resolve(
+                            db, workspace_id, [SlackMessageService._message_user_id(reply) for reply in thread_replies]
+                        )
                         for reply in thread_replies:
                             # Skip the parent message
                             if reply.get("ts") == parent.slack_ts:
@@ -1309,6 +1479,8 @@ class SlackMessageService:
                                 db_reply = SlackMessage(**reply_data)
                                 db.add(db_reply)
                                 thread_sync_results["replies_synced"] += 1
+                                if db_reply.message_datetime:
+                                    reply_days.add(message_day(db_reply.message_datetime))
 
                         # Update parent with latest counts
                         if thread_replies:
@@ -1319,6 +1491,8 @@ class SlackMessageService:
                         thread_sync_results["thread_errors"] += 1
 
                 # Commit all thread changes
+                await ensure_partitions_for_days(db, reply_days)
+                await refresh_activity_rollups(db, channel.id, reply_days)
                 await db.commit()
                 logger.info(f"Thread sync completed: {thread_sync_results}")
 
@@ -0,0 +1,316 @@
+"""
+Monthly partitions of the slackmessage table.
+
+slackmessage is range partitioned by message_datetime, one partition per
+calendar month (UTC) named slackmessage_YYYY_MM, plus slackmessage_default
+for rows outside every monthly range. Date-range queries are pruned to the
+months they cover, and retention drops whole partitions instead of running
+large DELETEs.
+
+maintain_message_partitions runs with the Slack background tasks: it creates
+partitions for the coming months before messages arrive for them and, when
+SLACK_MESSAGE_RETENTION_MONTHS is set, drops the ones that have aged out.
+Ingest calls ensure_partitions_for_days before storing a batch, so messages
+from earlier months (a first historical sync, a backfill) get partitions of
+their own instead of landing in the default partition. Rows that reach the
+default partition anyway are moved into monthly partitions by maintenance.
+"""
+
+import logging
+import re
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "slackmessage"
+DEFAULT_PARTITION = "slackmessage_default"
+
+_PARTITION_NAME = re.compile(r"^slackmessage_(\d{4})_(\d{2})$")
+
+# Months known to have a committed partition in this worker, so ingest only checks new months
+_known_months: Set[date] = set()
+
+
+def month_start(value: date) -> date:
+    """Get the first day of the month a date falls in."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Get the first day of the month a number of months after (or before) a month."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Get the name of the partition holding a month."""
+    return f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Get the month a partition holds from its name, or None for other tables."""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def create_partition_sql(month: date) -> str:
+    """Get the DDL creating the partition of a month if it does not exist."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    """Check whether slackmessage is a partitioned table in this database."""
+    result = await db.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND pg_table_is_visible(oid)"),
+        {"name": PARENT_TABLE},
+    )
+    return result.scalar() == "p"
+
+
+async def get_message_partitions(db: AsyncSession) -> Dict[str, Optional[date]]:
+    """
+    List the partitions of slackmessage.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Dictionary of partition name to the month it holds (None for the default partition)
+    """
+    result = await db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :name"
+        ),
+        {"name": PARENT_TABLE},
+    )
+    return {name: partition_month(name) for name in result.scalars().all()}
+
+
+def month_range_sql(month: date) -> str:
+    """Get the condition selecting the rows of a month."""
+    return f"message_datetime >= '{month.isoformat()}' AND message_datetime < '{add_months(month, 1).isoformat()}'"
+
+
+async def get_default_partition_months(db: AsyncSession) -> Set[date]:
+    """
+    Get the months of the rows in the default partition.
+
+    Args:
+        db: Database session
+
+    Returns:
+        First days of the months with rows in the default partition
+    """
+    result = await db.execute(text(f"SELECT DISTINCT date_trunc('month', message_datetime) FROM {DEFAULT_PARTITION}"))
+    return {month_start(value.date()) for value in result.scalars().all() if value is not None}
+
+
+async def create_month_partition(db: AsyncSession, month: date, move_default_rows: bool = False) -> None:
+    """
+    Create the partition of a month.
+
+    A partition can't be created over rows of its month in the default
+    partition, so with move_default_rows the default partition is detached,
+    its rows of the month are moved into the new partition and it is
+    attached again. Runs in the caller's transaction; the caller commits.
+
+    Args:
+        db: Database session
+        month: First day of the month
+        move_default_rows: Whether the default partition has rows of the month
+    """
+    if not move_default_rows:
+        await db.execute(text(create_partition_sql(month)))
+        return
+
+    rows = month_range_sql(month)
+    await db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    await db.execute(text(create_partition_sql(month)))
+    await db.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM {DEFAULT_PARTITION} WHERE {rows}"))
+    await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {rows}"))
+    await db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    logger.info(f"Moved the {month:%Y-%m} rows of {DEFAULT_PARTITION} into {partition_name(month)}")
+
+
+async def _create_month_partitions(
+    db: AsyncSession, months: Iterable[date], existing: Dict[str, Optional[date]]
+) -> List[str]:
+    """Create the partitions of the months that have none, moving their rows out of the default partition."""
+    missing = sorted({month for month in months if partition_name(month) not in existing})
+    if not missing:
+        return []
+
+    default_months = await get_default_partition_months(db) if DEFAULT_PARTITION in existing else set()
+    for month in missing:
+        await create_month_partition(db, month, move_default_rows=month in default_months)
+    return [partition_name(month) for month in missing]
+
+
+async def ensure_partitions_for_days(db: AsyncSession, days: Iterable[date]) -> List[str]:
+    """
+    Create the partitions of the months messages are about to be stored in.
+
+    Called by ingest before adding a batch of messages, in the same
+    transaction. Months this worker already found partitions for are
+    skipped without querying, so steady-state ingest costs nothing.
+
+    Args:
+        db: Database session
+        days: Days (or datetimes) of the messages to be stored
+
+    Returns:
+        Names of the partitions that were created
+    """
+    months = {month_start(day) for day in days if day} - _known_months
+    if not months or not await is_partitioned(db):
+        return []
+
+    # Serialise partition DDL between concurrent ingests
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext("slackmessage_partitions"))))
+    existing = await get_message_partitions(db)
+    # Only months whose partitions were already committed are remembered; new ones are confirmed next time
+    _known_months.update(month for month in months if partition_name(month) in existing)
+
+    created = await _create_month_partitions(db, months, existing)
+    if created:
+        logger.info(f"Created slackmessage partitions for ingested messages: {', '.join(created)}")
+    return created
+
+
+async def ensure_message_partitions(
+    db: AsyncSession,
+    months_ahead: Optional[int] = None,
+    start: Optional[date] = None,
+) -> List[str]:
+    """
+    Create the monthly partitions from a month through the coming months.
+
+    Runs in the caller's transaction; the caller commits.
+
+    Args:
+        db: Database session
+        months_ahead: Months after the current one to create (default SLACK_MESSAGE_PARTITION_MONTHS_AHEAD)
+        start: First month to create (default the current month)
+
+    Returns:
+        Names of the partitions that were created
+    """
+    if months_ahead is None:
+        months_ahead = settings.SLACK_MESSAGE_PARTITION_MONTHS_AHEAD
+
+    current = month_start(datetime.utcnow().date())
+    month = month_start(start) if start else current
+    last = add_months(current, months_ahead)
+
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+
+    created = await _create_month_partitions(db, months, await get_message_partitions(db))
+
+    if created:
+        logger.info(f"Created slackmessage partitions: {', '.join(created)}")
+    return created
+
+
+async def drop_expired_message_partitions(db: AsyncSession, retention_months: Optional[int] = None) -> List[str]:
+    """
+    Drop the monthly partitions that are entirely older than the retention period.
+
+    Reactions on the dropped messages are deleted with them. Daily activity
+    rollups are kept, so long-range statistics survive retention.
+
+    Args:
+        db: Database session
+        retention_months: Months of messages to keep, including the current one
+            (default SLACK_MESSAGE_RETENTION_MONTHS; 0 keeps everything)
+
+    Returns:
+        Names of the partitions that were dropped
+    """
+    if retention_months is None:
+        retention_months = settings.SLACK_MESSAGE_RETENTION_MONTHS
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(datetime.utcnow().date()), -(retention_months - 1))
+    partitions = await get_message_partitions(db)
+    expired = sorted(name for name, month in partitions.items() if month and month < cutoff)
+
+    if DEFAULT_PARTITION in partitions:
+        # Rows of expired months that never got a partition of their own
+        old_rows = f"message_datetime < '{cutoff.isoformat()}'"
+        await db.execute(
+            text(f"DELETE FROM slackreaction WHERE message_id IN (SELECT id FROM {DEFAULT_PARTITION} WHERE {old_rows})")
+        )
+        await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {old_rows}"))
+
+    for name in expired:
+        await db.execute(text(f"DELETE FROM slackreaction WHERE message_id IN (SELECT id FROM {name})"))
+        await db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+
+    if expired:
+        logger.info(f"Dropped slackmessage partitions older than {cutoff.isoformat()}: {', '.join(expired)}")
+    return expired
+
+
+async def move_default_partition_rows(db: AsyncSession) -> List[str]:
+    """
+    Move the rows of the default partition into monthly partitions.
+
+    Runs in the caller's transaction; the caller commits.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Names of the partitions that were created for them
+    """
+    partitions = await get_message_partitions(db)
+    if DEFAULT_PARTITION not in partitions:
+        return []
+
+    created = await _create_month_partitions(db, await get_default_partition_months(db), partitions)
+    if created:
+        logger.info(f"Created slackmessage partitions for rows of the default partition: {', '.join(created)}")
+    return created
+
+
+async def maintain_message_partitions(db: AsyncSession) -> None:
+    """
+    Create upcoming partitions, drop expired ones and empty the default partition.
+
+    Does nothing when slackmessage is not partitioned (e.g. before the
+    partitioning migration has run).
+
+    Args:
+        db: Database session
+    """
+    try:
+        if not await is_partitioned(db):
+            logger.debug("slackmessage is not partitioned, skipping partition maintenance")
+            return
+
+        await ensure_message_partitions(db)
+        await drop_expired_message_partitions(db)
+        await move_default_partition_rows(db)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Error maintaining slackmessage partitions: {str(e)}")
+        await db.rollback()
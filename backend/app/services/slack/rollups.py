@@ -0,0 +1,363 @@
+"""
+Daily activity rollups for Slack channels.
+
+slackchanneldailyactivity and slackuserdailyactivity hold message, reply,
+thread and reaction counts per channel-day and per channel-user-day, plus the
+number of participants per channel-day. Ingest paths call
+refresh_activity_rollups for the days they stored messages on, in the same
+transaction as the messages, and rebuild_activity_rollups recomputes any range
+(used by scripts/backfill_activity_rollups.py).
+
+Days are rebuilt from slackmessage rather than adjusted by deltas, so changes
+to existing messages made by the same sync (reaction counts, thread parent
+flags) are picked up too.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Date, and_, cast, delete, desc, func, insert, literal, or_, select, true, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.slack import SlackChannelDailyActivity, SlackMessage, SlackUser, SlackUserDailyActivity
+
+logger = logging.getLogger(__name__)
+
+_COUNT_COLUMNS = ["message_count", "reply_count", "thread_count", "reaction_count"]
+
+
+def message_day(message_datetime: datetime) -> date:
+    """Get the rollup day (UTC date) of a message datetime."""
+    return message_datetime.date()
+
+
+def _day_start(day: date) -> datetime:
+    """Get the first instant of a day as a naive UTC datetime."""
+    return datetime.combine(day, time.min)
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Drop tzinfo, since message datetimes are stored timezone-naive."""
+    if value is not None and value.tzinfo:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def _count_columns() -> List[Any]:
+    """Aggregate columns over slackmessage, in _COUNT_COLUMNS order."""
+    return [
+        func.count().label("message_count"),
+        func.count().filter(SlackMessage.is_thread_reply.is_(True)).label("reply_count"),
+        func.count().filter(SlackMessage.is_thread_parent.is_(True)).label("thread_count"),
+        func.coalesce(func.sum(SlackMessage.reaction_count), 0).label("reaction_count"),
+    ]
+
+
+async def rebuild_activity_rollups(
+    db: AsyncSession,
+    channel_id: Optional[UUID] = None,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    days: Optional[Iterable[date]] = None,
+) -> int:
+    """
+    Recompute the rollups of a day range from slackmessage.
+
+    Runs in the caller's transaction; the caller commits.
+
+    Args:
+        db: Database session
+        channel_id: Optional channel to rebuild (all channels if None)
+        start_day: Optional first day to rebuild (inclusive)
+        end_day: Optional last day to rebuild (inclusive)
+        days: Optional set of days within the range to rebuild
+
+    Returns:
+        Number of channel-day rows written
+    """
+    day_expr = cast(SlackMessage.message_datetime, Date)
+    day_list = sorted(set(days)) if days is not None else None
+    if day_list is not None:
+        if not day_list:
+            return 0
+        start_day = max(start_day, day_list[0]) if start_day else day_list[0]
+        end_day = min(end_day, day_list[-1]) if end_day else day_list[-1]
+
+    message_conditions = [SlackMessage.message_datetime.isnot(None)]
+    channel_conditions = []
+    user_conditions = []
+
+    if channel_id is not None:
+        message_conditions.append(SlackMessage.channel_id == channel_id)
+        channel_conditions.append(SlackChannelDailyActivity.channel_id == channel_id)
+        user_conditions.append(SlackUserDailyActivity.channel_id == channel_id)
+    if start_day is not None:
+        message_conditions.append(SlackMessage.message_datetime >= _day_start(start_day))
+        channel_conditions.append(SlackChannelDailyActivity.day >= start_day)
+        user_conditions.append(SlackUserDailyActivity.day >= start_day)
+    if end_day is not None:
+        message_conditions.append(SlackMessage.message_datetime < _day_start(end_day + timedelta(days=1)))
+        channel_conditions.append(SlackChannelDailyActivity.day <= end_day)
+        user_conditions.append(SlackUserDailyActivity.day <= end_day)
+    if day_list is not None:
+        message_conditions.append(day_expr.in_(day_list))
+        channel_conditions.append(SlackChannelDailyActivity.day.in_(day_list))
+        user_conditions.append(SlackUserDailyActivity.day.in_(day_list))
+
+    # New messages may still be pending in the session (autoflush is off)
+    await db.flush()
+
+    await db.execute(delete(SlackUserDailyActivity).where(*user_conditions))
+    await db.execute(delete(SlackChannelDailyActivity).where(*channel_conditions))
+
+    now = datetime.utcnow()
+    row_defaults = [func.gen_random_uuid(), literal(now), literal(now), true()]
+    base_columns = ["id", "created_at", "updated_at", "is_active"]
+
+    channel_rows = select(
+        *row_defaults,
+        SlackMessage.channel_id,
+        day_expr,
+        *_count_columns(),
+        func.count(SlackMessage.user_id.distinct()),
+    ).where(*message_conditions)
+    channel_result = await db.execute(
+        insert(SlackChannelDailyActivity).from_select(
+            base_columns + ["channel_id", "day"] + _COUNT_COLUMNS + ["participant_count"],
+            channel_rows.group_by(SlackMessage.channel_id, day_expr),
+        )
+    )
+
+    user_rows = select(
+        *row_defaults,
+        SlackMessage.channel_id,
+        SlackMessage.user_id,
+        day_expr,
+        *_count_columns(),
+    ).where(*message_conditions, SlackMessage.user_id.isnot(None))
+    await db.execute(
+        insert(SlackUserDailyActivity).from_select(
+            base_columns + ["channel_id", "user_id", "day"] + _COUNT_COLUMNS,
+            user_rows.group_by(SlackMessage.channel_id, SlackMessage.user_id, day_expr),
+        )
+    )
+
+    return channel_result.rowcount or 0
+
+
+async def refresh_activity_rollups(db: AsyncSession, channel_id: UUID, days: Iterable[date]) -> None:
+    """
+    Rebuild a channel's rollups for the days an ingest touched.
+
+    Call before committing the ingested messages so both commit together.
+    Concurrent refreshes of the same channel are serialised with a
+    transaction-level advisory lock.
+
+    Args:
+        db: Database session
+        channel_id: UUID of the channel
+        days: Days on which messages were stored or changed
+    """
+    days = set(days)
+    if not days:
+        return
+
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"slack_activity_rollups:{channel_id}"))))
+    await rebuild_activity_rollups(db, channel_id=channel_id, days=days)
+    logger.debug(f"Refreshed activity rollups for channel {channel_id} on {len(days)} days")
+
+
+async def get_channel_activity_stats(
+    db: AsyncSession,
+    channel_id: UUID,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Get message statistics for a channel from the daily rollups.
+
+    Whole days inside the range are read from the rollups. Partial days at
+    either end are counted from slackmessage, which is at most two days of
+    messages, so any range costs about the same.
+
+    Args:
+        db: Database session
+        channel_id: UUID of the channel
+        start_date: Optional start of the range (inclusive)
+        end_date: Optional end of the range (inclusive)
+
+    Returns:
+        Dictionary with message_count, participant_count, thread_count and reaction_count
+    """
+    start_date = _naive(start_date)
+    end_date = _naive(end_date)
+
+    # Whole days covered by the range
+    first_day = None
+    if start_date is not None:
+        first_day = (
+            start_date.date() if start_date == _day_start(start_date.date()) else start_date.date() + timedelta(1)
+        )
+    last_day = None
+    if end_date is not None:
+        last_day = (end_date + timedelta(microseconds=1)).date() - timedelta(1)
+
+    # Partial days are read from the messages themselves
+    edge_ranges = []
+    if first_day is not None and last_day is not None and first_day > last_day:
+        edge_ranges.append((start_date, end_date))
+    else:
+        if start_date is not None and start_date < _day_start(first_day):
+            edge_ranges.append((start_date, _day_start(first_day) - timedelta(microseconds=1)))
+        if end_date is not None and end_date >= _day_start(last_day + timedelta(1)):
+            edge_ranges.append((_day_start(last_day + timedelta(1)), end_date))
+
+    rollup_conditions = []
+    rollup_user_conditions = []
+    use_rollups = not (first_day is not None and last_day is not None and first_day > last_day)
+    if use_rollups:
+        rollup_conditions.append(SlackChannelDailyActivity.channel_id == channel_id)
+        rollup_user_conditions.append(SlackUserDailyActivity.channel_id == channel_id)
+        if first_day is not None:
+            rollup_conditions.append(SlackChannelDailyActivity.day >= first_day)
+            rollup_user_conditions.append(SlackUserDailyActivity.day >= first_day)
+        if last_day is not None:
+            rollup_conditions.append(SlackChannelDailyActivity.day <= last_day)
+            rollup_user_conditions.append(SlackUserDailyActivity.day <= last_day)
+
+    edge_condition = None
+    if edge_ranges:
+        edge_condition = and_(
+            SlackMessage.channel_id == channel_id,
+            or_(*(SlackMessage.message_datetime.between(low, high) for low, high in edge_ranges)),
+        )
+
+    totals = dict.fromkeys(_COUNT_COLUMNS, 0)
+
+    if use_rollups:
+        rollup_result = await db.execute(
+            select(
+                *(
+                    func.coalesce(func.sum(getattr(SlackChannelDailyActivity, column)), 0).label(column)
+                    for column in _COUNT_COLUMNS
+                )
+            ).where(*rollup_conditions)
+        )
+        row = rollup_result.one()
+        for column in _COUNT_COLUMNS:
+            totals[column] += int(getattr(row, column) or 0)
+
+    if edge_condition is not None:
+        edge_result = await db.execute(select(*_count_columns()).where(edge_condition))
+        row = edge_result.one()
+        for column in _COUNT_COLUMNS:
+            totals[column] += int(getattr(row, column) or 0)
+
+    # Participants can't be summed across days: count distinct users over both sources
+    user_queries = []
+    if use_rollups:
+        user_queries.append(select(SlackUserDailyActivity.user_id).where(*rollup_user_conditions))
+    if edge_condition is not None:
+        user_queries.append(select(SlackMessage.user_id).where(edge_condition, SlackMessage.user_id.isnot(None)))
+    users = union(*user_queries).subquery() if len(user_queries) > 1 else user_queries[0].distinct().subquery()
+    participant_result = await db.execute(select(func.count()).select_from(users))
+
+    return {
+        "message_count": totals["message_count"],
+        "participant_count": participant_result.scalar() or 0,
+        "thread_count": totals["thread_count"],
+        "reaction_count": totals["reaction_count"],
+    }
+
+
+async def get_channel_daily_activity(
+    db: AsyncSession,
+    channel_id: UUID,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+) -> List[SlackChannelDailyActivity]:
+    """
+    Get a channel's daily activity rows, oldest first.
+
+    Args:
+        db: Database session
+        channel_id: UUID of the channel
+        start_day: Optional first day (inclusive)
+        end_day: Optional last day (inclusive)
+
+    Returns:
+        List of SlackChannelDailyActivity rows (days without messages are omitted)
+    """
+    query = select(SlackChannelDailyActivity).where(SlackChannelDailyActivity.channel_id == channel_id)
+    if start_day is not None:
+        query = query.where(SlackChannelDailyActivity.day >= start_day)
+    if end_day is not None:
+        query = query.where(SlackChannelDailyActivity.day <= end_day)
+
+    result = await db.execute(query.order_by(SlackChannelDailyActivity.day))
+    return list(result.scalars().all())
+
+
+async def get_channel_top_contributors(
+    db: AsyncSession,
+    channel_id: UUID,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    limit: int = 10,
+    include_bots: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Rank a channel's contributors by message count from the daily rollups.
+
+    Args:
+        db: Database session
+        channel_id: UUID of the channel
+        start_day: Optional first day (inclusive)
+        end_day: Optional last day (inclusive)
+        limit: Maximum number of contributors to return
+        include_bots: Whether to include bot users
+
+    Returns:
+        List of contributor dictionaries, most active first
+    """
+    totals = [func.sum(getattr(SlackUserDailyActivity, column)).label(column) for column in _COUNT_COLUMNS]
+    query = (
+        select(
+            SlackUser.id,
+            SlackUser.slack_id,
+            SlackUser.name,
+            SlackUser.display_name,
+            SlackUser.real_name,
+            SlackUser.is_bot,
+            func.count(SlackUserDailyActivity.day).label("active_days"),
+            *totals,
+        )
+        .join(SlackUser, SlackUser.id == SlackUserDailyActivity.user_id)
+        .where(SlackUserDailyActivity.channel_id == channel_id)
+        .group_by(SlackUser.id)
+        .order_by(desc("message_count"), desc("reaction_count"), SlackUser.id)
+        .limit(limit)
+    )
+    if start_day is not None:
+        query = query.where(SlackUserDailyActivity.day >= start_day)
+    if end_day is not None:
+        query = query.where(SlackUserDailyActivity.day <= end_day)
+    if not include_bots:
+        query = query.where(SlackUser.is_bot.is_(False))
+
+    result = await db.execute(query)
+    return [
+        {
+            "user_id": str(row.id),
+            "slack_id": row.slack_id,
+            "name": row.name,
+            "display_name": row.display_name,
+            "real_name": row.real_name,
+            "is_bot": row.is_bot,
+            "active_days": row.active_days,
+            **{column: int(getattr(row, column) or 0) for column in _COUNT_COLUMNS},
+        }
+        for row in result.all()
+    ]
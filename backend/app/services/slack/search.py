@@ -0,0 +1,204 @@
+"""
+Full-text search over Slack messages.
+
+Matching is substring based (ILIKE) on text and processed_text, served by
+pg_trgm GIN indexes. Trigrams need no word segmentation, so the same index
+works for Japanese, where words are not separated by spaces. Each
+whitespace-separated term must appear in the message; results are ordered
+newest first and paged with the same keyset cursors as message listings.
+
+A term shorter than three characters has no trigram, so the index cannot
+serve it and it would scan every message. Such terms (common in Japanese,
+e.g. 会議) are only accepted next to a longer term, which the index narrows
+the search with; a query made only of short terms is rejected.
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.slack import SlackChannel, SlackMessage
+from app.services.slack.messages import (
+    SlackMessageService,
+    decode_message_cursor,
+    defer_message_content,
+    encode_message_cursor,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on terms per query, each one adds an index condition
+MAX_SEARCH_TERMS = 8
+
+# Shortest term the trigram indexes can serve
+MIN_INDEXED_TERM_LENGTH = 3
+
+# Characters of context kept on each side of the first match in a snippet
+SNIPPET_CONTEXT = 80
+
+
+def split_search_terms(query: str) -> List[str]:
+    """
+    Split a search query into distinct terms.
+
+    Splits on any whitespace, including the full-width space used in
+    Japanese text.
+
+    Args:
+        query: Search query as typed by the user
+
+    Returns:
+        Terms in query order, without duplicates (case-insensitive)
+    """
+    terms: List[str] = []
+    seen = set()
+    for term in query.split():
+        if term.casefold() not in seen:
+            seen.add(term.casefold())
+            terms.append(term)
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards in a term so it matches literally (escape character is a backslash)."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def highlight_matches(text: Optional[str], terms: List[str], context: int = SNIPPET_CONTEXT) -> Dict[str, Any]:
+    """
+    Build a snippet around the first match and locate every match in it.
+
+    Offsets are returned instead of markup so clients can render highlights
+    without having to trust HTML from message text.
+
+    Args:
+        text: Message text
+        terms: Search terms
+        context: Characters of context to keep before and after the first match
+
+    Returns:
+        Dictionary with the snippet and a list of [start, end) offsets of matches in it
+    """
+    if not text or not terms:
+        return {"snippet": text or "", "highlights": []}
+
+    pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(text)
+    if not first:
+        return {"snippet": text[: context * 2], "highlights": []}
+
+    start = max(first.start() - context, 0)
+    end = min(first.end() + context, len(text))
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    snippet = prefix + text[start:end] + suffix
+
+    offset = len(prefix) - start
+    highlights = [[match.start() + offset, match.end() + offset] for match in pattern.finditer(text, start, end)]
+    return {"snippet": snippet, "highlights": highlights}
+
+
+async def search_messages(
+    db: AsyncSession,
+    workspace_id: str,
+    query: str,
+    channel_ids: Optional[List[str]] = None,
+    user_ids: Optional[List[str]] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    include_replies: bool = True,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Search message text in a workspace.
+
+    Args:
+        db: Database session
+        workspace_id: UUID of the workspace
+        query: Search query; every whitespace-separated term must match and at
+            least one must be MIN_INDEXED_TERM_LENGTH characters or longer
+        channel_ids: Optional list of channel UUIDs to search in
+        user_ids: Optional list of user UUIDs to restrict authors to
+        start_date: Optional start of the date range (inclusive)
+        end_date: Optional end of the date range (inclusive)
+        include_replies: Whether to include thread replies
+        limit: Maximum number of messages to return
+        cursor: Keyset cursor from a previous page
+
+    Returns:
+        Dictionary with matching messages (each with a highlight) and pagination information
+    """
+    terms = split_search_terms(query)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one term")
+    if all(len(term) < MIN_INDEXED_TERM_LENGTH for term in terms):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Search query must contain at least one term of {MIN_INDEXED_TERM_LENGTH} or more characters",
+        )
+
+    workspace_channels = select(SlackChannel.id).where(SlackChannel.workspace_id == workspace_id)
+    if channel_ids:
+        workspace_channels = workspace_channels.where(SlackChannel.id.in_(channel_ids))
+
+    conditions = [SlackMessage.channel_id.in_(workspace_channels)]
+    for term in terms:
+        pattern = f"%{escape_like(term)}%"
+        conditions.append(
+            or_(
+                SlackMessage.text.ilike(pattern, escape="\\"),
+                SlackMessage.processed_text.ilike(pattern, escape="\\"),
+            )
+        )
+    if user_ids:
+        conditions.append(SlackMessage.user_id.in_(user_ids))
+    if start_date:
+        conditions.append(SlackMessage.message_datetime >= start_date.replace(tzinfo=None))
+    if end_date:
+        conditions.append(SlackMessage.message_datetime <= end_date.replace(tzinfo=None))
+    if not include_replies:
+        conditions.append(SlackMessage.is_thread_reply.is_(False))
+
+    keyset = decode_message_cursor(cursor)
+    if keyset:
+        conditions.append(tuple_(SlackMessage.message_datetime, SlackMessage.id) < tuple_(*keyset))
+
+    # Fetch one extra row to know whether there is a next page without counting
+    result = await db.execute(
+        select(SlackMessage)
+        .options(*defer_message_content())
+        .where(*conditions)
+        .order_by(SlackMessage.message_datetime.desc(), SlackMessage.id.desc())
+        .limit(limit + 1)
+    )
+    messages = result.scalars().all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+
+    message_dicts = []
+    for message in messages:
+        message_dict = SlackMessageService._message_to_dict(message)
+        highlight = highlight_matches(message.processed_text, terms)
+        if not highlight["highlights"]:
+            highlight = highlight_matches(message.text, terms)
+        message_dict["highlight"] = highlight
+        message_dicts.append(message_dict)
+
+    logger.info(f"Search for {len(terms)} terms in workspace {workspace_id} returned {len(message_dicts)} messages")
+
+    return {
+        "query": query,
+        "terms": terms,
+        "messages": message_dicts,
+        "pagination": {
+            "page_size": limit,
+            "has_more": has_more,
+            "next_cursor": encode_message_cursor(messages[-1]) if has_more else None,
+        },
+    }
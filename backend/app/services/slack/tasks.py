@@ -9,6 +9,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.slack import SlackWorkspace
+from app.services.slack.partitions import maintain_message_partitions
 from app.services.slack.workspace import WorkspaceService
 
 # Configure logging
@@ -102,6 +103,7 @@ async def schedule_background_tasks():
                     # Verify tokens and update metadata
                     await verify_all_tokens(db)
                     await update_all_workspace_metadata(db)
+                    await maintain_message_partitions(db)
             except Exception as e:
                 logger.error(f"Error running scheduled tasks: {str(e)}")
 
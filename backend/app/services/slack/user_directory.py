@@ -0,0 +1,170 @@
+"""
+In-memory directory of the Slack users of each workspace.
+
+Message ingest and user lookups map Slack user IDs (U...) to SlackUser rows
+over and over. The directory keeps what those paths need of each user, so a
+known user is resolved without touching slackuser; unknown IDs are loaded
+in one query per batch and remembered. A user's row is never deleted or
+re-keyed, so entries don't go stale in a way that matters; paths creating or
+updating SlackUser rows pass them to remember() to keep names fresh.
+
+The directory is per worker and bounded: each workspace keeps its most
+recently used SLACK_USER_DIRECTORY_MAX_USERS users, and only the most
+recently used SLACK_USER_DIRECTORY_MAX_WORKSPACES workspaces are kept.
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.slack import SlackUser
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DirectoryUser:
+    """What the directory keeps of a Slack user."""
+
+    id: UUID
+    slack_id: str
+    name: Optional[str]
+    display_name: Optional[str]
+    real_name: Optional[str]
+    profile_image_url: Optional[str]
+    is_bot: bool
+
+    @classmethod
+    def from_user(cls, user: SlackUser) -> "DirectoryUser":
+        """Build the entry of a SlackUser row."""
+        return cls(
+            id=user.id,
+            slack_id=user.slack_id,
+            name=user.name,
+            display_name=user.display_name,
+            real_name=user.real_name,
+            profile_image_url=user.profile_image_url,
+            is_bot=bool(user.is_bot),
+        )
+
+
+class SlackUserDirectory:
+    """Per-workspace map of Slack user IDs to their SlackUser rows."""
+
+    _workspaces: "OrderedDict[str, OrderedDict[str, DirectoryUser]]" = OrderedDict()
+    _metrics: Dict[str, int] = {"hits": 0, "misses": 0, "loads": 0}
+
+    @classmethod
+    def _users(cls, workspace_id: str, create: bool = False) -> Optional["OrderedDict[str, DirectoryUser]"]:
+        """Get the users of a workspace, marking the workspace as recently used."""
+        key = str(workspace_id)
+        users = cls._workspaces.get(key)
+        if users is None and create:
+            users = cls._workspaces[key] = OrderedDict()
+            while len(cls._workspaces) > max(settings.SLACK_USER_DIRECTORY_MAX_WORKSPACES, 1):
+                cls._workspaces.popitem(last=False)
+        if users is not None:
+            cls._workspaces.move_to_end(key)
+        return users
+
+    @classmethod
+    def get(cls, workspace_id: str, slack_id: str) -> Optional[DirectoryUser]:
+        """
+        Get a user already in the directory.
+
+        Args:
+            workspace_id: UUID of the workspace
+            slack_id: Slack user ID
+
+        Returns:
+            The user, or None if the directory doesn't know them
+        """
+        users = cls._users(workspace_id)
+        user = users.get(slack_id) if users is not None else None
+        if user is None:
+            cls._metrics["misses"] += 1
+            return None
+        users.move_to_end(slack_id)
+        cls._metrics["hits"] += 1
+        return user
+
+    @classmethod
+    def remember(cls, workspace_id: str, user: SlackUser) -> DirectoryUser:
+        """
+        Add or refresh a user, e.g. after creating or updating their row.
+
+        Args:
+            workspace_id: UUID of the workspace
+            user: SlackUser row
+
+        Returns:
+            The user's directory entry
+        """
+        entry = DirectoryUser.from_user(user)
+        users = cls._users(workspace_id, create=True)
+        users[entry.slack_id] = entry
+        users.move_to_end(entry.slack_id)
+        while len(users) > max(settings.SLACK_USER_DIRECTORY_MAX_USERS, 1):
+            users.popitem(last=False)
+        return entry
+
+    @classmethod
+    async def resolve(cls, db: AsyncSession, workspace_id: str, slack_ids: Iterable[str]) -> Dict[str, DirectoryUser]:
+        """
+        Resolve Slack user IDs to users, loading the unknown ones in one query.
+
+        Args:
+            db: Database session
+            workspace_id: UUID of the workspace
+            slack_ids: Slack user IDs to resolve
+
+        Returns:
+            The users that exist, by Slack user ID
+        """
+        resolved: Dict[str, DirectoryUser] = {}
+        missing = []
+        for slack_id in dict.fromkeys(slack_id for slack_id in slack_ids if slack_id):
+            user = cls.get(workspace_id, slack_id)
+            if user is not None:
+                resolved[slack_id] = user
+            else:
+                missing.append(slack_id)
+
+        if missing:
+            cls._metrics["loads"] += 1
+            result = await db.execute(
+                select(SlackUser).where(
+                    SlackUser.workspace_id == workspace_id,
+                    SlackUser.slack_id.in_(missing),
+                )
+            )
+            for user in result.scalars().all():
+                resolved[user.slack_id] = cls.remember(workspace_id, user)
+
+        return resolved
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, int]:
+        """
+        Get directory metrics.
+
+        Returns:
+            Lookups served from memory and missed, loading queries, and sizes
+        """
+        return {
+            **cls._metrics,
+            "workspaces": len(cls._workspaces),
+            "users": sum(len(users) for users in cls._workspaces.values()),
+        }
+
+    @classmethod
+    def clear(cls) -> None:
+        """Forget all users and reset the metrics."""
+        cls._workspaces = OrderedDict()
+        cls._metrics = {"hits": 0, "misses": 0, "loads": 0}
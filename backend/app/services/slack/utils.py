@@ -7,10 +7,9 @@ from datetime import datetime
 from typing import Dict, Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.slack import SlackMessage
+from app.services.slack.rollups import get_channel_activity_stats
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +23,9 @@ async def get_channel_message_stats(
     """
     Get message statistics for a channel within a date range.
 
+    Reads the daily activity rollups, so the cost does not grow with the
+    length of the range.
+
     Args:
         db: Database session
         channel_id: UUID of the channel
@@ -34,45 +36,11 @@ async def get_channel_message_stats(
         Dictionary with message statistics (message_count, participant_count, thread_count, reaction_count)
     """
     try:
-        # Base query for messages in this channel
-        query = select(SlackMessage).where(SlackMessage.channel_id == channel_id)
-
-        # Apply date filtering if specified
-        if start_date:
-            # Ensure timezone-naive datetime for comparison
-            if hasattr(start_date, "tzinfo") and start_date.tzinfo:
-                start_date = start_date.replace(tzinfo=None)
-            query = query.where(SlackMessage.message_datetime >= start_date)
-
-        if end_date:
-            # Ensure timezone-naive datetime for comparison
-            if hasattr(end_date, "tzinfo") and end_date.tzinfo:
-                end_date = end_date.replace(tzinfo=None)
-            query = query.where(SlackMessage.message_datetime <= end_date)
-
-        # Count total messages
-        message_count_query = select(func.count()).where(query.whereclause)
-        message_count_result = await db.execute(message_count_query)
-        message_count = message_count_result.scalar() or 0
-
-        # Count unique participants (user_id is not null)
-        participant_query = (
-            select(func.count(SlackMessage.user_id.distinct()))
-            .where(query.whereclause)
-            .where(SlackMessage.user_id.isnot(None))
-        )
-        participant_result = await db.execute(participant_query)
-        participant_count = participant_result.scalar() or 0
-
-        # Count thread parents
-        thread_query = select(func.count()).where(query.whereclause).where(SlackMessage.is_thread_parent.is_(True))
-        thread_result = await db.execute(thread_query)
-        thread_count = thread_result.scalar() or 0
-
-        # Sum reaction counts
-        reaction_query = select(func.sum(SlackMessage.reaction_count)).where(query.whereclause)
-        reaction_result = await db.execute(reaction_query)
-        reaction_count = reaction_result.scalar() or 0
+        stats = await get_channel_activity_stats(db, channel_id, start_date, end_date)
+        message_count = stats["message_count"]
+        participant_count = stats["participant_count"]
+        thread_count = stats["thread_count"]
+        reaction_count = stats["reaction_count"]
 
         logger.info(
             f"Channel {channel_id} stats - Messages: {message_count}, "
@@ -11,6 +11,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.slack import SlackWorkspace
+from app.services.integration.credentials import IntegrationCredentialCache
 from app.services.slack.api import SlackApiClient, SlackApiError
 
 # Configure logging
@@ -111,6 +112,7 @@ class WorkspaceService:
                 workspace.connection_status = "token_expired"
                 db.add(workspace)
                 await db.commit()
+                IntegrationCredentialCache.invalidate()
 
             raise HTTPException(
                 status_code=500,
@@ -179,4 +181,8 @@ class WorkspaceService:
         # Commit any changes made
         await db.commit()
 
+        # Don't keep using what was looked up with a token that turned out to be invalid
+        if any(verification["status"] == "invalid" for verification in results):
+            IntegrationCredentialCache.invalidate()
+
         return results
@@ -15,7 +15,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.team import Team, TeamMember, TeamMemberRole
-from app.services.team.permissions import ensure_team_permission, get_team_member
+from app.services.team.permissions import ensure_team_permission, get_team_member, invalidate_team_roles
 
 logger = logging.getLogger(__name__)
 
@@ -260,6 +260,7 @@ class TeamMemberService:
             db.add(team_member)
             await db.commit()
             await db.refresh(team_member)
+            await invalidate_team_roles(team_id, team_member.user_id)
 
             # Update team_size counter
             await TeamMemberService.update_team_size(db, team_id)
@@ -385,6 +386,7 @@ class TeamMemberService:
             # Save changes
             await db.commit()
             await db.refresh(member)
+            await invalidate_team_roles(team_id, member.user_id)
 
             logger.info(f"Updated team member {member_id} successfully")
             return member
@@ -481,6 +483,7 @@ class TeamMemberService:
 
             # Save changes
             await db.commit()
+            await invalidate_team_roles(team_id, member.user_id)
 
             # Update team_size counter
             await TeamMemberService.update_team_size(db, team_id)
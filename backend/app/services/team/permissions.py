@@ -1,19 +1,100 @@
 """
 Permissions and access control for teams.
+
+Read paths authorise with get_team_role, which remembers each (team, user)
+role for the rest of the request and, for TEAM_ROLE_CACHE_TTL_SECONDS, in
+the shared cache. Changes to memberships must call invalidate_team_roles so
+other requests and workers stop using the old role.
 """
 
 import logging
-from typing import List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.core.cache import Cache
 from app.models.team import TeamMember, TeamMemberRole
 
 logger = logging.getLogger(__name__)
 
+# Roles of active members by "team_id:user_id", "" for users who aren't one
+_role_cache = Cache("team-roles")
+
+# Roles already resolved in the current request, by the same keys
+_request_roles: ContextVar[Optional[Dict[str, Optional[TeamMemberRole]]]] = ContextVar("team_roles", default=None)
+
+
+@contextmanager
+def team_role_memo() -> Iterator[None]:
+    """Remember the team roles resolved within the block, e.g. one request."""
+    token = _request_roles.set({})
+    try:
+        yield
+    finally:
+        _request_roles.reset(token)
+
+
+async def get_team_role(db: AsyncSession, team_id: UUID, user_id: str) -> Optional[TeamMemberRole]:
+    """
+    Get a user's role in a team, if they are an active member.
+
+    Args:
+        db: Database session
+        team_id: Team ID
+        user_id: User ID to check
+
+    Returns:
+        The user's role, or None if they aren't an active member
+    """
+    key = f"{team_id}:{user_id}"
+    memo = _request_roles.get()
+    if memo is not None and key in memo:
+        return memo[key]
+
+    ttl = settings.TEAM_ROLE_CACHE_TTL_SECONDS
+    cached = await _role_cache.get(key) if ttl > 0 else None
+    if cached is not None:
+        role = TeamMemberRole(cached) if cached else None
+    else:
+        result = await db.execute(
+            select(TeamMember.role).where(
+                TeamMember.team_id == team_id,
+                TeamMember.user_id == user_id,
+                TeamMember.invitation_status == "active",
+            )
+        )
+        role = result.scalars().first()
+        if ttl > 0:
+            await _role_cache.set(key, role.value if role else "", ttl=ttl)
+
+    if memo is not None:
+        memo[key] = role
+    return role
+
+
+async def invalidate_team_roles(team_id: UUID, user_id: Optional[str] = None) -> None:
+    """
+    Forget cached roles after a membership changed, in every worker.
+
+    Args:
+        team_id: Team whose memberships changed
+        user_id: User whose membership changed, or None for every member of the team
+    """
+    key = f"{team_id}:{user_id}" if user_id is not None else f"{team_id}:"
+
+    memo = _request_roles.get()
+    if memo is not None:
+        for cached_key in [k for k in memo if k == key or (user_id is None and k.startswith(key))]:
+            del memo[cached_key]
+
+    await _role_cache.invalidate(key, prefix=user_id is None)
+
 
 async def get_team_member(
     db: AsyncSession, team_id: UUID, user_id: str, include_all_statuses: bool = False
@@ -166,14 +247,11 @@ async def has_team_permission(
         # Default to requiring admin for unknown permission levels
         allowed_roles = [TeamMemberRole.OWNER, TeamMemberRole.ADMIN]
 
-    # Get the user's team membership
-    member = await get_team_member(db, team_id, user_id, include_all_statuses=False)
+    # Get the user's role in the team
+    role = await get_team_role(db, team_id, user_id)
 
     # Check if user is a member with the required role
-    if member and member.role in allowed_roles:
-        return True
-
-    return False
+    return role is not None and role in allowed_roles
 
 
 def create_team_permission_dependency(required_roles: List[TeamMemberRole]):
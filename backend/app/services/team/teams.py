@@ -14,7 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.team import Team, TeamMember, TeamMemberRole
-from app.services.team.permissions import ensure_team_permission
+from app.services.team.permissions import ensure_team_permission, invalidate_team_roles
 
 logger = logging.getLogger(__name__)
 
@@ -360,6 +360,7 @@ class TeamService:
 
             # Save changes
             await db.commit()
+            await invalidate_team_roles(team_id)
 
             logger.info(f"Deleted team {team_id} successfully")
             return {
@@ -0,0 +1,82 @@
+"""
+Script to rebuild the daily Slack activity rollups from stored messages.
+
+Ingest keeps the rollups current; run this after bulk imports, manual data
+fixes, or to repair a range. Each channel is rebuilt in its own transaction.
+
+Usage:
+    python scripts/backfill_activity_rollups.py [--channel-id UUID] [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Import after sys.path is updated - these imports must be here, ignore E402
+# flake8: noqa: E402
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.slack import SlackChannel
+from app.services.slack.rollups import rebuild_activity_rollups
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill_activity_rollups(
+    channel_id: Optional[str] = None,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+) -> int:
+    """
+    Rebuild the rollups of one or all channels.
+
+    Args:
+        channel_id: Optional UUID of the channel to rebuild (all channels if None)
+        start_day: Optional first day to rebuild (inclusive)
+        end_day: Optional last day to rebuild (inclusive)
+
+    Returns:
+        Number of channel-day rows written
+    """
+    async with AsyncSessionLocal() as db:
+        query = select(SlackChannel.id, SlackChannel.name)
+        if channel_id:
+            query = query.where(SlackChannel.id == channel_id)
+        channels = (await db.execute(query)).all()
+
+    logger.info(f"Rebuilding activity rollups for {len(channels)} channels")
+
+    total_rows = 0
+    for channel in channels:
+        async with AsyncSessionLocal() as db:
+            rows = await rebuild_activity_rollups(db, channel_id=channel.id, start_day=start_day, end_day=end_day)
+            await db.commit()
+        total_rows += rows
+        logger.info(f"Rebuilt {rows} daily rollups for channel {channel.name}")
+
+    logger.info(f"Done: {total_rows} channel-day rollups written")
+    return total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily Slack activity rollups")
+    parser.add_argument("--channel-id", help="UUID of a single channel to rebuild")
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    asyncio.run(backfill_activity_rollups(args.channel_id, args.start_date, args.end_date))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,31 @@
 Tests for cross-resource reports API endpoints.
 """
 
+import re
+import uuid
 from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from fastapi import status
+from fastapi import HTTPException, Response, status
 from httpx import AsyncClient
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.reports import CrossResourceReport, ReportStatus
+from app.api.v1.reports.reports import (
+    get_resource_analyses,
+    get_resource_analysis,
+    get_team_report,
+    get_team_reports,
+)
+from app.api.v1.reports.schemas import ReportFilterParams, ResourceAnalysisFilterParams
+from app.models.reports import (
+    AnalysisResourceType,
+    AnalysisType,
+    CrossResourceReport,
+    ReportStatus,
+    ResourceAnalysis,
+)
 from app.models.team import Team
 
 
@@ -184,3 +201,281 @@ async def test_delete_report(
     # Verify the report is soft deleted (is_active=False)
     await db_session.refresh(report)
     assert report.is_active is False
+
+
+def _listing_row(report, total_count):
+    """Build a result row of the report listing query."""
+    row = MagicMock()
+    row.__getitem__.side_effect = lambda index: report
+    row.total_count = total_count
+    return row
+
+
+async def _list_reports(report_count, page=1, total_count=None):
+    """Call get_team_reports against a mocked session and return (response, db)."""
+    now = datetime.utcnow()
+    team_id = uuid.uuid4()
+    reports = [
+        CrossResourceReport(
+            id=uuid.uuid4(),
+            team_id=team_id,
+            title=f"Report {i}",
+            status=ReportStatus.COMPLETED,
+            date_range_start=now - timedelta(days=7),
+            date_range_end=now,
+            created_at=now,
+            updated_at=now,
+            total_resources=3,
+            completed_analyses=3,
+            pending_analyses=0,
+            failed_analyses=0,
+            resource_types=["SLACK_CHANNEL"],
+        )
+        for i in range(report_count)
+    ]
+
+    page_result = MagicMock()
+    page_result.all.return_value = [_listing_row(report, total_count or report_count) for report in reports]
+    count_result = MagicMock()
+    count_result.scalar_one.return_value = total_count or 0
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [page_result, count_result]
+
+    with patch("app.api.v1.reports.reports.check_team_access", AsyncMock(return_value=True)):
+        response = await get_team_reports(
+            team_id=team_id,
+            filter_params=ReportFilterParams(page=page, page_size=100),
+            db=db,
+            current_user={"id": "user-1"},
+        )
+
+    return response, db
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("report_count", [1, 100])
+async def test_get_reports_constant_query_count(report_count):
+    """Test that listing reports costs one query however many reports are on the page."""
+    response, db = await _list_reports(report_count, total_count=250)
+
+    assert db.execute.call_count == 1
+    assert response.total == 250
+    assert len(response.items) == report_count
+    assert response.items[0]["completed_analyses"] == 3
+    assert response.items[0]["resource_types"] == ["SLACK_CHANNEL"]
+
+
+@pytest.mark.asyncio
+async def test_get_reports_past_last_page():
+    """Test that the total is still reported for a page past the end."""
+    response, db = await _list_reports(0, page=5, total_count=250)
+
+    assert db.execute.call_count == 2
+    assert response.total == 250
+    assert response.items == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("include_content", [False, True])
+async def test_get_reports_defers_comprehensive_analysis(include_content):
+    """Test that the report listing only loads the comprehensive analysis on request."""
+    db = AsyncMock(spec=AsyncSession)
+    page_result = MagicMock()
+    page_result.all.return_value = []
+    db.execute.return_value = page_result
+
+    with patch("app.api.v1.reports.reports.check_team_access", AsyncMock(return_value=True)):
+        await get_team_reports(
+            team_id=uuid.uuid4(),
+            filter_params=ReportFilterParams(),
+            include_content=include_content,
+            db=db,
+            current_user={"id": "user-1"},
+        )
+
+    listing_sql = str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert bool(re.search(r"crossresourcereport\.comprehensive_analysis\b", listing_sql)) is include_content
+    assert "crossresourcereport.title" in listing_sql
+
+
+@pytest.mark.asyncio
+async def test_get_resource_analyses_defers_content():
+    """Test that the analysis listing leaves out generated text unless full content is requested."""
+    team_id, report_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime.utcnow()
+    analysis = ResourceAnalysis(
+        id=uuid.uuid4(),
+        cross_resource_report_id=report_id,
+        integration_id=uuid.uuid4(),
+        resource_id=uuid.uuid4(),
+        resource_type=AnalysisResourceType.SLACK_CHANNEL,
+        analysis_type=AnalysisType.CONTRIBUTION,
+        status=ReportStatus.COMPLETED,
+        period_start=now - timedelta(days=7),
+        period_end=now,
+        created_at=now,
+        updated_at=now,
+    )
+    report_result = MagicMock()
+    report_result.scalar_one_or_none.return_value = CrossResourceReport(id=report_id, team_id=team_id)
+    analyses_result = MagicMock()
+    analyses_result.scalars.return_value.all.return_value = [analysis]
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [report_result, analyses_result]
+
+    with patch("app.api.v1.reports.reports.check_team_access", AsyncMock(return_value=True)):
+        response = await get_resource_analyses(
+            team_id=team_id,
+            report_id=report_id,
+            filter_params=ResourceAnalysisFilterParams(),
+            db=db,
+            current_user={"id": "user-1"},
+        )
+
+    listing_sql = str(db.execute.call_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    for column in ("results", "contributor_insights", "topic_analysis", "resource_summary", "key_highlights"):
+        assert f"resourceanalysis.{column}" not in listing_sql
+    assert "resourceanalysis.status" in listing_sql
+    assert response[0]["id"] == analysis.id
+    assert "resource_summary" not in response[0]
+
+
+def _version_row(**values):
+    """Build a result of a version query returning one row."""
+    result = MagicMock()
+    result.one_or_none.return_value = MagicMock(**values) if values else None
+    return result
+
+
+async def _get_report(db, team_id, report_id, if_none_match=None):
+    """Call get_team_report against a mocked session."""
+    response = Response()
+    with patch("app.api.v1.reports.reports.check_team_access", AsyncMock(return_value=True)):
+        body = await get_team_report(
+            team_id=team_id,
+            report_id=report_id,
+            response=response,
+            include_analyses=False,
+            include_content=True,
+            if_none_match=if_none_match,
+            db=db,
+            current_user={"id": "user-1"},
+        )
+    return body, response
+
+
+@pytest.mark.asyncio
+async def test_get_report_not_modified_skips_loading():
+    """Test that a report revalidated with its ETag gets a 304 after only the version query."""
+    team_id, report_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime.utcnow()
+    version = dict(
+        updated_at=now,
+        status=ReportStatus.COMPLETED,
+        analyses_updated_at=now,
+        analysis_count=2,
+        total_messages=40,
+        total_participants=5,
+        total_threads=3,
+        total_reactions=7,
+    )
+    report_result = MagicMock()
+    report_result.scalar_one_or_none.return_value = CrossResourceReport(
+        id=report_id, team_id=team_id, title="Weekly", status=ReportStatus.COMPLETED
+    )
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [_version_row(**version), report_result]
+    body, response = await _get_report(db, team_id, report_id)
+
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert body["title"] == "Weekly" and body["total_messages"] == 40
+    assert db.execute.call_count == 2
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [_version_row(**version)]
+    body, _ = await _get_report(db, team_id, report_id, if_none_match=f'W/"other", {etag}')
+
+    assert body.status_code == status.HTTP_304_NOT_MODIFIED
+    assert body.headers["ETag"] == etag
+    assert db.execute.call_count == 1
+
+    # A changed analysis changes the ETag
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [
+        _version_row(**{**version, "analyses_updated_at": now + timedelta(seconds=1)}),
+        report_result,
+    ]
+    body, response = await _get_report(db, team_id, report_id, if_none_match=etag)
+
+    assert response.headers["ETag"] != etag
+    assert body["title"] == "Weekly"
+
+
+@pytest.mark.asyncio
+async def test_get_completed_resource_analysis_is_immutable():
+    """Test that a completed analysis is cacheable without revalidation and revalidates with a 304."""
+    team_id, report_id, analysis_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    version = dict(updated_at=datetime.utcnow(), status=ReportStatus.COMPLETED)
+    analysis = ResourceAnalysis(id=analysis_id, cross_resource_report_id=report_id, status=ReportStatus.COMPLETED)
+    analysis_result = MagicMock()
+    analysis_result.scalar_one_or_none.return_value = analysis
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [_version_row(**version), analysis_result]
+    response = Response()
+    with patch("app.api.v1.reports.reports.check_team_access", AsyncMock(return_value=True)):
+        body = await get_resource_analysis(
+            team_id=team_id,
+            report_id=report_id,
+            analysis_id=analysis_id,
+            response=response,
+            if_none_match=None,
+            db=db,
+            current_user={"id": "user-1"},
+        )
+
+        assert body is analysis
+        assert "immutable" in response.headers["Cache-Control"]
+
+        db = AsyncMock(spec=AsyncSession)
+        db.execute.side_effect = [_version_row(**version)]
+        body = await get_resource_analysis(
+            team_id=team_id,
+            report_id=report_id,
+            analysis_id=analysis_id,
+            response=Response(),
+            if_none_match=response.headers["ETag"],
+            db=db,
+            current_user={"id": "user-1"},
+        )
+
+    assert body.status_code == status.HTTP_304_NOT_MODIFIED
+    assert db.execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_resource_analysis_of_missing_report():
+    """Test that an analysis of a report that isn't the team's is reported as a missing report."""
+    report_result = MagicMock()
+    report_result.scalar_one_or_none.return_value = None
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [_version_row(), report_result]
+
+    with patch("app.api.v1.reports.reports.check_team_access", AsyncMock(return_value=True)):
+        with pytest.raises(HTTPException) as exc_info:
+            await get_resource_analysis(
+                team_id=uuid.uuid4(),
+                report_id=uuid.uuid4(),
+                analysis_id=uuid.uuid4(),
+                response=Response(),
+                if_none_match=None,
+                db=db,
+                current_user={"id": "user-1"},
+            )
+
+    assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+    assert exc_info.value.detail == "Report not found"
@@ -0,0 +1,292 @@
+"""
+In-process mock of the OpenRouter chat completions API.
+
+MockOpenRouterApi runs an aiohttp server on localhost that answers
+/api/v1/chat/completions like OpenRouter does, after a delay and with the
+outcome given by an LlmProfile: a base latency plus time per prompt and
+completion token, jitter, a share of 500 errors and 429 rate limits, and the
+size of the completions. Point settings.OPENROUTER_API_BASE_URL at base_url
+to analyse against it.
+
+Latency jitter and failures are drawn from a hash of the prompt (ignoring
+timestamps, which include the time of the request), so the same analysis gets
+the same answer on every run, whatever order concurrent requests arrive in.
+The mock records every request (prompt size, latency, outcome and how many
+requests were in flight) for the benchmark's report.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from asyncio import sleep
+from collections import Counter
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from app.services.analysis.budget import estimate_tokens
+
+# ISO timestamps, removed from prompts before hashing them
+TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?")
+
+
+@dataclass(frozen=True)
+class LlmProfile:
+    """How the mock LLM behaves."""
+
+    name: str
+    latency_ms: float = 0.0  # Before the first token
+    ms_per_1k_prompt_tokens: float = 0.0
+    ms_per_completion_token: float = 0.0
+    jitter: float = 0.0  # Latencies vary by up to this share either way
+    error_rate: float = 0.0  # Share of requests answered with a 500
+    rate_limit_rate: float = 0.0  # Share of requests answered with a 429
+    completion_tokens: int = 400
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the profile as JSON-serialisable values, e.g. for result files."""
+        return asdict(self)
+
+
+PROFILES = {
+    # Answers at once: measures the pipeline's own overhead
+    "instant": LlmProfile("instant"),
+    # Roughly a hosted frontier model
+    "typical": LlmProfile(
+        "typical",
+        latency_ms=800,
+        ms_per_1k_prompt_tokens=40,
+        ms_per_completion_token=12,
+        jitter=0.3,
+        completion_tokens=800,
+    ),
+    "slow": LlmProfile(
+        "slow",
+        latency_ms=3000,
+        ms_per_1k_prompt_tokens=120,
+        ms_per_completion_token=30,
+        jitter=0.5,
+        completion_tokens=1500,
+    ),
+    "flaky": LlmProfile(
+        "flaky",
+        latency_ms=800,
+        ms_per_1k_prompt_tokens=40,
+        ms_per_completion_token=12,
+        jitter=0.3,
+        error_rate=0.1,
+        rate_limit_rate=0.05,
+        completion_tokens=800,
+    ),
+}
+
+
+def profile_from_env(default: str = "instant") -> LlmProfile:
+    """
+    Get the profile named by BENCHMARK_LLM_PROFILE, with overrides from the environment.
+
+    BENCHMARK_LLM_LATENCY_MS, BENCHMARK_LLM_ERROR_RATE, BENCHMARK_LLM_RATE_LIMIT_RATE
+    and BENCHMARK_LLM_COMPLETION_TOKENS override the profile's values.
+    """
+    profile = PROFILES[os.environ.get("BENCHMARK_LLM_PROFILE", default)]
+    overrides = {
+        "latency_ms": ("BENCHMARK_LLM_LATENCY_MS", float),
+        "error_rate": ("BENCHMARK_LLM_ERROR_RATE", float),
+        "rate_limit_rate": ("BENCHMARK_LLM_RATE_LIMIT_RATE", float),
+        "completion_tokens": ("BENCHMARK_LLM_COMPLETION_TOKENS", int),
+    }
+    values = {field: cast(os.environ[name]) for field, (name, cast) in overrides.items() if name in os.environ}
+    return replace(profile, **values) if values else profile
+
+
+@dataclass
+class LlmRequest:
+    """One request the mock answered."""
+
+    started: float
+    seconds: float
+    status: int
+    prompt_chars: int
+    prompt_tokens: int
+    completion_tokens: int
+    in_flight: int  # Requests in flight when this one arrived, itself included
+
+
+class MockOpenRouterApi:
+    """Mock OpenRouter API answering chat completions according to a profile."""
+
+    def __init__(self, profile: LlmProfile = PROFILES["instant"]) -> None:
+        """
+        Initialize the mock.
+
+        Args:
+            profile: How the mock LLM behaves
+        """
+        self.profile = profile
+        self.requests: List[LlmRequest] = []
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.in_flight = 0
+        self.base_url = ""
+        self._attempts: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application(client_max_size=64 * 2**20)
+        self.app.router.add_post("/api/v1/chat/completions", self._chat_completions)
+
+    async def start(self) -> str:
+        """
+        Start serving on a free localhost port.
+
+        Returns:
+            Base URL of the API, e.g. http://127.0.0.1:54321/api/v1
+        """
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}/api/v1"
+        return self.base_url
+
+    async def close(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockOpenRouterApi":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def reset(self) -> None:
+        """Forget the requests recorded so far."""
+        self.requests = []
+        self.calls.clear()
+        self.rate_limited.clear()
+        self._attempts.clear()
+
+    def _draws(self, prompt: str) -> List[float]:
+        """Get uniform draws in [0, 1) determined by the prompt and how often it was sent."""
+        key = hashlib.sha256(TIMESTAMP.sub("", prompt).encode()).hexdigest()
+        self._attempts[key] += 1
+        digest = hashlib.sha256(f"{key}:{self._attempts[key]}".encode()).digest()
+        return [int.from_bytes(digest[i : i + 4], "big") / 2**32 for i in range(0, 12, 4)]
+
+    @staticmethod
+    def _completion(words: int) -> str:
+        """Build an analysis in the JSON format the prompts ask for, about `words` words long."""
+        section_words = max(words // 4, 1)
+        filler = " ".join(
+            ["The team discussed the release plan and <@U00000001> followed up."] * (section_words // 10 + 1)
+        )
+        return json.dumps(
+            {
+                "channel_summary": filler,
+                "topic_analysis": filler,
+                "contributor_insights": filler,
+                "key_highlights": filler,
+            }
+        )
+
+    async def _chat_completions(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        payload = await request.json()
+        self.calls["chat.completions"] += 1
+        self.in_flight += 1
+        in_flight = self.in_flight
+        prompt = "".join(message.get("content", "") for message in payload.get("messages", []))
+        prompt_tokens = estimate_tokens(prompt)
+        profile = self.profile
+        jitter_draw, error_draw, limit_draw = self._draws(prompt)
+        completion_tokens = min(profile.completion_tokens, int(payload.get("max_tokens") or profile.completion_tokens))
+
+        status = 200
+        if error_draw < profile.error_rate:
+            status = 500
+        elif limit_draw < profile.rate_limit_rate:
+            status = 429
+
+        latency_ms = profile.latency_ms + prompt_tokens / 1000 * profile.ms_per_1k_prompt_tokens
+        if status == 200:
+            latency_ms += completion_tokens * profile.ms_per_completion_token
+        latency_ms *= 1 + profile.jitter * (2 * jitter_draw - 1)
+
+        try:
+            # Bound at import, so benchmarks skipping the services' own pauses don't skip this
+            await sleep(max(latency_ms, 0) / 1000)
+        finally:
+            self.in_flight -= 1
+
+        if status == 500:
+            response = web.json_response({"error": {"message": "Internal server error", "code": 500}}, status=500)
+        elif status == 429:
+            self.rate_limited["chat.completions"] += 1
+            response = web.json_response(
+                {"error": {"message": "Rate limit exceeded", "code": 429}}, status=429, headers={"Retry-After": "1"}
+            )
+        else:
+            response = web.json_response(
+                {
+                    "id": f"gen-mock-{len(self.requests)}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": payload.get("model", "mock/model"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": self._completion(completion_tokens * 3 // 4)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }
+            )
+
+        self.requests.append(
+            LlmRequest(
+                started=started,
+                seconds=time.perf_counter() - started,
+                status=status,
+                prompt_chars=len(prompt),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens if status == 200 else 0,
+                in_flight=in_flight,
+            )
+        )
+        return response
+
+    def concurrency(self) -> Dict[str, float]:
+        """
+        Get how many requests were in flight at once.
+
+        Returns:
+            The most at once, and the average over the time any request was in flight
+        """
+        if not self.requests:
+            return {"max_in_flight": 0, "mean_in_flight": 0.0}
+        events = sorted(
+            [(request.started, 1) for request in self.requests]
+            + [(request.started + request.seconds, -1) for request in self.requests]
+        )
+        busy = weighted = 0.0
+        current, last = 0, events[0][0]
+        for moment, change in events:
+            if current:
+                busy += moment - last
+                weighted += current * (moment - last)
+            current, last = current + change, moment
+        return {
+            "max_in_flight": max(request.in_flight for request in self.requests),
+            "mean_in_flight": round(weighted / busy, 2) if busy else 0.0,
+        }
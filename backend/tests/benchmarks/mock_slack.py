@@ -0,0 +1,253 @@
+"""
+In-process mock of the Slack Web API serving a synthetic workspace.
+
+MockSlackApi runs an aiohttp server on localhost answering the methods the
+syncs call, the way Slack does: cursor pagination with Slack's page size
+limits, newest-first history windows, invalid_auth for unknown tokens and
+HTTP 429 with Retry-After when a method is rate limited. Point
+settings.SLACK_API_BASE_URL at base_url to sync from it.
+
+Rate limiting is deterministic so runs stay comparable: with
+rate_limit_every=N, every Nth call of each method is answered with a 429.
+"""
+
+import base64
+import bisect
+from asyncio import sleep
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from tests.benchmarks.synthetic_workspace import SyntheticWorkspace
+
+# Largest page each method returns, whatever limit is asked for
+MAX_PAGE_SIZES = {
+    "conversations.list": 1000,
+    "users.list": 1000,
+    "conversations.history": 999,
+    "conversations.replies": 1000,
+}
+DEFAULT_PAGE_SIZE = 100
+
+
+def encode_cursor(offset: int) -> str:
+    """Encode a page offset as an opaque cursor like Slack's."""
+    return base64.b64encode(f"next:{offset}".encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Decode a cursor from encode_cursor(), treating a missing one as the first page."""
+    if not cursor:
+        return 0
+    return int(base64.b64decode(cursor).decode().split(":", 1)[1])
+
+
+class MockSlackApi:
+    """Mock Slack Web API serving one synthetic workspace."""
+
+    def __init__(
+        self,
+        workspace: SyntheticWorkspace,
+        rate_limit_every: int = 0,
+        retry_after: int = 1,
+        latency: float = 0.0,
+    ) -> None:
+        """
+        Initialize the mock.
+
+        Args:
+            workspace: Workspace to serve
+            rate_limit_every: Answer every Nth call of each method with a 429 (0 disables it)
+            retry_after: Retry-After seconds of rate-limited responses
+            latency: Seconds each response is delayed by, to simulate the network
+        """
+        self.workspace = workspace
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.base_url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+        self._channels = {channel["id"]: channel for channel in workspace.channels}
+        self._users = {user["id"]: user for user in workspace.users}
+        # Negated timestamps of each history, ascending, for bisecting the oldest/latest window
+        self._history_keys = {
+            channel_id: [-float(message["ts"]) for message in messages]
+            for channel_id, messages in workspace.history.items()
+        }
+
+        handlers: Dict[str, Callable[[Dict[str, str]], Dict[str, Any]]] = {
+            "auth.test": self._auth_test,
+            "team.info": self._team_info,
+            "users.list": self._users_list,
+            "users.info": self._users_info,
+            "conversations.list": self._conversations_list,
+            "conversations.info": self._conversations_info,
+            "conversations.join": self._conversations_join,
+            "conversations.history": self._conversations_history,
+            "conversations.replies": self._conversations_replies,
+        }
+        self.app = web.Application()
+        for method, handler in handlers.items():
+            self.app.router.add_route("*", f"/api/{method}", self._endpoint(method, handler))
+
+    async def start(self) -> str:
+        """
+        Start serving on a free localhost port.
+
+        Returns:
+            Base URL of the API, e.g. http://127.0.0.1:54321/api
+        """
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}/api"
+        return self.base_url
+
+    async def close(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockSlackApi":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def reset_counts(self) -> None:
+        """Forget the calls counted so far."""
+        self.calls.clear()
+        self.rate_limited.clear()
+
+    def _endpoint(
+        self, method: str, handler: Callable[[Dict[str, str]], Dict[str, Any]]
+    ) -> Callable[[web.Request], Awaitable[web.Response]]:
+        """Wrap a handler with counting, auth, latency and rate limiting."""
+
+        async def endpoint(request: web.Request) -> web.Response:
+            self.calls[method] += 1
+            if self.latency:
+                # Bound at import, so benchmarks skipping the syncs' own pauses don't skip this
+                await sleep(self.latency)
+
+            if self.rate_limit_every and self.calls[method] % self.rate_limit_every == 0:
+                self.rate_limited[method] += 1
+                return web.json_response(
+                    {"ok": False, "error": "ratelimited"},
+                    status=429,
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+
+            if request.headers.get("Authorization") != f"Bearer {self.workspace.access_token}":
+                return web.json_response({"ok": False, "error": "invalid_auth"})
+
+            params = dict(request.query)
+            if request.can_read_body:
+                try:
+                    params.update(await request.json())
+                except ValueError:
+                    params.update(await request.post())
+            return web.json_response(handler(params))
+
+        return endpoint
+
+    @staticmethod
+    def _page_size(method: str, params: Dict[str, Any]) -> int:
+        """Get the page size of a request, clamped to what Slack allows."""
+        return max(1, min(int(params.get("limit") or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZES[method]))
+
+    @staticmethod
+    def _paginate(items: List[Any], offset: int, size: int) -> Tuple[List[Any], str]:
+        """Get one page of items and the cursor of the next page ("" after the last)."""
+        end = offset + size
+        return items[offset:end], encode_cursor(end) if end < len(items) else ""
+
+    def _auth_test(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "team_id": self.workspace.team_id, "user_id": "UBOT", "bot_id": "BBOT"}
+
+    def _team_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "team": {"id": self.workspace.team_id, "name": "Synthetic", "domain": "synthetic"}}
+
+    def _users_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        members, next_cursor = self._paginate(
+            self.workspace.users, decode_cursor(params.get("cursor")), self._page_size("users.list", params)
+        )
+        return {"ok": True, "members": members, "response_metadata": {"next_cursor": next_cursor}}
+
+    def _users_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        user = self._users.get(params.get("user", ""))
+        if user is None:
+            return {"ok": False, "error": "user_not_found"}
+        return {"ok": True, "user": user}
+
+    def _conversations_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        channels = self.workspace.channels
+        if params.get("exclude_archived") == "true":
+            channels = [channel for channel in channels if not channel["is_archived"]]
+        page, next_cursor = self._paginate(
+            channels, decode_cursor(params.get("cursor")), self._page_size("conversations.list", params)
+        )
+        return {"ok": True, "channels": page, "response_metadata": {"next_cursor": next_cursor}}
+
+    def _conversations_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        channel = self._channels.get(params.get("channel", ""))
+        if channel is None:
+            return {"ok": False, "error": "channel_not_found"}
+        return {"ok": True, "channel": channel}
+
+    def _conversations_join(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._conversations_info(params)
+
+    def _conversations_history(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        channel_id = params.get("channel", "")
+        if channel_id not in self._channels:
+            return {"ok": False, "error": "channel_not_found"}
+
+        # Newest first, between oldest and latest (both exclusive unless inclusive is set)
+        messages = self.workspace.history[channel_id]
+        keys = self._history_keys[channel_id]
+        inclusive = params.get("inclusive") == "true"
+        start, end = 0, len(messages)
+        if params.get("latest"):
+            latest = -float(params["latest"])
+            start = (bisect.bisect_left if inclusive else bisect.bisect_right)(keys, latest)
+        if params.get("oldest"):
+            oldest = -float(params["oldest"])
+            end = (bisect.bisect_right if inclusive else bisect.bisect_left)(keys, oldest)
+
+        page, next_cursor = self._paginate(
+            messages[start:end], decode_cursor(params.get("cursor")), self._page_size("conversations.history", params)
+        )
+        return {
+            "ok": True,
+            "messages": page,
+            "has_more": bool(next_cursor),
+            "pin_count": 0,
+            "response_metadata": {"next_cursor": next_cursor},
+        }
+
+    def _conversations_replies(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        channel_id = params.get("channel", "")
+        if channel_id not in self._channels:
+            return {"ok": False, "error": "channel_not_found"}
+        thread = self.workspace.threads.get((channel_id, params.get("ts", "")))
+        if thread is None:
+            return {"ok": False, "error": "thread_not_found"}
+
+        page, next_cursor = self._paginate(
+            thread, decode_cursor(params.get("cursor")), self._page_size("conversations.replies", params)
+        )
+        return {
+            "ok": True,
+            "messages": page,
+            "has_more": bool(next_cursor),
+            "response_metadata": {"next_cursor": next_cursor},
+        }
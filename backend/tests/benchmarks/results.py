@@ -0,0 +1,292 @@
+"""
+Measurements and result files shared by the benchmarks.
+
+A Measurement records one scenario: wall time, the items it processed, the
+SQL statements sent through an engine, the calls a mock API answered and the
+peak resident memory of the process. write_results() stores the scenarios of
+a run as JSON under BENCHMARK_RESULTS_DIR (default: benchmark-results), named
+after the suite and the commit they ran on, and the module compares two of
+those files:
+
+    python -m tests.benchmarks.results benchmark-results/sync-OLD.json benchmark-results/sync-NEW.json
+"""
+
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+RESULTS_DIR = Path(os.environ.get("BENCHMARK_RESULTS_DIR", "benchmark-results"))
+
+# Metrics where a lower value is better, for the comparison
+LOWER_IS_BETTER = (
+    "seconds",
+    "_ms",
+    "per_item",
+    "api_calls",
+    "db_statements",
+    "peak_rss_mb",
+    "errors",
+    "rate_limited",
+    "tokens",
+    "chars",
+)
+
+
+def current_rss() -> int:
+    """Get the resident memory of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # No procfs: fall back to the peak so far (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRssSampler:
+    """Samples the resident memory from a thread, so a blocked event loop doesn't hide a peak."""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, current_rss())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> "PeakRssSampler":
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def distribution(values: Iterable[float], digits: int = 4) -> Dict[str, float]:
+    """Get the mean, median, 95th percentile and maximum of some values (all 0 if there are none)."""
+    ordered = sorted(values)
+    if not ordered:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+
+    def percentile(share: float) -> float:
+        # Nearest rank, so it is always one of the values
+        return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+    return {
+        "mean": round(sum(ordered) / len(ordered), digits),
+        "p50": round(percentile(0.5), digits),
+        "p95": round(percentile(0.95), digits),
+        "max": round(ordered[-1], digits),
+    }
+
+
+@contextmanager
+def skipped_pacing(measurement: Optional["Measurement"] = None) -> Iterator[None]:
+    """
+    Make time.sleep and asyncio.sleep return at once, adding what was asked for to the measurement.
+
+    The syncs pause between Slack pages to stay under the rate limits. Against
+    a local mock those pauses would dominate the timings, so benchmarks skip
+    them and report how long they would have taken.
+    """
+    original_sleep, original_async_sleep = time.sleep, asyncio.sleep
+
+    def sleep(seconds: float) -> None:
+        if measurement is not None:
+            measurement.pacing_seconds += max(seconds, 0)
+
+    async def async_sleep(seconds: float, result: Any = None) -> Any:
+        if measurement is not None:
+            measurement.pacing_seconds += max(seconds, 0)
+        return await original_async_sleep(0, result)
+
+    time.sleep, asyncio.sleep = sleep, async_sleep
+    try:
+        yield
+    finally:
+        time.sleep, asyncio.sleep = original_sleep, original_async_sleep
+
+
+class Measurement:
+    """Metrics of one benchmark scenario."""
+
+    def __init__(self, name: str, engine: Optional[Engine] = None, api: Optional[Any] = None) -> None:
+        """
+        Initialize the measurement.
+
+        Args:
+            name: Scenario name
+            engine: Sync engine (AsyncEngine.sync_engine) whose statements are counted
+            api: Mock API with `calls` and `rate_limited` counters to count calls on
+        """
+        self.name = name
+        self.engine = engine
+        self.api = api
+        self.items = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.pacing_seconds = 0.0
+        self.peak_rss = 0
+        self.statements: Counter = Counter()
+        self.api_calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.extra: Dict[str, Any] = {}
+
+    def _count_statement(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements[statement.lstrip().split(None, 1)[0].upper()] += 1
+
+    @contextmanager
+    def measure(self) -> Iterator["Measurement"]:
+        """Measure the block; may be entered several times, e.g. once per channel."""
+        calls_before = Counter(self.api.calls) if self.api is not None else Counter()
+        limited_before = Counter(self.api.rate_limited) if self.api is not None else Counter()
+        if self.engine is not None:
+            event.listen(self.engine, "before_cursor_execute", self._count_statement)
+        started = time.perf_counter()
+        try:
+            with PeakRssSampler() as sampler:
+                yield self
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.peak_rss = max(self.peak_rss, sampler.peak)
+            if self.engine is not None:
+                event.remove(self.engine, "before_cursor_execute", self._count_statement)
+            if self.api is not None:
+                self.api_calls.update(Counter(self.api.calls) - calls_before)
+                self.rate_limited.update(Counter(self.api.rate_limited) - limited_before)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the metrics, with per-item ratios, as written to result files."""
+        items = max(self.items, 1)
+        statements = sum(self.statements.values())
+        api_calls = sum(self.api_calls.values())
+        return {
+            "items": self.items,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 4),
+            "items_per_second": round(self.items / self.seconds, 2) if self.seconds else 0.0,
+            "pacing_seconds_skipped": round(self.pacing_seconds, 2),
+            "api_calls": api_calls,
+            "api_calls_per_item": round(api_calls / items, 4),
+            "api_calls_by_method": dict(sorted(self.api_calls.items())),
+            "rate_limited": sum(self.rate_limited.values()),
+            "db_statements": statements,
+            "db_statements_per_item": round(statements / items, 4),
+            "db_statements_by_kind": dict(sorted(self.statements.items())),
+            "peak_rss_mb": round(self.peak_rss / 2**20, 1),
+            **self.extra,
+        }
+
+    def summary(self) -> str:
+        """One line describing the scenario, for the benchmark's output."""
+        metrics = self.to_dict()
+        return (
+            f"{self.name}: {metrics['items']} items in {metrics['seconds']:.2f} s "
+            f"({metrics['items_per_second']:.1f}/s), {metrics['api_calls_per_item']:.2f} API calls "
+            f"and {metrics['db_statements_per_item']:.2f} statements per item, "
+            f"peak RSS {metrics['peak_rss_mb']:.0f} MB"
+        )
+
+
+def _git(*args: str) -> str:
+    """Run a git command in the repository, returning "" if git isn't available."""
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def write_results(suite: str, parameters: Dict[str, Any], measurements: Dict[str, Measurement]) -> Path:
+    """
+    Write the results of a benchmark run.
+
+    Args:
+        suite: Benchmark suite, e.g. "sync"
+        parameters: What the run was configured with, e.g. the workspace spec
+        measurements: Measurements by scenario name
+
+    Returns:
+        Path of the result file
+    """
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    created_at = datetime.utcnow()
+    results = {
+        "suite": suite,
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": created_at.isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "scenarios": {name: measurement.to_dict() for name, measurement in measurements.items()},
+    }
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"{suite}-{created_at:%Y%m%dT%H%M%S}-{commit}.json"
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False, default=str) + "\n")
+    print(f"Wrote {path}")
+    return path
+
+
+def compare_results(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> str:
+    """
+    Compare the numeric metrics of two result files.
+
+    Args:
+        baseline: Results of the reference run
+        candidate: Results of the run to compare with it
+
+    Returns:
+        A table of each scenario's metrics, their change and whether it is an improvement
+    """
+    lines = [f"{baseline['suite']}: {baseline['commit']} -> {candidate['commit']}"]
+    if baseline.get("parameters") != candidate.get("parameters"):
+        lines.append("Warning: the runs used different parameters, so they aren't directly comparable")
+
+    for scenario, metrics in candidate["scenarios"].items():
+        lines.append(f"\n{scenario}")
+        reference = baseline["scenarios"].get(scenario)
+        if reference is None:
+            lines.append("  (not in the baseline)")
+            continue
+        for metric, value in metrics.items():
+            old = reference.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or isinstance(value, bool):
+                continue
+            change = (value - old) / old * 100 if old else 0.0
+            verdict = ""
+            if abs(change) >= 5:
+                better = change < 0 if metric.endswith(LOWER_IS_BETTER) else change > 0
+                verdict = "better" if better else "WORSE"
+            lines.append(f"  {metric:<28} {old:>14} {value:>14} {change:>+8.1f}%  {verdict}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python -m tests.benchmarks.results BASELINE.json CANDIDATE.json")
+    baseline_path, candidate_path = sys.argv[1:]
+    print(compare_results(json.loads(Path(baseline_path).read_text()), json.loads(Path(candidate_path).read_text())))
@@ -0,0 +1,78 @@
+"""
+Tests for the mock OpenRouter API used by the analysis benchmark.
+"""
+
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from app.config import settings
+from app.services.llm.openrouter import OpenRouterService
+from tests.benchmarks.mock_llm import PROFILES, MockOpenRouterApi, profile_from_env
+from tests.benchmarks.results import distribution
+
+MESSAGES = {
+    "message_count": 3,
+    "participant_count": 2,
+    "messages": [
+        {"user": "U00000001", "text": "Shipping the release on Friday", "timestamp": "2025-04-01T09:00:00"},
+        {"user": "U00000002", "text": "リリースノートを確認しました", "timestamp": "2025-04-01T09:05:00"},
+        {"user": "U00000001", "text": "Thanks, merging the last fixes now", "timestamp": "2025-04-01T09:10:00"},
+    ],
+}
+
+
+async def _analyze(channel_name: str = "general"):
+    return await OpenRouterService().analyze_channel_messages(
+        channel_name=channel_name, messages_data=MESSAGES, start_date="2025-04-01", end_date="2025-04-02"
+    )
+
+
+@pytest.mark.asyncio
+async def test_mock_answers_analyses_and_records_requests(monkeypatch):
+    """Test that the OpenRouter client gets a parseable analysis and the mock records the requests' sizes."""
+    profile = replace(PROFILES["instant"], latency_ms=50, completion_tokens=200)
+
+    async with MockOpenRouterApi(profile) as llm:
+        monkeypatch.setattr(settings, "OPENROUTER_API_BASE_URL", llm.base_url)
+        results = await asyncio.gather(*(_analyze(f"channel-{n}") for n in range(3)))
+
+    for sections in results:
+        assert sections["channel_summary"] and sections["key_highlights"]
+    assert llm.calls["chat.completions"] == 3
+    assert all(request.status == 200 and request.completion_tokens == 200 for request in llm.requests)
+    assert all(request.prompt_tokens == request.prompt_chars // 4 + 1 for request in llm.requests)
+    assert all(request.seconds >= 0.05 for request in llm.requests)
+    assert llm.concurrency()["max_in_flight"] == 3
+
+
+@pytest.mark.asyncio
+async def test_mock_fails_as_the_profile_says(monkeypatch):
+    """Test that errors and rate limits reach the client, and that outcomes only depend on the prompt."""
+    async with MockOpenRouterApi(replace(PROFILES["instant"], error_rate=1.0)) as llm:
+        monkeypatch.setattr(settings, "OPENROUTER_API_BASE_URL", llm.base_url)
+        with pytest.raises(ValueError, match="HTTP error 500"):
+            await _analyze()
+
+        llm.profile = replace(PROFILES["instant"], rate_limit_rate=1.0)
+        with pytest.raises(ValueError, match="Rate limit exceeded"):
+            await _analyze()
+        assert llm.rate_limited["chat.completions"] == 1
+
+    # Timestamps in the prompt don't change the draws; sending it again does
+    first = MockOpenRouterApi()._draws("Report generated at 2025-04-01T09:00:00.123")
+    mock = MockOpenRouterApi()
+    assert mock._draws("Report generated at 2025-05-02 10:30:00") == first
+    assert mock._draws("Report generated at 2025-05-02 10:30:00") != first
+
+
+def test_profile_from_env_and_distribution(monkeypatch):
+    """Test that the environment picks and overrides the profile, and the summary statistics of values."""
+    monkeypatch.setenv("BENCHMARK_LLM_PROFILE", "slow")
+    monkeypatch.setenv("BENCHMARK_LLM_ERROR_RATE", "0.25")
+    profile = profile_from_env()
+    assert profile == replace(PROFILES["slow"], error_rate=0.25)
+
+    assert distribution(range(1, 101)) == {"mean": 50.5, "p50": 51, "p95": 96, "max": 100}
+    assert distribution([]) == {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
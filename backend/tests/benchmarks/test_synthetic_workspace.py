@@ -0,0 +1,105 @@
+"""
+Tests for the synthetic workspace generator, the mock Slack API and the benchmark measurements.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.slack.api import SlackApiClient, SlackApiError, SlackApiRateLimitError
+from tests.benchmarks.mock_slack import MockSlackApi
+from tests.benchmarks.results import Measurement, compare_results, skipped_pacing
+from tests.benchmarks.synthetic_workspace import JAPANESE_PHRASES, WorkspaceSpec, generate_workspace
+
+SPEC = WorkspaceSpec(channels=4, messages=600, users=30, seed=7)
+
+
+def test_generation_is_deterministic_and_matches_the_spec():
+    """Test that a spec always gives the same workspace, with the requested shape."""
+    workspace = generate_workspace(SPEC)
+
+    assert workspace == generate_workspace(SPEC)
+    assert workspace != generate_workspace(WorkspaceSpec(channels=4, messages=600, users=30, seed=8))
+    assert len(workspace.channels) == 4 and len(workspace.users) == 30
+    assert workspace.message_count == 600
+
+    messages = [message for history in workspace.history.values() for message in history]
+    japanese = sum(any(phrase in message["text"] for phrase in JAPANESE_PHRASES) for message in messages)
+    assert 0.35 < japanese / len(messages) < 0.65
+    assert any(message.get("reactions") for message in messages)
+
+    for (channel_id, thread_ts), thread in workspace.threads.items():
+        parent, replies = thread[0], thread[1:]
+        assert parent["ts"] == thread_ts and parent["reply_count"] == len(replies) > 0
+        assert all(reply["thread_ts"] == thread_ts for reply in replies)
+        # Replies come after their parent, oldest first
+        assert [float(reply["ts"]) for reply in replies] == sorted(float(reply["ts"]) for reply in replies)
+        assert float(replies[0]["ts"]) > float(thread_ts)
+
+    for history in workspace.history.values():
+        timestamps = [float(message["ts"]) for message in history]
+        assert timestamps == sorted(timestamps, reverse=True) and len(set(timestamps)) == len(timestamps)
+
+
+@pytest.mark.asyncio
+async def test_mock_paginates_and_rate_limits(monkeypatch):
+    """Test that the Slack client pages through a history and sees rate limits as Slack sends them."""
+    workspace = generate_workspace(SPEC)
+    channel_id = workspace.channels[0]["id"]
+
+    async with MockSlackApi(workspace, rate_limit_every=4, retry_after=3) as api:
+        monkeypatch.setattr(settings, "SLACK_API_BASE_URL", api.base_url)
+        client = SlackApiClient(workspace.access_token)
+
+        fetched, cursor = [], None
+        for _ in range(3):
+            response = await client._make_request(
+                "GET", "conversations.history", params={"channel": channel_id, "limit": 50, "cursor": cursor}
+            )
+            fetched.extend(response["messages"])
+            cursor = response["response_metadata"]["next_cursor"]
+        assert fetched == workspace.history[channel_id][:150]
+        assert response["has_more"] is True
+
+        # The fourth call of the method is rate limited
+        with pytest.raises(SlackApiRateLimitError) as error:
+            await client._make_request("GET", "conversations.history", params={"channel": channel_id})
+        assert error.value.retry_after == 3
+        assert api.calls["conversations.history"] == 4 and api.rate_limited["conversations.history"] == 1
+
+        with pytest.raises(SlackApiError) as error:
+            await SlackApiClient("xoxb-wrong").get_channel_info(channel_id)
+        assert error.value.error_code == "invalid_auth"
+
+
+@pytest.mark.asyncio
+async def test_measurement_counts_calls_and_skips_pacing():
+    """Test that a measurement counts the calls made in it and records the pauses it skipped."""
+    workspace = generate_workspace(SPEC)
+
+    async with MockSlackApi(workspace) as api:
+        client = SlackApiClient(workspace.access_token)
+        client.base_url = api.base_url
+        await client.verify_token()
+
+        measurement = Measurement("sync", api=api)
+        measurement.items = 2
+        started = time.perf_counter()
+        with measurement.measure(), skipped_pacing(measurement):
+            await client.get_channel_info(workspace.channels[0]["id"])
+            await client.get_user_info(workspace.users[0]["id"])
+            time.sleep(5)
+            await asyncio.sleep(5)
+
+    assert time.perf_counter() - started < 5
+    metrics = measurement.to_dict()
+    assert metrics["api_calls_by_method"] == {"conversations.info": 1, "users.info": 1}
+    assert metrics["api_calls_per_item"] == 1.0
+    assert metrics["pacing_seconds_skipped"] == 10
+    assert metrics["peak_rss_mb"] > 0
+
+    baseline = {"suite": "sync", "commit": "a", "parameters": {}, "scenarios": {"sync": metrics}}
+    candidate = {"suite": "sync", "commit": "b", "parameters": {}, "scenarios": {"sync": {**metrics, "seconds": 0}}}
+    assert "seconds" in compare_results(baseline, candidate)
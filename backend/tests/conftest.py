@@ -17,7 +17,7 @@ from sqlalchemy.pool import NullPool
 
 from app.api.router import router as api_router
 from app.db.base import Base
-from app.db.session import get_async_db
+from app.db.session import get_async_db, get_read_db
 
 # Mark the team tests as expected to fail due to SQLite limitations
 # This is necessary only for CI to pass while developing the team feature
@@ -119,8 +119,9 @@ def app(override_get_db, test_user_id):
     app = FastAPI()
     app.include_router(api_router)
 
-    # Override the get_async_db dependency
+    # Override the get_async_db and get_read_db dependencies
     app.dependency_overrides[get_async_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     # Mock the authentication dependency
     from app.core.auth import get_current_user
@@ -0,0 +1,80 @@
+"""
+Tests for JWT verification and the verified token cache.
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.config import settings
+from app.core.auth import VerifiedTokens, create_token_with_team_context, decode_token
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start each test without verified tokens."""
+    VerifiedTokens.reset()
+    yield
+    VerifiedTokens.reset()
+
+
+def _count_decodes():
+    """Patch jwt.decode in the auth module to count verifications."""
+    return patch("app.core.auth.jwt.decode", side_effect=jwt.decode)
+
+
+def test_repeat_token_is_verified_once():
+    """Test that a token is only verified on its first use and its payload can't be changed by callers."""
+    token = create_token_with_team_context("user-1", email="a@example.com", teams=[{"id": "t1"}], expires_delta=600)
+
+    with _count_decodes() as decode:
+        first = decode_token(token)
+        first["teams"].append({"id": "t2"})
+        second = decode_token(token)
+
+    assert decode.call_count == 1
+    assert second["sub"] == "user-1"
+    assert second["teams"] == [{"id": "t1"}]
+
+
+def test_cached_token_expires_with_the_token():
+    """Test that a cached payload isn't used past the token's exp."""
+    token = create_token_with_team_context("user-1", expires_delta=600)
+    decode_token(token)
+
+    with _count_decodes() as decode, patch("app.core.auth.time.time", return_value=time.time() + 601):
+        decode_token(token)
+
+    # Verified again, which rejects the token once the clock is really past exp
+    assert decode.call_count == 1
+
+
+def test_cache_is_bounded():
+    """Test that the least recently used token is evicted once the cache is full."""
+    tokens = [create_token_with_team_context(f"user-{i}", expires_delta=600) for i in range(3)]
+
+    with patch.object(settings, "AUTH_TOKEN_CACHE_MAX_ENTRIES", 2):
+        for token in tokens:
+            decode_token(token)
+
+    with _count_decodes() as decode:
+        decode_token(tokens[2])
+        decode_token(tokens[0])
+
+    assert decode.call_count == 1
+
+
+def test_invalid_tokens_are_not_cached_and_use_the_known_strategy():
+    """Test that a forged token is rejected every time, with one attempt once its issuer's strategy is known."""
+    decode_token(create_token_with_team_context("user-1", expires_delta=600))
+    forged = jwt.encode({"sub": "user-1", "exp": time.time() + 600}, "wrong-secret", algorithm="HS256")
+
+    with _count_decodes() as decode:
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                decode_token(forged)
+
+    assert decode.call_count == 2
@@ -0,0 +1,214 @@
+"""
+Tests for the shared cache backends.
+"""
+
+import asyncio
+import fnmatch
+from datetime import datetime
+
+import pytest
+
+from app.core.cache import (
+    Cache,
+    MemoryBackend,
+    RedisBackend,
+    SingleFlight,
+    dispatch_invalidation,
+    listen_for_invalidations,
+)
+from app.services.analysis.data_cache import ChannelDataCache
+
+
+class FakeRedisServer:
+    """In-process stand-in for a Redis server, shared by the clients of several workers."""
+
+    def __init__(self):
+        self.values = {}
+        self.subscribers = {}
+
+
+class FakePubSub:
+    """Stand-in for redis.asyncio.client.PubSub."""
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.server.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def unsubscribe(self, channel):
+        self.server.subscribers[channel].remove(self.queue)
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    """Stand-in for a redis.asyncio.Redis client with decode_responses=True."""
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    async def get(self, key):
+        return self.server.values.get(key)
+
+    async def set(self, key, value, px=None):
+        self.server.values[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.server.values.pop(key, None)
+
+    async def scan_iter(self, match, count=None):
+        for key in list(self.server.values):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def publish(self, channel, message):
+        for queue in self.server.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+
+    def pubsub(self):
+        return FakePubSub(self.server)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clean_handlers():
+    """Keep invalidation handlers registered by tests from leaking."""
+    handlers = {namespace: list(registered) for namespace, registered in Cache._handlers.items()}
+    ChannelDataCache.clear()
+    yield
+    Cache._handlers = handlers
+    ChannelDataCache.clear()
+
+
+@pytest.mark.asyncio
+async def test_values_are_namespaced_and_serialised():
+    """Test that values round-trip through JSON and namespaces don't collide."""
+    backend = MemoryBackend()
+    reports, users = Cache("reports", backend), Cache("users", backend)
+
+    await reports.set("1", {"title": "Weekly", "counts": [1, 2]})
+    await users.set("1", ["alice"])
+
+    assert await reports.get("1") == {"title": "Weekly", "counts": [1, 2]}
+    assert await users.get("1") == ["alice"]
+    assert await reports.get("2") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_values_expire():
+    """Test that values are gone after their TTL."""
+    cache = Cache("reports", MemoryBackend())
+
+    await cache.set("1", "value", ttl=0.01)
+    await asyncio.sleep(0.02)
+
+    assert await cache.get("1") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_values_are_shared_between_workers():
+    """Test that a value stored by one worker is a hit for another."""
+    server = FakeRedisServer()
+    worker_a, worker_b = RedisBackend(client=FakeRedis(server)), RedisBackend(client=FakeRedis(server))
+
+    await Cache("reports", worker_a).set("1", {"title": "Weekly"}, ttl=60)
+
+    assert await Cache("reports", worker_b).get("1") == {"title": "Weekly"}
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers_only():
+    """Test that invalidating a key prefix deletes it and calls the other workers' handlers."""
+    server = FakeRedisServer()
+    worker_a, worker_b = RedisBackend(client=FakeRedis(server)), RedisBackend(client=FakeRedis(server))
+    received = []
+    Cache("reports").on_invalidate(lambda key, prefix: received.append((key, prefix)))
+
+    listeners = [asyncio.create_task(listen_for_invalidations(backend)) for backend in (worker_a, worker_b)]
+    await asyncio.sleep(0)
+
+    cache = Cache("reports", worker_a)
+    await cache.set("team-1:a", 1)
+    await cache.set("team-1:b", 2)
+    await cache.set("team-2:a", 3)
+    await cache.invalidate("team-1:", prefix=True)
+    await asyncio.sleep(0)
+
+    for listener in listeners:
+        listener.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+
+    # Only worker B's listener handled it; worker A's own message was skipped
+    assert received == [("team-1:", True)]
+    assert await cache.get("team-1:a") is None and await cache.get("team-1:b") is None
+    assert await cache.get("team-2:a") == 3
+
+
+@pytest.mark.asyncio
+async def test_backend_errors_are_misses():
+    """Test that a failing backend makes the cache miss instead of raising."""
+
+    class BrokenBackend(MemoryBackend):
+        async def get(self, key):
+            raise ConnectionError("Connection refused")
+
+        async def set(self, key, value, ttl=None):
+            raise ConnectionError("Connection refused")
+
+    cache = Cache("reports", BrokenBackend())
+
+    await cache.set("1", "value")
+    assert await cache.get("1") is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_loads_and_errors():
+    """Test that concurrent runs of a key share one load, its result and its error."""
+    flights = SingleFlight()
+    stored = []
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        if loads == 2:
+            raise ValueError("Lookup failed")
+        return loads
+
+    assert await asyncio.gather(*(flights.run("k", load, stored.append) for _ in range(3))) == [1, 1, 1]
+    assert loads == 1 and stored == [1] and not flights.is_loading("k")
+
+    results = await asyncio.gather(*(flights.run("k", load) for _ in range(2)), return_exceptions=True)
+    assert loads == 2 and all(isinstance(result, ValueError) for result in results)
+
+    # A load forgotten while it runs is returned to its caller but not stored
+    running = asyncio.create_task(flights.run("k", load, stored.append))
+    await asyncio.sleep(0)
+    flights.forget(["k"])
+    assert await running == 3 and stored == [1]
+
+
+def test_channel_data_invalidation_from_another_worker():
+    """Test that another worker's invalidation drops the channel's local cache entries."""
+    start, end = datetime(2025, 5, 1), datetime(2025, 5, 8)
+    data = {"channel": {}, "messages": [], "users": [], "period": {}, "metadata": {}}
+    ChannelDataCache.set("c1", data, start, end)
+    ChannelDataCache.set("c2", data, start, end)
+
+    dispatch_invalidation(
+        '{"origin": "other-worker", "namespace": "channel-data", "key": "c1:", "prefix": true}', origin="this-worker"
+    )
+
+    assert ChannelDataCache.get("c1", start, end) is None
+    assert ChannelDataCache.get("c2", start, end) is not None
@@ -0,0 +1,56 @@
+"""Tests for off-event-loop execution of CPU-bound work."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.core import cpu_pool
+from app.core.cpu_pool import run_cpu_bound, shutdown_cpu_executor
+
+
+@pytest.fixture
+def pool_settings():
+    """Patch the pool settings and shut the pool down after each test."""
+    shutdown_cpu_executor()
+    with patch("app.core.cpu_pool.settings") as mock_settings:
+        mock_settings.CPU_POOL_MAX_WORKERS = 2
+        yield mock_settings
+    shutdown_cpu_executor()
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_runs_off_event_loop(pool_settings):
+    """Test that work runs on a pool thread, not the event loop thread."""
+    pool_settings.CPU_POOL_MODE = "thread"
+
+    worker_thread = await run_cpu_bound(threading.current_thread)
+
+    assert worker_thread is not threading.current_thread()
+    assert worker_thread.name.startswith("cpu-pool")
+
+
+@pytest.mark.asyncio
+async def test_inline_mode_runs_on_caller(pool_settings):
+    """Test that inline mode runs work on the calling thread."""
+    pool_settings.CPU_POOL_MODE = "inline"
+
+    assert await run_cpu_bound(threading.current_thread) is threading.current_thread()
+    assert cpu_pool._executor is None
+
+
+@pytest.mark.asyncio
+async def test_process_mode(pool_settings):
+    """Test that process mode runs module-level functions with keyword arguments."""
+    pool_settings.CPU_POOL_MODE = "process"
+
+    assert await run_cpu_bound(int, "ff", base=16) == 255
+
+
+@pytest.mark.asyncio
+async def test_invalid_mode(pool_settings):
+    """Test that an unknown mode is rejected."""
+    pool_settings.CPU_POOL_MODE = "gpu"
+
+    with pytest.raises(ValueError):
+        await run_cpu_bound(len, "abc")
@@ -0,0 +1,33 @@
+"""
+Tests for conditional GET helpers.
+"""
+
+from app.core.etag import IMMUTABLE, REVALIDATE, analysis_cache_control, etag_matches, make_etag
+from app.models.reports import ReportStatus
+
+
+def test_etag_depends_on_every_part():
+    """Test that ETags are quoted and change with any of their parts."""
+    etag = make_etag("report", 1, "2025-05-01T00:00:00", True)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("report", 1, "2025-05-01T00:00:00", True)
+    assert etag != make_etag("report", 1, "2025-05-01T00:00:00", False)
+
+
+def test_if_none_match_comparison():
+    """Test that If-None-Match lists, weak validators and * are matched."""
+    etag = make_etag("report", 1)
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag, f'"other", W/{etag}')
+    assert etag_matches(etag, "*")
+    assert not etag_matches(etag, '"other"')
+    assert not etag_matches(etag, None)
+
+
+def test_only_completed_analyses_are_immutable():
+    """Test that analyses which may still change are revalidated."""
+    assert analysis_cache_control(ReportStatus.COMPLETED) == IMMUTABLE
+    assert analysis_cache_control(ReportStatus.IN_PROGRESS) == REVALIDATE
+    assert analysis_cache_control(ReportStatus.FAILED) == REVALIDATE
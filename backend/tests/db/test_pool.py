@@ -0,0 +1,108 @@
+"""
+Tests for connection pool settings and telemetry.
+"""
+
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from app.db import session
+from app.db.pool import InstrumentedAsyncPool, PoolMetrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Start each test with empty pool statistics."""
+    PoolMetrics.reset()
+    yield
+    PoolMetrics.reset()
+
+
+def _pool(**kwargs) -> InstrumentedAsyncPool:
+    """Create an instrumented pool whose connections are mocks."""
+    return InstrumentedAsyncPool(lambda: MagicMock(), **kwargs)
+
+
+def test_metrics_summarise_checkout_waits():
+    """Test that checkout waits are aggregated."""
+    pool = MagicMock()
+    for wait in (0.01, 0.02, 0.03):
+        PoolMetrics.record_checkout(pool, wait)
+
+    metrics = PoolMetrics.get_metrics()
+
+    assert metrics["checkouts"] == 3
+    assert metrics["avg_wait_seconds"] == pytest.approx(0.02)
+    assert metrics["max_wait_seconds"] == 0.03
+    assert metrics["p95_wait_seconds"] == 0.03
+    assert metrics["slow_checkouts"] == 0
+
+
+def test_slow_checkout_is_logged(caplog, monkeypatch):
+    """Test that a checkout slower than the threshold is counted and logged."""
+    monkeypatch.setattr("app.db.pool.settings.DB_POOL_SLOW_CHECKOUT_SECONDS", 0.5)
+    pool = MagicMock()
+    pool.status.return_value = "Pool size: 1"
+
+    with caplog.at_level(logging.WARNING, logger="app.db.pool"):
+        PoolMetrics.record_checkout(pool, 0.75)
+
+    assert PoolMetrics.get_metrics()["slow_checkouts"] == 1
+    assert "Waited 0.75s for a database connection" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_reports_saturation_and_timeouts():
+    """Test that an exhausted pool shows full saturation and counts the timeout."""
+    pool = _pool(pool_size=1, max_overflow=1, timeout=0.05)
+
+    first = await greenlet_spawn(pool.connect)
+    second = await greenlet_spawn(pool.connect)
+
+    metrics = PoolMetrics.get_metrics(pool)
+    assert metrics["checkouts"] == 2
+    assert metrics["checked_out"] == 2
+    assert metrics["capacity"] == 2
+    assert metrics["saturation"] == 1.0
+
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+    assert PoolMetrics.get_metrics(pool)["timeouts"] == 1
+
+    await greenlet_spawn(first.close)
+    await greenlet_spawn(second.close)
+    assert PoolMetrics.get_metrics(pool)["saturation"] == 0.0
+
+
+def test_async_engine_uses_configured_pool():
+    """Test that the async engine is built from the pool settings."""
+    pool = session.async_engine.pool
+
+    assert isinstance(pool, InstrumentedAsyncPool)
+    assert pool.size() == session.settings.DB_POOL_SIZE
+    assert pool._max_overflow == session.settings.DB_MAX_OVERFLOW
+    assert pool._recycle == session.settings.DB_POOL_RECYCLE
+    assert pool._pre_ping is session.settings.DB_POOL_PRE_PING
+
+
+def test_sync_engine_is_created_lazily(monkeypatch):
+    """Test that the sync engine is only created when first requested."""
+    monkeypatch.setattr(session, "_engine", None)
+    monkeypatch.setattr(session, "_session_local", None)
+    created = []
+
+    def fake_create_engine(url, **kwargs):
+        created.append(kwargs)
+        return MagicMock()
+
+    monkeypatch.setattr(session, "create_engine", fake_create_engine)
+
+    assert created == []
+    factory = session.SessionLocal
+    assert session.engine is session.get_sync_engine()
+    assert session.SessionLocal is factory
+    assert len(created) == 1
+    assert created[0]["pool_size"] == session.settings.DB_POOL_SIZE
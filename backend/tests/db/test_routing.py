@@ -0,0 +1,112 @@
+"""
+Tests for read-replica routing.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import Response
+from jose import jwt
+from starlette.requests import Request
+
+from app.db import session
+from app.db.routing import PRIMARY_COOKIE, RecentWrites, record_write, routing_key, should_read_primary
+
+
+@pytest.fixture(autouse=True)
+def reset_writers():
+    """Start each test without recent writers."""
+    RecentWrites.reset()
+    yield
+    RecentWrites.reset()
+
+
+def _request(method: str = "GET", token: str = None, cookie: str = None) -> Request:
+    """Build a request with an optional bearer token and cookie header."""
+    headers = []
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    return Request({"type": "http", "method": method, "path": "/", "headers": headers})
+
+
+def test_routing_key_uses_token_subject():
+    """Test that requests are keyed by the user in their token, and anonymous ones are not keyed."""
+    token = jwt.encode({"sub": "user-1"}, "secret", algorithm="HS256")
+
+    assert routing_key(_request(token=token)) == "user-1"
+    assert routing_key(_request(token="not-a-jwt")) != "not-a-jwt"
+    assert routing_key(_request()) is None
+
+
+def test_write_keeps_user_on_primary():
+    """Test that a writing request sends the same user's reads to the primary, but not other users'."""
+    writer = jwt.encode({"sub": "writer"}, "secret", algorithm="HS256")
+    reader = jwt.encode({"sub": "reader"}, "secret", algorithm="HS256")
+    response = Response()
+
+    record_write(_request("POST", token=writer), response)
+
+    assert should_read_primary(_request(token=writer))
+    assert not should_read_primary(_request(token=reader))
+    assert PRIMARY_COOKIE in response.headers["set-cookie"]
+
+
+def test_reads_do_not_mark_writers():
+    """Test that safe methods neither mark the user nor set the cookie."""
+    token = jwt.encode({"sub": "user-1"}, "secret", algorithm="HS256")
+    response = Response()
+
+    record_write(_request("GET", token=token), response)
+
+    assert not should_read_primary(_request(token=token))
+    assert "set-cookie" not in response.headers
+
+
+def test_sticky_window_expires():
+    """Test that a writer's reads return to the replica after the sticky window."""
+    with patch("app.db.routing.time.monotonic", return_value=100.0):
+        RecentWrites.record("user-1")
+    with patch("app.db.routing.time.monotonic", return_value=100.0 + 3600):
+        assert not RecentWrites.is_recent("user-1")
+
+
+def test_cookie_keeps_client_on_primary():
+    """Test that the cookie set by another worker routes reads to the primary."""
+    assert should_read_primary(_request(cookie=f"{PRIMARY_COOKIE}=1"))
+
+
+class _SessionFactory:
+    """Session factory stand-in whose sessions are mocks."""
+
+    def __init__(self):
+        self.session = AsyncMock()
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self.session
+
+    async def __aexit__(self, *args):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_uses_replica_unless_recent_writer():
+    """Test that read sessions come from the replica, and from the primary after a write."""
+    primary, replica = _SessionFactory(), _SessionFactory()
+
+    with patch.object(session, "AsyncSessionLocal", primary), patch.object(session, "ReplicaSessionLocal", replica):
+        assert await session.get_read_db(_request()).__anext__() is replica.session
+        assert await session.get_read_db(_request(cookie=f"{PRIMARY_COOKIE}=1")).__anext__() is primary.session
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_uses_primary_without_replica():
+    """Test that read sessions come from the primary when no replica is configured."""
+    primary = _SessionFactory()
+
+    with patch.object(session, "AsyncSessionLocal", primary), patch.object(session, "ReplicaSessionLocal", None):
+        assert await session.get_read_db(_request()).__anext__() is primary.session
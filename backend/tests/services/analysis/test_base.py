@@ -1,5 +1,6 @@
 """Tests for base ResourceAnalysisService."""
 
+import asyncio
 import uuid
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -9,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.reports import ReportStatus, ResourceAnalysis
 from app.services.analysis.base import ResourceAnalysisService
+from app.services.analysis.budget import AnalysisBudget, BudgetExceededError
 
 
 class MockResourceAnalysisService(ResourceAnalysisService):
@@ -42,6 +44,8 @@ async def test_update_analysis_status():
     # Mock the execute and scalar_one_or_none methods
     mock_result = MagicMock()
     mock_result.scalar_one_or_none.return_value = ResourceAnalysis(id=uuid.uuid4(), status=ReportStatus.IN_PROGRESS)
+    # Current status and report of the analysis, read under a row lock by the transition
+    mock_result.one_or_none.return_value = (ReportStatus.PENDING, uuid.uuid4())
     db.execute.return_value = mock_result
 
     # Create service instance
@@ -72,6 +76,8 @@ async def test_store_analysis_results():
     # Mock the execute and scalar_one_or_none methods
     mock_result = MagicMock()
     mock_result.scalar_one_or_none.return_value = ResourceAnalysis(id=uuid.uuid4(), status=ReportStatus.COMPLETED)
+    # Current status and report of the analysis, read under a row lock by the transition
+    mock_result.one_or_none.return_value = (ReportStatus.PENDING, uuid.uuid4())
     db.execute.return_value = mock_result
 
     # Create service instance
@@ -90,8 +96,9 @@ async def test_store_analysis_results():
         model_used="test-model",
     )
 
-    # Check that execute was called twice (once for update, once for select)
-    assert db.execute.call_count == 2
+    # Check that execute was called four times (locking select, analysis update,
+    # report counter update and the final select)
+    assert db.execute.call_count == 4
 
     # Check that the returned analysis has the correct status
     assert result.status == ReportStatus.COMPLETED
@@ -106,6 +113,8 @@ async def test_handle_errors_non_retryable():
     # Mock the execute and scalar_one_or_none methods
     mock_result = MagicMock()
     mock_result.scalar_one_or_none.return_value = ResourceAnalysis(id=uuid.uuid4(), status=ReportStatus.FAILED)
+    # Current status and report of the analysis, read under a row lock by the transition
+    mock_result.one_or_none.return_value = (ReportStatus.PENDING, uuid.uuid4())
     db.execute.return_value = mock_result
 
     # Create service instance
@@ -134,6 +143,8 @@ async def test_handle_errors_retryable():
         id=uuid.uuid4(),
         status=ReportStatus.PENDING,  # Should be set to PENDING for retry
     )
+    # Current status and report of the analysis, read under a row lock by the transition
+    mock_result.one_or_none.return_value = (ReportStatus.PENDING, uuid.uuid4())
     db.execute.return_value = mock_result
 
     # Create service instance
@@ -277,3 +288,118 @@ async def test_run_analysis_error():
 
     # Check that handle_errors was called with the error
     service.handle_errors.assert_called_with(error=service.fetch_data.side_effect, analysis_id=analysis_id)
+
+
+@pytest.mark.asyncio
+async def test_run_analysis_budget_exceeded_records_partial_results():
+    """Test that an analysis past its deadline is stopped and keeps its partial results."""
+    db = AsyncMock(spec=AsyncSession)
+    service = MockResourceAnalysisService(db)
+
+    service.update_analysis_status = AsyncMock()
+    service.fetch_data = AsyncMock(
+        return_value={"metadata": {"message_count": 42, "user_count": 5, "thread_count": 3, "reaction_count": 7}}
+    )
+    service.store_analysis_results = AsyncMock()
+    service.handle_errors = AsyncMock()
+    service.record_partial_results = AsyncMock()
+
+    async def slow_llm(**kwargs):
+        await asyncio.sleep(10)
+
+    service.analyze_data = slow_llm
+
+    analysis_id = uuid.uuid4()
+    budget = AnalysisBudget(timeout_seconds=0.05)
+
+    await service.run_analysis(
+        analysis_id=analysis_id,
+        resource_id=uuid.uuid4(),
+        integration_id=uuid.uuid4(),
+        analysis_type="CONTRIBUTION",
+        period_start=datetime.utcnow() - timedelta(days=7),
+        period_end=datetime.utcnow(),
+        budget=budget,
+    )
+
+    service.store_analysis_results.assert_not_called()
+    service.handle_errors.assert_not_called()
+    service.record_partial_results.assert_called_once()
+
+    args = service.record_partial_results.call_args.args
+    assert args[0] == analysis_id
+    assert isinstance(args[1], BudgetExceededError)
+    assert args[1].phase == "llm"
+    assert args[2]["message_count"] == 42
+    assert args[2]["participant_count"] == 5
+    assert args[3] is budget
+
+
+@pytest.mark.asyncio
+async def test_record_partial_results():
+    """Test that partial results are stored with a FAILED status."""
+    db = AsyncMock(spec=AsyncSession)
+    service = MockResourceAnalysisService(db)
+    analysis_id = uuid.uuid4()
+    error = BudgetExceededError("deadline", "llm", "Analysis deadline exceeded during llm")
+
+    with patch(
+        "app.services.analysis.base.transition_analysis_status",
+        AsyncMock(return_value=uuid.uuid4()),
+    ) as mock_transition:
+        await service.record_partial_results(
+            analysis_id, error, {"message_count": 42, "thread_count": None}, AnalysisBudget(max_tokens=100)
+        )
+
+    args, kwargs = mock_transition.call_args
+    assert args[1:] == (analysis_id, ReportStatus.FAILED)
+    assert kwargs["message_count"] == 42
+    assert "thread_count" not in kwargs
+    assert kwargs["results"]["budget_exceeded"] == {"reason": "deadline", "phase": "llm"}
+    assert kwargs["results"]["partial"]["message_count"] == 42
+
+
+@pytest.mark.asyncio
+async def test_cancelled_analysis_records_partial_results():
+    """Test that cancelling a running analysis fails it with the statistics it already gathered."""
+    db = AsyncMock(spec=AsyncSession)
+    service = MockResourceAnalysisService(db)
+
+    service.update_analysis_status = AsyncMock()
+    service.fetch_data = AsyncMock(
+        return_value={"metadata": {"message_count": 42, "user_count": 5, "thread_count": 3, "reaction_count": 7}}
+    )
+    service.store_analysis_results = AsyncMock()
+    llm_started = asyncio.Event()
+
+    async def slow_llm(**kwargs):
+        llm_started.set()
+        await asyncio.sleep(10)
+
+    service.analyze_data = slow_llm
+    analysis_id = uuid.uuid4()
+
+    with patch("app.services.analysis.base.transition_analysis_status", AsyncMock()) as mock_transition:
+        task = asyncio.create_task(
+            service.run_analysis(
+                analysis_id=analysis_id,
+                resource_id=uuid.uuid4(),
+                integration_id=uuid.uuid4(),
+                analysis_type="CONTRIBUTION",
+                period_start=datetime.utcnow() - timedelta(days=7),
+                period_end=datetime.utcnow(),
+                budget=AnalysisBudget(),
+            )
+        )
+        await llm_started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    service.store_analysis_results.assert_not_called()
+    db.rollback.assert_called_once()
+    args, kwargs = mock_transition.call_args
+    assert args[1:] == (analysis_id, ReportStatus.FAILED)
+    assert kwargs["message_count"] == 42
+    assert kwargs["results"]["cancelled"] == {"phase": "llm"}
+    assert kwargs["results"]["partial"]["participant_count"] == 5
@@ -0,0 +1,92 @@
+"""Tests for analysis deadline and token budgets."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.analysis.budget import AnalysisBudget, BudgetExceededError
+
+
+@pytest.mark.asyncio
+async def test_run_phase_returns_result():
+    """Test that a phase finishing in time returns its result and is timed."""
+    budget = AnalysisBudget(timeout_seconds=5)
+
+    async def phase():
+        return "done"
+
+    assert await budget.run_phase("fetch", phase()) == "done"
+    assert "fetch" in budget.summary()["phase_seconds"]
+
+
+@pytest.mark.asyncio
+async def test_run_phase_cancels_on_deadline():
+    """Test that a phase still running at the deadline is cancelled."""
+    budget = AnalysisBudget(timeout_seconds=0.05)
+    cancelled = asyncio.Event()
+
+    async def hung_request():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(BudgetExceededError) as excinfo:
+        await budget.run_phase("llm", hung_request())
+
+    assert excinfo.value.reason == "deadline"
+    assert excinfo.value.phase == "llm"
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_run_phase_after_deadline_does_not_start():
+    """Test that no phase starts once the deadline has passed."""
+    budget = AnalysisBudget(deadline=time.monotonic() - 1)
+    started = False
+
+    async def phase():
+        nonlocal started
+        started = True
+
+    with pytest.raises(BudgetExceededError) as excinfo:
+        await budget.run_phase("fetch", phase())
+
+    assert excinfo.value.phase == "fetch"
+    assert not started
+
+
+def test_report_deadline_caps_analysis_deadline():
+    """Test that the earlier of the analysis and report deadlines wins."""
+    report_deadline = time.monotonic() + 10
+    budget = AnalysisBudget(timeout_seconds=600, deadline=report_deadline)
+
+    assert budget.deadline == report_deadline
+
+
+def test_token_budget():
+    """Test token accounting, limiting and checks."""
+    budget = AnalysisBudget(max_tokens=1000)
+    budget.record_tokens(400)
+    assert budget.remaining_tokens() == 600
+
+    # The report has less left than the analysis allowance
+    budget.limit_tokens(500)
+    assert budget.remaining_tokens() == 100
+
+    budget.check_tokens("prompt_build", 100)
+    with pytest.raises(BudgetExceededError) as excinfo:
+        budget.check_tokens("prompt_build", 101)
+    assert excinfo.value.reason == "tokens"
+
+
+def test_unlimited_budget():
+    """Test that a budget without limits never runs out."""
+    budget = AnalysisBudget()
+
+    assert budget.remaining_seconds() is None
+    assert budget.remaining_tokens() is None
+    budget.check_deadline("fetch")
+    budget.check_tokens("prompt_build", 10**9)
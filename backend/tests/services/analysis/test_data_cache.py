@@ -0,0 +1,203 @@
+"""Tests for the analysis channel data cache."""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.services.analysis.data_cache import ChannelDataCache
+
+START = datetime(2025, 5, 1)
+END = datetime(2025, 5, 8)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start each test with an empty cache and fresh metrics."""
+    ChannelDataCache.clear()
+    yield
+    ChannelDataCache.clear()
+
+
+def _channel_data(days: int = 7, start: datetime = START):
+    """Build channel data with one message per day from a different user."""
+    messages = [
+        {
+            "id": f"m{day}",
+            "user_id": f"u{day}",
+            "text": "x" * 100,
+            "thread_ts": None,
+            "is_thread_parent": day % 2 == 0,
+            "is_thread_reply": False,
+            "reply_count": 0,
+            "reaction_count": 1,
+            "timestamp": (start + timedelta(days=day, hours=12)).isoformat(),
+            "has_attachments": False,
+        }
+        for day in range(days)
+    ]
+    return {
+        "channel": {"id": "c1", "name": "general"},
+        "messages": messages,
+        "users": [{"id": f"u{day}", "name": f"user{day}"} for day in range(days)],
+        "period": {"start": start.isoformat(), "end": (start + timedelta(days=days)).isoformat()},
+        "metadata": {"message_count": days, "user_count": days, "parameters": {}},
+    }
+
+
+def test_returned_data_cannot_change_the_cache():
+    """Test that changing data returned by the cache doesn't change the cached copy."""
+    ChannelDataCache.set("c1", _channel_data(), START, END)
+
+    data = ChannelDataCache.get("c1", START, END)
+    data["messages"] = []
+    data["metadata"]["message_count"] = 0
+
+    again = ChannelDataCache.get("c1", START, END)
+    assert len(again["messages"]) == 7
+    assert again["metadata"]["message_count"] == 7
+    assert ChannelDataCache.get_metrics()["hits"] == 2
+
+
+def test_least_recently_used_entry_is_evicted_for_the_byte_budget():
+    """Test that entries are evicted in least-recently-used order once the byte budget is exceeded."""
+    data = _channel_data()
+    ChannelDataCache.set("c1", data, START, END)
+    size = ChannelDataCache.get_metrics()["bytes"]
+
+    with patch("app.services.analysis.data_cache.settings.CHANNEL_DATA_CACHE_MAX_BYTES", size * 2):
+        ChannelDataCache.set("c2", data, START, END)
+        assert ChannelDataCache.get("c1", START, END) is not None
+        ChannelDataCache.set("c3", data, START, END)
+
+    assert ChannelDataCache.get("c2", START, END) is None
+    assert ChannelDataCache.get("c1", START, END) is not None
+    metrics = ChannelDataCache.get_metrics()
+    assert metrics["evictions"] == 1
+    assert metrics["entries"] == 2 and metrics["bytes"] == size * 2
+
+
+def test_payload_larger_than_budget_is_not_cached():
+    """Test that a payload bigger than the whole budget is not cached."""
+    with patch("app.services.analysis.data_cache.settings.CHANNEL_DATA_CACHE_MAX_BYTES", 10):
+        ChannelDataCache.set("c1", _channel_data(), START, END)
+
+    assert ChannelDataCache.get_metrics()["entries"] == 0
+
+
+def test_entries_expire_after_their_ttl():
+    """Test that an entry past its TTL is a miss and is counted as expired."""
+    with patch("app.services.analysis.data_cache.time.monotonic", return_value=100.0):
+        ChannelDataCache.set("c1", _channel_data(), START, END, ttl=60)
+        assert ChannelDataCache.get("c1", START, END) is not None
+    with patch("app.services.analysis.data_cache.time.monotonic", return_value=161.0):
+        assert ChannelDataCache.get("c1", START, END) is None
+
+    assert ChannelDataCache.get_metrics()["expirations"] == 1
+
+
+def test_sub_range_is_sliced_from_complete_superset():
+    """Test that a period inside a complete cached period is served with its own messages and counts."""
+    ChannelDataCache.set("c1", _channel_data(), START, END, complete=True)
+
+    data = ChannelDataCache.get("c1", START + timedelta(days=2), START + timedelta(days=4))
+
+    assert [message["id"] for message in data["messages"]] == ["m2", "m3"]
+    assert [user["id"] for user in data["users"]] == ["u2", "u3"]
+    assert data["metadata"]["message_count"] == 2
+    assert data["metadata"]["thread_count"] == 1
+    assert data["period"]["start"] == (START + timedelta(days=2)).isoformat()
+    assert ChannelDataCache.get_metrics()["range_hits"] == 1
+
+
+def test_sub_range_is_not_sliced_from_truncated_data():
+    """Test that data cut off by a message limit is only served for its exact period."""
+    ChannelDataCache.set("c1", _channel_data(), START, END, complete=False)
+
+    assert ChannelDataCache.get("c1", START + timedelta(days=2), START + timedelta(days=4)) is None
+    assert ChannelDataCache.get("c1", START, END, include_threads=False) is None
+
+
+def test_invalidate_removes_only_that_channel():
+    """Test that invalidating a channel drops its entries and frees their bytes."""
+    ChannelDataCache.set("c1", _channel_data(), START, END)
+    ChannelDataCache.set("c1", _channel_data(), START, END + timedelta(days=1))
+    ChannelDataCache.set("c2", _channel_data(), START, END)
+
+    ChannelDataCache.invalidate("c1")
+
+    assert ChannelDataCache.get("c1", START, END) is None
+    assert ChannelDataCache.get("c2", START, END) is not None
+    assert ChannelDataCache.get_metrics()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once():
+    """Test that concurrent misses of the same key share a single load."""
+    loads = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await release.wait()
+        return _channel_data(), True
+
+    tasks = [asyncio.create_task(ChannelDataCache.get_or_load("c1", START, END, True, load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert loads == 1
+    assert all(len(result["messages"]) == 7 for result in results)
+    assert ChannelDataCache.get_metrics()["coalesced_loads"] == 4
+    assert await ChannelDataCache.get_or_load("c1", START, END, True, load) is not None
+    assert loads == 1
+
+
+@pytest.mark.asyncio
+async def test_load_running_during_invalidation_is_not_cached():
+    """Test that data loaded before a sync invalidated the channel is returned but not cached."""
+    release = asyncio.Event()
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await release.wait()
+        return _channel_data(), True
+
+    task = asyncio.create_task(ChannelDataCache.get_or_load("c1", START, END, True, load))
+    await asyncio.sleep(0)
+    ChannelDataCache.invalidate("c1")
+    release.set()
+
+    assert len((await task)["messages"]) == 7
+    assert ChannelDataCache.get("c1", START, END, True) is None
+
+    # The next analysis loads the synced data instead of waiting for the old load
+    assert await ChannelDataCache.get_or_load("c1", START, END, True, load) is not None
+    assert loads == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_raised_to_all_waiters_and_not_cached():
+    """Test that a failing load raises for every waiter and the next call loads again."""
+    release = asyncio.Event()
+
+    async def failing_load():
+        await release.wait()
+        raise ValueError("Channel not found")
+
+    tasks = [asyncio.create_task(ChannelDataCache.get_or_load("c1", START, END, True, failing_load)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def load():
+        return _channel_data(), True
+
+    assert await ChannelDataCache.get_or_load("c1", START, END, True, load) is not None
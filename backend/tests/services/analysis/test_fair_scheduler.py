@@ -0,0 +1,230 @@
+"""Tests for fair-share admission of analysis tasks."""
+
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.reports import ReportStatus
+from app.services.analysis.fair_scheduler import FairShareScheduler, TeamQueueFullError
+from app.services.analysis.task_scheduler import ResourceAnalysisTaskScheduler
+
+
+@pytest.fixture(autouse=True)
+def fair_settings():
+    """Use small limits and a clean scheduler for each test."""
+    FairShareScheduler.reset()
+    with patch("app.services.analysis.fair_scheduler.settings") as mock_settings:
+        mock_settings.ANALYSIS_MAX_CONCURRENCY = 1
+        mock_settings.ANALYSIS_TEAM_MAX_CONCURRENCY = 1
+        mock_settings.ANALYSIS_TEAM_MAX_QUEUE_DEPTH = 10
+        mock_settings.ANALYSIS_TEAM_WEIGHTS = {}
+        yield mock_settings
+    FairShareScheduler.reset()
+
+
+def _admitted(tickets):
+    """Return the analysis IDs of the admitted tickets."""
+    return [ticket.analysis_id for ticket in tickets if ticket.admitted]
+
+
+def _release_admitted(tickets):
+    """Release every admitted ticket that is still holding a slot."""
+    for ticket in tickets:
+        if ticket.admitted and not ticket.released:
+            FairShareScheduler.release(ticket)
+            return
+
+
+@pytest.mark.asyncio
+async def test_round_robin_between_teams():
+    """Test that a team with a large backlog does not starve other teams."""
+    tickets = [FairShareScheduler.enqueue("team-a", f"a{i}") for i in range(1, 4)]
+    tickets.append(FairShareScheduler.enqueue("team-b", "b1"))
+    tickets.append(FairShareScheduler.enqueue("team-c", "c1"))
+
+    order = []
+    while len(order) < len(tickets):
+        newly_admitted = [analysis_id for analysis_id in _admitted(tickets) if analysis_id not in order]
+        order.extend(newly_admitted)
+        _release_admitted(tickets)
+
+    assert order == ["a1", "a2", "b1", "c1", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_team_weight(fair_settings):
+    """Test that a team's weight lets it start several analyses per turn."""
+    fair_settings.ANALYSIS_TEAM_WEIGHTS = {"team-a": 2}
+    tickets = [FairShareScheduler.enqueue("team-a", f"a{i}") for i in range(1, 5)]
+    tickets.append(FairShareScheduler.enqueue("team-b", "b1"))
+
+    order = []
+    while len(order) < len(tickets):
+        order.extend(analysis_id for analysis_id in _admitted(tickets) if analysis_id not in order)
+        _release_admitted(tickets)
+
+    assert order == ["a1", "a2", "a3", "b1", "a4"]
+
+
+@pytest.mark.asyncio
+async def test_team_concurrency_cap(fair_settings):
+    """Test that free slots go to other teams once a team hits its cap."""
+    fair_settings.ANALYSIS_MAX_CONCURRENCY = 3
+
+    a1 = FairShareScheduler.enqueue("team-a", "a1")
+    a2 = FairShareScheduler.enqueue("team-a", "a2")
+    b1 = FairShareScheduler.enqueue("team-b", "b1")
+
+    assert a1.admitted
+    assert not a2.admitted
+    assert b1.admitted
+
+    metrics = FairShareScheduler.get_team_metrics("team-a")
+    assert metrics["running"] == 1
+    assert metrics["queued"] == 1
+
+    FairShareScheduler.release(a1)
+    assert a2.admitted
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_limit(fair_settings):
+    """Test that a team cannot queue more than its depth limit."""
+    fair_settings.ANALYSIS_TEAM_MAX_QUEUE_DEPTH = 2
+
+    FairShareScheduler.enqueue("team-a", "a1")  # admitted straight away
+    FairShareScheduler.enqueue("team-a", "a2")
+    FairShareScheduler.enqueue("team-a", "a3")
+
+    with pytest.raises(TeamQueueFullError):
+        FairShareScheduler.enqueue("team-a", "a4")
+
+    # Other teams are unaffected
+    FairShareScheduler.enqueue("team-b", "b1")
+
+    assert FairShareScheduler.get_team_metrics("team-a")["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    """Test that cancelling a queued analysis removes it from the queue."""
+    a1 = FairShareScheduler.enqueue("team-a", "a1")
+    b1 = FairShareScheduler.enqueue("team-b", "b1")
+    c1 = FairShareScheduler.enqueue("team-c", "c1")
+
+    waiter = asyncio.create_task(FairShareScheduler.wait_for_turn(b1))
+    await asyncio.sleep(0)
+    assert FairShareScheduler.is_queued("b1")
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert not FairShareScheduler.is_queued("b1")
+
+    FairShareScheduler.release(a1)
+    assert c1.admitted
+
+
+@pytest.mark.asyncio
+async def test_wait_time_metrics():
+    """Test that admitted analyses record their queue wait time."""
+    a1 = FairShareScheduler.enqueue("team-a", "a1")
+    b1 = FairShareScheduler.enqueue("team-b", "b1")
+
+    await asyncio.sleep(0.01)
+    FairShareScheduler.release(a1)
+
+    assert b1.admitted
+    metrics = FairShareScheduler.get_team_metrics("team-b")
+    assert metrics["admitted"] == 1
+    assert metrics["max_wait_seconds"] >= 0.01
+    assert metrics["avg_wait_seconds"] == metrics["max_wait_seconds"]
+    assert set(FairShareScheduler.get_all_metrics()) == {"team-a", "team-b"}
+
+
+@pytest.mark.asyncio
+async def test_task_scheduler_reports_queued_analyses():
+    """Test that analyses waiting for admission report a QUEUED status."""
+    team_id = uuid.uuid4()
+    first_id = uuid.uuid4()
+    second_id = uuid.uuid4()
+    release = asyncio.Event()
+
+    async def fake_run(analysis_id):
+        await release.wait()
+
+    try:
+        with patch.object(ResourceAnalysisTaskScheduler, "_run_analysis", side_effect=fake_run):
+            assert await ResourceAnalysisTaskScheduler.schedule_analysis(first_id, team_id=team_id)
+            assert await ResourceAnalysisTaskScheduler.schedule_analysis(second_id, team_id=team_id)
+            await asyncio.sleep(0)
+
+            assert ResourceAnalysisTaskScheduler.get_task_status(first_id) == "RUNNING"
+            assert ResourceAnalysisTaskScheduler.get_task_status(second_id) == "QUEUED"
+
+            release.set()
+            await asyncio.gather(*ResourceAnalysisTaskScheduler._tasks.values())
+    finally:
+        ResourceAnalysisTaskScheduler._tasks.clear()
+
+    assert FairShareScheduler.get_team_metrics(team_id)["admitted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rejected_analyses_fail_and_finish_the_report(fair_settings):
+    """Test that analyses rejected by a full team queue are failed, so their report still finishes."""
+    fair_settings.ANALYSIS_TEAM_MAX_QUEUE_DEPTH = 1
+    team_id = uuid.uuid4()
+    FairShareScheduler.enqueue(team_id, "running")
+    FairShareScheduler.enqueue(team_id, "queued")
+
+    report_id = uuid.uuid4()
+    analysis_ids = [uuid.uuid4(), uuid.uuid4()]
+    analyses_result = MagicMock()
+    analyses_result.scalars.return_value.all.return_value = [MagicMock(id=analysis_id) for analysis_id in analysis_ids]
+    team_result = MagicMock()
+    team_result.scalar_one_or_none.return_value = team_id
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [analyses_result, team_result, MagicMock(), MagicMock()]
+
+    counters = iter(
+        [
+            {
+                "total_resources": 2,
+                "pending_analyses": 1,
+                "in_progress_analyses": 0,
+                "completed_analyses": 0,
+                "failed_analyses": 1,
+            },
+            {
+                "total_resources": 2,
+                "pending_analyses": 0,
+                "in_progress_analyses": 0,
+                "completed_analyses": 0,
+                "failed_analyses": 2,
+            },
+        ]
+    )
+
+    with patch(
+        "app.services.analysis.task_scheduler.transition_analysis_status", AsyncMock(return_value=report_id)
+    ) as mock_transition, patch(
+        "app.services.analysis.task_scheduler.get_report_counters", AsyncMock(side_effect=lambda *args: next(counters))
+    ):
+        scheduled = await ResourceAnalysisTaskScheduler.schedule_analyses_for_report(report_id, db)
+
+    assert scheduled == 0
+    assert not ResourceAnalysisTaskScheduler._tasks
+    assert [call.args[1:3] for call in mock_transition.call_args_list] == [
+        (analysis_id, ReportStatus.FAILED) for analysis_id in analysis_ids
+    ]
+    assert "queue full" in mock_transition.call_args.kwargs["results"]["error"]
+
+    # Once both are failed, the report is marked FAILED
+    report_update = db.execute.call_args.args[0]
+    assert "crossresourcereport" in str(report_update)
+    assert report_update.compile().params["status"] == ReportStatus.FAILED
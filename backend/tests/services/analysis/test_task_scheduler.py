@@ -1,6 +1,7 @@
 """Tests for ResourceAnalysisTaskScheduler."""
 
 import asyncio
+import time
 import uuid
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -8,7 +9,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.reports import AnalysisResourceType, ReportStatus, ResourceAnalysis
+from app.models.reports import AnalysisResourceType, CrossResourceReport, ReportStatus, ResourceAnalysis
+from app.services.analysis.budget import AnalysisBudget, BudgetExceededError
 from app.services.analysis.task_scheduler import ResourceAnalysisTaskScheduler
 
 
@@ -128,6 +130,68 @@ async def test_run_analysis():
     assert True
 
 
+@pytest.mark.asyncio
+async def test_run_analysis_records_budget_exceeded_during_sync():
+    """Test that running out of time while syncing fails the analysis with sync as the phase."""
+    report = CrossResourceReport(id=uuid.uuid4(), total_resources=2, llm_tokens_used=0)
+    analysis = ResourceAnalysis(
+        id=uuid.uuid4(),
+        cross_resource_report_id=report.id,
+        status=ReportStatus.PENDING,
+        resource_type=AnalysisResourceType.SLACK_CHANNEL,
+        resource_id=uuid.uuid4(),
+        integration_id=uuid.uuid4(),
+        period_start=datetime.utcnow() - timedelta(days=7),
+        period_end=datetime.utcnow(),
+    )
+    channel = MagicMock(id=analysis.resource_id, workspace_id=uuid.uuid4(), last_sync_at=None)
+
+    results = []
+    for value in (analysis, report, channel):
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = value
+        results.append(result)
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = results
+
+    async def get_db():
+        yield db
+
+    service = MagicMock()
+    service.record_partial_results = AsyncMock()
+    service.run_analysis = AsyncMock()
+    budget = AnalysisBudget(deadline=time.monotonic() - 1)
+
+    with patch("app.services.analysis.task_scheduler.get_async_db", get_db), patch(
+        "app.services.analysis.task_scheduler.get_current_budget", return_value=budget
+    ), patch(
+        "app.services.analysis.task_scheduler.ResourceAnalysisServiceFactory.create_service", return_value=service
+    ), patch(
+        "app.services.slack.messages.SlackMessageService", autospec=True
+    ) as mock_message_service, patch.object(
+        ResourceAnalysisTaskScheduler, "_check_and_update_report_status", AsyncMock()
+    ) as mock_check:
+        await ResourceAnalysisTaskScheduler._run_analysis(analysis.id)
+
+    mock_message_service.sync_channel_messages.assert_called_once_with(
+        db=db,
+        workspace_id=str(channel.workspace_id),
+        channel_id=str(channel.id),
+        start_date=analysis.period_start,
+        end_date=analysis.period_end,
+        include_replies=True,
+    )
+    service.run_analysis.assert_not_called()
+    analysis_id, error, partial, used_budget = service.record_partial_results.call_args.args
+    assert analysis_id == analysis.id
+    assert isinstance(error, BudgetExceededError)
+    assert error.phase == "sync"
+    assert used_budget is budget
+    db.commit.assert_called_once()
+    mock_check.assert_called_once_with(db, report.id)
+
+
 @pytest.mark.asyncio
 async def test_cancel_task():
     """Test cancelling a task."""
@@ -157,6 +221,49 @@ async def test_cancel_task():
         ResourceAnalysisTaskScheduler._tasks.clear()
 
 
+@pytest.mark.asyncio
+async def test_cancelled_queued_analysis_fails_and_updates_report():
+    """Test that cancelling an analysis still waiting for its turn fails it and updates its report."""
+    analysis_id = uuid.uuid4()
+    report_id = uuid.uuid4()
+
+    status_result = MagicMock()
+    status_result.one_or_none.return_value = (ReportStatus.PENDING, report_id)
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.return_value = status_result
+
+    async def get_db():
+        yield db
+
+    async def never_admitted(ticket):
+        await asyncio.sleep(10)
+
+    with patch("app.services.analysis.task_scheduler.get_async_db", get_db), patch(
+        "app.services.analysis.task_scheduler.FairShareScheduler.wait_for_turn", never_admitted
+    ), patch(
+        "app.services.analysis.task_scheduler.transition_analysis_status", AsyncMock(return_value=report_id)
+    ) as mock_transition, patch.object(
+        ResourceAnalysisTaskScheduler, "_check_and_update_report_status", AsyncMock()
+    ) as mock_check, patch.object(
+        ResourceAnalysisTaskScheduler, "_run_analysis", AsyncMock()
+    ) as mock_run:
+        await ResourceAnalysisTaskScheduler.schedule_analysis(analysis_id, team_id=uuid.uuid4())
+        task = ResourceAnalysisTaskScheduler._tasks[str(analysis_id)]
+        await asyncio.sleep(0)
+
+        assert ResourceAnalysisTaskScheduler.cancel_task(analysis_id) is True
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    mock_run.assert_not_called()
+    mock_transition.assert_called_once_with(
+        db, analysis_id, ReportStatus.FAILED, results={"error": "Analysis was cancelled"}
+    )
+    db.commit.assert_called_once()
+    mock_check.assert_called_once_with(db, report_id)
+    ResourceAnalysisTaskScheduler._tasks.clear()
+
+
 @pytest.mark.asyncio
 async def test_get_task_status_running():
     """Test getting task status for running task."""
@@ -238,3 +345,53 @@ async def test_get_all_running_tasks():
     finally:
         # Cleanup
         ResourceAnalysisTaskScheduler._tasks.clear()
+
+
+@pytest.mark.asyncio
+async def test_check_and_update_report_status_uses_counters():
+    """Test that the report status check reads the counters instead of aggregating."""
+    report_id = uuid.uuid4()
+    db = AsyncMock(spec=AsyncSession)
+
+    counters = {
+        "total_resources": 3,
+        "pending_analyses": 0,
+        "in_progress_analyses": 0,
+        "completed_analyses": 3,
+        "failed_analyses": 0,
+    }
+
+    with patch(
+        "app.services.analysis.task_scheduler.get_report_counters",
+        AsyncMock(return_value=counters),
+    ) as mock_counters:
+        await ResourceAnalysisTaskScheduler._check_and_update_report_status(db, report_id)
+
+    mock_counters.assert_called_once_with(db, report_id)
+    # Only the report status update is executed
+    assert db.execute.call_count == 1
+    assert "crossresourcereport" in str(db.execute.call_args.args[0])
+    db.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_check_and_update_report_status_pending():
+    """Test that a report with pending analyses is left alone."""
+    db = AsyncMock(spec=AsyncSession)
+
+    counters = {
+        "total_resources": 3,
+        "pending_analyses": 1,
+        "in_progress_analyses": 1,
+        "completed_analyses": 1,
+        "failed_analyses": 0,
+    }
+
+    with patch(
+        "app.services.analysis.task_scheduler.get_report_counters",
+        AsyncMock(return_value=counters),
+    ):
+        await ResourceAnalysisTaskScheduler._check_and_update_report_status(db, uuid.uuid4())
+
+    db.execute.assert_not_called()
+    db.commit.assert_not_called()
@@ -0,0 +1,134 @@
+"""
+Tests for the integration credential cache.
+"""
+
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.integration import CredentialType, Integration, IntegrationCredential
+from app.models.slack import SlackWorkspace
+from app.services.analysis.slack_channel import SlackChannelAnalysisService
+from app.services.integration.base import IntegrationService
+from app.services.integration.credentials import IntegrationCredentialCache
+from app.services.integration.slack import SlackIntegrationService
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start each test with an empty cache."""
+    IntegrationCredentialCache.clear()
+    yield
+    IntegrationCredentialCache.clear()
+
+
+def _token_session(*tokens):
+    """Build a mocked session whose credential queries return the given tokens in turn."""
+    results = []
+    for token in tokens:
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = IntegrationCredential(
+            credential_type=CredentialType.OAUTH_TOKEN, encrypted_value=token
+        )
+        results.append(result)
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = results
+    return db
+
+
+@pytest.mark.asyncio
+async def test_token_is_loaded_once_until_invalidated():
+    """Test that repeated token lookups are served from the cache until the credentials change."""
+    integration_id = uuid.uuid4()
+    db = _token_session("xoxb-old", "xoxb-new")
+
+    assert await SlackIntegrationService.get_token(db, integration_id) == "xoxb-old"
+    assert await SlackIntegrationService.get_token(db, integration_id) == "xoxb-old"
+    assert db.execute.call_count == 1
+
+    IntegrationCredentialCache.invalidate(integration_id)
+
+    assert await SlackIntegrationService.get_token(db, integration_id) == "xoxb-new"
+    assert db.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_tokens_expire():
+    """Test that a cached token is looked up again after the TTL."""
+    integration_id = uuid.uuid4()
+    db = _token_session("xoxb-1", "xoxb-2")
+
+    with patch("app.services.integration.credentials.time.monotonic", return_value=100.0):
+        await SlackIntegrationService.get_token(db, integration_id)
+    with patch("app.services.integration.credentials.time.monotonic", return_value=161.0):
+        assert await SlackIntegrationService.get_token(db, integration_id) == "xoxb-2"
+
+
+@pytest.mark.asyncio
+async def test_status_change_invalidates():
+    """Test that changing an integration's status, e.g. revoking it, drops its cached token."""
+    integration = Integration(id=uuid.uuid4(), name="Slack", integration_metadata={})
+    IntegrationCredentialCache._entries[(str(integration.id), "token")] = ("xoxb-token", float("inf"))
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = integration
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.return_value = result
+    db.add = MagicMock()
+
+    await IntegrationService.update_integration(db, integration.id, "user-1", {"status": "revoked"})
+
+    assert IntegrationCredentialCache.get(integration.id, "token") is None
+
+
+@pytest.mark.asyncio
+async def test_report_channels_share_one_workspace_lookup():
+    """Test that concurrent channel loads of one integration look its workspace up once."""
+    integration_id = uuid.uuid4()
+    release = asyncio.Event()
+    lookups = 0
+
+    async def lookup(self, integration_id):
+        nonlocal lookups
+        lookups += 1
+        await release.wait()
+        return {"workspace_id": "w1", "integration_name": "Slack"}
+
+    service = SlackChannelAnalysisService(AsyncMock(spec=AsyncSession), llm_client=MagicMock())
+    with patch.object(SlackChannelAnalysisService, "_get_integration_workspace", lookup):
+        tasks = [
+            asyncio.create_task(
+                IntegrationCredentialCache.get_or_load(
+                    integration_id, "slack_workspace", lambda: service._get_integration_workspace(integration_id)
+                )
+            )
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+    assert lookups == 1
+    assert all(result["workspace_id"] == "w1" for result in results)
+    assert IntegrationCredentialCache.get_metrics()["coalesced_loads"] == 4
+
+
+@pytest.mark.asyncio
+async def test_workspace_lookup_queries_integration_and_workspace():
+    """Test that the workspace lookup resolves the integration's Slack ID to the SlackWorkspace ID."""
+    workspace_id = uuid.uuid4()
+    integration_result = MagicMock()
+    integration_result.scalar_one_or_none.return_value = Integration(
+        id=uuid.uuid4(), name="Acme Slack", workspace_id="T123"
+    )
+    workspace_result = MagicMock()
+    workspace_result.scalar_one_or_none.return_value = SlackWorkspace(id=workspace_id, slack_id="T123")
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [integration_result, workspace_result]
+
+    service = SlackChannelAnalysisService(db, llm_client=MagicMock())
+    workspace = await service._get_integration_workspace(uuid.uuid4())
+
+    assert workspace == {"workspace_id": str(workspace_id), "integration_name": "Acme Slack"}
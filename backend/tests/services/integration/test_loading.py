@@ -0,0 +1,110 @@
+"""
+Tests for how much the integration service loads per query.
+"""
+
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.integration.router import prepare_integration_response
+from app.models.integration import Integration, IntegrationStatus, IntegrationType
+from app.services.integration.base import RESPONSE_RELATIONSHIPS, IntegrationService
+
+
+def _db(result=None):
+    """Create a mock session whose queries return a single result."""
+    execute_result = MagicMock()
+    execute_result.scalar_one_or_none.return_value = result
+    execute_result.scalars.return_value.all.return_value = []
+    db = AsyncMock()
+    db.execute = AsyncMock(return_value=execute_result)
+    return db
+
+
+def _statement(db):
+    """Get the statement of the only db.execute call."""
+    assert db.execute.await_count == 1
+    return db.execute.call_args.args[0]
+
+
+def _sql(statement):
+    """Compile a statement to PostgreSQL SQL."""
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_get_integration_checks_access_in_one_query():
+    """Test that the access check is a single query that loads no relationships by default."""
+    db = _db()
+
+    await IntegrationService.get_integration(db, uuid.uuid4(), "user123")
+
+    statement = _statement(db)
+    sql = _sql(statement)
+    assert "teammember.user_id" in sql
+    assert "EXISTS" in sql and "integration_share.status" in sql
+    assert not statement._with_options
+
+
+@pytest.mark.asyncio
+async def test_get_integration_loads_requested_relationships():
+    """Test that only the requested relationships are loaded, and never the event log."""
+    db = _db()
+
+    await IntegrationService.get_integration(db, uuid.uuid4(), "user123", relationships=("resources",))
+    loaded = [str(option.path) for option in _statement(db)._with_options]
+    assert len(loaded) == 1 and "resources" in loaded[0]
+
+    db = _db()
+    await IntegrationService.get_integration(db, uuid.uuid4(), "user123", relationships=RESPONSE_RELATIONSHIPS)
+    loaded = " ".join(str(option.path) for option in _statement(db)._with_options)
+    assert "events" not in loaded
+
+
+@pytest.mark.asyncio
+async def test_get_integration_resources_paginates_in_index_order():
+    """Test that resources are paged in the order of their unique index."""
+    db = _db()
+
+    await IntegrationService.get_integration_resources(db, uuid.uuid4(), limit=100, offset=200)
+
+    sql = _sql(_statement(db))
+    assert "ORDER BY serviceresource.resource_type, serviceresource.external_id" in sql
+    assert "LIMIT" in sql and "OFFSET" in sql
+
+
+@pytest.mark.asyncio
+async def test_get_integration_resources_returns_all_without_limit():
+    """Test that resources are not limited unless a limit is given."""
+    db = _db()
+
+    await IntegrationService.get_integration_resources(db, uuid.uuid4())
+
+    sql = _sql(_statement(db))
+    assert "LIMIT" not in sql and "OFFSET" not in sql
+
+
+def test_response_skips_unloaded_relationships():
+    """Test that a response is built from an integration loaded without relationships."""
+    integration = Integration(
+        id=uuid.uuid4(),
+        name="Test Slack",
+        service_type=IntegrationType.SLACK,
+        status=IntegrationStatus.ACTIVE,
+        integration_metadata={},
+        owner_team_id=uuid.uuid4(),
+        created_by_user_id="user123",
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow(),
+    )
+    # Simulate a persistent instance whose relationships were not loaded
+    for name in RESPONSE_RELATIONSHIPS:
+        integration.__dict__.pop(name, None)
+
+    response = prepare_integration_response(integration)
+
+    assert response.owner_team.id == integration.owner_team_id
+    assert response.resources == [] and response.credentials == [] and response.shared_with == []
@@ -414,3 +414,101 @@ async def test_analyze_channel_messages_with_datetime(
     # Check that the dates were properly formatted in the prompt
     assert "2023-05-01" in user_prompt
     assert "2023-05-31" in user_prompt
+
+
+@pytest.mark.asyncio
+async def test_analyze_channel_messages_within_budget(mock_openrouter_service, mock_messages_data):
+    """Test that the running analysis' budget caps the completion and records usage."""
+    from app.services.analysis.budget import AnalysisBudget, reset_current_budget, set_current_budget
+
+    response = {
+        "model": "anthropic/claude-3-sonnet:20240229",
+        "choices": [{"message": {"role": "assistant", "content": "CHANNEL SUMMARY: Busy channel"}}],
+        "usage": {"prompt_tokens": 900, "completion_tokens": 100, "total_tokens": 1000},
+    }
+    mock_post = AsyncMock(
+        return_value=MagicMock(
+            status_code=200,
+            raise_for_status=MagicMock(),
+            json=MagicMock(return_value=response),
+        )
+    )
+
+    budget = AnalysisBudget(max_tokens=3000)
+    token = set_current_budget(budget)
+    try:
+        with patch("httpx.AsyncClient") as mock_client:
+            mock_client.return_value.__aenter__.return_value.post = mock_post
+
+            await mock_openrouter_service.analyze_channel_messages(
+                channel_name="general",
+                messages_data=mock_messages_data,
+                start_date="2023-05-01T00:00:00Z",
+                end_date="2023-05-31T23:59:59Z",
+            )
+    finally:
+        reset_current_budget(token)
+
+    # The completion may only use what the prompt leaves of the budget
+    assert mock_post.call_args[1]["json"]["max_tokens"] < 3000
+    assert budget.tokens_used == 1000
+
+
+@pytest.mark.asyncio
+async def test_analyze_channel_messages_over_budget(mock_openrouter_service, mock_messages_data):
+    """Test that no request is sent when the prompt does not fit in the budget."""
+    from app.services.analysis.budget import (
+        AnalysisBudget,
+        BudgetExceededError,
+        reset_current_budget,
+        set_current_budget,
+    )
+
+    mock_post = AsyncMock()
+    token = set_current_budget(AnalysisBudget(max_tokens=10))
+    try:
+        with patch("httpx.AsyncClient") as mock_client:
+            mock_client.return_value.__aenter__.return_value.post = mock_post
+
+            with pytest.raises(BudgetExceededError):
+                await mock_openrouter_service.analyze_channel_messages(
+                    channel_name="general",
+                    messages_data=mock_messages_data,
+                    start_date="2023-05-01T00:00:00Z",
+                    end_date="2023-05-31T23:59:59Z",
+                )
+    finally:
+        reset_current_budget(token)
+
+    mock_post.assert_not_called()
+
+
+def test_parse_analysis_response_repairs_fenced_json():
+    """Test that fenced JSON with control characters is parsed into sections."""
+    from app.services.llm.openrouter import parse_analysis_response
+
+    llm_response = (
+        "```json\n"
+        '{"channel_summary": "Summary\x07", "topic_analysis": "Topics",'
+        ' "contributor_insights": "Insights", "key_highlights": "Highlights"}\n'
+        "```"
+    )
+
+    sections = parse_analysis_response(llm_response, use_json_mode=True)
+
+    assert sections == {
+        "channel_summary": "Summary",
+        "topic_analysis": "Topics",
+        "contributor_insights": "Insights",
+        "key_highlights": "Highlights",
+    }
+
+
+def test_parse_analysis_response_text_fallback():
+    """Test that a text response falls back to section extraction."""
+    from app.services.llm.openrouter import parse_analysis_response
+
+    sections = parse_analysis_response("CHANNEL SUMMARY: A summary.\n\nTOPIC ANALYSIS: Topics.", use_json_mode=False)
+
+    assert sections["channel_summary"] == "A summary."
+    assert sections["topic_analysis"] == "Topics."
@@ -0,0 +1,130 @@
+"""Tests for the denormalised report counters."""
+
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.reports import (
+    AnalysisResourceType,
+    CrossResourceReport,
+    ReportStatus,
+    ResourceAnalysis,
+)
+from app.services.reports.counters import (
+    add_analyses_to_report,
+    get_report_counters,
+    transition_analysis_status,
+)
+
+
+def _make_analysis(report_id, status, resource_type=AnalysisResourceType.SLACK_CHANNEL):
+    """Create an in-memory ResourceAnalysis for the given report."""
+    return ResourceAnalysis(
+        id=uuid.uuid4(),
+        cross_resource_report_id=report_id,
+        integration_id=uuid.uuid4(),
+        resource_id=uuid.uuid4(),
+        resource_type=resource_type,
+        status=status,
+        period_start=datetime.utcnow() - timedelta(days=7),
+        period_end=datetime.utcnow(),
+    )
+
+
+def test_add_analyses_to_report():
+    """Test counting new analyses on a report being created."""
+    report = CrossResourceReport(id=uuid.uuid4(), title="Test")
+    analyses = [
+        _make_analysis(report.id, ReportStatus.PENDING),
+        _make_analysis(report.id, ReportStatus.PENDING),
+        _make_analysis(report.id, ReportStatus.COMPLETED, AnalysisResourceType.GITHUB_REPO),
+    ]
+
+    add_analyses_to_report(report, analyses)
+
+    assert report.total_resources == 3
+    assert report.pending_analyses == 2
+    assert report.completed_analyses == 1
+    assert report.in_progress_analyses == 0
+    assert report.failed_analyses == 0
+    assert report.resource_types == ["SLACK_CHANNEL", "GITHUB_REPO"]
+
+
+def test_add_no_analyses_initialises_counters():
+    """Test that a report without analyses gets zeroed counters."""
+    report = CrossResourceReport(id=uuid.uuid4(), title="Empty")
+
+    add_analyses_to_report(report, [])
+
+    assert report.total_resources == 0
+    assert report.pending_analyses == 0
+    assert report.resource_types == []
+
+
+@pytest.mark.asyncio
+async def test_transition_adjusts_counters():
+    """Test that a status change moves one count between report columns."""
+    db = AsyncMock(spec=AsyncSession)
+    report_id = uuid.uuid4()
+    mock_result = MagicMock()
+    mock_result.one_or_none.return_value = (ReportStatus.IN_PROGRESS, report_id)
+    db.execute.return_value = mock_result
+
+    result = await transition_analysis_status(db, uuid.uuid4(), ReportStatus.COMPLETED)
+
+    assert result == report_id
+    # Locking select, analysis update and report counter update
+    assert db.execute.call_count == 3
+    counter_update = str(db.execute.call_args_list[2].args[0])
+    assert "in_progress_analyses" in counter_update
+    assert "completed_analyses" in counter_update
+
+
+@pytest.mark.asyncio
+async def test_transition_same_status_leaves_counters():
+    """Test that re-applying the current status does not touch the report."""
+    db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.one_or_none.return_value = (ReportStatus.PENDING, uuid.uuid4())
+    db.execute.return_value = mock_result
+
+    await transition_analysis_status(db, uuid.uuid4(), ReportStatus.PENDING)
+
+    # Locking select and analysis update only
+    assert db.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_transition_missing_analysis():
+    """Test transitioning an analysis that does not exist."""
+    db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.one_or_none.return_value = None
+    db.execute.return_value = mock_result
+
+    result = await transition_analysis_status(db, uuid.uuid4(), ReportStatus.COMPLETED)
+
+    assert result is None
+    assert db.execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_report_counters():
+    """Test reading the counters of a report."""
+    db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.one_or_none.return_value = (4, 1, None, 2, 1)
+    db.execute.return_value = mock_result
+
+    counters = await get_report_counters(db, uuid.uuid4())
+
+    assert counters == {
+        "total_resources": 4,
+        "pending_analyses": 1,
+        "in_progress_analyses": 0,
+        "completed_analyses": 2,
+        "failed_analyses": 1,
+    }
@@ -0,0 +1,268 @@
+"""Tests for recurring report scheduling."""
+
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.reports import (
+    AnalysisType,
+    CrossResourceReport,
+    ReportFrequency,
+    ReportSchedule,
+    ReportStatus,
+    ResourceAnalysis,
+)
+from app.services.reports.scheduled_reports import (
+    compute_next_run,
+    get_report_period,
+    get_window_offset,
+    materialize_schedule,
+    process_report_schedules,
+)
+
+
+def test_window_offset_is_stable_and_inside_window():
+    """Test that each schedule gets a fixed offset inside the off-peak window."""
+    window = timedelta(hours=settings.REPORT_SCHEDULE_WINDOW_HOURS)
+    schedule_ids = [uuid.uuid4() for _ in range(50)]
+    offsets = [get_window_offset(schedule_id) for schedule_id in schedule_ids]
+
+    assert all(timedelta(0) <= offset < window for offset in offsets)
+    assert offsets == [get_window_offset(schedule_id) for schedule_id in schedule_ids]
+    # Schedules are spread out rather than all starting together
+    assert len(set(offsets)) > 1
+
+
+def test_compute_next_run_weekly():
+    """Test that weekly runs land on the next Monday inside the window."""
+    schedule_id = uuid.uuid4()
+    # Wednesday
+    after = datetime(2025, 5, 7, 15, 30)
+
+    next_run = compute_next_run(schedule_id, ReportFrequency.WEEKLY, after)
+
+    window_start = datetime(2025, 5, 12, settings.REPORT_SCHEDULE_WINDOW_START_HOUR)
+    assert next_run == window_start + get_window_offset(schedule_id)
+    assert next_run.weekday() == 0
+
+
+def test_compute_next_run_skips_current_slot():
+    """Test that a run time equal to 'after' moves on to the following period."""
+    schedule_id = uuid.uuid4()
+    run_at = compute_next_run(schedule_id, ReportFrequency.WEEKLY, datetime(2025, 5, 7))
+
+    assert compute_next_run(schedule_id, ReportFrequency.WEEKLY, run_at) == run_at + timedelta(days=7)
+
+
+def test_compute_next_run_monthly_rolls_over_year():
+    """Test that monthly runs land on the 1st, including across a year end."""
+    schedule_id = uuid.uuid4()
+
+    next_run = compute_next_run(schedule_id, ReportFrequency.MONTHLY, datetime(2025, 12, 15))
+
+    assert (next_run.year, next_run.month, next_run.day) == (2026, 1, 1)
+
+
+def test_get_report_period():
+    """Test that runs cover the week or calendar month that just ended."""
+    weekly_start, weekly_end = get_report_period(ReportFrequency.WEEKLY, datetime(2025, 5, 12, 3, 12))
+    assert weekly_start == datetime(2025, 5, 5)
+    assert weekly_end == datetime(2025, 5, 12)
+
+    monthly_start, monthly_end = get_report_period(ReportFrequency.MONTHLY, datetime(2025, 3, 1, 2, 0))
+    assert monthly_start == datetime(2025, 2, 1)
+    assert monthly_end == datetime(2025, 3, 1)
+
+
+def _make_schedule(next_run_at, channel_count=2):
+    """Create an in-memory ReportSchedule."""
+    return ReportSchedule(
+        id=uuid.uuid4(),
+        team_id=uuid.uuid4(),
+        frequency=ReportFrequency.WEEKLY,
+        channels=[
+            {"id": str(uuid.uuid4()), "name": f"channel-{i}", "integration_id": str(uuid.uuid4())}
+            for i in range(channel_count)
+        ],
+        analysis_type=AnalysisType.CONTRIBUTION,
+        include_threads=True,
+        include_reactions=True,
+        next_run_at=next_run_at,
+    )
+
+
+@pytest.mark.asyncio
+async def test_materialize_schedule():
+    """Test that a due schedule becomes a report with one analysis per channel."""
+    schedule = _make_schedule(None)
+    schedule.next_run_at = compute_next_run(schedule.id, ReportFrequency.WEEKLY, datetime(2025, 5, 11))
+    now = schedule.next_run_at + timedelta(minutes=1)
+
+    db = AsyncMock(spec=AsyncSession)
+    db.add = MagicMock()
+    stats = {"message_count": 10, "participant_count": 3, "thread_count": 2, "reaction_count": 5}
+
+    with patch(
+        "app.services.reports.scheduled_reports.get_channel_message_stats",
+        AsyncMock(return_value=stats),
+    ):
+        report = await materialize_schedule(db, schedule, now)
+
+    added = [call.args[0] for call in db.add.call_args_list]
+    analyses = [obj for obj in added if isinstance(obj, ResourceAnalysis)]
+
+    assert isinstance(added[0], CrossResourceReport)
+    assert report.date_range_start == datetime(2025, 5, 5)
+    assert report.date_range_end == datetime(2025, 5, 12)
+    assert report.report_parameters["schedule_id"] == str(schedule.id)
+    assert len(analyses) == 2
+    assert all(analysis.status == ReportStatus.PENDING for analysis in analyses)
+    assert report.total_resources == 2
+    assert report.pending_analyses == 2
+
+    # The schedule moves on to the next week
+    assert schedule.last_report_id == report.id
+    assert schedule.last_run_at == now
+    assert schedule.next_run_at > now
+    assert schedule.next_run_at.date() == datetime(2025, 5, 19).date()
+    db.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_process_report_schedules_runs_due_schedules():
+    """Test that due schedules are materialised and their analyses queued."""
+    now = datetime(2025, 5, 12, 3, 0)
+    schedule = _make_schedule(datetime(2025, 5, 12, 2, 0), channel_count=1)
+    report = CrossResourceReport(id=uuid.uuid4(), title="Weekly")
+
+    upcoming_result = MagicMock()
+    upcoming_result.scalars.return_value.all.return_value = []
+    due_result = MagicMock()
+    due_result.scalars.return_value.all.return_value = [schedule.id]
+    locked_result = MagicMock()
+    locked_result.scalar_one_or_none.return_value = schedule
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [upcoming_result, due_result, locked_result]
+
+    with patch(
+        "app.services.reports.scheduled_reports.materialize_schedule",
+        AsyncMock(return_value=report),
+    ) as mock_materialize, patch(
+        "app.services.analysis.task_scheduler.ResourceAnalysisTaskScheduler.schedule_analyses_for_report",
+        AsyncMock(return_value=1),
+    ) as mock_schedule:
+        stats = await process_report_schedules(db, now=now)
+
+    assert stats == {"presynced": 0, "reports_created": 1}
+    mock_materialize.assert_called_once_with(db, schedule, now)
+    mock_schedule.assert_called_once_with(report_id=report.id, db=db)
+
+
+@pytest.mark.asyncio
+async def test_process_report_schedules_presyncs_after_period_end():
+    """Test that channels are pre-synced once the period is over, and only once."""
+    lead = timedelta(hours=settings.REPORT_SCHEDULE_PRESYNC_LEAD_HOURS)
+    next_run_at = datetime(2025, 5, 12, 4, 0)
+    schedule = _make_schedule(next_run_at)
+    now = next_run_at - lead + timedelta(minutes=1)
+
+    upcoming_result = MagicMock()
+    upcoming_result.scalars.return_value.all.return_value = [schedule.id]
+    claimed_result = MagicMock()
+    claimed_result.scalar_one_or_none.return_value = schedule
+    due_result = MagicMock()
+    due_result.scalars.return_value.all.return_value = []
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [upcoming_result, claimed_result, due_result]
+
+    with patch(
+        "app.services.reports.scheduled_reports.presync_schedule_channels",
+        AsyncMock(return_value=2),
+    ) as mock_presync:
+        stats = await process_report_schedules(db, now=now)
+
+    assert stats["presynced"] == 1
+    mock_presync.assert_called_once_with(db, schedule, now)
+    # The claim is committed before the channels are synced
+    assert schedule.last_presync_at == now
+    db.commit.assert_called_once()
+
+    # Already pre-synced for this run: nothing to do on the next pass
+    db.execute.side_effect = [upcoming_result, claimed_result, due_result]
+    with patch(
+        "app.services.reports.scheduled_reports.presync_schedule_channels",
+        AsyncMock(return_value=2),
+    ) as mock_presync:
+        stats = await process_report_schedules(db, now=now + timedelta(minutes=5))
+
+    db.rollback.assert_called_once()
+    assert stats["presynced"] == 0
+    mock_presync.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_process_report_schedules_skips_presync_claimed_elsewhere():
+    """Test that a schedule locked by another worker is not pre-synced twice."""
+    lead = timedelta(hours=settings.REPORT_SCHEDULE_PRESYNC_LEAD_HOURS)
+    schedule = _make_schedule(datetime(2025, 5, 12, 4, 0))
+    now = schedule.next_run_at - lead + timedelta(minutes=1)
+
+    upcoming_result = MagicMock()
+    upcoming_result.scalars.return_value.all.return_value = [schedule.id]
+    locked_result = MagicMock()
+    locked_result.scalar_one_or_none.return_value = None
+    due_result = MagicMock()
+    due_result.scalars.return_value.all.return_value = []
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [upcoming_result, locked_result, due_result]
+
+    with patch(
+        "app.services.reports.scheduled_reports.presync_schedule_channels",
+        AsyncMock(return_value=2),
+    ) as mock_presync:
+        stats = await process_report_schedules(db, now=now)
+
+    assert stats["presynced"] == 0
+    mock_presync.assert_not_called()
+    db.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_schedule_without_valid_channels_fails_its_report():
+    """Test that a run with no valid channel creates a FAILED report and queues nothing."""
+    now = datetime(2025, 5, 12, 3, 0)
+    schedule = _make_schedule(datetime(2025, 5, 12, 2, 0), channel_count=1)
+    schedule.channels = [{"id": "not-a-uuid", "name": "broken"}]
+
+    due_result = MagicMock()
+    due_result.scalars.return_value.all.return_value = [schedule.id]
+    locked_result = MagicMock()
+    locked_result.scalar_one_or_none.return_value = schedule
+    upcoming_result = MagicMock()
+    upcoming_result.scalars.return_value.all.return_value = []
+
+    db = AsyncMock(spec=AsyncSession)
+    db.add = MagicMock()
+    db.execute.side_effect = [upcoming_result, due_result, locked_result]
+
+    with patch(
+        "app.services.analysis.task_scheduler.ResourceAnalysisTaskScheduler.schedule_analyses_for_report",
+        AsyncMock(return_value=0),
+    ) as mock_schedule:
+        stats = await process_report_schedules(db, now=now)
+
+    report = db.add.call_args_list[0].args[0]
+    assert stats["reports_created"] == 1
+    assert report.status == ReportStatus.FAILED
+    assert report.total_resources == 0
+    assert report.report_parameters["error"] == "No valid channels to analyze"
+    assert schedule.last_report_id == report.id
+    assert schedule.next_run_at > now
+    mock_schedule.assert_not_called()
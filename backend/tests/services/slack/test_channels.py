@@ -8,6 +8,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.slack import SlackChannel, SlackWorkspace
@@ -349,3 +350,42 @@ async def test_select_channels_for_analysis_with_bot_install(mock_db_session, mo
         # Verify the db operations
         assert mock_db_session.execute.call_count == 5  # Including all_channels query for debugging
         assert mock_db_session.commit.called
+
+
+@pytest.mark.asyncio
+async def test_get_channel_states_uses_one_keyed_query(mock_db_session):
+    """Test that the state of all requested channels comes from one query keyed by Slack ID."""
+    result = MagicMock()
+    result.all.return_value = [("C1", True, False), ("C2", False, True)]
+    mock_db_session.execute = AsyncMock(return_value=result)
+
+    states = await ChannelService.get_channel_states(mock_db_session, uuid.uuid4(), ["C1", "C2", "C3", "C1"])
+
+    assert states == {"C1": (True, False), "C2": (False, True)}
+    assert mock_db_session.execute.await_count == 1
+    sql = str(mock_db_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "slackchannel.workspace_id = " in sql and "slackchannel.slack_id IN" in sql
+
+
+@pytest.mark.asyncio
+async def test_get_channel_states_skips_query_without_channels(mock_db_session):
+    """Test that no query is made when there are no channels to look up."""
+    assert await ChannelService.get_channel_states(mock_db_session, uuid.uuid4(), []) == {}
+    mock_db_session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_channels_from_resources_is_one_insert(mock_db_session):
+    """Test that missing channels are created by a single INSERT ... SELECT that skips existing ones."""
+    result = MagicMock()
+    result.rowcount = 3
+    mock_db_session.execute = AsyncMock(return_value=result)
+
+    created = await ChannelService.create_channels_from_resources(mock_db_session, uuid.uuid4(), uuid.uuid4())
+
+    assert created == 3
+    assert mock_db_session.execute.await_count == 1
+    sql = str(mock_db_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO slackchannel")
+    assert "FROM serviceresource" in sql
+    assert sql.rstrip().endswith("ON CONFLICT DO NOTHING")
@@ -2,17 +2,19 @@
 Tests for the SlackMessageService.
 """
 
+import uuid
 from datetime import datetime, timedelta
 from typing import Any, Dict, List
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.slack import SlackChannel, SlackMessage, SlackUser, SlackWorkspace
 from app.services.slack.api import SlackApiError, SlackApiRateLimitError
-from app.services.slack.messages import SlackMessageService
+from app.services.slack.messages import SlackMessageService, decode_message_cursor, encode_message_cursor
 
 
 @pytest.fixture
@@ -514,3 +516,188 @@ async def test_sync_channel_messages(mock_workspace, mock_channel, mock_message_
     assert result["channel_id"] == str(mock_channel.id)
     assert result["processed_count"] == 6  # 3 messages in each of 2 batches
     assert "elapsed_time" in result
+
+
+def _make_messages(count, channel_id):
+    """Create in-memory messages, newest first."""
+    now = datetime(2025, 5, 1, 12, 0)
+    return [
+        SlackMessage(
+            id=uuid.uuid4(),
+            channel_id=channel_id,
+            slack_id=f"msg{i}",
+            slack_ts=f"{1746100000 - i}.000000",
+            text=f"message {i}",
+            message_datetime=now - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def _scalars_result(items):
+    """Create a mock result whose scalars() return the given items."""
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = items[0] if items else None
+    result.scalars.return_value.all.return_value = items
+    return result
+
+
+def _sql(statement):
+    """Compile a statement to PostgreSQL SQL."""
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the sort key of the message it was made from."""
+    message = _make_messages(1, uuid.uuid4())[0]
+
+    cursor = encode_message_cursor(message)
+
+    assert decode_message_cursor(cursor) == (message.message_datetime, message.id)
+
+
+def test_decode_cursor_ignores_slack_cursors():
+    """Test that Slack API cursors are not treated as keyset cursors."""
+    assert decode_message_cursor(None) is None
+    assert decode_message_cursor("bmV4dF90czoxNTEyMDg1ODYxMDAwNTQz") is None
+
+
+def test_decode_cursor_rejects_malformed_cursors():
+    """Test that a tampered keyset cursor is rejected."""
+    with pytest.raises(HTTPException) as excinfo:
+        decode_message_cursor("k.not-a-cursor")
+
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_messages_by_date_range_keyset_page():
+    """Test that a cursor page uses a keyset predicate, no OFFSET and no COUNT."""
+    workspace_id = str(uuid.uuid4())
+    channel_id = uuid.uuid4()
+    messages = _make_messages(4, channel_id)
+    previous = _make_messages(1, channel_id)[0]
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [
+        _scalars_result([SlackWorkspace(id=workspace_id)]),
+        _scalars_result([SlackChannel(id=channel_id)]),
+        _scalars_result(messages),
+    ]
+
+    result = await SlackMessageService.get_messages_by_date_range(
+        db=db,
+        workspace_id=workspace_id,
+        channel_ids=[str(channel_id)],
+        start_date=datetime(2025, 4, 1),
+        end_date=datetime(2025, 5, 2),
+        page_size=3,
+        cursor=encode_message_cursor(previous),
+        include_total=False,
+    )
+
+    assert db.execute.call_count == 3
+    page_sql = _sql(db.execute.call_args_list[2].args[0])
+    assert "(slackmessage.message_datetime, slackmessage.id) <" in page_sql
+    assert "OFFSET" not in page_sql
+
+    pagination = result["pagination"]
+    assert len(result["messages"]) == 3
+    assert pagination["has_next"] is True
+    assert pagination["has_prev"] is True
+    assert pagination["total_items"] is None
+    assert decode_message_cursor(pagination["next_cursor"]) == (messages[2].message_datetime, messages[2].id)
+
+
+@pytest.mark.asyncio
+async def test_get_messages_by_date_range_with_total():
+    """Test that page-number requests still report totals."""
+    workspace_id = str(uuid.uuid4())
+    channel_id = uuid.uuid4()
+    count_result = MagicMock()
+    count_result.scalar.return_value = 2
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [
+        _scalars_result([SlackWorkspace(id=workspace_id)]),
+        _scalars_result([SlackChannel(id=channel_id)]),
+        _scalars_result(_make_messages(2, channel_id)),
+        count_result,
+    ]
+
+    result = await SlackMessageService.get_messages_by_date_range(
+        db=db,
+        workspace_id=workspace_id,
+        channel_ids=[str(channel_id)],
+        start_date=datetime(2025, 4, 1),
+        end_date=datetime(2025, 5, 2),
+        page_size=3,
+    )
+
+    pagination = result["pagination"]
+    assert pagination["total_items"] == 2
+    assert pagination["total_pages"] == 1
+    assert pagination["has_next"] is False
+    assert pagination["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_channel_messages_keyset_page_skips_slack_api():
+    """Test that a keyset cursor pages the database without calling Slack."""
+    workspace_id = str(uuid.uuid4())
+    channel_id = uuid.uuid4()
+    messages = _make_messages(3, channel_id)
+    previous = _make_messages(1, channel_id)[0]
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [
+        _scalars_result([SlackWorkspace(id=workspace_id, access_token="xoxb-test")]),
+        _scalars_result([SlackChannel(id=channel_id, slack_id="C123")]),
+        _scalars_result(messages),
+    ]
+
+    with patch.object(SlackMessageService, "_fetch_messages_from_api", AsyncMock()) as mock_fetch:
+        result = await SlackMessageService.get_channel_messages(
+            db=db,
+            workspace_id=workspace_id,
+            channel_id=str(channel_id),
+            limit=2,
+            cursor=encode_message_cursor(previous),
+        )
+
+    mock_fetch.assert_not_called()
+    assert len(result["messages"]) == 2
+    assert result["pagination"]["has_more"] is True
+    assert decode_message_cursor(result["pagination"]["next_cursor"])[1] == messages[1].id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("include_content", [False, True])
+async def test_get_messages_by_date_range_defers_content(include_content):
+    """Test that attachments, files and analysis data are only loaded and returned on request."""
+    workspace_id = str(uuid.uuid4())
+    channel_id = uuid.uuid4()
+    messages = _make_messages(1, channel_id)
+    messages[0].attachments = [{"title": "attachment"}]
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = [
+        _scalars_result([SlackWorkspace(id=workspace_id)]),
+        _scalars_result([SlackChannel(id=channel_id)]),
+        _scalars_result(messages),
+    ]
+
+    result = await SlackMessageService.get_messages_by_date_range(
+        db=db,
+        workspace_id=workspace_id,
+        channel_ids=[str(channel_id)],
+        start_date=datetime(2025, 4, 1),
+        end_date=datetime(2025, 5, 2),
+        include_total=False,
+        include_content=include_content,
+    )
+
+    page_sql = _sql(db.execute.call_args_list[2].args[0])
+    for column in ("attachments", "files", "analysis_data"):
+        assert (f"slackmessage.{column}" in page_sql) is include_content
+    assert ("attachments" in result["messages"][0]) is include_content
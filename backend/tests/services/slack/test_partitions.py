@@ -0,0 +1,176 @@
+"""
+Tests for the monthly slackmessage partitions.
+"""
+
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.slack.partitions import (
+    add_months,
+    create_partition_sql,
+    drop_expired_message_partitions,
+    ensure_message_partitions,
+    ensure_partitions_for_days,
+    maintain_message_partitions,
+    month_start,
+    move_default_partition_rows,
+    partition_month,
+    partition_name,
+)
+
+
+def _partitions_result(names):
+    """Create a result mock listing partition names."""
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = names
+    return result
+
+
+def _statements(db):
+    """Get the SQL text of every db.execute call."""
+    return [str(call.args[0]) for call in db.execute.call_args_list]
+
+
+def test_month_arithmetic():
+    """Test month arithmetic across year boundaries."""
+    assert month_start(date(2025, 5, 17)) == date(2025, 5, 1)
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+
+def test_partition_names():
+    """Test that partition names and months round-trip and other tables are ignored."""
+    assert partition_name(date(2025, 3, 1)) == "slackmessage_2025_03"
+    assert partition_month("slackmessage_2025_03") == date(2025, 3, 1)
+    assert partition_month("slackmessage_default") is None
+
+
+def test_create_partition_sql_covers_one_month():
+    """Test that a partition's bounds run from the first of its month to the first of the next."""
+    sql = create_partition_sql(date(2024, 12, 1))
+
+    assert sql.startswith("CREATE TABLE IF NOT EXISTS slackmessage_2024_12 PARTITION OF slackmessage")
+    assert "FROM ('2024-12-01') TO ('2025-01-01')" in sql
+
+
+@pytest.mark.asyncio
+async def test_ensure_creates_only_missing_partitions():
+    """Test that existing partitions are left alone and missing months are created."""
+    current = month_start(datetime.utcnow().date())
+    existing = [partition_name(current), "slackmessage_default"]
+    db = AsyncMock()
+    db.execute = AsyncMock(side_effect=[_partitions_result(existing), _partitions_result([]), MagicMock(), MagicMock()])
+
+    created = await ensure_message_partitions(db, months_ahead=2)
+
+    assert created == [partition_name(add_months(current, 1)), partition_name(add_months(current, 2))]
+    # The default partition is checked for rows of the new months before they are created
+    assert "FROM slackmessage_default" in _statements(db)[1]
+    assert all(statement.startswith("CREATE TABLE IF NOT EXISTS") for statement in _statements(db)[2:])
+
+
+@pytest.mark.asyncio
+async def test_drop_expired_keeps_everything_without_retention():
+    """Test that a retention of zero months drops nothing and queries nothing."""
+    db = AsyncMock()
+
+    assert await drop_expired_message_partitions(db, retention_months=0) == []
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_drop_expired_drops_old_months():
+    """Test that partitions older than the retention period are detached and dropped with their reactions."""
+    current = month_start(datetime.utcnow().date())
+    old = partition_name(add_months(current, -3))
+    kept = partition_name(add_months(current, -2))
+    db = AsyncMock()
+    db.execute = AsyncMock(side_effect=[_partitions_result([kept, old, "slackmessage_default"])] + [MagicMock()] * 5)
+
+    dropped = await drop_expired_message_partitions(db, retention_months=3)
+
+    assert dropped == [old]
+    cutoff = add_months(current, -2).isoformat()
+    statements = _statements(db)[1:]
+    # Expired rows in the default partition are deleted too
+    assert statements[0] == (
+        "DELETE FROM slackreaction WHERE message_id IN "
+        f"(SELECT id FROM slackmessage_default WHERE message_datetime < '{cutoff}')"
+    )
+    assert statements[1] == f"DELETE FROM slackmessage_default WHERE message_datetime < '{cutoff}'"
+    statements = statements[2:]
+    assert statements[0].startswith(f"DELETE FROM slackreaction WHERE message_id IN (SELECT id FROM {old})")
+    assert statements[1] == f"ALTER TABLE slackmessage DETACH PARTITION {old}"
+    assert statements[2] == f"DROP TABLE {old}"
+
+
+@pytest.mark.asyncio
+async def test_maintain_skips_unpartitioned_table():
+    """Test that maintenance does nothing before the partitioning migration has run."""
+    relkind = MagicMock()
+    relkind.scalar.return_value = "r"
+    db = AsyncMock()
+    db.execute = AsyncMock(return_value=relkind)
+
+    await maintain_message_partitions(db)
+
+    assert db.execute.await_count == 1
+    db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ingest_creates_partitions_of_old_months_once(monkeypatch):
+    """Test that ingest creates the partition of a backfilled month, moving its default-partition rows."""
+    monkeypatch.setattr("app.services.slack.partitions._known_months", set())
+    current = month_start(datetime.utcnow().date())
+    old_month = add_months(current, -14)
+    relkind = MagicMock()
+    relkind.scalar.return_value = "p"
+    db = AsyncMock()
+    db.execute = AsyncMock(
+        side_effect=[
+            relkind,
+            MagicMock(),
+            _partitions_result([partition_name(current), "slackmessage_default"]),
+            _partitions_result([datetime(old_month.year, old_month.month, 1)]),
+        ]
+        + [MagicMock()] * 5
+    )
+
+    created = await ensure_partitions_for_days(db, [date(old_month.year, old_month.month, 3), current])
+
+    assert created == [partition_name(old_month)]
+    rows = (
+        f"message_datetime >= '{old_month.isoformat()}' AND message_datetime < '{add_months(old_month, 1).isoformat()}'"
+    )
+    assert _statements(db)[4:] == [
+        "ALTER TABLE slackmessage DETACH PARTITION slackmessage_default",
+        create_partition_sql(old_month),
+        f"INSERT INTO slackmessage SELECT * FROM slackmessage_default WHERE {rows}",
+        f"DELETE FROM slackmessage_default WHERE {rows}",
+        "ALTER TABLE slackmessage ATTACH PARTITION slackmessage_default DEFAULT",
+    ]
+
+    # The current month's partition was already there, so later batches of it don't query at all
+    db.execute.reset_mock()
+    assert await ensure_partitions_for_days(db, [current]) == []
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_maintenance_moves_default_partition_rows():
+    """Test that rows left in the default partition get partitions of their own."""
+    month = date(2023, 7, 1)
+    db = AsyncMock()
+    db.execute = AsyncMock(
+        side_effect=[
+            _partitions_result(["slackmessage_default"]),
+            _partitions_result([datetime(2023, 7, 1)]),
+        ]
+        + [MagicMock()] * 5
+    )
+
+    assert await move_default_partition_rows(db) == [partition_name(month)]
+    assert _statements(db)[3] == create_partition_sql(month)
@@ -0,0 +1,197 @@
+"""
+Tests for the daily Slack activity rollups.
+"""
+
+import uuid
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.slack.rollups import (
+    get_channel_activity_stats,
+    get_channel_top_contributors,
+    rebuild_activity_rollups,
+    refresh_activity_rollups,
+)
+
+
+def _sql(call) -> str:
+    """Compile the statement passed to a db.execute call for PostgreSQL."""
+    return str(call.args[0].compile(dialect=postgresql.dialect()))
+
+
+def _mock_db(*results):
+    """Create a session mock whose execute calls return the given results in order."""
+    db = AsyncMock()
+    db.execute = AsyncMock(side_effect=list(results) if results else None)
+    return db
+
+
+def _one(**values):
+    """Create a result mock whose .one() returns a row with the given attributes."""
+    result = MagicMock()
+    result.one.return_value = MagicMock(**values)
+    return result
+
+
+def _scalar(value):
+    """Create a result mock whose .scalar() returns the value."""
+    result = MagicMock()
+    result.scalar.return_value = value
+    return result
+
+
+@pytest.mark.asyncio
+async def test_rebuild_replaces_rollups_of_given_days():
+    """Test that a rebuild deletes and re-aggregates only the requested days."""
+    channel_id = uuid.uuid4()
+    insert_result = MagicMock(rowcount=2)
+    db = _mock_db(MagicMock(), MagicMock(), insert_result, MagicMock())
+
+    rows = await rebuild_activity_rollups(db, channel_id=channel_id, days=[date(2025, 5, 2), date(2025, 5, 1)])
+
+    assert rows == 2
+    db.flush.assert_awaited_once()
+    statements = [_sql(call) for call in db.execute.call_args_list]
+    assert statements[0].startswith("DELETE FROM slackuserdailyactivity")
+    assert statements[1].startswith("DELETE FROM slackchanneldailyactivity")
+    assert statements[2].startswith("INSERT INTO slackchanneldailyactivity")
+    assert statements[3].startswith("INSERT INTO slackuserdailyactivity")
+    # Aggregation is bounded by a datetime range the channel/datetime index can serve
+    assert "slackmessage.message_datetime >= " in statements[2]
+    assert "slackmessage.message_datetime < " in statements[2]
+    assert "GROUP BY slackmessage.channel_id" in statements[2]
+    assert "count(DISTINCT slackmessage.user_id)" in statements[2]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_with_no_days_is_a_noop():
+    """Test that an ingest that stored nothing does not touch the rollups."""
+    db = _mock_db()
+
+    assert await rebuild_activity_rollups(db, channel_id=uuid.uuid4(), days=[]) == 0
+    await refresh_activity_rollups(db, uuid.uuid4(), set())
+
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_locks_channel_before_rebuilding():
+    """Test that concurrent refreshes of a channel are serialised."""
+    db = _mock_db(MagicMock(), MagicMock(), MagicMock(), MagicMock(rowcount=1), MagicMock())
+
+    await refresh_activity_rollups(db, uuid.uuid4(), {date(2025, 5, 1)})
+
+    assert "pg_advisory_xact_lock" in _sql(db.execute.call_args_list[0])
+    assert db.execute.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_stats_for_whole_days_read_only_rollups():
+    """Test that a range of whole days never scans slackmessage."""
+    db = _mock_db(
+        _one(message_count=120, reply_count=30, thread_count=8, reaction_count=15),
+        _scalar(7),
+    )
+
+    stats = await get_channel_activity_stats(
+        db,
+        uuid.uuid4(),
+        start_date=datetime(2025, 4, 1),
+        end_date=datetime(2025, 4, 30, 23, 59, 59, 999999),
+    )
+
+    assert stats == {"message_count": 120, "participant_count": 7, "thread_count": 8, "reaction_count": 15}
+    assert db.execute.await_count == 2
+    for call in db.execute.call_args_list:
+        assert "slackmessage" not in _sql(call)
+
+
+@pytest.mark.asyncio
+async def test_stats_add_partial_edge_days_from_messages():
+    """Test that partial days at the range edges are counted from slackmessage."""
+    db = _mock_db(
+        _one(message_count=100, reply_count=10, thread_count=5, reaction_count=20),
+        _one(message_count=4, reply_count=1, thread_count=1, reaction_count=2),
+        _scalar(9),
+    )
+
+    stats = await get_channel_activity_stats(
+        db,
+        uuid.uuid4(),
+        start_date=datetime(2025, 4, 1, 12, 0),
+        end_date=datetime(2025, 4, 30, 8, 0),
+    )
+
+    assert stats == {"message_count": 104, "participant_count": 9, "thread_count": 6, "reaction_count": 22}
+    rollup_sql = _sql(db.execute.call_args_list[0])
+    assert "slackchanneldailyactivity.day >= " in rollup_sql
+    edge_sql = _sql(db.execute.call_args_list[1])
+    assert "FROM slackmessage" in edge_sql
+    assert "BETWEEN" in edge_sql
+    assert "UNION" in _sql(db.execute.call_args_list[2])
+
+
+@pytest.mark.asyncio
+async def test_stats_within_one_day_skip_rollups():
+    """Test that a range inside a single day is counted from messages only."""
+    db = _mock_db(
+        _one(message_count=3, reply_count=0, thread_count=0, reaction_count=1),
+        _scalar(2),
+    )
+
+    stats = await get_channel_activity_stats(
+        db, uuid.uuid4(), start_date=datetime(2025, 4, 1, 9), end_date=datetime(2025, 4, 1, 17)
+    )
+
+    assert stats["message_count"] == 3
+    assert stats["participant_count"] == 2
+    for call in db.execute.call_args_list:
+        assert "dailyactivity" not in _sql(call)
+
+
+@pytest.mark.asyncio
+async def test_top_contributors_ranked_from_user_rollups():
+    """Test that contributors are ranked from the per-user rollups."""
+    user_id = uuid.uuid4()
+    row = MagicMock(
+        id=user_id,
+        slack_id="U1",
+        display_name="Ada",
+        real_name="Ada Lovelace",
+        is_bot=False,
+        active_days=3,
+        message_count=42,
+        reply_count=10,
+        thread_count=2,
+        reaction_count=5,
+    )
+    row.name = "ada"
+    result = MagicMock()
+    result.all.return_value = [row]
+    db = _mock_db(result)
+
+    contributors = await get_channel_top_contributors(db, uuid.uuid4(), start_day=date(2025, 4, 1), limit=5)
+
+    assert contributors == [
+        {
+            "user_id": str(user_id),
+            "slack_id": "U1",
+            "name": "ada",
+            "display_name": "Ada",
+            "real_name": "Ada Lovelace",
+            "is_bot": False,
+            "active_days": 3,
+            "message_count": 42,
+            "reply_count": 10,
+            "thread_count": 2,
+            "reaction_count": 5,
+        }
+    ]
+    sql = _sql(db.execute.call_args_list[0])
+    assert "FROM slackuserdailyactivity JOIN slackuser" in sql
+    assert "ORDER BY message_count DESC" in sql
+    assert "slackuser.is_bot IS false" in sql
+    assert "FROM slackmessage" not in sql
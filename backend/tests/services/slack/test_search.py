@@ -0,0 +1,143 @@
+"""
+Tests for Slack message search.
+"""
+
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.models.slack import SlackMessage
+from app.services.slack.messages import decode_message_cursor
+from app.services.slack.search import escape_like, highlight_matches, search_messages, split_search_terms
+
+
+def _message(text: str, minutes: int = 0) -> SlackMessage:
+    """Create a message with the given text."""
+    return SlackMessage(
+        id=uuid.uuid4(),
+        slack_id="msg",
+        slack_ts="1714000000.000100",
+        text=text,
+        message_type="message",
+        is_edited=False,
+        has_attachments=False,
+        is_thread_parent=False,
+        is_thread_reply=False,
+        reply_count=0,
+        reply_users_count=0,
+        reaction_count=0,
+        message_datetime=datetime(2025, 5, 1, 12, minutes),
+        channel_id=uuid.uuid4(),
+    )
+
+
+def _mock_db(messages):
+    """Create a session mock returning the given messages."""
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = messages
+    db = AsyncMock()
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+def test_split_search_terms_handles_full_width_space():
+    """Test that terms are split on ASCII and full-width spaces and deduplicated."""
+    assert split_search_terms("  会議　議事録 Deploy deploy ") == ["会議", "議事録", "Deploy"]
+
+
+def test_escape_like_matches_wildcards_literally():
+    """Test that LIKE wildcards are escaped."""
+    assert escape_like("100%_done\\") == "100\\%\\_done\\\\"
+
+
+def test_highlight_matches_returns_offsets_in_snippet():
+    """Test that matches are located case-insensitively in the snippet."""
+    highlight = highlight_matches("The Deploy failed, redeploy tomorrow", ["deploy"])
+
+    assert highlight["snippet"] == "The Deploy failed, redeploy tomorrow"
+    assert highlight["highlights"] == [[4, 10], [21, 27]]
+
+
+def test_highlight_matches_trims_long_text():
+    """Test that long messages are cut to a window around the first match."""
+    text = "あ" * 200 + "障害対応" + "い" * 200
+
+    highlight = highlight_matches(text, ["障害"], context=10)
+
+    snippet = highlight["snippet"]
+    assert snippet.startswith("…") and snippet.endswith("…")
+    start, end = highlight["highlights"][0]
+    assert snippet[start:end] == "障害"
+
+
+@pytest.mark.asyncio
+async def test_search_builds_trigram_friendly_query():
+    """Test that every term is an ILIKE on both text columns, scoped to the workspace."""
+    db = _mock_db([_message("リリース 手順")])
+
+    result = await search_messages(
+        db,
+        "workspace-uuid",
+        "リリース 手順",
+        channel_ids=["channel-uuid"],
+        user_ids=["user-uuid"],
+        start_date=datetime(2025, 4, 1),
+    )
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.count("slackmessage.text ILIKE") == 2
+    assert sql.count("slackmessage.processed_text ILIKE") == 2
+    assert "slackchannel.workspace_id" in sql
+    assert "slackmessage.user_id IN" in sql
+    assert "ORDER BY slackmessage.message_datetime DESC, slackmessage.id DESC" in sql
+
+    message = result["messages"][0]
+    assert message["highlight"]["highlights"] == [[0, 4], [5, 7]]
+    assert result["pagination"] == {"page_size": 50, "has_more": False, "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_search_returns_keyset_cursor_for_next_page():
+    """Test that a full page returns a cursor pointing at its last message."""
+    messages = [_message("incident report", minutes=3 - i) for i in range(3)]
+    db = _mock_db(messages)
+
+    result = await search_messages(db, "workspace-uuid", "incident", limit=2)
+
+    assert result["pagination"]["has_more"] is True
+    assert len(result["messages"]) == 2
+    assert decode_message_cursor(result["pagination"]["next_cursor"]) == (
+        messages[1].message_datetime,
+        messages[1].id,
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_blank_query():
+    """Test that a query of only whitespace is rejected."""
+    with pytest.raises(HTTPException) as exc_info:
+        await search_messages(AsyncMock(), "workspace-uuid", " 　 ")
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_needs_a_term_the_trigram_index_can_serve():
+    """Test that short Japanese terms are rejected alone but narrow a search next to a longer term."""
+    for query in ("会議", "会議　確認"):
+        db = _mock_db([])
+        with pytest.raises(HTTPException) as exc_info:
+            await search_messages(db, "workspace-uuid", query)
+
+        assert exc_info.value.status_code == 400
+        db.execute.assert_not_called()
+
+    db = _mock_db([_message("定例会議の議事録を確認しました")])
+    result = await search_messages(db, "workspace-uuid", "会議 議事録")
+
+    assert result["terms"] == ["会議", "議事録"]
+    assert result["messages"][0]["highlight"]["highlights"] == [[2, 4], [5, 8]]
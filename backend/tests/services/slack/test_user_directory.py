@@ -0,0 +1,111 @@
+"""
+Tests for the Slack user directory.
+"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.slack import SlackMessage, SlackUser
+from app.services.slack.messages import SlackMessageService
+from app.services.slack.user_directory import SlackUserDirectory
+
+WORKSPACE_ID = str(uuid.uuid4())
+
+
+@pytest.fixture(autouse=True)
+def empty_directory():
+    """Start each test with an empty directory."""
+    SlackUserDirectory.clear()
+    yield
+    SlackUserDirectory.clear()
+
+
+def _user(slack_id: str) -> SlackUser:
+    """Build a SlackUser row."""
+    return SlackUser(id=uuid.uuid4(), workspace_id=WORKSPACE_ID, slack_id=slack_id, name=slack_id.lower(), is_bot=False)
+
+
+def _session(users):
+    """Build a mocked session: user queries return the given users, other queries find nothing."""
+    user_queries = []
+
+    async def execute(query, *args, **kwargs):
+        result = MagicMock()
+        result.scalars.return_value.first.return_value = None
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        if "FROM slackuser" in sql:
+            user_queries.append(sql)
+            requested = query.compile().params
+            slack_ids = next(value for name, value in requested.items() if name.startswith("slack_id"))
+            result.scalars.return_value.all.return_value = [user for user in users if user.slack_id in slack_ids]
+        else:
+            result.scalars.return_value.all.return_value = []
+        return result
+
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = execute
+    db.add = MagicMock()
+    return db, user_queries
+
+
+@pytest.mark.asyncio
+async def test_known_users_resolve_without_queries():
+    """Test that unknown users are loaded in one query and known ones come from memory."""
+    db, user_queries = _session([_user("U1"), _user("U2")])
+
+    first = await SlackUserDirectory.resolve(db, WORKSPACE_ID, ["U1", "U2", "U3", "U1", None])
+    second = await SlackUserDirectory.resolve(db, WORKSPACE_ID, ["U2", "U1"])
+
+    assert set(first) == {"U1", "U2"}
+    assert second["U1"].id == first["U1"].id
+    assert len(user_queries) == 1
+    assert SlackUserDirectory.get_metrics()["hits"] == 2
+
+
+def test_directory_is_bounded():
+    """Test that the least recently used users and workspaces are evicted."""
+    with patch("app.services.slack.user_directory.settings.SLACK_USER_DIRECTORY_MAX_USERS", 2), patch(
+        "app.services.slack.user_directory.settings.SLACK_USER_DIRECTORY_MAX_WORKSPACES", 1
+    ):
+        for slack_id in ("U1", "U2"):
+            SlackUserDirectory.remember(WORKSPACE_ID, _user(slack_id))
+        SlackUserDirectory.get(WORKSPACE_ID, "U1")
+        SlackUserDirectory.remember(WORKSPACE_ID, _user("U3"))
+
+        assert SlackUserDirectory.get(WORKSPACE_ID, "U2") is None
+        assert SlackUserDirectory.get(WORKSPACE_ID, "U1") is not None
+
+        SlackUserDirectory.remember(str(uuid.uuid4()), _user("U4"))
+
+    assert SlackUserDirectory.get(WORKSPACE_ID, "U1") is None
+    assert SlackUserDirectory.get_metrics()["workspaces"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ingest_resolves_authors_once_per_batch():
+    """Test that storing a batch of messages looks its authors up in one query."""
+    users = [_user("U1"), _user("U2")]
+    db, user_queries = _session(users)
+    channel = MagicMock(id=uuid.uuid4())
+    channel.name = "general"
+    messages = [
+        {"ts": "1715000000.000100", "user": "U1", "text": "hello"},
+        {"ts": "1715000001.000100", "user": "U2", "text": "hi"},
+        {"ts": "1715000002.000100", "text": "<@U1> joined the channel"},
+    ]
+
+    with patch("app.services.slack.messages.refresh_activity_rollups", AsyncMock()):
+        await SlackMessageService._store_messages(db, WORKSPACE_ID, channel, messages, include_replies=False)
+
+        # The next batch of the same authors doesn't query users at all
+        await SlackMessageService._store_messages(
+            db, WORKSPACE_ID, channel, [{"ts": "1715000003.000100", "user": "U2", "text": "again"}], False
+        )
+
+    stored = [call.args[0] for call in db.add.call_args_list if isinstance(call.args[0], SlackMessage)]
+    assert [message.user_id for message in stored] == [users[0].id, users[1].id, users[0].id, users[1].id]
+    assert len(user_queries) == 1
@@ -0,0 +1,106 @@
+"""
+Tests for cached team role resolution.
+"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import Cache, MemoryBackend
+from app.core.team_scoped_access import TeamScopedAccess, check_team_access
+from app.models.team import TeamMemberRole
+from app.services.team.permissions import (
+    get_team_role,
+    has_team_permission,
+    invalidate_team_roles,
+    team_role_memo,
+)
+
+
+@pytest.fixture(autouse=True)
+def role_cache():
+    """Give each test an empty role cache."""
+    with patch("app.services.team.permissions._role_cache", Cache("team-roles", MemoryBackend())):
+        yield
+
+
+def _session(*roles):
+    """Build a mocked session whose role queries return the given roles in turn."""
+    results = []
+    for role in roles:
+        result = MagicMock()
+        result.scalars.return_value.first.return_value = role
+        results.append(result)
+    db = AsyncMock(spec=AsyncSession)
+    db.execute.side_effect = results
+    return db
+
+
+@pytest.mark.asyncio
+async def test_role_is_queried_once_per_request():
+    """Test that repeated checks in one request share one query, even with the shared cache off."""
+    team_id = uuid.uuid4()
+    db = _session(TeamMemberRole.ADMIN)
+
+    with patch("app.services.team.permissions.settings.TEAM_ROLE_CACHE_TTL_SECONDS", 0), team_role_memo():
+        assert await check_team_access(team_id, "user-1", db)
+        assert await has_team_permission(db, team_id, "user-1", "admin")
+        assert not await has_team_permission(db, team_id, "user-1", "owner")
+
+    assert db.execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_roles_are_cached_across_requests():
+    """Test that a later request uses the cached role, including a cached non-membership."""
+    team_id = uuid.uuid4()
+    db = _session(TeamMemberRole.VIEWER, None)
+
+    with team_role_memo():
+        await get_team_role(db, team_id, "user-1")
+        await get_team_role(db, team_id, "user-2")
+    with team_role_memo():
+        assert await get_team_role(db, team_id, "user-1") == TeamMemberRole.VIEWER
+        assert await get_team_role(db, team_id, "user-2") is None
+
+    assert db.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_drops_memo_and_cache():
+    """Test that a membership change is seen by the same request and later ones."""
+    team_id = uuid.uuid4()
+    db = _session(TeamMemberRole.MEMBER, TeamMemberRole.ADMIN, TeamMemberRole.MEMBER, None, None)
+
+    with team_role_memo():
+        await get_team_role(db, team_id, "user-1")
+        await invalidate_team_roles(team_id, "user-1")
+        assert await get_team_role(db, team_id, "user-1") == TeamMemberRole.ADMIN
+
+    # Deleting the team forgets all of its members
+    await get_team_role(db, team_id, "user-2")
+    await invalidate_team_roles(team_id)
+    assert await get_team_role(db, team_id, "user-1") is None
+    assert await get_team_role(db, team_id, "user-2") is None
+
+    assert db.execute.call_count == 5
+
+
+@pytest.mark.asyncio
+async def test_team_scoped_access_uses_role():
+    """Test that the team-scoped dependency adds the role and rejects other roles."""
+    team_id = uuid.uuid4()
+    db = _session(TeamMemberRole.MEMBER)
+
+    user = await TeamScopedAccess()(team_id=team_id, db=db, current_user={"id": "user-1"})
+    assert user["team_role"] == TeamMemberRole.MEMBER
+
+    with pytest.raises(HTTPException) as exc_info:
+        await TeamScopedAccess(required_roles=[TeamMemberRole.OWNER])(
+            team_id=team_id, db=db, current_user={"id": "user-1"}
+        )
+    assert exc_info.value.status_code == 403
+    assert db.execute.call_count == 1
@@ -13,3 +13,10 @@ def test_read_main(client):
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "Welcome to Toban Contribution Viewer API"}
+
+
+def test_db_pool_metrics(client):
+    response = client.get("/health/db-pool")
+    assert response.status_code == 200
+    metrics = response.json()
+    assert {"checkouts", "timeouts", "p95_wait_seconds", "saturation"} <= metrics.keys()